@@ -0,0 +1 @@
+"""Microbenchmarks for VariDock's pure-Python hot paths. Run with ``python -m benchmarks.run``."""
@@ -0,0 +1,199 @@
+"""Benchmark cases for VariDock's pure-Python hot paths.
+
+A case is a ``setup(fixture_dir, **params)`` function decorated with
+``@benchmark``. It builds its inputs and returns the zero-argument callable
+that is timed, so fixture generation is never part of the measurement. Each
+case declares the modules it needs; cases whose dependencies are missing are
+skipped rather than failing the run.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from benchmarks import fixtures
+
+SIZES = ("small", "medium", "large")
+
+
+@dataclass
+class Case:
+    """A registered benchmark.
+
+    Attributes:
+        name (str): Case name, e.g. 'tfbio.make_grid'.
+        setup (Callable[..., Callable[[], Any]]): Builds inputs and returns the function to time.
+        sizes (dict[str, dict[str, Any]]): Keyword arguments passed to ``setup`` per size.
+        requires (tuple[str, ...]): Importable modules the case needs.
+
+    """
+
+    name: str
+    setup: Callable[..., Callable[[], Any]]
+    sizes: dict[str, dict[str, Any]]
+    requires: tuple[str, ...] = field(default_factory=tuple)
+
+
+CASES: dict[str, Case] = {}
+
+
+def benchmark(name: str, sizes: dict[str, dict[str, Any]], requires: tuple[str, ...] = ()):
+    """Register ``setup`` as benchmark ``name``, run at each of ``sizes``."""
+    missing = set(SIZES) - set(sizes)
+    if missing:
+        raise ValueError(f"Benchmark {name} is missing sizes: {sorted(missing)}")
+
+    def decorator(setup):
+        CASES[name] = Case(name=name, setup=setup, sizes=sizes, requires=requires)
+        return setup
+
+    return decorator
+
+
+def _random_coords(n: int, seed: int = 0):
+    import numpy as np
+
+    return np.random.default_rng(seed).uniform(-30, 30, size=(n, 3))
+
+
+@benchmark(
+    "tfbio.make_grid",
+    sizes={"small": {"n_atoms": 1_000}, "medium": {"n_atoms": 10_000}, "large": {"n_atoms": 50_000}},
+    requires=("numpy", "openbabel"),
+)
+def make_grid(fixture_dir: Path, n_atoms: int):
+    import numpy as np
+    from varidock.broker.deepsurf.tfbio_data import make_grid
+
+    coords = _random_coords(n_atoms) / 3.0
+    features = np.random.default_rng(1).random((n_atoms, 18))
+    return lambda: make_grid(coords, features, grid_resolution=1.0, max_dist=7.5)
+
+
+@benchmark(
+    "deepsurf.KalasantyFeaturizer.grid_feats",
+    sizes={"small": {"n_atoms": 1_000}, "medium": {"n_atoms": 10_000}, "large": {"n_atoms": 50_000}},
+    requires=("numpy", "openbabel", "scipy", "sklearn"),
+)
+def grid_feats(fixture_dir: Path, n_atoms: int, n_points: int = 50):
+    import numpy as np
+    from varidock.broker.deepsurf.features import KalasantyFeaturizer
+
+    featurizer = KalasantyFeaturizer(gridSize=16, voxelSize=1.0)
+    coords = _random_coords(n_atoms)
+    featurizer.channels = np.random.default_rng(1).random((n_atoms, 18))
+    rng = np.random.default_rng(2)
+    points = rng.uniform(-25, 25, size=(n_points, 3))
+    normals = rng.normal(size=(n_points, 3))
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+
+    def run():
+        for point, normal in zip(points, normals):
+            featurizer.grid_feats(point, normal, coords)
+
+    return run
+
+
+# readSurfPoints rejects surfaces with more than 100k points, so "large" stops there.
+@benchmark(
+    "deepsurf.readSurfPoints",
+    sizes={"small": {"n_points": 10_000}, "medium": {"n_points": 50_000}, "large": {"n_points": 100_000}},
+    requires=("numpy", "scipy", "sklearn"),
+)
+def read_surf_points(fixture_dir: Path, n_points: int):
+    from varidock.broker.deepsurf.utils import readSurfPoints
+
+    path = fixtures.cached_fixture(
+        fixture_dir, f"surface_{n_points}.dms", lambda p: fixtures.write_surface(p, n_points)
+    )
+    return lambda: readSurfPoints(str(path))
+
+
+@benchmark(
+    "deepsurf.simplify_dms",
+    sizes={"small": {"n_points": 10_000}, "medium": {"n_points": 50_000}, "large": {"n_points": 100_000}},
+    requires=("numpy", "scipy", "sklearn"),
+)
+def simplify_dms(fixture_dir: Path, n_points: int, factor: int = 10):
+    from varidock.broker.deepsurf.utils import simplify_dms
+
+    path = fixtures.cached_fixture(
+        fixture_dir, f"surface_{n_points}.dms", lambda p: fixtures.write_surface(p, n_points)
+    )
+    return lambda: simplify_dms(str(path), factor, seed=0)
+
+
+@benchmark(
+    "CenterLigand.place_ligand",
+    sizes={"small": {"n_atoms": 100}, "medium": {"n_atoms": 1_000}, "large": {"n_atoms": 10_000}},
+    requires=("numpy",),
+)
+def place_ligand(fixture_dir: Path, n_atoms: int):
+    from varidock.stages.center_ligand_to_pocket import CenterLigand, CenterLigandConfig
+
+    ligand = fixtures.cached_fixture(
+        fixture_dir, f"ligand_{n_atoms}.pdb", lambda p: fixtures.write_pdb(p, n_atoms, record="HETATM")
+    )
+    out = fixture_dir / "out" / f"ligand_{n_atoms}_centered.pdb"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    stage = CenterLigand(CenterLigandConfig(output_dir=out.parent))
+    return lambda: stage.place_ligand(str(ligand), str(out), center=(1.0, 2.0, 3.0))
+
+
+@benchmark(
+    "InsertPLDDT.run",
+    sizes={"small": {"n_atoms": 1_000}, "medium": {"n_atoms": 10_000}, "large": {"n_atoms": 50_000}},
+)
+def insert_plddt(fixture_dir: Path, n_atoms: int):
+    from varidock.stages.insert_plddt_to_pdb import InsertPLDDT, InsertPLDDTConfig
+    from varidock.types import PDB
+
+    job = f"prot{n_atoms}"
+    pdb = fixtures.cached_fixture(fixture_dir, f"{job}.pdb", lambda p: fixtures.write_pdb(p, n_atoms))
+    fixtures.cached_fixture(
+        fixture_dir, f"{job}_confidences.json", lambda p: fixtures.write_confidences(p, n_atoms)
+    )
+    out_dir = fixture_dir / "out"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stage = InsertPLDDT(InsertPLDDTConfig(output_dir=out_dir))
+    source = PDB(path=pdb, source_cif=fixture_dir / f"{job}_model.cif")
+    return lambda: stage.run(source)
+
+
+@benchmark(
+    "namd.get_namd_ns",
+    sizes={"small": {"mb": 10}, "medium": {"mb": 100}, "large": {"mb": 1_000}},
+)
+def get_namd_ns(fixture_dir: Path, mb: int):
+    from varidock.utils.namd import get_namd_ns
+
+    log = fixtures.cached_fixture(
+        fixture_dir, f"namd_{mb}mb.log", lambda p: fixtures.write_namd_log(p, mb * 1_000_000)
+    )
+    return lambda: get_namd_ns(log)
+
+
+@benchmark(
+    "AF3MSAMerger.run",
+    sizes={"small": {"mb": 2}, "medium": {"mb": 20}, "large": {"mb": 100}},
+)
+def af3_msa_merger(fixture_dir: Path, mb: int, chains: int = 2):
+    from varidock.stages.alphafold3.merger import AF3MSAMerger, AF3MSAMergerConfig
+    from varidock.types import AF3MSAOutput, Ligand
+
+    outputs = []
+    for i in range(chains):
+        chain = "ABCDEFGH"[i]
+        path = fixtures.cached_fixture(
+            fixture_dir,
+            f"msa_{mb}mb_{chain}_data.json",
+            lambda p, chain=chain, i=i: fixtures.write_msa_json(
+                p, mb * 1_000_000 // chains, chain_id=chain, seed=i
+            ),
+        )
+        outputs.append(AF3MSAOutput(data_json_path=path, protein_id=f"P{i}", chain_id=chain))
+    ligand = Ligand(name="lig", af3_sequence_id="L", smiles="CCO")
+    merger = AF3MSAMerger(AF3MSAMergerConfig(output_dir=fixture_dir / "out" / "merged"))
+    return lambda: merger.run(outputs, [ligand], name=f"merged_{mb}mb")
+
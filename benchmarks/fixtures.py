@@ -0,0 +1,126 @@
+"""Synthetic, size-parameterized inputs for the benchmark cases.
+
+Every generator is deterministic for a given set of parameters and writes to
+``<fixture_dir>/<name>``, so large fixtures (1 GB NAMD logs, 100 MB MSA
+JSONs) are generated once and reused by later runs. Files are written to a
+temporary name and renamed into place, so an interrupted run never leaves a
+truncated fixture behind.
+"""
+from __future__ import annotations
+
+import json
+import os
+import random
+from pathlib import Path
+from typing import Callable
+
+_RESIDUES = ["ALA", "ARG", "ASN", "ASP", "CYS", "GLN", "GLU", "GLY", "HIS", "ILE",
+             "LEU", "LYS", "MET", "PHE", "PRO", "SER", "THR", "TRP", "TYR", "VAL"]
+_AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"
+
+
+def cached_fixture(fixture_dir: Path, name: str, write: Callable[[Path], None]) -> Path:
+    """Return ``fixture_dir/name``, calling ``write(tmp_path)`` to create it first if needed."""
+    path = Path(fixture_dir) / name
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    write(tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def pdb_lines(n_atoms: int, seed: int = 0, record: str = "ATOM") -> list[str]:
+    """Fixed-column PDB ATOM/HETATM records with random coordinates in a 60 Å box."""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(n_atoms):
+        res = _RESIDUES[(i // 8) % len(_RESIDUES)]
+        x, y, z = (rng.uniform(-30, 30) for _ in range(3))
+        lines.append(
+            f"{record:<6}{(i + 1) % 100000:>5}  CA  {res} A{(i // 8 + 1) % 10000:>4}    "
+            f"{x:8.3f}{y:8.3f}{z:8.3f}  1.00  0.00           C"
+        )
+    return lines
+
+
+def write_pdb(path: Path, n_atoms: int, seed: int = 0, record: str = "ATOM") -> None:
+    path.write_text("\n".join(pdb_lines(n_atoms, seed, record) + ["END"]) + "\n")
+
+
+def write_confidences(path: Path, n_atoms: int, seed: int = 0) -> None:
+    """AF3 ``*_confidences.json`` with one pLDDT per atom."""
+    rng = random.Random(seed)
+    data = {"atom_plddts": [round(rng.uniform(30, 99), 2) for _ in range(n_atoms)]}
+    path.write_text(json.dumps(data))
+
+
+def write_surface(path: Path, n_points: int, seed: int = 0) -> None:
+    """DMS surface file: ``res resnum atom x y z type area nx ny nz`` per point."""
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        for i in range(n_points):
+            x, y, z = (rng.uniform(-30, 30) for _ in range(3))
+            nx, ny, nz = (rng.uniform(-1, 1) for _ in range(3))
+            norm = (nx * nx + ny * ny + nz * nz) ** 0.5 or 1.0
+            f.write(
+                f"ALA {i % 9999:>5} CA {x:8.3f} {y:8.3f} {z:8.3f} SC0 0.100 "
+                f"{nx / norm:7.4f} {ny / norm:7.4f} {nz / norm:7.4f}\n"
+            )
+
+
+def write_namd_log(path: Path, target_bytes: int, steps_per_block: int = 500) -> None:
+    """NAMD-like log of roughly ``target_bytes``, with periodic restart and a final output line."""
+    block = "".join(
+        f"ENERGY:  {i:>8}    1234.5678   2345.6789    345.6789     45.6789  -98765.4321"
+        f"     -1234.5678     0.0000     0.0000  12345.6789  -86420.1234   300.0000\n"
+        for i in range(0, steps_per_block, 50)
+    )
+    step = 0
+    written = 0
+    with open(path, "w") as f:
+        while written < target_bytes:
+            f.write(block)
+            step += steps_per_block
+            line = f"WRITING VELOCITIES TO RESTART FILE AT STEP {step}\n"
+            f.write(line)
+            written += len(block) + len(line)
+        f.write(f"WRITING VELOCITIES TO OUTPUT FILE AT STEP {step}\n")
+
+
+def write_msa_json(path: Path, target_bytes: int, seq_len: int = 500, chain_id: str = "A", seed: int = 0) -> None:
+    """AF3 ``*_data.json`` for one protein whose unpaired+paired MSAs total roughly ``target_bytes``."""
+    rng = random.Random(seed)
+    sequence = "".join(rng.choice(_AMINO_ACIDS) for _ in range(seq_len))
+    row_bytes = seq_len + 16
+    n_rows = max(1, target_bytes // (2 * row_bytes))
+
+    def a3m(prefix: str) -> str:
+        rows = [f">query\n{sequence}"]
+        for i in range(n_rows):
+            mutated = list(sequence)
+            for _ in range(seq_len // 10):
+                mutated[rng.randrange(seq_len)] = rng.choice(_AMINO_ACIDS + "-")
+            rows.append(f">{prefix}{i}\n{''.join(mutated)}")
+        return "\n".join(rows) + "\n"
+
+    data = {
+        "dialect": "alphafold3",
+        "version": 2,
+        "name": path.stem,
+        "sequences": [
+            {
+                "protein": {
+                    "id": chain_id,
+                    "sequence": sequence,
+                    "modifications": [],
+                    "unpairedMsa": a3m("UniRef90_"),
+                    "pairedMsa": a3m("UniProt_"),
+                    "templates": [],
+                }
+            }
+        ],
+        "modelSeeds": [1],
+    }
+    path.write_text(json.dumps(data, indent=2))
@@ -0,0 +1,179 @@
+"""Run the benchmark suite and compare the results with a stored baseline.
+
+Examples:
+    python -m benchmarks.run --size small
+    python -m benchmarks.run --size medium --output bench.json --baseline benchmarks/baseline.json
+    python -m benchmarks.run --size small --filter namd --update-baseline
+
+The output JSON maps ``"<case>[<size>]"`` to timing statistics in seconds.
+With ``--baseline``, any case whose median is more than ``--tolerance`` slower
+than the baseline median is reported as a regression and the exit code is 1.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from benchmarks.cases import CASES, SIZES, Case
+
+DEFAULT_FIXTURE_DIR = Path(tempfile.gettempdir()) / "varidock-bench-fixtures"
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+
+def missing_requirements(case: Case) -> list[str]:
+    return [m for m in case.requires if importlib.util.find_spec(m) is None]
+
+
+def time_case(case: Case, size: str, fixture_dir: Path, repeat: int, warmup: int = 1) -> dict[str, Any]:
+    """Set up one case at one size and time ``repeat`` calls after ``warmup`` untimed ones."""
+    fn = case.setup(fixture_dir, **case.sizes[size])
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {
+        "params": case.sizes[size],
+        "repeat": repeat,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "max": max(times),
+    }
+
+
+def run_suite(
+    size: str,
+    fixture_dir: Path,
+    repeat: int,
+    name_filter: str | None = None,
+    log=print,
+) -> dict[str, Any]:
+    """Run every registered case at ``size``. Cases with missing dependencies are listed under 'skipped'."""
+    results: dict[str, Any] = {}
+    skipped: dict[str, str] = {}
+    for name, case in sorted(CASES.items()):
+        if name_filter and name_filter not in name:
+            continue
+        key = f"{name}[{size}]"
+        missing = missing_requirements(case)
+        if missing:
+            skipped[key] = f"missing {', '.join(missing)}"
+            log(f"  skip {key}: {skipped[key]}")
+            continue
+        try:
+            results[key] = time_case(case, size, fixture_dir, repeat)
+        except ImportError as e:
+            skipped[key] = f"import failed: {e}"
+            log(f"  skip {key}: {skipped[key]}")
+            continue
+        log(f"  {key:<52} median {results[key]['median'] * 1e3:10.2f} ms")
+    return {"meta": _meta(size, repeat), "results": results, "skipped": skipped}
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[dict[str, Any]]:
+    """Compare medians case by case.
+
+    Args:
+        results (dict): Output of run_suite().
+        baseline (dict): A previous output of run_suite().
+        tolerance (float): Allowed slowdown as a fraction, e.g. 0.2 for 20%.
+
+    Returns:
+        list[dict]: One row per case present in both, with 'ratio' (current/baseline) and 'regression'.
+
+    """
+    rows = []
+    for key, current in results["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if base is None or base["median"] <= 0:
+            continue
+        ratio = current["median"] / base["median"]
+        rows.append(
+            {
+                "case": key,
+                "baseline": base["median"],
+                "current": current["median"],
+                "ratio": ratio,
+                "regression": ratio > 1 + tolerance,
+            }
+        )
+    return rows
+
+
+def _meta(size: str, repeat: int) -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "size": size,
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+        "timestamp": time.time(),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", choices=SIZES, default="small")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", dest="name_filter", default=None, help="Only run cases whose name contains this.")
+    parser.add_argument("--fixture-dir", type=Path, default=DEFAULT_FIXTURE_DIR,
+                        help="Where generated fixtures are cached between runs.")
+    parser.add_argument("--output", type=Path, default=None, help="Write results JSON here.")
+    parser.add_argument("--baseline", type=Path, default=None, help="Compare against this results JSON.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed median slowdown before flagging (0.2 = 20%%).")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Merge these results into the baseline file instead of comparing.")
+    args = parser.parse_args(argv)
+
+    print(f"Running {args.size} benchmarks (fixtures in {args.fixture_dir})")
+    results = run_suite(args.size, args.fixture_dir, args.repeat, args.name_filter)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+    baseline_path = args.baseline or DEFAULT_BASELINE
+    if args.update_baseline:
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {"results": {}}
+        baseline["results"].update(results["results"])
+        baseline["meta"] = results["meta"]
+        baseline_path.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"Updated {baseline_path}")
+        return 0
+
+    if not args.baseline:
+        return 0
+
+    rows = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+    print(f"\n{'case':<52} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['case']:<52} {row['baseline'] * 1e3:>12.2f} {row['current'] * 1e3:>12.2f} "
+            f"{row['ratio']:>7.2f}{flag}"
+        )
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+from pathlib import Path
+
+from benchmarks import fixtures
+from benchmarks.cases import CASES, SIZES, Case
+from benchmarks.run import compare, run_suite, time_case
+
+
+def test_every_case_defines_every_size():
+    assert CASES
+    for case in CASES.values():
+        assert set(case.sizes) == set(SIZES)
+
+
+def test_time_case_reports_statistics(tmp_path: Path):
+    calls = []
+    case = Case(name="noop", setup=lambda fixture_dir, n: lambda: calls.append(n), sizes={"small": {"n": 3}})
+
+    result = time_case(case, "small", tmp_path, repeat=4)
+
+    assert len(calls) == 5  # one warmup
+    assert result["params"] == {"n": 3}
+    assert result["min"] <= result["median"] <= result["max"]
+
+
+def test_namd_case_runs_offline(tmp_path: Path, monkeypatch):
+    monkeypatch.setitem(CASES["namd.get_namd_ns"].sizes, "small", {"mb": 1})
+
+    out = run_suite("small", tmp_path, repeat=1, name_filter="namd", log=lambda *_: None)
+
+    assert "namd.get_namd_ns[small]" in out["results"]
+    assert (tmp_path / "namd_1mb.log").exists()
+
+
+def test_compare_flags_slowdowns():
+    baseline = {"results": {"a[small]": {"median": 1.0}, "b[small]": {"median": 1.0}}}
+    current = {"results": {"a[small]": {"median": 1.1}, "b[small]": {"median": 1.5}, "c[small]": {"median": 9.0}}}
+
+    rows = {r["case"]: r for r in compare(current, baseline, tolerance=0.2)}
+
+    assert set(rows) == {"a[small]", "b[small]"}
+    assert not rows["a[small]"]["regression"]
+    assert rows["b[small]"]["regression"]
+
+
+def test_cached_fixture_is_written_once(tmp_path: Path):
+    writes = []
+
+    def write(p: Path):
+        writes.append(p)
+        p.write_text("x")
+
+    first = fixtures.cached_fixture(tmp_path, "f.txt", write)
+    second = fixtures.cached_fixture(tmp_path, "f.txt", write)
+
+    assert first == second and len(writes) == 1
+    assert not list(tmp_path.glob(".*.tmp"))
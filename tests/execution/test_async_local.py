@@ -0,0 +1,135 @@
+import asyncio
+import errno
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from varidock.plans import RunPlan
+from varidock.execution import AsyncLocalExecutor, PlanFailedError, RetryPolicy, RunLedger
+from varidock.execution.ledger import FAILED
+
+
+def _plan(work: Path, code: str, outputs=("done.txt",)) -> RunPlan:
+    return RunPlan(
+        work_dir=work,
+        files_text={work / "input.json": '{"ok": true}\n'},
+        argv=[sys.executable, "-c", code],
+        expected_outputs=[work / o for o in outputs],
+    )
+
+
+WRITE_DONE = "from pathlib import Path; print('hello'); Path('done.txt').write_text('hi')"
+
+
+async def _collect(agen):
+    return [item async for item in agen]
+
+
+def test_execute_runs_and_logs_to_files(tmp_path: Path):
+    plan = _plan(tmp_path / "w", WRITE_DONE)
+
+    result = asyncio.run(AsyncLocalExecutor().execute(plan))
+
+    assert result.returncode == 0
+    assert (tmp_path / "w" / "done.txt").exists()
+    assert (tmp_path / "w" / "run.stdout.log").read_text() == "hello\n"
+
+
+def test_execute_skips_when_outputs_valid(tmp_path: Path):
+    work = tmp_path / "w"
+    work.mkdir()
+    (work / "done.txt").write_text("already")
+    plan = _plan(work, "raise SystemExit(1)")
+
+    result = asyncio.run(AsyncLocalExecutor().execute(plan))
+
+    assert result.stdout == "(skipped: outputs already valid)"
+
+
+def test_execute_many_runs_concurrently(tmp_path: Path):
+    code = "import time; from pathlib import Path; time.sleep(0.3); Path('done.txt').write_text('x')"
+    plans = [_plan(tmp_path / f"w{i}", code) for i in range(6)]
+
+    start = time.monotonic()
+    outcomes = asyncio.run(_collect(AsyncLocalExecutor().execute_many(plans, concurrency=6)))
+    elapsed = time.monotonic() - start
+
+    assert sorted(o.index for o in outcomes) == list(range(6))
+    assert all(o.ok for o in outcomes)
+    assert elapsed < 6 * 0.3
+
+
+def test_execute_many_continues_past_failures(tmp_path: Path):
+    plans = [
+        _plan(tmp_path / "ok", WRITE_DONE),
+        _plan(tmp_path / "bad", "import sys; print('oops', file=sys.stderr); sys.exit(3)"),
+    ]
+
+    outcomes = asyncio.run(_collect(AsyncLocalExecutor().execute_many(plans, concurrency=2)))
+    by_index = {o.index: o for o in outcomes}
+
+    assert by_index[0].ok
+    assert not by_index[1].ok
+    assert "returncode=3" in str(by_index[1].error)
+    assert (tmp_path / "bad" / "run.stderr.log").read_text() == "oops\n"
+
+
+def test_execute_many_fail_fast_cancels_running(tmp_path: Path):
+    slow = "import time; time.sleep(30)"
+    plans = [
+        _plan(tmp_path / "slow", slow),
+        _plan(tmp_path / "bad", "raise SystemExit(2)"),
+    ]
+
+    start = time.monotonic()
+    with pytest.raises(RuntimeError, match="returncode=2"):
+        asyncio.run(
+            _collect(AsyncLocalExecutor().execute_many(plans, concurrency=2, fail_fast=True))
+        )
+
+    assert time.monotonic() - start < 15
+
+
+def test_execute_many_missing_output_is_failure(tmp_path: Path):
+    plan = _plan(tmp_path / "w", "pass")
+
+    outcomes = asyncio.run(_collect(AsyncLocalExecutor().execute_many([plan])))
+
+    assert not outcomes[0].ok
+    assert "Missing expected outputs" in str(outcomes[0].error)
+
+
+def test_failure_carries_tails_of_both_logs(tmp_path: Path):
+    plan = _plan(tmp_path / "w", "import sys; print('out'); print('err', file=sys.stderr); sys.exit(2)")
+
+    with pytest.raises(PlanFailedError) as info:
+        asyncio.run(AsyncLocalExecutor().execute(plan))
+
+    assert (info.value.stdout, info.value.stderr) == ("out\n", "err\n")
+
+
+def test_start_errors_are_retried_and_recorded(tmp_path: Path, monkeypatch):
+    calls = []
+    real_exec = asyncio.create_subprocess_exec
+
+    async def flaky_exec(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise OSError(errno.EMFILE, "Too many open files")
+        return await real_exec(*args, **kwargs)
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", flaky_exec)
+    ledger = RunLedger(tmp_path / "ledger.sqlite")
+    executor = AsyncLocalExecutor(ledger=ledger, retry=RetryPolicy(backoff_seconds=0.0))
+
+    asyncio.run(executor.execute(_plan(tmp_path / "ok", WRITE_DONE)))
+    assert len(calls) == 2 and ledger.is_done(_plan(tmp_path / "ok", WRITE_DONE))
+
+    missing = replace(_plan(tmp_path / "missing", ""), argv=["no-such-binary-xyz"])
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(executor.execute(missing))
+    assert len(calls) == 3  # permanent: not retried
+    assert ledger.lookup(missing).status == FAILED
@@ -0,0 +1,97 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from varidock.plans import RunPlan
+from varidock.execution import FingerprintValidator
+from varidock.execution.validate import MANIFEST_NAME
+
+CIF = "data_x\nloop_\n_atom_site.group_PDB\n_atom_site.id\nATOM 1\n#\n"
+
+
+def _plan(work: Path, *outputs: str) -> RunPlan:
+    return RunPlan(
+        work_dir=work,
+        files_text={},
+        argv=["true"],
+        expected_outputs=[work / o for o in outputs],
+    )
+
+
+class CountingCheck:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, path: Path) -> None:
+        self.calls += 1
+        json.loads(path.read_text())
+
+
+def test_valid_outputs_are_recorded(tmp_path: Path):
+    (tmp_path / "x_data.json").write_text('{"a": 1}')
+    (tmp_path / "x_model.cif").write_text(CIF)
+    plan = _plan(tmp_path, "x_data.json", "x_model.cif")
+
+    FingerprintValidator().validate(plan)
+
+    manifest = json.loads((tmp_path / MANIFEST_NAME).read_text())
+    assert set(manifest) == {str(p) for p in plan.expected_outputs}
+    assert manifest[str(tmp_path / "x_data.json")]["size"] == 8
+
+
+def test_truncated_json_fails(tmp_path: Path):
+    (tmp_path / "x_data.json").write_text('{"a": [1, 2')
+
+    with pytest.raises(RuntimeError, match="not valid JSON"):
+        FingerprintValidator().validate(_plan(tmp_path, "x_data.json"))
+
+
+def test_cif_without_atoms_fails(tmp_path: Path):
+    (tmp_path / "x_model.cif").write_text("data_x\nloop_\n_atom_site.group_PDB\n")
+
+    with pytest.raises(RuntimeError, match="_atom_site"):
+        FingerprintValidator().validate(_plan(tmp_path, "x_model.cif"))
+
+
+def test_missing_output_fails(tmp_path: Path):
+    with pytest.raises(RuntimeError, match="Missing expected outputs"):
+        FingerprintValidator().validate(_plan(tmp_path, "x_data.json"))
+
+
+def test_check_runs_only_when_fingerprint_changes(tmp_path: Path):
+    out = tmp_path / "x_data.json"
+    out.write_text('{"a": 1}')
+    check = CountingCheck()
+    validator = FingerprintValidator(checks={".json": check})
+    plan = _plan(tmp_path, "x_data.json")
+
+    validator.validate(plan)
+    validator.validate(plan)
+    assert check.calls == 1
+
+    # Same content with a new mtime: the head/tail hash matches, no recheck.
+    st = out.stat()
+    os.utime(out, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    validator.validate(plan)
+    assert check.calls == 1
+
+    out.write_text('{"a": 2}')
+    os.utime(out, ns=(st.st_atime_ns, st.st_mtime_ns + 2 * 10**9))
+    validator.validate(plan)
+    assert check.calls == 2
+
+
+def test_rewritten_output_is_rechecked(tmp_path: Path):
+    out = tmp_path / "x_data.json"
+    out.write_text('{"a": 1}')
+    plan = _plan(tmp_path, "x_data.json")
+    FingerprintValidator().validate(plan)
+
+    out.write_text('{"a": 1')
+    os.utime(out, ns=(0, 10**9))
+
+    with pytest.raises(RuntimeError, match="not valid JSON"):
+        FingerprintValidator().validate(plan)
+    assert str(out) not in json.loads((tmp_path / MANIFEST_NAME).read_text())
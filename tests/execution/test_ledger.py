@@ -0,0 +1,93 @@
+import sys
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from varidock.plans import RunPlan
+from varidock.execution import LocalExecutor, RunLedger, plan_key
+
+
+def _plan(work: Path, code: str = "from pathlib import Path; Path('done.txt').write_text('hi')") -> RunPlan:
+    return RunPlan(
+        work_dir=work,
+        files_text={work / "input.json": "{}\n"},
+        argv=[sys.executable, "-c", code],
+        expected_outputs=[work / "done.txt"],
+    )
+
+
+@pytest.fixture
+def ledger(tmp_path: Path):
+    with RunLedger(tmp_path / "ledger.sqlite") as ledger:
+        yield ledger
+
+
+def test_plan_key_depends_on_plan_contents(tmp_path: Path):
+    plan = _plan(tmp_path / "w")
+
+    assert plan_key(plan) == plan_key(_plan(tmp_path / "w"))
+    assert plan_key(plan) != plan_key(replace(plan, env={"X": "1"}))
+    assert plan_key(plan) != plan_key(replace(plan, files_text={tmp_path / "w" / "input.json": "[]"}))
+
+
+def test_successful_run_is_recorded(tmp_path: Path, ledger: RunLedger):
+    plan = _plan(tmp_path / "w")
+
+    LocalExecutor(ledger=ledger).execute(plan)
+    entry = ledger.lookup(plan)
+
+    assert entry is not None and entry.done
+    assert entry.returncode == 0
+    assert entry.started_at <= entry.finished_at
+    assert str(tmp_path / "w" / "done.txt") in entry.fingerprints
+
+
+def test_recorded_plan_is_skipped_without_filesystem(tmp_path: Path, ledger: RunLedger):
+    plan = _plan(tmp_path / "w")
+    LocalExecutor(ledger=ledger).execute(plan)
+
+    # Even with the output gone, the ledger alone decides the plan is done.
+    (tmp_path / "w" / "done.txt").unlink()
+    result = LocalExecutor(ledger=ledger).execute(plan)
+
+    assert result.stdout == "(skipped: recorded in ledger)"
+    assert not (tmp_path / "w" / "done.txt").exists()
+
+
+def test_failed_run_is_recorded_and_retried(tmp_path: Path, ledger: RunLedger):
+    plan = _plan(tmp_path / "w", code="raise SystemExit(4)")
+
+    with pytest.raises(RuntimeError):
+        LocalExecutor(ledger=ledger).execute(plan)
+    entry = ledger.lookup(plan)
+
+    assert entry.status == "failed"
+    assert entry.returncode == 4
+    assert ledger.pending([plan]) == [plan]
+
+
+def test_missing_outputs_after_zero_exit_is_failure(tmp_path: Path, ledger: RunLedger):
+    plan = _plan(tmp_path / "w", code="pass")
+
+    with pytest.raises(RuntimeError, match="Missing expected outputs"):
+        LocalExecutor(ledger=ledger).execute(plan)
+
+    assert ledger.lookup(plan).status == "failed"
+
+
+def test_pending_filters_done_plans(tmp_path: Path, ledger: RunLedger):
+    plans = [_plan(tmp_path / f"w{i}") for i in range(3)]
+    LocalExecutor(ledger=ledger).execute(plans[1])
+
+    assert ledger.pending(plans) == [plans[0], plans[2]]
+    assert ledger.counts() == {"succeeded": 1}
+
+
+def test_ledger_persists_across_connections(tmp_path: Path):
+    plan = _plan(tmp_path / "w")
+    with RunLedger(tmp_path / "l.sqlite") as ledger:
+        LocalExecutor(ledger=ledger).execute(plan)
+
+    with RunLedger(tmp_path / "l.sqlite") as reopened:
+        assert reopened.is_done(plan)
@@ -0,0 +1,137 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+from varidock.execution.local_cluster import (
+    CANCELLED,
+    COMPLETED,
+    FAILED,
+    PENDING,
+    TIMEOUT,
+    LocalCluster,
+    LocalClusterExecutor,
+    parse_sbatch_directives,
+)
+from varidock.execution.slurm import SlurmConfig
+from varidock.plans import RunPlan
+from varidock.utils.slurm import _sbatch, get_cluster_state
+
+
+def _script(path: Path, body: str, *directives: str) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("#!/bin/bash\n" + "".join(f"#SBATCH {d}\n" for d in directives) + "\n" + body + "\n")
+    return path
+
+
+@pytest.fixture
+def cluster():
+    with LocalCluster(cpus=2, mem="4G") as cluster:
+        yield cluster
+
+
+def test_parse_directives(tmp_path):
+    script = _script(
+        tmp_path / "job.sh",
+        "echo hi\n#SBATCH --mem=1T",
+        "--job-name=prod",
+        "-c 4",
+        "--mem=8G",
+        "--gres=gpu:a100:2  # two cards",
+    )
+    assert parse_sbatch_directives(script) == {
+        "--job-name": "prod",
+        "--cpus-per-task": "4",
+        "--mem": "8G",
+        "--gres": "gpu:a100:2",
+    }
+
+
+def test_afterok_chain_and_failed_dependency(tmp_path, cluster):
+    log = tmp_path / "order.txt"
+    first = cluster.submit(_script(tmp_path / "a" / "eq.sh", f"sleep 0.2; echo eq >> {log}"))
+    second = cluster.submit(_script(tmp_path / "a" / "prod.sh", f"echo prod >> {log}"), depends_on=first)
+    bad = cluster.submit(_script(tmp_path / "b" / "eq.sh", "exit 3"))
+    never = cluster.submit(_script(tmp_path / "b" / "prod.sh", f"echo never >> {log}"), depends_on=bad)
+
+    assert cluster.wait(timeout=10)
+    assert log.read_text().split() == ["eq", "prod"]
+    assert cluster.job(second).state == COMPLETED
+    assert (cluster.job(bad).state, cluster.job(bad).returncode) == (FAILED, 3)
+    assert (cluster.job(never).state, cluster.job(never).reason) == (PENDING, "DependencyNeverSatisfied")
+    assert [j.never_starts for j in cluster.squeue()] == [True]
+
+
+def test_kill_invalid_depend_cancels_instead(tmp_path):
+    with LocalCluster(cpus=1, mem="1G", kill_invalid_depend=True) as cluster:
+        bad = cluster.submit(_script(tmp_path / "eq.sh", "exit 3"))
+        never = cluster.submit(_script(tmp_path / "prod.sh", "true"), depends_on=bad)
+        assert cluster.wait(timeout=10)
+        assert (cluster.job(never).state, cluster.job(never).reason) == (CANCELLED, "DependencyNeverSatisfied")
+
+
+def test_memory_defaults_to_a_per_cpu_share(tmp_path):
+    with LocalCluster(cpus=4, mem="4G") as cluster:
+        plain = cluster.submit(_script(tmp_path / "a.sh", "true", "--cpus-per-task=2"))
+        per_cpu = cluster.submit(_script(tmp_path / "b.sh", "true", "--mem-per-cpu=300M"))
+        whole = cluster.submit(_script(tmp_path / "c.sh", "true", "--mem=0"))
+        assert cluster.wait(timeout=10)
+        assert [cluster.job(j).mem_mb for j in (plain, per_cpu, whole)] == [2048, 300, 4096]
+    assert LocalCluster(cpus=4, mem="4G", def_mem_per_cpu="100M").def_mem_per_cpu_mb == 100
+
+
+def test_packs_jobs_without_oversubscribing(tmp_path, cluster):
+    log = tmp_path / "times.txt"
+    body = f'echo "start $(date +%s.%N)" >> {log}; sleep 0.3; echo "end $(date +%s.%N)" >> {log}'
+    for i in range(3):
+        cluster.submit(_script(tmp_path / f"j{i}" / "run.sh", body, "--cpus-per-task=1", "--mem=1G"))
+    cluster.submit(_script(tmp_path / "big" / "run.sh", body, "--cpus-per-task=2", "--mem=1G"))
+    assert cluster.wait(timeout=10)
+
+    events = sorted((float(t), kind) for kind, t in (line.split() for line in log.read_text().splitlines()))
+    running = peak = 0
+    for _, kind in events:
+        running += 1 if kind == "start" else -1
+        peak = max(peak, running)
+    assert peak == 2
+    with pytest.raises(ValueError, match="not available"):
+        cluster.submit(_script(tmp_path / "huge" / "run.sh", "true", "--mem=8G"))
+
+
+def test_time_limit(tmp_path, cluster):
+    job = cluster.submit(_script(tmp_path / "slow.sh", "sleep 30", "--time=0:01"))
+    assert cluster.wait(timeout=15)
+    assert cluster.job(job).state == TIMEOUT
+
+
+def test_executor_runs_slurm_arrays(tmp_path, cluster):
+    plans = [
+        RunPlan(
+            work_dir=tmp_path / f"p{i}",
+            files_text={},
+            argv=[sys.executable, "-c", "import os; open('out.txt', 'w').write(os.environ['SLURM_ARRAY_TASK_ID'])"],
+            expected_outputs=[tmp_path / f"p{i}" / "out.txt"],
+        )
+        for i in range(4)
+    ]
+    executor = LocalClusterExecutor(SlurmConfig(cpus=1, mem="1G"), cluster)
+
+    [job] = executor.execute_many(plans, array_dir=tmp_path / "arrays", max_concurrent=2)
+    assert sorted(j.job_id for j in cluster.sacct()) == [f"{job.job_id}_{i}" for i in range(4)]
+    assert sum(j.state == "RUNNING" for j in cluster.squeue()) <= 2
+    assert cluster.wait([job.job_id], timeout=20)
+
+    assert [(p.work_dir / "out.txt").read_text() for p in plans] == ["0", "1", "2", "3"]
+    assert cluster.job(job.task_id(plans[3])).state == COMPLETED
+
+
+def test_activate_routes_sbatch_and_cluster_state(tmp_path, cluster):
+    work = tmp_path / "sys"
+    with cluster.activate():
+        eq = _sbatch(_script(work / "eq.sh", "sleep 0.2", "--job-name=sys"))
+        run = _sbatch(_script(work / "run.sh", "touch done", "--job-name=sys"), depends_on=eq)
+        assert get_cluster_state().by_work_dir(work)
+        assert cluster.wait([run], timeout=10)
+        assert not get_cluster_state().by_work_dir(work)
+    assert (work / "done").exists()
+    assert not hasattr(get_cluster_state()._fetch, "__self__")  # real scheduler restored
@@ -0,0 +1,147 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from varidock.execution.namd_campaign import (
+    DONE,
+    EQ,
+    EQ2,
+    PRODUCTION,
+    QUEUED,
+    STALLED,
+    NAMDCampaign,
+    NAMDCampaignConfig,
+)
+from varidock.types import NAMDSimulationDir
+from varidock.utils.slurm import ClusterState
+
+STEPS_PER_NS = 500_000  # 2 fs timestep
+
+
+@pytest.fixture
+def fake_slurm(tmp_path: Path, monkeypatch) -> Path:
+    """sbatch/squeue shims; every submission is logged as 'job_id workdir script dependency'."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    log = tmp_path / "sbatch.log"
+    log.write_text("")
+    queue = tmp_path / "queue.txt"
+    queue.write_text("")
+    (bin_dir / "sbatch").write_text(
+        "#!/bin/sh\n"
+        "dep=none\n"
+        'for a in "$@"; do case $a in --dependency=*) dep=${a#--dependency=};; esac; script=$a; done\n'
+        f"n=$((100 + $(wc -l < {log})))\n"
+        f'echo "$n $PWD $script $dep" >> {log}\n'
+        f'echo "$n|job|PENDING|None|$PWD" >> {queue}\n'
+        "echo $n\n"
+    )
+    (bin_dir / "squeue").write_text(f"#!/bin/sh\ncat {queue}\n")
+    (bin_dir / "scancel").write_text(f'#!/bin/sh\ngrep -v "^$1|" {queue} > {queue}.new; mv {queue}.new {queue}\n')
+    for tool in ("sbatch", "squeue", "scancel"):
+        (bin_dir / tool).chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return log
+
+
+def _system(root: Path, name: str) -> NAMDSimulationDir:
+    path = root / name
+    path.mkdir()
+    for script in ("eq.sh", "eq2.sh", "run.sh"):
+        (path / script).write_text(f"#!/bin/sh\n#SBATCH --job-name={name}\n")
+    return NAMDSimulationDir(path=path.resolve())
+
+
+def _finish(log: Path, ns: float) -> None:
+    log.write_text(f"WRITING VELOCITIES TO OUTPUT FILE AT STEP {int(ns * STEPS_PER_NS)}\n")
+
+
+def _campaign(systems, **kwargs) -> NAMDCampaign:
+    config = NAMDCampaignConfig(target_ns=10, **kwargs)
+    return NAMDCampaign(systems, config, cluster_state=ClusterState(ttl=0), log=lambda _: None)
+
+
+def _submissions(log: Path) -> list[tuple[str, str, str, str]]:
+    return [tuple(line.split()) for line in log.read_text().splitlines()]
+
+
+def test_fresh_systems_get_full_afterok_chains(tmp_path, fake_slurm):
+    systems = [_system(tmp_path, f"sys{i}") for i in range(2)]
+    campaign = _campaign(systems, segments_per_submit=2)
+
+    assert campaign.run_once() == {EQ: 2}
+
+    subs = _submissions(fake_slurm)
+    assert [s[2] for s in subs] == ["eq.sh", "eq2.sh", "run.sh", "run.sh"] * 2
+    for chain in (subs[:4], subs[4:]):
+        assert chain[0][3] == "none"
+        for prev, cur in zip(chain, chain[1:]):
+            assert cur[3] == f"afterok:{prev[0]}"
+    assert campaign.run_once() == {QUEUED: 2}  # deduplicated against the queue
+    assert len(_submissions(fake_slurm)) == 8
+
+
+def test_resumes_from_completed_steps(tmp_path, fake_slurm):
+    after_eq = _system(tmp_path, "after_eq")
+    _finish(after_eq.path / "eq.log", 0.1)
+    in_prod = _system(tmp_path, "in_prod")
+    _finish(in_prod.path / "eq.log", 0.1)
+    _finish(in_prod.path / "eq2.log", 0.1)
+    (in_prod.path / "run.log").write_text(f"WRITING VELOCITIES TO RESTART FILE AT STEP {4 * STEPS_PER_NS}\n")
+    done = _system(tmp_path, "done")
+    _finish(done.path / "run.log", 10)
+
+    campaign = _campaign([after_eq, in_prod, done])
+    assert [campaign.status(s) for s in (after_eq, in_prod, done)] == [EQ2, PRODUCTION, DONE]
+    campaign.run_once()
+
+    assert [(Path(s[1]).name, s[2]) for s in _submissions(fake_slurm)] == [
+        ("after_eq", "eq2.sh"),
+        ("after_eq", "run.sh"),
+        ("in_prod", "run.sh"),
+    ]
+
+
+def test_resubmits_production_until_target_then_stops(tmp_path, fake_slurm):
+    system = _system(tmp_path, "sys")
+    _finish(system.path / "eq.log", 0.1)
+    _finish(system.path / "eq2.log", 0.1)
+    queue = tmp_path / "queue.txt"
+    campaign = _campaign([system])
+
+    for ns in (5, 10):
+        assert campaign.run_once() == {PRODUCTION: 1}
+        queue.write_text("")  # segment finished
+        _finish(system.path / "run.log", ns)
+
+    assert campaign.run() == {DONE: 1}
+    assert len(_submissions(fake_slurm)) == 2
+
+
+def test_gives_up_on_systems_that_do_not_progress(tmp_path, fake_slurm):
+    system = _system(tmp_path, "sys")
+    queue = tmp_path / "queue.txt"
+    campaign = _campaign([system], max_stalled_submissions=2)
+
+    for _ in range(3):
+        campaign.run_once()
+        queue.write_text("")  # eq crashed without writing its log
+
+    assert campaign.status(system) == STALLED
+    assert campaign.run() == {STALLED: 1}
+
+
+def test_cancels_and_resubmits_chains_whose_dependency_failed(tmp_path, fake_slurm):
+    system = _system(tmp_path, "sys")
+    queue = tmp_path / "queue.txt"
+    campaign = _campaign([system])
+    campaign.run_once()
+
+    # eq failed: eq2 and production stay pending behind it forever.
+    queue.write_text("".join(f"{n}|job|PENDING|DependencyNeverSatisfied|{system.path}\n" for n in (101, 102)))
+    assert campaign.status(system) == EQ
+    assert campaign.run_once() == {EQ: 1}
+
+    assert [line.split("|")[0] for line in queue.read_text().splitlines()] == ["103", "104", "105"]
+    assert len(_submissions(fake_slurm)) == 6
@@ -0,0 +1,142 @@
+import os
+import signal
+import sys
+import threading
+from pathlib import Path
+
+from varidock.execution import RunLedger
+from varidock.execution.pilot import FileQueue, PilotExecutor, run_pilot
+from varidock.execution.slurm import SlurmConfig
+from varidock.plans import RunPlan
+
+
+class Double:
+    """Picklable stand-in for a pipeline stage."""
+
+    name = "double"
+
+    def run(self, x):
+        return 2 * x
+
+
+def _plan(work_dir: Path, code: str = "pass") -> RunPlan:
+    return RunPlan(
+        work_dir=work_dir,
+        files_text={},
+        argv=[sys.executable, "-c", f"{code}\nopen('out.txt', 'w').write('ok')"],
+        expected_outputs=[work_dir / "out.txt"],
+    )
+
+
+def test_drains_queue_and_records_ledger(tmp_path):
+    queue = FileQueue(tmp_path / "queue")
+    plans = [_plan(tmp_path / f"job{i}") for i in range(6)]
+    for plan in plans:
+        plan.work_dir.mkdir()
+        queue.put(plan)
+    ledger = RunLedger(tmp_path / "ledger.sqlite")
+
+    report = run_pilot(queue, workers=3, walltime_seconds=None, ledger=ledger)
+
+    assert (report.done, report.failed, report.stopped_for_walltime) == (6, 0, False)
+    assert queue.counts() == {"pending": 0, "claimed": 0, "done": 6, "failed": 0}
+    assert all(ledger.is_done(plan) for plan in plans)
+    assert all((plan.work_dir / "out.txt").exists() for plan in plans)
+
+
+def test_failed_items_are_moved_aside(tmp_path):
+    queue = FileQueue(tmp_path / "queue")
+    (tmp_path / "bad").mkdir()
+    queue.put(_plan(tmp_path / "bad", "raise SystemExit(3)"))
+
+    report = run_pilot(queue, workers=1, walltime_seconds=None)
+
+    assert (report.done, report.failed) == (0, 1)
+    [info] = (tmp_path / "queue" / "failed").glob("*.info.json")
+    assert "returncode=3" in info.read_text()
+
+
+def test_stops_claiming_near_walltime(tmp_path):
+    queue = FileQueue(tmp_path / "queue")
+    (tmp_path / "job").mkdir()
+    queue.put(_plan(tmp_path / "job"))
+
+    report = run_pilot(queue, workers=2, walltime_seconds=60, margin_seconds=60)
+
+    assert report.stopped_for_walltime and report.done == 0
+    assert queue.counts()["pending"] == 1
+
+
+def test_runs_stage_invocations(tmp_path, monkeypatch):
+    monkeypatch.setenv(
+        "PYTHONPATH", os.pathsep.join([str(Path(__file__).parent), os.getcwd(), os.environ.get("PYTHONPATH", "")])
+    )
+    queue = FileQueue(tmp_path / "queue")
+    item = queue.put_call(Double(), 21)
+
+    assert run_pilot(queue, workers=1, walltime_seconds=None).done == 1
+    assert queue.result(item) == 42
+
+
+def test_requeue_stale_claims(tmp_path):
+    queue = FileQueue(tmp_path / "queue")
+    queue.put(_plan(tmp_path / "job"))
+    claimed = queue.claim()
+    assert claimed is not None and queue.claim() is None
+
+    assert queue.requeue_stale(max_age_seconds=3600) == 0
+    os.utime(claimed, (0, 0))
+    assert queue.requeue_stale(max_age_seconds=3600) == 1
+    assert queue.counts()["pending"] == 1
+
+
+def test_claim_ages_from_claim_time(tmp_path):
+    queue = FileQueue(tmp_path / "queue")
+    item = queue.put(_plan(tmp_path / "job"))
+    os.utime(item, (0, 0))  # enqueued long ago
+
+    assert queue.claim() is not None
+    assert queue.requeue_stale(max_age_seconds=3600) == 0
+    assert queue.counts()["claimed"] == 1
+
+
+def test_sigterm_releases_claims(tmp_path):
+    queue = FileQueue(tmp_path / "queue")
+    for name in ("slow", "next"):
+        (tmp_path / name).mkdir()
+        queue.put(_plan(tmp_path / name, "import time; time.sleep(1)"))
+    threading.Timer(0.3, os.kill, (os.getpid(), signal.SIGTERM)).start()
+
+    report = run_pilot(queue, workers=1, walltime_seconds=None)
+
+    assert report.stopped_for_signal and (report.done, report.failed) == (0, 0)
+    assert queue.counts() == {"pending": 2, "claimed": 0, "done": 0, "failed": 0}
+    assert signal.getsignal(signal.SIGTERM) is signal.SIG_DFL
+
+
+def test_pilot_script(tmp_path):
+    queue = FileQueue(tmp_path / "queue")
+    pilot = PilotExecutor(queue, SlurmConfig(cpus=64, time="12:00:00"), margin_seconds=900, ledger_path=tmp_path / "l.sqlite")
+
+    [script] = pilot.submit(write_only=True)
+
+    text = script.read_text()
+    assert "#SBATCH --cpus-per-task=64" in text
+    assert "#SBATCH --time=12:00:00" in text
+    assert f"-m varidock.execution.pilot {queue.root.resolve()} --workers 64 --margin 900" in text
+    assert f"--ledger {tmp_path}/l.${{SLURM_JOB_ID:-$$}}.sqlite" in text
+
+
+def test_pilot_ledgers_are_per_job_and_read_together(tmp_path):
+    plans = [_plan(tmp_path / f"w{i}") for i in range(3)]
+    for job_id, plan in zip((11, 12), plans):
+        with RunLedger(tmp_path / f"l.{job_id}.sqlite") as ledger:
+            ledger.record_finish(plan, returncode=0)
+    queue = FileQueue(tmp_path / "queue")
+    pilot = PilotExecutor(queue, SlurmConfig(cpus=4), ledger_path=tmp_path / "l.sqlite")
+
+    assert [p.name for p in pilot.ledger_paths()] == ["l.11.sqlite", "l.12.sqlite"]
+    assert pilot.pending(plans) == plans[2:]
+    pilot.execute_many(plans, write_only=True)
+    assert queue.counts()["pending"] == 1
+
@@ -0,0 +1,140 @@
+import asyncio
+import errno
+import sys
+from pathlib import Path
+
+import pytest
+
+from varidock.plans import RunPlan
+from varidock.execution import (
+    AsyncLocalExecutor,
+    FailureReport,
+    LocalCommandRunner,
+    LocalExecutor,
+    PERMANENT,
+    PlanFailedError,
+    RetryPolicy,
+    TRANSIENT,
+)
+
+# Fails with the given exit code and stderr until it has run `succeed_on` times.
+FLAKY = """
+import sys
+from pathlib import Path
+n = int(Path('attempts').read_text()) + 1 if Path('attempts').exists() else 1
+Path('attempts').write_text(str(n))
+if n < {succeed_on}:
+    sys.stderr.write({stderr!r})
+    sys.exit({code})
+Path('done.txt').write_text('ok')
+"""
+
+
+def _plan(work: Path, code: str) -> RunPlan:
+    return RunPlan(
+        work_dir=work,
+        files_text={work / "input.json": "{}\n"},
+        argv=[sys.executable, "-c", code],
+        expected_outputs=[work / "done.txt"],
+    )
+
+
+def _flaky(work: Path, succeed_on: int, code: int = 1, stderr: str = "") -> RunPlan:
+    return _plan(work, FLAKY.format(succeed_on=succeed_on, code=code, stderr=stderr))
+
+
+def _policy(**kwargs) -> RetryPolicy:
+    delays = []
+    policy = RetryPolicy(backoff_seconds=0.0, sleep=delays.append, **kwargs)
+    policy.delays = delays
+    return policy
+
+
+def _attempts(work: Path) -> int:
+    return int((work / "attempts").read_text())
+
+
+def test_classify():
+    policy = RetryPolicy()
+
+    assert policy.classify(-9) == TRANSIENT
+    assert policy.classify(137) == TRANSIENT
+    assert policy.classify(1, "FATAL: open /scratch/x: Stale file handle") == TRANSIENT
+    assert policy.classify(1, "MemoryError: Cannot allocate memory") == TRANSIENT
+    assert policy.classify(1, "KeyError: 'sequences'") == PERMANENT
+    assert policy.classify_exception(OSError(errno.ESTALE, "Stale file handle")) == TRANSIENT
+    assert policy.classify_exception(ValueError("bad input")) == PERMANENT
+
+
+def test_backoff_is_exponential_and_capped():
+    policy = RetryPolicy(backoff_seconds=1.0, backoff_factor=3.0, max_backoff_seconds=5.0, jitter=0.0)
+
+    assert [policy.delay(a) for a in (1, 2, 3)] == [1.0, 3.0, 5.0]
+
+
+def test_transient_failure_is_retried(tmp_path: Path):
+    work = tmp_path / "w"
+    policy = _policy(max_attempts=3)
+    ex = LocalExecutor(runner=LocalCommandRunner(capture_output=True), retry=policy)
+
+    ex.execute(_flaky(work, succeed_on=3, stderr="Stale file handle"))
+
+    assert _attempts(work) == 3
+    assert len(policy.delays) == 2
+
+
+def test_permanent_failure_is_not_retried(tmp_path: Path):
+    work = tmp_path / "w"
+    ex = LocalExecutor(runner=LocalCommandRunner(capture_output=True), retry=_policy())
+
+    with pytest.raises(PlanFailedError) as info:
+        ex.execute(_flaky(work, succeed_on=3, stderr="KeyError"))
+
+    assert _attempts(work) == 1
+    assert info.value.kind == PERMANENT
+    assert info.value.returncode == 1
+
+
+def test_default_runner_keeps_a_stderr_tail_for_classification(tmp_path: Path, capfd):
+    work = tmp_path / "w"
+    policy = _policy(max_attempts=3)
+    ex = LocalExecutor(retry=policy)
+
+    ex.execute(_flaky(work, succeed_on=2, stderr="x" * 20000 + "Stale file handle"))
+
+    assert _attempts(work) == 2
+    assert ex.runner.stderr_tail and not ex.runner.capture_output
+    assert capfd.readouterr().err.endswith("Stale file handle")  # still passed through
+
+
+def test_gives_up_after_max_attempts(tmp_path: Path):
+    work = tmp_path / "w"
+    ex = LocalExecutor(retry=_policy(max_attempts=2))
+
+    with pytest.raises(PlanFailedError) as info:
+        ex.execute(_flaky(work, succeed_on=10, code=137))
+
+    assert _attempts(work) == 2
+    assert (info.value.kind, info.value.attempts) == (TRANSIENT, 2)
+
+
+def test_execute_many_quarantines_failures(tmp_path: Path):
+    ok = [_flaky(tmp_path / f"ok{i}", succeed_on=1) for i in range(3)]
+    bad = _flaky(tmp_path / "bad", succeed_on=10, code=137)
+    report = FailureReport(tmp_path / "failures.json")
+
+    outcomes = list(LocalExecutor(retry=_policy(max_attempts=2)).execute_many([ok[0], bad, ok[1], ok[2]], report))
+
+    assert [o.ok for o in outcomes] == [True, False, True, True]
+    assert len(report) == 1
+    assert FailureReport.load_plans(tmp_path / "failures.json", kinds=[TRANSIENT]) == [bad]
+    assert FailureReport.load_plans(tmp_path / "failures.json", kinds=[PERMANENT]) == []
+
+
+def test_async_executor_retries_using_stderr_log(tmp_path: Path):
+    work = tmp_path / "w"
+    plan = _flaky(work, succeed_on=2, stderr="srun: error: Out of memory")
+
+    asyncio.run(AsyncLocalExecutor(retry=_policy()).execute(plan))
+
+    assert _attempts(work) == 2
@@ -0,0 +1,81 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from varidock.execution import LocalExecutor, Route, RoutingExecutor, SequenceLengthSizer
+from varidock.execution.retry import plan_from_dict, plan_to_dict
+from varidock.execution.slurm import SlurmConfig, SlurmExecutor
+from varidock.plans import CPU_HEAVY, GPU, SHORT, RunPlan
+from varidock.runners.af3 import AF3Config, plan_af3
+from varidock.utils.slurm import ClusterState
+
+
+def _plan(tmp_path: Path, resource_class=None, **metadata) -> RunPlan:
+    return RunPlan(
+        work_dir=tmp_path,
+        files_text={},
+        argv=["true"],
+        expected_outputs=[],
+        resource_class=resource_class,
+        metadata=metadata or None,
+    )
+
+
+@pytest.fixture
+def router():
+    state = ClusterState(fetch=list)
+    return RoutingExecutor(
+        {
+            CPU_HEAVY: SlurmExecutor(SlurmConfig(partition="cpu", cpus=16), state),
+            GPU: Route(
+                SlurmExecutor(SlurmConfig(partition="gpu", gpus=1, mem="32G", time="01:00:00"), state),
+                sizer=SequenceLengthSizer(mem_gb=16, mem_gb_per_1k=20, minutes=30, minutes_per_1k=60, max_mem_gb=200),
+            ),
+            SHORT: LocalExecutor(),
+        },
+        default=SHORT,
+    )
+
+
+def test_routes_by_resource_class(tmp_path, router):
+    assert router.route(_plan(tmp_path, CPU_HEAVY)).config.partition == "cpu"
+    assert router.route(_plan(tmp_path, GPU)).config.partition == "gpu"
+    assert isinstance(router.route(_plan(tmp_path)), LocalExecutor)
+    assert isinstance(router.route(_plan(tmp_path, "io-bound")), LocalExecutor)
+
+
+def test_sizes_gpu_requests_from_sequence_length(tmp_path, router):
+    assert router.route(_plan(tmp_path, GPU, sequence_length=500)).config.mem == "32G"  # floor is the route's config
+    big = router.route(_plan(tmp_path, GPU, sequence_length=3000)).config
+    assert (big.mem, big.time) == ("76G", "03:30:00")
+    huge = router.route(_plan(tmp_path, GPU, sequence_length=30000)).config
+    assert (huge.mem, huge.time) == ("200G", "1-06:30:00")
+    assert router.routes[GPU].executor.config.mem == "32G"
+
+
+def test_requires_route_without_default(tmp_path):
+    with pytest.raises(KeyError):
+        RoutingExecutor({GPU: LocalExecutor()}).route(_plan(tmp_path, CPU_HEAVY))
+    with pytest.raises(ValueError):
+        RoutingExecutor({GPU: LocalExecutor()}, default=SHORT)
+
+
+def test_plan_af3_tags_resource_class_and_size(tmp_path):
+    runner = tmp_path / "run_alphafold.py"
+    runner.write_text("")
+    cfg = AF3Config(sif_path=Path("af3.sif"), model_dir=tmp_path, db_dir=tmp_path, runner_script=runner)
+    input_json = json.dumps(
+        {"sequences": [{"protein": {"id": ["A", "B"], "sequence": "MKV" * 10}}, {"ligand": {"id": "L", "ccdCodes": ["ATP"]}}]}
+    )
+
+    inference = plan_af3(cfg, "x", input_json, tmp_path / "out")
+    msa = plan_af3(AF3Config(**{**cfg.__dict__, "script_args": ("--norun_inference",)}), "x", input_json, tmp_path / "out")
+
+    assert inference.resource_class == GPU and msa.resource_class == CPU_HEAVY
+    assert {k: v for k, v in inference.metadata.items() if k != "af3_job"} == {
+        "tool": "af3",
+        "sequence_length": 60,
+        "num_chains": 2,
+    }
+    assert plan_from_dict(plan_to_dict(inference)) == inference
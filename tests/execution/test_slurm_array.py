@@ -0,0 +1,112 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from varidock.plans import RunPlan
+from varidock.execution.slurm import SlurmConfig, SlurmExecutor
+from varidock.utils.slurm import ClusterState, JobInfo
+
+
+@pytest.fixture
+def fake_sbatch(tmp_path: Path, monkeypatch) -> Path:
+    """Put an sbatch on PATH that logs its arguments and prints a job ID."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    calls = tmp_path / "sbatch_calls.txt"
+    sbatch = bin_dir / "sbatch"
+    sbatch.write_text(f'#!/bin/sh\necho "$@" >> {calls}\necho "4242;cluster"\n')
+    sbatch.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return calls
+
+
+def _plan(work: Path, i: int) -> RunPlan:
+    return RunPlan(
+        work_dir=work,
+        files_text={work / "input.json": f'{{"i": {i}}}\n'},
+        argv=[sys.executable, "-c", "import os; open('out.txt', 'w').write(os.environ['IDX'] + ' ' + open('input.json').read())"],
+        expected_outputs=[work / "out.txt"],
+        env={"IDX": str(i)},
+    )
+
+
+def _run_task(job, index: int) -> subprocess.CompletedProcess:
+    env = {**os.environ, "SLURM_ARRAY_TASK_ID": str(index), "SLURM_ARRAY_JOB_ID": "4242"}
+    return subprocess.run(["bash", str(job.script)], env=env)
+
+
+def test_one_sbatch_call_for_many_plans(tmp_path: Path, fake_sbatch: Path):
+    plans = [_plan(tmp_path / f"p{i}", i) for i in range(5)]
+
+    (job,) = SlurmExecutor(SlurmConfig(account="lab")).execute_many(
+        plans, array_dir=tmp_path / "arrays", name="msa", max_concurrent=2
+    )
+
+    assert job.job_id == 4242
+    assert fake_sbatch.read_text().splitlines() == [f"--parsable {job.script}"]
+    script = job.script.read_text()
+    assert "#SBATCH --array=0-4%2" in script
+    assert "#SBATCH --account=lab" in script
+    manifest = json.loads(job.manifest.read_text())
+    assert [m["work_dir"] for m in manifest] == [str(p.work_dir) for p in plans]
+    assert manifest[3]["env"] == {"IDX": "3"}
+    assert job.task_id(plans[3]) == "4242_3"
+
+
+def test_array_tasks_are_queued_under_their_plan_work_dirs(tmp_path: Path, fake_sbatch: Path):
+    plans = [_plan(tmp_path / f"p{i}", i) for i in range(3)]
+    squeue: list[JobInfo] = []
+    state = ClusterState(fetch=lambda: squeue).refresh()
+    executor = SlurmExecutor(SlurmConfig(), cluster_state=state)
+
+    (job,) = executor.execute_many(plans, array_dir=tmp_path / "arrays", name="msa")
+
+    assert all(executor.is_queued(p) for p in plans)
+    # squeue reports the array directory, where sbatch ran, for every task.
+    squeue += [JobInfo(f"4242_{i}", job.script.stem, "PENDING", str(job.script.parent)) for i in (0, 2)]
+    state.refresh()
+    assert [executor.is_queued(p) for p in plans] == [True, False, True]
+    assert state.by_id("4242_2").work_dir == str(plans[2].work_dir.resolve())
+
+
+def test_array_task_runs_its_plan_and_logs_in_work_dir(tmp_path: Path):
+    plans = [_plan(tmp_path / f"p{i}", i) for i in range(3)]
+    (job,) = SlurmExecutor(SlurmConfig()).execute_many(plans, array_dir=tmp_path / "arrays", write_only=True)
+
+    assert _run_task(job, 2).returncode == 0
+
+    assert (tmp_path / "p2" / "out.txt").read_text() == '2 {"i": 2}\n'
+    assert not (tmp_path / "p0" / "out.txt").exists()
+    assert (tmp_path / "p2" / "slurm-4242_2.out").exists()
+    assert (tmp_path / "p2" / "slurm-4242_2.err").exists()
+
+
+def test_task_fails_when_expected_output_missing(tmp_path: Path):
+    work = tmp_path / "p0"
+    plan = RunPlan(work_dir=work, files_text={}, argv=["true"], expected_outputs=[work / "never.txt"])
+    (job,) = SlurmExecutor(SlurmConfig()).execute_many([plan], array_dir=tmp_path / "arrays", write_only=True)
+
+    assert _run_task(job, 0).returncode == 1
+    assert "Missing expected output" in (work / "slurm-4242_0.err").read_text()
+
+
+def test_done_plans_are_skipped_and_arrays_are_chunked(tmp_path: Path, fake_sbatch: Path):
+    plans = [_plan(tmp_path / f"p{i}", i) for i in range(7)]
+    plans[0].work_dir.mkdir()
+    (plans[0].work_dir / "out.txt").write_text("done")
+
+    jobs = SlurmExecutor(SlurmConfig()).execute_many(plans, array_dir=tmp_path / "arrays", max_array_size=4)
+
+    assert [len(j.plans) for j in jobs] == [4, 2]
+    assert jobs[0].plans[0] is plans[1]
+    assert "#SBATCH --array=0-1\n" in jobs[1].script.read_text()
+    assert len(fake_sbatch.read_text().splitlines()) == 2
+
+
+def test_nothing_to_submit(tmp_path: Path, fake_sbatch: Path):
+    assert SlurmExecutor(SlurmConfig()).execute_many([]) == []
+    assert not fake_sbatch.exists()
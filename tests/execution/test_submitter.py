@@ -0,0 +1,135 @@
+import os
+from pathlib import Path
+
+import pytest
+
+import sys
+
+from varidock.execution import FailureReport, RunLedger, Submitter, read_plan_file, scan_scripts, write_plan_file
+from varidock.execution.slurm import SlurmConfig, SlurmExecutor
+from varidock.execution.submitter import write_plan_scripts
+from varidock.plans import RunPlan
+from varidock.utils.slurm import ClusterState
+
+
+@pytest.fixture
+def fake_slurm(tmp_path: Path, monkeypatch) -> Path:
+    """sbatch/squeue shims backed by a file with one queued job ID per line."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    queue = tmp_path / "queue.txt"
+    queue.write_text("")
+    (bin_dir / "sbatch").write_text(
+        "#!/bin/sh\n"
+        'if [ -e "$PWD/reject" ]; then echo "QOSMaxSubmitJobPerUserLimit" >&2; exit 1; fi\n'
+        f"echo x >> {tmp_path}/submitted.txt\n"
+        f"n=$((100 + $(wc -l < {tmp_path}/submitted.txt)))\n"
+        f"echo $n >> {queue}\n"
+        "echo $n\n"
+    )
+    (bin_dir / "squeue").write_text(
+        "#!/bin/sh\n"
+        f'if [ -e "{tmp_path}/squeue_down" ]; then echo "slurm_load_jobs error: Socket timed out" >&2; exit 1; fi\n'
+        f"cat {queue}\n"
+    )
+    for tool in ("sbatch", "squeue"):
+        (bin_dir / tool).chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return queue
+
+
+@pytest.fixture
+def scripts(tmp_path: Path) -> list[Path]:
+    for i in range(5):
+        d = tmp_path / "jobs" / f"job{i}"
+        d.mkdir(parents=True)
+        (d / "submit.sh").write_text("#!/bin/sh\n#SBATCH --job-name=job\n")
+    return scan_scripts(tmp_path / "jobs")
+
+
+def test_respects_cap_and_tops_up_as_jobs_drain(tmp_path, fake_slurm, scripts):
+    submitter = Submitter(scripts, tmp_path / "state.json", max_in_flight=3, log=lambda _: None)
+
+    assert submitter.run_once() == 3
+    assert submitter.run_once() == 0
+    assert len(fake_slurm.read_text().splitlines()) == 3
+
+    fake_slurm.write_text("")  # jobs finished
+    assert submitter.run_once() == 2
+    assert submitter.pending == []
+
+
+def test_restart_resumes_from_state(tmp_path, fake_slurm, scripts):
+    Submitter(scripts, tmp_path / "state.json", max_in_flight=2, log=lambda _: None).run_once()
+    fake_slurm.write_text("")
+
+    restarted = Submitter(scripts, tmp_path / "state.json", max_in_flight=10, log=lambda _: None)
+
+    assert len(restarted.pending) == 3
+    assert restarted.run_once() == 3
+    assert len(set(restarted.state.submitted.values())) == 5
+
+
+def test_sbatch_failure_is_retried_next_pass(tmp_path, fake_slurm, scripts):
+    (scripts[1].parent / "reject").touch()
+    submitter = Submitter(scripts, tmp_path / "state.json", max_in_flight=10, log=lambda _: None)
+
+    assert submitter.run_once() == 1
+    assert "QOSMaxSubmitJobPerUserLimit" in submitter.state.last_error
+
+    (scripts[1].parent / "reject").unlink()
+    assert submitter.run_once() == 4
+
+
+def test_run_polls_until_everything_is_submitted(tmp_path, fake_slurm, scripts):
+    sleeps = []
+
+    def drain(seconds):
+        sleeps.append(seconds)
+        fake_slurm.write_text("")
+
+    submitter = Submitter(
+        scripts, tmp_path / "state.json", max_in_flight=2, poll_seconds=7, sleep=drain, log=lambda _: None
+    )
+
+    assert submitter.run() == 5
+    assert sleeps == [7, 7]
+
+
+def test_squeue_failure_is_retried_next_pass(tmp_path, fake_slurm, scripts):
+    (tmp_path / "squeue_down").touch()
+    sleeps = []
+
+    def recover(seconds):
+        sleeps.append(seconds)
+        (tmp_path / "squeue_down").unlink(missing_ok=True)
+
+    submitter = Submitter(scripts, tmp_path / "state.json", max_in_flight=10, sleep=recover, log=lambda _: None)
+
+    assert submitter.run_once() == 0
+    assert "Socket timed out" in submitter.state.last_error
+    assert submitter.run() == 5
+    assert submitter.state.last_error is None and len(sleeps) == 1
+
+
+def test_plan_file_and_ledger_feed_the_submitter(tmp_path):
+    plans = [
+        RunPlan(work_dir=tmp_path / f"p{i}", files_text={}, argv=[sys.executable, "-V"], expected_outputs=[])
+        for i in range(3)
+    ]
+    for plan in plans:
+        plan.work_dir.mkdir()
+    ledger = RunLedger(tmp_path / "ledger.sqlite")
+    ledger.record_start(plans[1])
+    ledger.record_finish(plans[1], returncode=0)
+    path = write_plan_file(plans, tmp_path / "plans.json")
+    report = FailureReport()
+    report.add(plans[2], RuntimeError("boom"))
+    report.write(tmp_path / "failures.json")
+
+    loaded = read_plan_file(path)
+    scripts = write_plan_scripts(loaded, SlurmExecutor(SlurmConfig(), cluster_state=ClusterState(fetch=list)), ledger=ledger)
+
+    assert [p.work_dir for p in loaded] == [p.work_dir for p in plans]
+    assert scripts == [plans[0].work_dir / "submit.sh", plans[2].work_dir / "submit.sh"]
+    assert [p.work_dir for p in read_plan_file(tmp_path / "failures.json")] == [plans[2].work_dir]
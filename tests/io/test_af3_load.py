@@ -60,4 +60,63 @@ def test_extract_msas_contains_correct_data(af3_output_dir):
 
 def test_extract_msas_missing_data_json(tmp_path):
     with pytest.raises(FileNotFoundError):
-        extract_msas_from_af3_output(tmp_path)
\ No newline at end of file
+        extract_msas_from_af3_output(tmp_path)
+
+def test_load_msas_is_lazy_and_cached(af3_output_dir):
+    from varidock.io.af3_load import load_msas
+    from varidock.structure import LazyMSAData
+
+    result = load_msas(af3_output_dir, chains=["B"])
+
+    msa = result["test_job"]["B"]
+    assert set(result["test_job"]) == {"B"}
+    assert isinstance(msa, LazyMSAData)
+    assert msa.has_unpaired() and not msa.has_paired()
+    assert msa.unpaired == ">query\nGGGGGGGGGG\n"
+    assert (af3_output_dir / ".test_job_data.json.msaidx").exists()
+
+    # Changing the JSON invalidates both the sidecar and outstanding lazy objects.
+    data_json = af3_output_dir / "test_job_data.json"
+    data_json.write_text(data_json.read_text().replace("GGGGGGGGGG", "WWWW"))
+    with pytest.raises(ValueError, match="changed"):
+        msa.unpaired
+    assert load_msas(af3_output_dir)["test_job"]["B"].unpaired == ">query\nWWWW\n"
+
+
+def test_extract_msas_reads_every_data_json(af3_output_dir):
+    (af3_output_dir / "other_data.json").write_text(
+        json.dumps({"sequences": [{"protein": {"id": ["C", "D"], "sequence": "MK", "unpairedMsa": "u", "pairedMsa": "p"}}]})
+    )
+
+    result = extract_msas_from_af3_output(af3_output_dir)
+
+    assert set(result) == {"A", "B", "C", "D"}
+    assert result["D"].paired == "p"
+
+
+def test_extract_msas_rejects_chain_ids_shared_across_files(af3_output_dir):
+    from varidock.io.af3_load import load_msas
+
+    (af3_output_dir / "clash_data.json").write_text(json.dumps({"sequences": [{"protein": {"id": "A"}}]}))
+
+    with pytest.raises(ValueError, match=r"'A' is in both clash_data.json and test_job_data.json.*load_msas"):
+        extract_msas_from_af3_output(af3_output_dir)
+    by_file = load_msas(af3_output_dir)
+    assert set(by_file) == {"clash", "test_job"}
+    assert not by_file["clash"]["A"].has_unpaired() and by_file["test_job"]["A"].has_unpaired()
+
+
+def test_lazy_msa_data_compares_without_reading(af3_output_dir):
+    import dataclasses
+
+    from varidock.io.af3_load import load_msas
+
+    first = load_msas(af3_output_dir)["test_job"]["A"]
+    (af3_output_dir / "test_job_data.json").unlink()
+    again = dataclasses.replace(first)
+
+    assert again == first and hash(again) == hash(first)
+    assert "test_job_data.json" in repr(first)
+    assert dataclasses.asdict(first)["unpaired_span"] == first.unpaired_span
+    with pytest.raises(FileNotFoundError):
+        first.unpaired
@@ -0,0 +1,75 @@
+import io
+import json
+
+import pytest
+
+from varidock.io.json_spans import copy_span, scan_spans, splice_spans
+
+
+@pytest.mark.parametrize("buffer_size", [1, 2, 3, 5, 64, 1 << 20])
+def test_spans_round_trip(tmp_path, buffer_size):
+    doc = {
+        "a": [1, -2.5e3, True, None, {"k\"ey": "v\\\"al\n"}],
+        "b": {"nested": ["x", [], {}], "s": "é\\"},
+        "c": "",
+        "d": '\\\\"\\\\\\',
+    }
+    path = tmp_path / "doc.json"
+    path.write_text(json.dumps(doc, indent=1, ensure_ascii=False), encoding="utf-8")
+    data = path.read_bytes()
+
+    spans = scan_spans(path, lambda p: True, buffer_size=buffer_size)
+
+    assert json.loads(data[slice(*spans[()])]) == doc
+    assert json.loads(data[slice(*spans[("a", 4, 'k"ey')])]) == "v\\\"al\n"
+    assert json.loads(data[slice(*spans[("b", "nested")])]) == ["x", [], {}]
+    assert json.loads(data[slice(*spans[("a", 1)])]) == -2500.0
+    assert json.loads(data[slice(*spans[("c",)])]) == ""
+    assert json.loads(data[slice(*spans[("d",)])]) == doc["d"]
+
+
+def test_only_selected_paths_are_returned(tmp_path):
+    path = tmp_path / "doc.json"
+    path.write_text(json.dumps({"x": {"y": [1, 2]}, "z": 3}))
+    assert set(scan_spans(path, lambda p: p[-1:] == ("y",))) == {("x", "y")}
+
+
+def test_copy_span(tmp_path):
+    src = io.BytesIO(b"0123456789")
+    dst = io.BytesIO()
+    copy_span(src, 2, 9, dst, buffer_size=3)
+    assert dst.getvalue() == b"2345678"
+
+
+def test_malformed_json(tmp_path):
+    path = tmp_path / "bad.json"
+    path.write_text('{"a": "unterminated')
+    with pytest.raises(ValueError):
+        scan_spans(path, lambda p: True)
+
+
+@pytest.mark.parametrize("buffer_size", [1, 2, 4, 1 << 20])
+def test_copy_span_compact(buffer_size):
+    value = {"a": [1, 2, {"b": "x \\\" y\n z"}], "c": " ", "d": '\\\\" \\\\\\'}
+    text = json.dumps(value, indent=3).encode()
+    dst = io.BytesIO()
+    copy_span(io.BytesIO(b"  " + text), 2, 2 + len(text), dst, buffer_size=buffer_size, compact=True)
+    assert dst.getvalue() == json.dumps(value, separators=(",", ":")).encode()
+
+
+def test_copy_span_compact_reports_requested_end_when_truncated():
+    with pytest.raises(ValueError, match="before byte 50"):
+        copy_span(io.BytesIO(b'"abc\\\\d'), 0, 50, io.BytesIO(), buffer_size=2, compact=True)
+
+
+def test_splice_spans(tmp_path):
+    path = tmp_path / "doc.json"
+    path.write_text(json.dumps({"name": "a", "big": "x" * 100, "id": ["A"]}))
+    spans = scan_spans(path, lambda p: p in (("name",), ("id",)))
+    dst = io.BytesIO()
+
+    splice_spans(path, dst, {spans[("id",)]: b'["B"]', spans[("name",)]: b'"bb"'}, buffer_size=7)
+
+    assert json.loads(dst.getvalue()) == {"name": "bb", "big": "x" * 100, "id": ["B"]}
+    with pytest.raises(ValueError, match="Overlapping"):
+        splice_spans(path, io.BytesIO(), {(0, 10): b"", (5, 12): b""})
@@ -0,0 +1,197 @@
+"""Tests for StageCache and CachedStage."""
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+
+from varidock.pipeline import CachedStage, StageCache
+from varidock.types import PDB, PDBQT
+
+
+@dataclass
+class FakePrepConfig:
+    output_dir: Path
+    charges: str = "gasteiger"
+
+
+class FakePrep:
+    """Writes a PDBQT next to output_dir and counts how often it actually runs."""
+
+    name = "fake_prep"
+    input_type = PDB
+    output_type = PDBQT
+
+    def __init__(self, config: FakePrepConfig):
+        self.config = config
+        self.calls = 0
+
+    def run(self, input: PDB) -> PDBQT:
+        self.calls += 1
+        out = self.config.output_dir / f"{input.path.stem}.pdbqt"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(input.path.read_text().upper())
+        return PDBQT(path=out)
+
+
+@pytest.fixture
+def pdb(tmp_path: Path) -> PDB:
+    path = tmp_path / "in" / "prot.pdb"
+    path.parent.mkdir()
+    path.write_text("atom 1\n")
+    return PDB(path=path)
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> StageCache:
+    return StageCache(tmp_path / "cache", max_entries=10)
+
+
+def test_second_run_is_a_hit(tmp_path, pdb, cache):
+    stage = FakePrep(FakePrepConfig(output_dir=tmp_path / "out"))
+    cached = CachedStage(stage, cache)
+
+    first = cached.run(pdb)
+    second = cached.run(pdb)
+
+    assert stage.calls == 1
+    assert first == second
+    assert cache.hits == 1
+    assert cached.name == "fake_prep"
+
+
+def test_changed_input_content_is_a_miss(tmp_path, pdb, cache):
+    stage = FakePrep(FakePrepConfig(output_dir=tmp_path / "out"))
+    cached = CachedStage(stage, cache)
+
+    cached.run(pdb)
+    pdb.path.write_text("atom 2\n")
+    cached.run(pdb)
+
+    assert stage.calls == 2
+
+
+def test_changed_config_is_a_miss(tmp_path, pdb, cache):
+    out = tmp_path / "out"
+    CachedStage(FakePrep(FakePrepConfig(output_dir=out)), cache).run(pdb)
+
+    stage = FakePrep(FakePrepConfig(output_dir=out, charges="none"))
+    CachedStage(stage, cache).run(pdb)
+
+    assert stage.calls == 1
+
+
+class PlainPrep:
+    """A stage that keeps its settings as plain attributes instead of a config dataclass."""
+
+    name = "plain_prep"
+
+    def __init__(self, output_dir: Path, charges: str = "gasteiger", executor=None):
+        self.output_dir = output_dir
+        self.charges = charges
+        self.executor = executor or object()
+        self._calls = 0
+
+    def run(self, input: PDB) -> PDBQT:
+        self._calls += 1
+        out = self.output_dir / f"{input.path.stem}.{self.charges}.pdbqt"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(input.path.read_text())
+        return PDBQT(path=out)
+
+
+def test_plain_stage_settings_are_part_of_the_key(tmp_path, pdb, cache):
+    CachedStage(PlainPrep(tmp_path / "out"), cache).run(pdb)
+
+    same = PlainPrep(tmp_path / "out", executor=object())  # a different executor is not a different result
+    CachedStage(same, cache).run(pdb)
+    changed = PlainPrep(tmp_path / "out", charges="none")
+    CachedStage(changed, cache).run(pdb)
+
+    assert (same._calls, changed._calls) == (0, 1)
+
+
+def test_unfingerprintable_plain_stage_is_refused(tmp_path, cache):
+    stage = PlainPrep(tmp_path / "out")
+    stage.scorer = object()
+
+    with pytest.raises(TypeError, match="'scorer' is not fingerprintable"):
+        CachedStage(stage, cache)
+    stage.cache_exclude = ("scorer",)
+    CachedStage(stage, cache)
+
+
+def test_deleted_output_is_a_miss(tmp_path, pdb, cache):
+    stage = FakePrep(FakePrepConfig(output_dir=tmp_path / "out"))
+    cached = CachedStage(stage, cache)
+
+    result = cached.run(pdb)
+    result.path.unlink()
+    cached.run(pdb)
+
+    assert stage.calls == 2
+    assert result.path.exists()
+
+
+def test_key_is_stable_across_instances(tmp_path, pdb):
+    stage = FakePrep(FakePrepConfig(output_dir=tmp_path / "out"))
+    a = StageCache(tmp_path / "a").key(stage, pdb)
+    b = StageCache(tmp_path / "b").key(stage, pdb)
+
+    assert a == b
+
+
+def test_prune_evicts_least_recently_used(tmp_path, cache):
+    keys = [f"{i:02d}" + "0" * 62 for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.put(key, i)
+        path = cache._entry_path(key)
+        os.utime(path, ns=(i * 10**9, i * 10**9))
+
+    # Touch the oldest entry so it becomes the most recently used.
+    assert cache.get(keys[0]) == (True, 0)
+    removed = cache.prune(max_entries=2)
+
+    assert removed == 1
+    assert cache.get(keys[1]) == (False, None)
+    assert cache.get(keys[0]) == (True, 0)
+    assert cache.get(keys[2]) == (True, 2)
+
+
+def test_put_enforces_max_entries(tmp_path):
+    cache = StageCache(tmp_path / "cache", max_entries=2)
+    for i in range(5):
+        cache.put(f"{i:064d}", i)
+
+    assert cache.stats().entries == 2
+
+
+def test_stats_reports_entries_and_bytes(cache):
+    cache.put("a" * 64, {"x": 1})
+    stats = cache.stats()
+
+    assert stats.entries == 1
+    assert stats.total_bytes > 0
+
+
+def test_modified_output_is_a_miss(tmp_path, pdb, cache):
+    stage = FakePrep(FakePrepConfig(output_dir=tmp_path / "out"))
+    cached = CachedStage(stage, cache)
+
+    result = cached.run(pdb)
+    result.path.write_text("truncated")
+    cached.run(pdb)
+
+    assert stage.calls == 2
+    assert result.path.read_text() == "ATOM 1\n"
+
+
+def test_overwriting_a_key_does_not_count_as_a_new_entry(tmp_path):
+    cache = StageCache(tmp_path / "cache", max_entries=2)
+    cache.put("a" * 64, 0)
+    for i in range(3):
+        cache.put("b" * 64, i)
+
+    assert cache.get("a" * 64) == (True, 0)
+    assert cache._count == 2
@@ -0,0 +1,181 @@
+"""Tests for DAGPipeline."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from varidock.pipeline import DAGPipeline
+
+
+class Sleep:
+    """Sleeps, then returns its input tagged with the stage label."""
+
+    input_type = str
+    output_type = str
+
+    def __init__(self, label: str, seconds: float = 0.0, name: str = "sleep"):
+        self.label = label
+        self.seconds = seconds
+        self.name = name
+
+    def run(self, input: str) -> str:
+        time.sleep(self.seconds)
+        return f"{self.label}({input})"
+
+
+class Join:
+    name = "join"
+    input_types = {"left": str, "right": str, "rest": str}
+    output_type = str
+
+    def run(self, left: str, right: str, rest: list[str] | None = None) -> str:
+        return "+".join([left, right, *(rest or [])])
+
+
+class Length:
+    name = "length"
+    input_type = str
+    output_type = int
+
+    def run(self, input: str) -> int:
+        return len(input)
+
+
+class Barrier:
+    """Only succeeds if two nodes reach it at the same time."""
+
+    name = "barrier"
+    input_type = str
+    output_type = str
+
+    def __init__(self, barrier: threading.Barrier):
+        self.barrier = barrier
+
+    def run(self, input: str) -> str:
+        self.barrier.wait(timeout=5)
+        return input
+
+
+class Probe:
+    """Records the maximum number of concurrent runs."""
+
+    name = "probe"
+    input_type = str
+    output_type = str
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def run(self, input: str) -> str:
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.01)
+        with self.lock:
+            self.active -= 1
+        return input
+
+
+def test_join_node_receives_keyword_inputs():
+    dag = DAGPipeline(sources={"x": str})
+    dag.add("a", Sleep("a"), inputs="x")
+    dag.add("b", Sleep("b"), inputs="x")
+    dag.add("c", Sleep("c"), inputs="x")
+    dag.add("j", Join(), inputs={"left": "a", "right": "b", "rest": ["c", "x"]})
+
+    result = dag.run({"x": "in"})
+
+    assert result.outputs["j"] == "a(in)+b(in)+c(in)+in"
+
+
+def test_independent_branches_run_concurrently():
+    barrier = threading.Barrier(2)
+    dag = DAGPipeline(sources={"x": str})
+    dag.add("left", Barrier(barrier), inputs="x")
+    dag.add("right", Barrier(barrier), inputs="x")
+
+    result = dag.run({"x": "in"}, max_workers=2)
+
+    assert result.outputs == {"left": "in", "right": "in"}
+
+
+def test_per_stage_limit_is_shared_by_nodes_of_the_same_stage():
+    probe = Probe()
+    dag = DAGPipeline(sources={"x": str})
+    for i in range(4):
+        dag.add(f"n{i}", probe, inputs="x")
+
+    dag.run({"x": "in"}, max_workers=4, per_stage_limits={"probe": 1})
+
+    assert probe.peak == 1
+
+
+def test_critical_path_follows_slowest_chain():
+    dag = DAGPipeline(sources={"x": str})
+    dag.add("fast", Sleep("fast", 0.0), inputs="x")
+    dag.add("slow", Sleep("slow", 0.1), inputs="x")
+    dag.add("after_slow", Sleep("after", 0.05), inputs="slow")
+    dag.add("end", Join(), inputs={"left": "fast", "right": "after_slow"})
+
+    result = dag.run({"x": "in"}, max_workers=2)
+
+    assert result.critical_path == ["slow", "after_slow", "end"]
+    assert result.critical_path_seconds >= 0.15
+    assert result.timings["after_slow"].start >= result.timings["slow"].end
+
+
+def test_topological_order_puts_dependencies_first():
+    dag = DAGPipeline(sources={"x": str})
+    dag.add("a", Sleep("a"), inputs="x")
+    dag.add("b", Sleep("b"), inputs="a")
+    dag.add("c", Join(), inputs={"left": "a", "right": "b"})
+
+    order = dag.topological_order()
+
+    assert order.index("a") < order.index("b") < order.index("c")
+
+
+def test_unknown_input_raises():
+    dag = DAGPipeline(sources={"x": str})
+    with pytest.raises(ValueError, match="unknown source or node"):
+        dag.add("a", Sleep("a"), inputs="y")
+
+
+def test_duplicate_name_raises():
+    dag = DAGPipeline(sources={"x": str})
+    dag.add("a", Sleep("a"), inputs="x")
+    with pytest.raises(ValueError, match="already used"):
+        dag.add("a", Sleep("a"), inputs="x")
+
+
+def test_type_mismatch_raises():
+    dag = DAGPipeline(sources={"x": str})
+    dag.add("n", Length(), inputs="x")
+    with pytest.raises(TypeError, match="expects str"):
+        dag.add("s", Sleep("s"), inputs="n")
+
+
+def test_missing_source_value_raises():
+    dag = DAGPipeline(sources={"x": str})
+    dag.add("a", Sleep("a"), inputs="x")
+    with pytest.raises(ValueError, match="Missing values"):
+        dag.run({})
+
+
+def test_per_stage_limit_below_one_raises():
+    dag = DAGPipeline(sources={"x": str})
+    dag.add("a", Probe(), inputs="x")
+    with pytest.raises(ValueError, match="at least 1"):
+        dag.run({"x": "in"}, per_stage_limits={"probe": 0})
+
+
+def test_executor_without_max_workers_raises():
+    dag = DAGPipeline(sources={"x": str})
+    dag.add("a", Probe(), inputs="x")
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        with pytest.raises(ValueError, match="max_workers is required"):
+            dag.run({"x": "in"}, executor=pool)
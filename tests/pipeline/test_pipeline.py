@@ -0,0 +1,150 @@
+"""Tests for Pipeline.run and Pipeline.run_many."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from varidock.pipeline import Pipeline
+
+
+class AddOne:
+    name = "add_one"
+    input_type = int
+    output_type = int
+
+    def run(self, input: int) -> int:
+        return input + 1
+
+
+class Double:
+    name = "double"
+    input_type = int
+    output_type = int
+
+    def run(self, input: int) -> int:
+        return input * 2
+
+
+class SlowForSmall:
+    """Sleeps longer for smaller inputs so completion order is reversed."""
+
+    name = "slow_for_small"
+    input_type = int
+    output_type = int
+
+    def run(self, input: int) -> int:
+        time.sleep(0.02 * (5 - input))
+        return input
+
+
+class ConcurrencyProbe:
+    """Records the maximum number of concurrent runs."""
+
+    name = "probe"
+    input_type = int
+    output_type = int
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def run(self, input: int) -> int:
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.01)
+        with self.lock:
+            self.active -= 1
+        return input
+
+
+class Boom:
+    name = "boom"
+    input_type = int
+    output_type = int
+
+    def run(self, input: int) -> int:
+        if input == 3:
+            raise RuntimeError("boom")
+        return input
+
+
+class ToStr:
+    name = "to_str"
+    input_type = int
+    output_type = str
+
+    def run(self, input: int) -> str:
+        return str(input)
+
+
+def test_add_rejects_mismatched_types():
+    with pytest.raises(TypeError, match="expects int"):
+        Pipeline(ToStr(), AddOne())
+
+
+def test_run_chains_stages():
+    assert Pipeline(AddOne(), Double()).run(3) == 8
+
+
+def test_run_many_process_pool_matches_run():
+    pipeline = Pipeline(AddOne(), Double())
+    results = list(pipeline.run_many(range(10), max_workers=2))
+
+    assert results == [(i, (i + 1) * 2) for i in range(10)]
+
+
+def test_run_many_ordered_with_out_of_order_completion():
+    pipeline = Pipeline(SlowForSmall())
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        results = list(pipeline.run_many(range(5), max_workers=5, executor=pool))
+
+    assert [i for i, _ in results] == [0, 1, 2, 3, 4]
+
+
+def test_run_many_unordered_yields_as_finished():
+    pipeline = Pipeline(SlowForSmall())
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        results = list(pipeline.run_many(range(5), max_workers=5, executor=pool, ordered=False))
+
+    assert [i for i, _ in results] == [4, 3, 2, 1, 0]
+    assert all(i == out for i, out in results)
+
+
+def test_run_many_respects_per_stage_limits():
+    probe = ConcurrencyProbe()
+    pipeline = Pipeline(AddOne(), probe)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(
+            pipeline.run_many(range(20), max_workers=8, executor=pool, per_stage_limits={"probe": 2})
+        )
+
+    assert len(results) == 20
+    assert probe.peak <= 2
+
+
+def test_run_many_unknown_stage_limit_raises():
+    pipeline = Pipeline(AddOne())
+    with pytest.raises(ValueError, match="unknown stages"):
+        pipeline.run_many([1], per_stage_limits={"nope": 1})
+
+
+def test_run_many_requires_max_workers_with_an_executor():
+    pipeline = Pipeline(AddOne())
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        with pytest.raises(ValueError, match="max_workers is required"):
+            pipeline.run_many([1], executor=pool)
+
+
+def test_run_many_propagates_stage_errors():
+    pipeline = Pipeline(Boom())
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        with pytest.raises(RuntimeError, match="boom"):
+            list(pipeline.run_many(range(5), max_workers=5, executor=pool))
+
+
+def test_run_many_empty_pipeline_passes_inputs_through():
+    assert list(Pipeline().run_many(["a", "b"])) == [(0, "a"), (1, "b")]
@@ -0,0 +1,120 @@
+"""Tests for Profiler, ProfiledStage and ProfiledRunner."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+from varidock.execution import LocalCommandRunner, LocalExecutor
+from varidock.pipeline import Pipeline, Profiler
+from varidock.pipeline.profiling import format_prometheus, load_records, percentile, summarize
+from varidock.plans import RunPlan
+from varidock.types import PDB
+
+
+class Touch:
+    name = "touch"
+    input_type = PDB
+    output_type = PDB
+
+    def run(self, input: PDB) -> PDB:
+        out = input.path.with_suffix(".out.pdb")
+        out.write_text(input.path.read_text())
+        return PDB(path=out)
+
+
+class Boom:
+    name = "boom"
+    input_type = PDB
+    output_type = PDB
+
+    def run(self, input: PDB) -> PDB:
+        raise ValueError("boom")
+
+
+@pytest.fixture
+def pdb(tmp_path: Path) -> PDB:
+    path = tmp_path / "prot.pdb"
+    path.write_text("ATOM\n")
+    return PDB(path=path)
+
+
+def test_profiled_stages_record_each_run(tmp_path, pdb):
+    profiler = Profiler(tmp_path / "profile.jsonl")
+    pipeline = Pipeline(*[profiler.stage(s) for s in (Touch(), Touch())])
+
+    pipeline.run(pdb)
+    records = load_records(profiler.path)
+
+    assert [r.name for r in records] == ["touch", "touch"]
+    assert records[0].input_id == str(pdb.path)
+    assert records[1].input_id == str(tmp_path / "prot.out.pdb")
+    assert all(r.ok and r.wall_seconds >= 0 and r.max_rss_bytes > 0 for r in records)
+
+
+def test_failed_stage_is_recorded(tmp_path, pdb):
+    profiler = Profiler(tmp_path / "profile.jsonl")
+
+    with pytest.raises(ValueError):
+        profiler.stage(Boom()).run(pdb)
+
+    (record,) = load_records(profiler.path)
+    assert not record.ok
+    assert record.error == "ValueError: boom"
+
+
+def test_profiled_runner_counts_child_cpu(tmp_path):
+    profiler = Profiler(tmp_path / "profile.jsonl", prometheus_path=tmp_path / "varidock.prom")
+    work = tmp_path / "work"
+    plan = RunPlan(
+        work_dir=work,
+        files_text={},
+        argv=[sys.executable, "-c", "sum(range(3_000_000)); open('out', 'w').write('x')"],
+        expected_outputs=[work / "out"],
+    )
+
+    LocalExecutor(runner=profiler.runner(LocalCommandRunner())).execute(plan)
+
+    (record,) = load_records(profiler.path)
+    assert record.kind == "plan"
+    assert record.input_id == str(work)
+    assert record.child_user_seconds + record.child_sys_seconds > 0
+    assert record.child_max_rss_bytes > 0
+    prom = (tmp_path / "varidock.prom").read_text()
+    assert f'varidock_stage_runs_total{{kind="plan",name="{Path(sys.executable).name}"}} 1' in prom
+
+
+def test_measure_records_arbitrary_blocks(tmp_path):
+    profiler = Profiler(tmp_path / "profile.jsonl")
+
+    with profiler.measure("stage", "deepsurf_tf", input="frame_0"):
+        sum(range(10_000))
+
+    (record,) = load_records(profiler.path)
+    assert (record.kind, record.name) == ("stage", "deepsurf_tf")
+
+
+def test_summarize_percentiles(tmp_path):
+    profiler = Profiler(tmp_path / "profile.jsonl")
+    with profiler.measure("stage", "x"):
+        pass
+    base = load_records(profiler.path)[0]
+    records = [
+        type(base)(**{**base.__dict__, "wall_seconds": float(w)}) for w in range(1, 101)
+    ]
+
+    (s,) = summarize(records)
+
+    assert (s.count, s.p50, s.p90, s.p99, s.max) == (100, 50.0, 90.0, 99.0, 100.0)
+    assert percentile([3.0], 50) == 3.0
+    assert "varidock_stage_wall_seconds_total" in format_prometheus(records)
+
+
+def test_load_records_skips_partial_lines(tmp_path):
+    profiler = Profiler(tmp_path / "profile.jsonl")
+    with profiler.measure("stage", "x"):
+        pass
+    with open(profiler.path, "a") as f:
+        f.write('{"kind": "stage", "na')
+
+    assert len(load_records(profiler.path)) == 1
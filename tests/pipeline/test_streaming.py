@@ -0,0 +1,213 @@
+"""Tests for StreamingPipeline and streaming stages."""
+
+import threading
+from pathlib import Path
+
+import pytest
+
+from varidock.pipeline.streaming import StreamingPipeline
+from varidock.stages.vmd_frame_extract import (
+    VMDFrameExtraction,
+    VMDFrameExtractionConfig,
+)
+from varidock.types import PDB, PSF, Trajectory
+
+
+class Frames:
+    """Streams n items, recording how far ahead of the consumer it got."""
+
+    name = "frames"
+    input_type = int
+    output_type = list
+    item_type = int
+
+    def __init__(self):
+        self.produced = 0
+
+    def run(self, input: int) -> list:
+        return list(range(input))
+
+    def stream(self, input: int):
+        for i in range(input):
+            self.produced += 1
+            yield i
+
+
+class Square:
+    name = "square"
+    input_type = int
+    output_type = int
+
+    def run(self, input: int) -> int:
+        return input * input
+
+
+class Gate:
+    """Blocks on the first item until released, then passes items through."""
+
+    name = "gate"
+    input_type = int
+    output_type = int
+
+    def __init__(self):
+        self.first_seen = threading.Event()
+        self.release = threading.Event()
+
+    def run(self, input: int) -> int:
+        self.first_seen.set()
+        self.release.wait(timeout=5)
+        return input
+
+
+class FailOn:
+    name = "fail_on"
+    input_type = int
+    output_type = int
+
+    def __init__(self, bad: int):
+        self.bad = bad
+
+    def run(self, input: int) -> int:
+        if input == self.bad:
+            raise ValueError(f"bad item {input}")
+        return input
+
+
+def test_stream_flattens_streaming_stage():
+    pipeline = StreamingPipeline(Frames(), Square())
+
+    assert pipeline.run(4) == [0, 1, 4, 9]
+
+
+def test_add_checks_item_type():
+    class NeedsStr:
+        name = "needs_str"
+        input_type = str
+        output_type = str
+
+    with pytest.raises(TypeError, match="emits int"):
+        StreamingPipeline(Frames(), NeedsStr())
+
+
+def test_downstream_starts_before_upstream_finishes():
+    frames = Frames()
+    gate = Gate()
+    pipeline = StreamingPipeline(frames, gate, queue_size=2)
+
+    consumer = threading.Thread(target=lambda: pipeline.run(100))
+    consumer.start()
+    assert gate.first_seen.wait(timeout=5)
+
+    # The gate holds one item and the bounded queue at most two more, so the
+    # producer must be blocked well before the end of its 100 items.
+    threading.Event().wait(0.3)
+    assert frames.produced <= 1 + 2 + 1
+    gate.release.set()
+    consumer.join(timeout=5)
+    assert frames.produced == 100
+
+
+def test_errors_propagate_and_stop_pipeline():
+    pipeline = StreamingPipeline(Frames(), FailOn(3), Square())
+
+    with pytest.raises(ValueError, match="bad item 3"):
+        pipeline.run(10)
+
+
+def test_closing_early_stops_producer():
+    frames = Frames()
+    pipeline = StreamingPipeline(frames, Square(), queue_size=1)
+
+    items = pipeline.stream(1000)
+    assert next(items) == 0
+    items.close()
+
+    assert frames.produced < 1000
+
+
+def test_vmd_frame_extraction_streams_frames(tmp_path: Path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake_vmd = bin_dir / "vmd"
+    fake_vmd.write_text(
+        "#!/bin/sh\n"
+        "for i in 0 1 2; do\n"
+        '  echo "frame $i" > protein_conf$i.pdb\n'
+        '  echo "VARIDOCK_FRAME_WRITTEN $i"\n'
+        "done\n"
+    )
+    fake_vmd.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:/usr/bin:/bin")
+
+    traj = Trajectory(
+        psf=PSF(path=tmp_path / "system.psf"),
+        pdb=PDB(path=tmp_path / "system.pdb"),
+        coor_files=[tmp_path / "run000.coor"],
+    )
+    out = tmp_path / "frames"
+    stage = VMDFrameExtraction(VMDFrameExtractionConfig(output_dir=out))
+
+    pdbs = list(stage.stream(traj))
+
+    assert [p.path.name for p in pdbs] == [f"protein_conf{i}.pdb" for i in range(3)]
+    assert all(p.path.exists() for p in pdbs)
+    assert "VARIDOCK_FRAME_WRITTEN" in (out / "frame_extraction.tcl").read_text()
+    assert "VARIDOCK_FRAME_WRITTEN 2" in (out / "vmd_frame_extraction.log").read_text()
+
+
+def test_vmd_frame_extraction_waits_for_consumer_and_bounds_disk(tmp_path: Path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake_vmd = bin_dir / "vmd"
+    fake_vmd.write_text(
+        "#!/bin/sh\n"
+        "for i in 0 1 2 3 4 5; do\n"
+        "  read grant || exit 0\n"
+        '  echo "frame $i" > protein_conf$i.pdb\n'
+        "  ls protein_conf*.pdb | wc -l >> on_disk.txt\n"
+        '  echo "VARIDOCK_FRAME_WRITTEN $i"\n'
+        "done\n"
+    )
+    fake_vmd.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:/usr/bin:/bin")
+    traj = Trajectory(
+        psf=PSF(path=tmp_path / "system.psf"),
+        pdb=PDB(path=tmp_path / "system.pdb"),
+        coor_files=[tmp_path / "run000.coor"],
+    )
+    out = tmp_path / "frames"
+    stage = VMDFrameExtraction(VMDFrameExtractionConfig(output_dir=out, prefetch_frames=1, keep_frames=2))
+
+    frames = stage.stream(traj)
+    first = next(frames)
+    threading.Event().wait(0.3)  # VMD must not run ahead while the consumer holds frame 0
+    assert first.path.exists() and sorted(p.name for p in out.glob("protein_conf*.pdb")) == ["protein_conf0.pdb"]
+    rest = list(frames)
+
+    assert [p.path.name for p in rest] == [f"protein_conf{i}.pdb" for i in range(1, 6)]
+    assert max(int(n) for n in (out / "on_disk.txt").read_text().split()) <= 2 + 1
+    assert sorted(p.name for p in out.glob("protein_conf*.pdb")) == ["protein_conf4.pdb", "protein_conf5.pdb"]
+
+
+def test_closing_vmd_stream_stops_vmd(tmp_path: Path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    (bin_dir / "vmd").write_text(
+        "#!/bin/sh\n"
+        "i=0\n"
+        "while read grant; do\n"
+        '  echo "frame $i" > protein_conf$i.pdb\n'
+        '  echo "VARIDOCK_FRAME_WRITTEN $i"\n'
+        "  i=$((i + 1))\n"
+        "done\n"
+    )
+    (bin_dir / "vmd").chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:/usr/bin:/bin")
+    traj = Trajectory(psf=PSF(path=tmp_path / "s.psf"), pdb=PDB(path=tmp_path / "s.pdb"), coor_files=[])
+    out = tmp_path / "frames"
+
+    frames = VMDFrameExtraction(VMDFrameExtractionConfig(output_dir=out)).stream(traj)
+    next(frames)
+    frames.close()
+
+    assert len(list(out.glob("protein_conf*.pdb"))) <= 2
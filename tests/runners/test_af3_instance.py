@@ -0,0 +1,160 @@
+import dataclasses
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from varidock.execution import LocalExecutor, PlanFailedError
+from varidock.plans import RunPlan
+from varidock.runners.af3 import AF3Config, plan_af3
+from varidock.runners.af3_instance import DRIVER, AF3InstanceRunner
+
+# Stands in for run_alphafold.py: absl-style FLAGS that keep their values
+# across parses until unparse_flags(), a ModelRunner that is expensive to
+# build, and a main() that reads the flags.
+FAKE_RUNNER = '''
+import json, os, pathlib
+
+class _Flags:
+    DEFAULTS = {"run_inference": "true"}
+
+    def __init__(self):
+        self.values = dict(self.DEFAULTS)
+
+    def __call__(self, argv):
+        for arg in argv[1:]:
+            if "=" in arg:
+                key, value = arg[2:].split("=", 1)
+            elif arg.startswith("--no"):
+                key, value = arg[4:], "false"
+            else:
+                key, value = arg[2:], "true"
+            self.values[key] = value
+        return argv
+
+    def unparse_flags(self):
+        self.values = dict(self.DEFAULTS)
+
+FLAGS = _Flags()
+
+class ModelRunner:
+    def __init__(self, model_dir):
+        with open(os.environ["FAKE_AF3_LOADS"], "a") as f:
+            f.write(f"{os.getpid()}\\n")
+
+def main(argv):
+    ModelRunner(model_dir=FLAGS.values["model_dir"])
+    name = json.loads(pathlib.Path(FLAGS.values["json_path"]).read_text())["name"]
+    if name == "bad":
+        raise RuntimeError("featurisation failed")
+    out = pathlib.Path(FLAGS.values["output_dir"]) / name
+    out.mkdir(parents=True, exist_ok=True)
+    if FLAGS.values["run_inference"] == "false":
+        (out / f"{name}_data.json").write_text("{}")
+        print("searched", name)
+        return
+    (out / f"{name}_model.cif").write_text("data_" + name + "\\n")
+    print("predicted", name)
+'''
+
+
+@pytest.fixture
+def setup(tmp_path: Path, monkeypatch):
+    """A fake singularity that runs commands on the host, and an AF3Config whose container paths are host paths."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    calls = tmp_path / "singularity_calls"
+    (bin_dir / "singularity").write_text(
+        "#!/bin/sh\n"
+        f'echo "$@" >> {calls}\n'
+        'if [ "$1" = instance ]; then exit 0; fi\n'
+        "shift\n"  # exec
+        'while [ "${1#instance://}" = "$1" ]; do shift; done\n'
+        "shift\n"
+        'exec "$@"\n'
+    )
+    (bin_dir / "singularity").chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_AF3_LOADS", str(tmp_path / "loads"))
+
+    runner_dir = tmp_path / "runner"
+    runner_dir.mkdir()
+    (runner_dir / "run_alphafold.py").write_text(FAKE_RUNNER)
+    cfg = AF3Config(
+        sif_path=tmp_path / "af3.sif",
+        model_dir=tmp_path / "models",
+        db_dir=tmp_path / "db",
+        runner_script=runner_dir / "run_alphafold.py",
+        python_entrypoint=sys.executable,
+        container_runner_dir=str(runner_dir),
+    )
+    runner = AF3InstanceRunner(
+        cfg,
+        queue_dir=tmp_path / "queue",
+        data_roots=[tmp_path / "screen"],
+        name="test_af3",
+        poll_seconds=0.05,
+        container_driver_dir=str(DRIVER.parent),
+    )
+    yield cfg, runner, tmp_path, calls
+    runner.close(timeout=10)
+
+
+def _plan(cfg: AF3Config, screen: Path, name: str) -> RunPlan:
+    return plan_af3(cfg, name, json.dumps({"name": name, "sequences": []}), screen / name)
+
+
+def test_jobs_share_one_instance_and_model(setup):
+    cfg, runner, tmp_path, calls = setup
+    executor = LocalExecutor(runner=runner)
+
+    for name in ("a", "b", "c"):
+        run = executor.execute(_plan(cfg, tmp_path / "screen", name))
+        assert "predicted " + name in run.stdout
+
+    for name in ("a", "b", "c"):
+        assert (tmp_path / "screen" / name / "af_output" / name / f"{name}_model.cif").exists()
+    assert len((tmp_path / "loads").read_text().split()) == 1  # ModelRunner built once
+    starts = [line for line in calls.read_text().splitlines() if line.startswith("instance start")]
+    assert len(starts) == 1
+    assert f"--bind {(tmp_path / 'screen').resolve()}:{(tmp_path / 'screen').resolve()}" in starts[0]
+
+
+def test_flags_do_not_carry_over_between_jobs(setup):
+    cfg, runner, tmp_path, _ = setup
+    executor = LocalExecutor(runner=runner)
+    msa_cfg = dataclasses.replace(cfg, script_args=["--norun_inference"])
+
+    msa_run = executor.execute(_plan(msa_cfg, tmp_path / "screen", "msa"))
+    fold_run = executor.execute(_plan(cfg, tmp_path / "screen", "fold"))
+
+    assert "searched msa" in msa_run.stdout
+    assert "predicted fold" in fold_run.stdout
+    assert (tmp_path / "screen" / "fold" / "af_output" / "fold" / "fold_model.cif").exists()
+
+
+def test_failed_job_does_not_stop_the_driver(setup):
+    cfg, runner, tmp_path, _ = setup
+    executor = LocalExecutor(runner=runner)
+
+    with pytest.raises(PlanFailedError, match="featurisation failed"):
+        executor.execute(_plan(cfg, tmp_path / "screen", "bad"))
+    executor.execute(_plan(cfg, tmp_path / "screen", "good"))
+
+    assert (tmp_path / "screen" / "good" / "af_output" / "good" / "good_model.cif").exists()
+
+
+def test_close_stops_instance_and_rejects_paths_outside_roots(setup):
+    cfg, runner, tmp_path, calls = setup
+
+    with pytest.raises(ValueError, match="data root"):
+        runner.run(_plan(cfg, tmp_path / "elsewhere", "x"))
+
+    runner.start()
+    driver = runner._driver
+    runner.close(timeout=10)
+
+    assert driver.returncode == 0
+    assert calls.read_text().splitlines()[-1] == "instance stop test_af3"
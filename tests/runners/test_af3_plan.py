@@ -31,4 +31,19 @@ def test_af3_plan_has_expected_paths(tmp_path: Path):
 
     assert (job.output_dir / "af_input" / "4UIN.json") in plan.files_text
     assert plan.argv[0:2] == ["singularity", "exec"]
-    assert (job.output_dir / "af_output" / job.name.lower() / f"{job.name.lower()}_model.cif") in plan.expected_outputs
\ No newline at end of file
+    assert (job.output_dir / "af_output" / job.name.lower() / f"{job.name.lower()}_model.cif") in plan.expected_outputs
+
+def test_af3_plan_binds_msa_dir(tmp_path: Path):
+    runner = tmp_path / "run_alphafold.py"
+    runner.write_text("# dummy\n")
+    cfg = AF3Config(
+        sif_path=Path("/fake/af3.sif"),
+        model_dir=Path("/fake/models"),
+        db_dir=Path("/fake/db"),
+        runner_script=runner,
+        msa_dir=tmp_path / "msas",
+    )
+
+    plan = plan_af3(cfg, "job", "{}", tmp_path / "out")
+
+    assert f"{(tmp_path / 'msas').resolve()}:/root/af_msas" in plan.argv
@@ -0,0 +1,137 @@
+"""Tests for AF3 inference token-bucket batching."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from varidock.types import AF3MergedInput
+from varidock.stages.alphafold3.batching import (
+    CompileLog,
+    InferenceJob,
+    bucket_for,
+    count_tokens,
+    plan_inference_batches,
+    run_inference_batches,
+    smiles_heavy_atoms,
+)
+
+
+def _merged(tmp_path: Path, name: str, residues: int, ligand: dict | None = None) -> AF3MergedInput:
+    sequences = [{"protein": {"id": ["A"], "sequence": "M" * residues, "unpairedMsa": ">q\n" + "M" * residues}}]
+    if ligand:
+        sequences.append({"ligand": {"id": ["L"], **ligand}})
+    path = tmp_path / f"{name}.json"
+    path.write_text(json.dumps({"name": name, "sequences": sequences}))
+    return AF3MergedInput(json_path=path, name=name, output_dir=tmp_path)
+
+
+def test_smiles_heavy_atoms():
+    assert smiles_heavy_atoms("CC(=O)Oc1ccccc1C(=O)O") == 13  # aspirin
+    assert smiles_heavy_atoms("[NH4+].[Cl-]") == 2
+    assert smiles_heavy_atoms("[2H]C([2H])([2H])Br") == 2
+
+
+def test_count_tokens(tmp_path: Path):
+    path = tmp_path / "complex.json"
+    path.write_text(
+        json.dumps(
+            {
+                "sequences": [
+                    {"protein": {"id": ["A", "B"], "sequence": "MKVLF"}},
+                    {"dna": {"id": "C", "sequence": "ACGT"}},
+                    {"ligand": {"id": ["L"], "ccdCodes": ["ATP"]}},
+                    {"ligand": {"id": "M", "smiles": "CCO"}},
+                ]
+            },
+            indent=2,
+        )
+    )
+    assert count_tokens(path) == 2 * 5 + 4 + 31 + 3
+    assert count_tokens(path, ccd_heavy_atoms={"ATP": 1}) == 2 * 5 + 4 + 1 + 3
+
+
+def test_bucket_for():
+    assert bucket_for(1) == 256
+    assert bucket_for(256) == 256
+    assert bucket_for(257) == 512
+    assert bucket_for(6000) == 6000
+    assert bucket_for(100, buckets=[64, 128]) == 128
+
+
+def test_plan_keeps_workers_within_buckets(tmp_path: Path):
+    sizes = [100, 900, 300, 100, 900, 300, 100, 900] * 3  # interleaved: every worker meets every bucket
+    inputs = [_merged(tmp_path, f"c{i}", n) for i, n in enumerate(sizes)]
+
+    plan = plan_inference_batches(inputs, workers=3)
+
+    assert sorted(j.input.name for w in plan.workers for j in w) == sorted(m.name for m in inputs)
+    assert sum(plan.compiles().values()) < plan.compiles_in_given_order == 9
+    for jobs in plan.workers:
+        assert [j.bucket for j in jobs] == sorted(j.bucket for j in jobs)
+    assert set(plan.estimated_compile_seconds(lambda b: 1.0)) == {256, 512, 1024}
+
+
+def test_plan_splits_a_dominant_bucket(tmp_path: Path):
+    inputs = [_merged(tmp_path, f"c{i}", 1000) for i in range(8)]
+
+    plan = plan_inference_batches(inputs, workers=4)
+
+    assert [len(w) for w in plan.workers] == [2, 2, 2, 2]
+    assert plan.compiles() == {1024: 4}
+    with pytest.raises(ValueError):
+        plan_inference_batches(inputs, workers=0)
+
+
+def test_split_never_takes_more_than_the_share(tmp_path: Path):
+    sizes = [1000, 600, 600, 600, 300]
+    inputs = [_merged(tmp_path, f"c{i}", n) for i, n in enumerate(sizes)]
+
+    plan = plan_inference_batches(inputs, workers=2)
+
+    # The 768 bucket is split 1 + 2; rounding 1.6 jobs of room up to 2 would
+    # leave the first worker at 1024**2 + 2 * 768**2.
+    loads = sorted(sum(j.bucket**2 for j in w) for w in plan.workers)
+    assert loads == [512**2 + 2 * 768**2, 1024**2 + 768**2]
+
+
+def test_compile_log_summary(tmp_path: Path):
+    log = CompileLog(tmp_path / "compile.jsonl")
+    job = InferenceJob(input=_merged(tmp_path, "x", 10), tokens=10, bucket=256)
+    times = iter([0.0, 0.05, 0.01, 0.01])
+
+    import time
+
+    for _ in range(4):
+        log.timed(0, job, lambda: time.sleep(next(times)))
+    with pytest.raises(RuntimeError):
+        log.timed(1, job, lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+
+    (summary,) = log.summary(estimated={256: 60.0})
+    assert summary.bucket == 256 and summary.jobs == 4 and summary.compiles == 1
+    assert summary.estimated_seconds == 60.0
+    assert summary.observed_seconds == pytest.approx(0.0, abs=0.02)
+    assert [r.first_in_bucket for r in log.records()] == [True, False, False, False, True]
+
+
+def test_run_inference_batches(tmp_path: Path):
+    inputs = [_merged(tmp_path, f"c{i}", n) for i, n in enumerate([100, 600, 100, 600])]
+    plan = plan_inference_batches(inputs, workers=2)
+
+    class FakeStage:
+        def __init__(self):
+            self.seen = []
+
+        def run(self, merged):
+            self.seen.append(merged.name)
+            return merged.name
+
+    stages = [FakeStage(), FakeStage()]
+    log = CompileLog(tmp_path / "compile.jsonl")
+    outputs = run_inference_batches(plan, stages, log)
+
+    assert outputs == [[j.input.name for j in w] for w in plan.workers]
+    assert [s.seen for s in stages] == outputs
+    assert len(log.records()) == 4
+    with pytest.raises(ValueError):
+        run_inference_batches(plan, stages[:1])
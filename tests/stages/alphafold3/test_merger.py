@@ -308,3 +308,190 @@ class TestErrorHandling:
 
         with pytest.raises(ValueError, match="must have an AF3 sequence ID"):
             merger.run(msa_outputs=[msa], ligands=[ligand])
+
+
+# --- Streaming merge ---
+
+
+class TestStreaming:
+    """streaming=True must produce the same JSON object as the default path."""
+
+    def _awkward_monomer(self, tmp_path: Path, protein_id: str, chain_id: str) -> AF3MSAOutput:
+        msa = ">query\nMKV\\LF\n>hit \"1\" ü\n" + "MKVLF\n" * 5000
+        data = {
+            "dialect": "alphafold3",
+            "name": protein_id,
+            "sequences": [
+                {"ligand": {"id": ["Z"], "ccdCodes": ["HEM"]}},
+                {"protein": {"id": chain_id, "sequence": "MKVLF", "unpairedMsa": msa, "pairedMsa": "",
+                             "templates": [{"mmcif": "data_x\n" * 100, "queryIndices": [0, 1], "templateIndices": [0, 1]}]}},
+                {"protein": {"id": "Q", "sequence": "WWWW", "unpairedMsa": "ignored"}},
+            ],
+            "modelSeeds": [1],
+        }
+        path = tmp_path / protein_id / f"{protein_id}_data.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, indent=4, ensure_ascii=False))
+        return AF3MSAOutput(data_json_path=path, protein_id=protein_id, chain_id=chain_id)
+
+    def test_matches_default_merge(self, tmp_path: Path, monkeypatch):
+        import varidock.io.json_spans as json_spans
+
+        monkeypatch.setattr(json_spans, "DEFAULT_BUFFER_SIZE", 7)  # exercise chunk boundaries
+        msas = [self._awkward_monomer(tmp_path, "P1", "A"), _make_monomer_json(tmp_path, "P2", "B", "ARNDQ")]
+        ligands = [Ligand(name="atp", ccd="ATP", af3_sequence_id="L")]
+
+        plain = AF3MSAMerger(AF3MSAMergerConfig(output_dir=tmp_path / "plain")).run(msas, ligands)
+        streamed = AF3MSAMerger(AF3MSAMergerConfig(output_dir=tmp_path / "stream", streaming=True)).run(msas, ligands)
+
+        assert json.loads(streamed.json_path.read_text()) == json.loads(plain.json_path.read_text())
+        assert streamed.json_path.read_bytes().count(b"\n") == 1  # compact, newline-terminated
+        assert streamed.name == plain.name
+
+    def test_errors_match_default_path(self, tmp_path: Path):
+        merger = AF3MSAMerger(AF3MSAMergerConfig(output_dir=tmp_path / "out", streaming=True))
+        bad = tmp_path / "bad_data.json"
+        bad.write_text(json.dumps({"sequences": [{"ligand": {"id": ["L"]}}]}))
+        with pytest.raises(ValueError, match="No protein entry"):
+            merger.run([AF3MSAOutput(data_json_path=bad, protein_id="bad", chain_id="A")])
+        msa = _make_monomer_json(tmp_path, "PROT_A", "A", "MKVLF")
+        with pytest.raises(ValueError, match="cannot have both"):
+            merger.run([msa], ligands=[Ligand(name="x", smiles="CC", ccd="X", af3_sequence_id="L")])
+
+
+# --- MSA file references ---
+
+
+class TestMsaPaths:
+    """msa_dir writes MSAs once and references them by path."""
+
+    def _merger(self, tmp_path: Path) -> AF3MSAMerger:
+        return AF3MSAMerger(AF3MSAMergerConfig(output_dir=tmp_path / "out", msa_dir=tmp_path / "msas"))
+
+    def test_entries_reference_files(self, tmp_path: Path):
+        msa_a = _make_monomer_json(tmp_path, "PROT_A", "A", "MKVLF")
+        data = json.loads(msa_a.data_json_path.read_text())
+        data["sequences"][0]["protein"]["templates"] = [{"mmcif": "data_1abc\n", "queryIndices": [0], "templateIndices": [3]}]
+        msa_a.data_json_path.write_text(json.dumps(data))
+
+        result = self._merger(tmp_path).run([msa_a], [Ligand(name="atp", ccd="ATP", af3_sequence_id="L")])
+
+        protein = json.loads(result.json_path.read_text())["sequences"][0]["protein"]
+        (host,) = (tmp_path / "msas").iterdir()
+        assert host.name.startswith("PROT_A-") and len(host.name) == len("PROT_A-") + 12
+        container = f"/root/af_msas/{host.name}"
+        assert "unpairedMsa" not in protein and "pairedMsa" not in protein
+        assert protein["unpairedMsaPath"] == f"{container}/unpaired.a3m"
+        assert protein["pairedMsaPath"] == f"{container}/paired.a3m"
+        assert protein["templates"] == [
+            {"mmcifPath": f"{container}/template_0.cif", "queryIndices": [0], "templateIndices": [3]}
+        ]
+        assert (host / "unpaired.a3m").read_text() == "unpaired_msa_for_PROT_A"
+        assert (host / "paired.a3m").read_text() == "paired_msa_for_PROT_A"
+        assert (host / "template_0.cif").read_text() == "data_1abc\n"
+
+    def test_files_written_once_per_monomer(self, tmp_path: Path):
+        msa_a = _make_monomer_json(tmp_path, "PROT_A", "A", "MKVLF")
+        merger = self._merger(tmp_path)
+        merger.run([msa_a], [Ligand(name="atp", ccd="ATP", af3_sequence_id="L")])
+        (host,) = (tmp_path / "msas").iterdir()
+        first = (host / "unpaired.a3m").stat().st_ino
+
+        merger.run([msa_a], [Ligand(name="gtp", ccd="GTP", af3_sequence_id="L")])
+        assert list((tmp_path / "msas").iterdir()) == [host]
+        assert (host / "unpaired.a3m").stat().st_ino == first
+
+        _make_monomer_json(tmp_path, "PROT_A", "A", "MKVLFW")  # new MSA run replaces the data JSON
+        result = merger.run([msa_a])
+        assert len(list((tmp_path / "msas").iterdir())) == 2
+        assert (host / "unpaired.a3m").stat().st_ino == first
+        assert json.loads(result.json_path.read_text())["sequences"][0]["protein"]["sequence"] == "MKVLFW"
+
+    def test_same_protein_id_from_different_sources(self, tmp_path: Path):
+        first = _make_monomer_json(tmp_path / "run1", "PROT_A", "A", "MKVLF")
+        second = _make_monomer_json(tmp_path / "run2", "PROT_A", "B", "MKVLFW")
+
+        result = self._merger(tmp_path).run([first, second])
+
+        proteins = [s["protein"] for s in json.loads(result.json_path.read_text())["sequences"]]
+        paths = [p["unpairedMsaPath"] for p in proteins]
+        assert paths[0] != paths[1]
+        assert len(list((tmp_path / "msas").iterdir())) == 2
+        assert not list((tmp_path / "msas").glob(".*"))
+
+    def test_missing_msas_stay_null(self, tmp_path: Path):
+        path = tmp_path / "bare_data.json"
+        path.write_text(json.dumps({"sequences": [{"protein": {"id": ["A"], "sequence": "MKV"}}]}))
+
+        result = self._merger(tmp_path).run([AF3MSAOutput(data_json_path=path, protein_id="bare", chain_id="A")])
+
+        protein = json.loads(result.json_path.read_text())["sequences"][0]["protein"]
+        assert protein["unpairedMsa"] is None and protein["pairedMsa"] is None
+        assert protein["templates"] is None and protein["modifications"] == []
+
+
+# --- Combinatorial grid ---
+
+
+class TestMergeGrid:
+    """merge_grid builds the same JSONs as run, loading each monomer once."""
+
+    def _inputs(self, tmp_path: Path):
+        proteins = [_make_monomer_json(tmp_path, f"P{i}", "A", "MKVLF") for i in range(3)]
+        ligands = [Ligand(name=f"lig{j}", ccd=f"L{j}", af3_sequence_id="L") for j in range(4)]
+        return proteins, ligands
+
+    @pytest.mark.parametrize("options", [{}, {"streaming": True}, {"msa_dir": "msas"}])
+    def test_product_matches_run(self, tmp_path: Path, options: dict):
+        proteins, ligands = self._inputs(tmp_path)
+        if "msa_dir" in options:
+            options = {"msa_dir": tmp_path / options["msa_dir"]}
+        merger = AF3MSAMerger(AF3MSAMergerConfig(output_dir=tmp_path / "grid", **options))
+        single = AF3MSAMerger(AF3MSAMergerConfig(output_dir=tmp_path / "single", **options))
+
+        results = merger.merge_grid(proteins, ligands, max_workers=4)
+
+        assert [r.name for r in results] == [f"p{i}_lig{j}" for i in range(3) for j in range(4)]
+        for result, (i, j) in zip(results, [(i, j) for i in range(3) for j in range(4)]):
+            expected = single.run([proteins[i]], [ligands[j]])
+            assert json.loads(result.json_path.read_text()) == json.loads(expected.json_path.read_text())
+
+    def test_each_monomer_parsed_once(self, tmp_path: Path, monkeypatch):
+        proteins, ligands = self._inputs(tmp_path)
+        merger = AF3MSAMerger(AF3MSAMergerConfig(output_dir=tmp_path / "grid"))
+        loads = []
+        original = AF3MSAMerger._load_monomer
+        monkeypatch.setattr(AF3MSAMerger, "_load_monomer", lambda self, m, s: loads.append(m) or original(self, m, s))
+
+        merger.merge_grid(proteins, ligands)
+
+        assert len(loads) == 3
+
+    def test_pairing_modes(self, tmp_path: Path):
+        proteins, ligands = self._inputs(tmp_path)
+        merger = AF3MSAMerger(AF3MSAMergerConfig(output_dir=tmp_path / "grid"))
+
+        assert [r.name for r in merger.merge_grid(proteins, ligands[:3], pairing="zip")] == ["p0_lig0", "p1_lig1", "p2_lig2"]
+        assert [r.name for r in merger.merge_grid(proteins, ligands, pairing=[(2, 3), (0, 1)])] == ["p2_lig3", "p0_lig1"]
+        assert [r.name for r in merger.merge_grid([proteins[:2]], None)] == ["p0_p1"]
+        with pytest.raises(ValueError, match="zip"):
+            merger.merge_grid(proteins, ligands, pairing="zip")
+        with pytest.raises(IndexError):
+            merger.merge_grid(proteins, ligands, pairing=[(3, 0)])
+
+    def test_rerun_writes_only_new_combinations(self, tmp_path: Path):
+        proteins, ligands = self._inputs(tmp_path)
+        merger = AF3MSAMerger(AF3MSAMergerConfig(output_dir=tmp_path / "grid"))
+        first = merger.merge_grid(proteins, ligands[:2])
+        before = {r.name: r.json_path.stat().st_mtime_ns for r in first}
+
+        second = merger.merge_grid(proteins, ligands)
+
+        rewritten = {r.name for r in second if r.name in before and r.json_path.stat().st_mtime_ns != before[r.name]}
+        assert rewritten == set()
+        assert all(r.json_path.exists() for r in second)
+
+        _make_monomer_json(tmp_path, "P0", "A", "MKVLFW")
+        third = merger.merge_grid(proteins, ligands)
+        changed = {r.name for r in third if r.name in before and r.json_path.stat().st_mtime_ns != before[r.name]}
+        assert changed == {"p0_lig0", "p0_lig1"}
@@ -0,0 +1,103 @@
+"""Tests for MSAStore and its use in AF3MSA."""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from varidock.runners.af3 import AF3Config
+from varidock.stages.alphafold3.input_builder import AF3InputBuilder
+from varidock.stages.alphafold3.msa import AF3MSA
+from varidock.stages.alphafold3.msa_store import MSAStore
+from varidock.types import ProteinSequence
+
+
+class FakeDataPipeline:
+    """Executor that 'runs' the AF3 data pipeline by writing a data JSON."""
+
+    def __init__(self):
+        self.runs = []
+
+    def execute(self, plan, write_only=False, overwrite_inputs=False):
+        [out] = plan.expected_outputs
+        name = out.name.removesuffix("_data.json")
+        protein = json.loads(plan.files_text[plan.work_dir / "af_input" / f"{name}.json"])["sequences"][0]["protein"]
+        out.parent.mkdir(parents=True, exist_ok=True)
+        entry = {"id": protein["id"], "sequence": protein["sequence"], "unpairedMsa": f">{name}"}
+        out.write_text(json.dumps({"name": name, "sequences": [{"protein": entry}]}))
+        self.runs.append(name)
+
+
+@pytest.fixture
+def af3_config(tmp_path: Path) -> AF3Config:
+    runner = tmp_path / "run_alphafold.py"
+    runner.write_text("")
+    return AF3Config(sif_path=Path("af3.sif"), model_dir=tmp_path, db_dir=tmp_path / "db", runner_script=runner)
+
+
+def _msa_input(tmp_path: Path, name: str, sequence: str):
+    return AF3InputBuilder(tmp_path / "screen").run(ProteinSequence(sequence=sequence, name=name))
+
+
+def test_same_sequence_under_another_name_is_reused(tmp_path, af3_config):
+    store = MSAStore(tmp_path / "store")
+    executor = FakeDataPipeline()
+    stage = AF3MSA(af3_config, executor, write_only=False, msa_store=store)
+
+    first = stage.run(_msa_input(tmp_path, "AT1G01010", "MKVLAG"))
+    second = stage.run(_msa_input(tmp_path, "ortholog", "mkv lag\n"))
+    third = stage.run(_msa_input(tmp_path, "other", "MKVLAGW"))
+
+    assert executor.runs == ["AT1G01010", "other"]
+    assert (store.hits, len(store.keys())) == (1, 2)
+    reused = json.loads(second.data_json_path.read_text())
+    assert reused == {**json.loads(first.data_json_path.read_text()), "name": "ortholog"}
+    assert second.data_json_path.stat().st_ino != first.data_json_path.stat().st_ino
+    assert json.loads(third.data_json_path.read_text())["sequences"][0]["protein"]["unpairedMsa"] == ">other"
+
+
+def test_hit_is_relabelled_for_the_reusing_protein(tmp_path):
+    store = MSAStore(tmp_path / "store")
+    src = tmp_path / "first_data.json"
+    msa = ">query\\nMKV\\n" * 1000
+    src.write_text(f'{{"name": "first", "sequences": [{{"protein": {{"id": ["A"], "unpairedMsa": "{msa}"}}}}]}}')
+    store.put("ab" * 32, src, "MKV")
+
+    renamed = tmp_path / "b" / "second_data.json"
+    assert store.fetch("ab" * 32, renamed, name="second", chain_id="B")
+    same = tmp_path / "a" / "first_data.json"
+    assert store.fetch("ab" * 32, same, name="first", chain_id="A")
+
+    data = json.loads(renamed.read_text())
+    assert (data["name"], data["sequences"][0]["protein"]["id"]) == ("second", ["B"])
+    assert data["sequences"][0]["protein"]["unpairedMsa"] == json.loads(src.read_text())["sequences"][0]["protein"]["unpairedMsa"]
+    assert same.stat().st_ino == store.lookup("ab" * 32).stat().st_ino  # nothing to relabel: linked
+
+
+def test_key_depends_on_databases_and_search_args(tmp_path, af3_config):
+    from dataclasses import replace
+
+    store = MSAStore(tmp_path / "store")
+    base = store.key("MKV", af3_config)
+    assert store.key(" mkv", replace(af3_config, script_args=("--norun_inference",))) == base
+    assert store.key("MKV", replace(af3_config, script_args=("--max_template_date=2020-01-01",))) != base
+    assert store.key("MKV", replace(af3_config, db_dir=tmp_path / "db2")) != base
+    assert MSAStore(tmp_path / "store", db_version="v2").key("MKV", af3_config) != base
+
+
+def test_put_is_atomic_and_read_only(tmp_path):
+    store = MSAStore(tmp_path / "store", link="copy")
+    src = tmp_path / "x_data.json"
+    src.write_text("{}")
+
+    stored = store.put("ab" * 32, src, "MKV")
+    src.write_text('{"changed": true}')
+    assert store.put("ab" * 32, src, "MKV") == stored  # first writer wins
+    assert stored.read_text() == "{}"
+    assert not os.access(stored, os.W_OK) or os.geteuid() == 0
+    assert [p.name for p in stored.parent.parent.iterdir()] == ["ab" * 32]  # no temp dirs left behind
+
+    dest = tmp_path / "out" / "y_data.json"
+    assert store.fetch("ab" * 32, dest) and dest.read_text() == "{}"
+    assert not store.fetch("cd" * 32, tmp_path / "missing.json")
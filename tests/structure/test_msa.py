@@ -21,3 +21,13 @@ def test_write_unpaired_a3m_raises_when_none(tmp_path):
 
     with pytest.raises(ValueError):
         msa.write_unpaired_a3m(tmp_path / "test.a3m")
+
+
+def test_write_paired_a3m(tmp_path):
+    msa = MSAData(unpaired=None, paired=">query\nMVLS\n")
+
+    msa.write_paired_a3m(tmp_path / "paired.a3m")
+
+    assert (tmp_path / "paired.a3m").read_text() == ">query\nMVLS\n"
+    with pytest.raises(ValueError):
+        MSAData().write_paired_a3m(tmp_path / "none.a3m")
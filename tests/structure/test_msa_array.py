@@ -0,0 +1,85 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from varidock.structure import MSAArray, MSAData  # noqa: E402
+from varidock.structure.msa_array import trim_a3m  # noqa: E402
+
+A3M = (
+    ">query\nMKVLF\n"
+    ">hit1 evalue=1e-30\nMKaaVLF\n"
+    ">hit2\nMK-LFww\n"
+    ">hit3\nMKaaVLF\n"
+    ">hit4\nM---W\n"
+    ">hit5 wrapped\nMRV\nLYc\n"
+)
+
+
+def test_round_trip_and_matrices():
+    msa = MSAArray.from_a3m(A3M)
+
+    assert msa.depth == 6 and msa.length == 5 and msa.query == "MKVLF"
+    assert msa.residues[2].tobytes() == b"MK-LF"
+    assert msa.insertions[1].tolist() == [0, 0, 2, 0, 0, 0]
+    assert msa.insertions[2].tolist() == [0, 0, 0, 0, 0, 2]
+    assert msa.insertions[5].tolist() == [0, 0, 0, 0, 0, 1]
+    assert msa.to_a3m() == A3M.replace("MRV\nLYc", "MRVLYc")
+
+
+def test_rejects_ragged_rows():
+    with pytest.raises(ValueError, match="aligned columns"):
+        MSAArray.from_a3m(">q\nMKV\n>h\nMK\n")
+    with pytest.raises(ValueError):
+        MSAArray.from_a3m("")
+
+
+def test_filters_keep_query_and_letters():
+    msa = MSAArray.from_a3m(A3M)
+
+    deduped = msa.dedup()
+    assert [h.split()[0] for h in deduped.headers] == ["query", "hit2", "hit4", "hit5"]
+    assert msa.coverage().tolist() == pytest.approx([1, 1, 0.8, 1, 0.4, 1])
+    assert msa.identity()[[2, 5]].tolist() == pytest.approx([1.0, 0.6])  # gaps are not mismatches
+
+    covered = msa.filter_coverage(0.5).filter_identity(max_identity=0.9)
+    assert [h.split()[0] for h in covered.headers] == ["query", "hit5"]
+    assert covered.to_a3m() == ">query\nMKVLF\n>hit5 wrapped\nMRVLYc\n"
+    assert msa.top(2).headers == ["query", "hit1 evalue=1e-30"]
+    empty = msa.select([])
+    assert (empty.depth, empty.length) == (0, 5)
+
+
+def test_subsample_diverse_prefers_distinct_rows():
+    rows = ["AAAAAAAA"] * 5 + ["CCCCCCCC", "AAAACCCC"]
+    msa = MSAArray.from_a3m("".join(f">s{i}\n{r}\n" for i, r in enumerate(rows)))
+
+    picked = msa.subsample_diverse(3)
+
+    assert picked.headers == ["s0", "s5", "s6"]
+    assert msa.subsample_diverse(100) is msa
+
+
+def test_npy_cache_is_memory_mapped(tmp_path):
+    path = tmp_path / "unpaired.a3m"
+    path.write_text(A3M)
+    cache = tmp_path / "unpaired.msa"
+
+    first = MSAArray.from_a3m_file(path, cache_dir=cache)
+    second = MSAArray.from_a3m_file(path, cache_dir=cache)
+
+    assert isinstance(second.residues, np.memmap)
+    assert second.to_a3m() == first.to_a3m()
+    assert second.dedup().depth == 4
+
+    path.write_text(">q\nMK\n")
+    assert MSAArray.from_a3m_file(path, cache_dir=cache).depth == 1
+
+
+def test_msa_data_and_trim():
+    msa = MSAArray.from_msa_data(MSAData(unpaired=A3M))
+    assert msa.to_msa_data().unpaired == msa.to_a3m()
+    with pytest.raises(ValueError):
+        MSAArray.from_msa_data(MSAData(unpaired=A3M), paired=True)
+
+    trimmed = trim_a3m(A3M, max_depth=3, min_coverage=0.5)
+    assert trimmed.startswith(">query\nMKVLF\n") and trimmed.count(">") == 3
@@ -0,0 +1,124 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from varidock.utils.slurm import ClusterState, JobInfo, fetch_squeue, job_exists, get_slurm_queue_count, parse_slurm_time
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _counting_fetch(jobs):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return list(jobs)
+
+    fetch.calls = calls
+    return fetch
+
+
+def _script(d: Path, name: str) -> Path:
+    d.mkdir(parents=True, exist_ok=True)
+    script = d / "run.sh"
+    script.write_text(f"#!/bin/bash\n#SBATCH --job-name={name}\n")
+    return script
+
+
+def test_thousands_of_checks_cost_one_query(tmp_path: Path):
+    jobs = [JobInfo(str(i), f"sim{i}", "RUNNING", str(tmp_path / f"sim{i}")) for i in range(0, 5000, 2)]
+    fetch = _counting_fetch(jobs)
+    state = ClusterState(fetch=fetch)
+
+    queued = [d for d in range(5000) if state.by_work_dir(tmp_path / f"sim{d}")]
+
+    assert len(queued) == 2500
+    assert len(fetch.calls) == 1
+
+
+def test_ttl_refresh():
+    clock = Clock()
+    fetch = _counting_fetch([JobInfo("1", "a", "PENDING")])
+    state = ClusterState(ttl=10, fetch=fetch, clock=clock)
+
+    state.count()
+    clock.now = 9
+    state.count()
+    assert len(fetch.calls) == 1
+
+    clock.now = 11
+    state.count()
+    assert len(fetch.calls) == 2
+
+
+def test_indexes_and_finished_jobs(tmp_path: Path):
+    state = ClusterState(
+        fetch=lambda: [
+            JobInfo("10", "eq", "COMPLETED", str(tmp_path)),
+            JobInfo("11_0", "msa", "RUNNING", str(tmp_path / "a")),
+            JobInfo("11_1", "msa", "PENDING", str(tmp_path / "a")),
+        ]
+    )
+
+    assert state.count() == 2
+    assert state.by_id("10").state == "COMPLETED"
+    assert [j.job_id for j in state.by_name("msa")] == ["11_0", "11_1"]
+    assert state.by_name("eq") == []
+    assert state.by_name("eq", active_only=False)[0].job_id == "10"
+    assert state.names() == {"msa"}
+
+
+def test_helpers_route_through_state(tmp_path: Path):
+    fetch = _counting_fetch([JobInfo("5", "prod_x", "RUNNING")])
+    state = ClusterState(fetch=fetch)
+
+    assert job_exists(_script(tmp_path / "x", "prod_x"), state)
+    assert not job_exists(_script(tmp_path / "y", "prod_y"), state)
+    assert get_slurm_queue_count(state) == 1
+
+    state.note_submitted(6, "prod_y", tmp_path / "y")
+    assert job_exists(tmp_path / "y" / "run.sh", state)
+    assert state.by_work_dir(tmp_path / "y")[0].job_id == "6"
+    assert len(fetch.calls) == 1
+
+
+def test_fetch_squeue_parses_pipe_format(tmp_path: Path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    squeue = bin_dir / "squeue"
+    squeue.write_text(
+        "#!/bin/sh\n"
+        f"echo '123|eq|RUNNING|None|{tmp_path}'\n"
+        f"echo '124_3|odd|name|PENDING|DependencyNeverSatisfied|{tmp_path}/b'\n"
+    )
+    squeue.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    jobs = fetch_squeue()
+
+    assert jobs[0] == JobInfo("123", "eq", "RUNNING", str(tmp_path.resolve()))
+    assert (jobs[1].job_id, jobs[1].name, jobs[1].state) == ("124_3", "odd|name", "PENDING")
+    assert jobs[1].reason == "DependencyNeverSatisfied" and jobs[1].never_starts
+    assert not jobs[0].never_starts
+
+
+@pytest.mark.parametrize(
+    "text, seconds",
+    [
+        ("30", 1800),
+        ("05:30", 330),
+        ("04:00:00", 4 * 3600),
+        ("1-02:03:04", 93784),
+        ("2-12", 60 * 3600),
+        ("UNLIMITED", None),
+    ],
+)
+def test_parse_slurm_time(text, seconds):
+    assert parse_slurm_time(text) == seconds
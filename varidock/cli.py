@@ -87,3 +87,126 @@ def check():
         click.echo("\n✓ All configured paths exist.")
     else:
         click.echo("\n✗ Some paths are missing.")
+
+
+@cli.group()
+def cache():
+    """Inspect and prune the stage result cache."""
+    pass
+
+
+@cache.command()
+@click.option("--dir", "cache_dir", type=click.Path(path_type=Path), default=None, help="Cache directory (defaults to the configured one).")
+def stats(cache_dir):
+    """Show the number and size of cached stage results."""
+    from varidock.pipeline.cache import StageCache
+
+    store = StageCache(cache_dir) if cache_dir else StageCache.from_config()
+    s = store.stats()
+    click.echo(f"Cache: {store.root}")
+    click.echo(f"  entries: {s.entries} (limit {store.max_entries})")
+    click.echo(f"  size:    {s.total_bytes / 1e6:.1f} MB")
+
+
+@cache.command()
+@click.option("--dir", "cache_dir", type=click.Path(path_type=Path), default=None, help="Cache directory (defaults to the configured one).")
+@click.option("--max-entries", type=int, default=None, help="Entries to keep (defaults to the configured limit, 0 clears the cache).")
+def prune(cache_dir, max_entries):
+    """Evict least recently used stage results."""
+    from varidock.pipeline.cache import StageCache
+
+    store = StageCache(cache_dir) if cache_dir else StageCache.from_config()
+    removed = store.prune(max_entries)
+    click.echo(f"✓ Removed {removed} entries from {store.root}")
+
+
+@cli.group()
+def profile():
+    """Inspect profiling records written by varidock.pipeline.Profiler."""
+    pass
+
+
+@profile.command()
+@click.argument("path", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--kind", default=None, help="Only summarize records of this kind (e.g. 'stage' or 'plan').")
+def summarize(path, kind):
+    """Print per-stage wall-time percentiles from a profile JSONL file."""
+    from varidock.pipeline.profiling import load_records, summarize as summarize_records
+
+    records = [r for r in load_records(path) if kind is None or r.kind == kind]
+    if not records:
+        click.echo("No records.")
+        return
+
+    click.echo(
+        f"{'kind':<6} {'name':<28} {'n':>6} {'fail':>5} {'p50 s':>9} {'p90 s':>9} "
+        f"{'p99 s':>9} {'max s':>9} {'total s':>10} {'cpu s':>10} {'rss MB':>8}"
+    )
+    for s in summarize_records(records):
+        click.echo(
+            f"{s.kind:<6} {s.name[:28]:<28} {s.count:>6} {s.failures:>5} {s.p50:>9.2f} {s.p90:>9.2f} "
+            f"{s.p99:>9.2f} {s.max:>9.2f} {s.total_wall_seconds:>10.1f} {s.total_cpu_seconds:>10.1f} "
+            f"{s.max_rss_bytes / 1e6:>8.0f}"
+        )
+
+
+@cli.command()
+@click.argument("root", required=False, type=click.Path(exists=True, file_okay=False, path_type=Path))
+@click.option("--pattern", default="submit.sh", show_default=True, help="File name of the batch scripts to submit.")
+@click.option("--plans", "plans_path", type=click.Path(exists=True, dir_okay=False, path_type=Path), default=None,
+              help="Submit the RunPlans in this JSON file (write_plan_file or a FailureReport) instead of scanning ROOT.")
+@click.option("--ledger", "ledger_path", type=click.Path(path_type=Path), default=None, help="Skip plans this RunLedger records as done.")
+@click.option("--partition", default="general", show_default=True, help="SLURM partition for --plans scripts.")
+@click.option("--time", "walltime", default="04:00:00", show_default=True, help="Wall time for --plans scripts.")
+@click.option("--cpus", type=int, default=8, show_default=True, help="CPUs per --plans job.")
+@click.option("--mem", default="64G", show_default=True, help="Memory per --plans job.")
+@click.option("--gpus", type=int, default=0, show_default=True, help="GPUs per --plans job.")
+@click.option("--account", default=None, help="SLURM account for --plans scripts.")
+@click.option("--max-in-flight", type=int, default=500, show_default=True, help="Cap on your pending + running SLURM jobs.")
+@click.option("--poll", "poll_seconds", type=float, default=60.0, show_default=True, help="Seconds between queue checks.")
+@click.option("--state", "state_path", type=click.Path(path_type=Path), default=None,
+              help="Cursor file (defaults to ROOT/.varidock_submitter.json, or .<plans>.submitter.json next to --plans).")
+@click.option("--once", is_flag=True, help="Do a single submission pass and exit.")
+def submit(root, pattern, plans_path, ledger_path, partition, walltime, cpus, mem, gpus, account,
+           max_in_flight, poll_seconds, state_path, once):
+    """Submit every batch script under ROOT, or every plan in --plans, keeping the SLURM queue below a cap.
+
+    With --plans, a submit.sh is written into each plan's work_dir first,
+    skipping plans --ledger records as done. Safe to stop and restart:
+    submitted scripts are recorded in the state file.
+    """
+    import signal
+
+    from varidock.execution.submitter import Submitter, read_plan_file, scan_scripts, write_plan_scripts
+
+    if (root is None) == (plans_path is None):
+        raise click.UsageError("Give either ROOT or --plans.")
+    if plans_path is not None:
+        from varidock.execution.ledger import RunLedger
+        from varidock.execution.slurm import SlurmConfig, SlurmExecutor
+
+        config = SlurmConfig(partition=partition, time=walltime, cpus=cpus, mem=mem, gpus=gpus, account=account)
+        ledger = RunLedger(ledger_path) if ledger_path else None
+        scripts = write_plan_scripts(read_plan_file(plans_path), SlurmExecutor(config), ledger=ledger)
+        default_state = plans_path.parent / f".{plans_path.stem}.submitter.json"
+    else:
+        scripts = scan_scripts(root, pattern)
+        default_state = root / ".varidock_submitter.json"
+    submitter = Submitter(
+        scripts,
+        state_path or default_state,
+        max_in_flight=max_in_flight,
+        poll_seconds=poll_seconds,
+        log=click.echo,
+    )
+    click.echo(f"{len(scripts)} scripts found, {len(submitter.pending)} not yet submitted")
+
+    signal.signal(signal.SIGTERM, lambda *_: submitter.stop())
+    try:
+        if once:
+            submitter.run_once()
+        else:
+            submitter.run()
+    except KeyboardInterrupt:
+        pass
+    click.echo(f"✓ {len(submitter.state.submitted)} submitted, {len(submitter.pending)} pending")
@@ -15,6 +15,7 @@ class AF3Settings:
     model_dir: Path | None = None
     db_dir: Path | None = None
     runner_script: Path | None = None
+    msa_store: Path | None = None
 
 
 @dataclass
@@ -22,10 +23,17 @@ class DeepSurfSettings:
     model_dir: Path | None = None
 
 
+@dataclass
+class CacheSettings:
+    dir: Path = VARIDOCK_CONFIG_DIR / "cache"
+    max_entries: int = 100_000
+
+
 @dataclass
 class VaridockConfig:
     af3: AF3Settings = field(default_factory=AF3Settings)
     deepsurf: DeepSurfSettings = field(default_factory=DeepSurfSettings)
+    cache: CacheSettings = field(default_factory=CacheSettings)
 
     @classmethod
     def load(cls) -> "VaridockConfig":
@@ -54,12 +62,19 @@ def _apply_toml(config: VaridockConfig, raw: dict[str, Any]) -> VaridockConfig:
             runner_script=Path(af3["runner_script"])
             if "runner_script" in af3
             else None,
+            msa_store=Path(af3["msa_store"]) if "msa_store" in af3 else None,
         )
     if "deepsurf" in raw:
         ds = raw["deepsurf"]
         config.deepsurf = DeepSurfSettings(
             model_dir=Path(ds["model_dir"]) if "model_dir" in ds else None,
         )
+    if "cache" in raw:
+        cache = raw["cache"]
+        config.cache = CacheSettings(
+            dir=Path(cache["dir"]) if "dir" in cache else CacheSettings.dir,
+            max_entries=int(cache.get("max_entries", CacheSettings.max_entries)),
+        )
     return config
 
 
@@ -72,6 +87,10 @@ def _apply_env(config: VaridockConfig) -> VaridockConfig:
         config.af3.db_dir = Path(v)
     if v := os.environ.get("AF3_RUNNER_SCRIPT"):
         config.af3.runner_script = Path(v)
+    if v := os.environ.get("AF3_MSA_STORE"):
+        config.af3.msa_store = Path(v)
     if v := os.environ.get("DEEPSURF_MODEL_DIR"):
         config.deepsurf.model_dir = Path(v)
+    if v := os.environ.get("VARIDOCK_CACHE_DIR"):
+        config.cache.dir = Path(v)
     return config
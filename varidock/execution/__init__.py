@@ -1,7 +1,14 @@
 from .materialize import PlanMaterializer, DefaultMaterializer
-from .run import CommandRunner, LocalCommandRunner, CompletedRun
-from .validate import PlanValidator, ExpectedOutputsValidator
+from .run import CommandRunner, LocalCommandRunner, CompletedRun, PlanOutcome
+from .validate import PlanValidator, ExpectedOutputsValidator, FingerprintValidator
+from .ledger import RunLedger, LedgerEntry, plan_key
+from .retry import RetryPolicy, FailureReport, PlanFailedError, TRANSIENT, PERMANENT
 from .local import LocalExecutor
+from .async_local import AsyncLocalExecutor
+from .submitter import Submitter, read_plan_file, scan_scripts, write_plan_file, write_plan_scripts
+from .pilot import FileQueue, PilotExecutor, run_pilot
+from .routing import RoutingExecutor, Route, SequenceLengthSizer
+from .local_cluster import LocalCluster, LocalClusterExecutor
 
 
 __all__ = [
@@ -10,7 +17,31 @@ __all__ = [
     "CommandRunner",
     "LocalCommandRunner",
     "CompletedRun",
+    "PlanOutcome",
     "PlanValidator",
     "ExpectedOutputsValidator",
+    "FingerprintValidator",
+    "RunLedger",
+    "LedgerEntry",
+    "plan_key",
+    "RetryPolicy",
+    "FailureReport",
+    "PlanFailedError",
+    "TRANSIENT",
+    "PERMANENT",
     "LocalExecutor",
+    "AsyncLocalExecutor",
+    "Submitter",
+    "scan_scripts",
+    "write_plan_scripts",
+    "write_plan_file",
+    "read_plan_file",
+    "FileQueue",
+    "PilotExecutor",
+    "run_pilot",
+    "RoutingExecutor",
+    "Route",
+    "SequenceLengthSizer",
+    "LocalCluster",
+    "LocalClusterExecutor",
 ]
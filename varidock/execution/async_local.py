@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Optional
+
+from varidock.plans import RunPlan
+from varidock.execution.ledger import FAILED, RunLedger
+from varidock.execution.materialize import PlanMaterializer, DefaultMaterializer
+from varidock.execution.retry import PlanFailedError, RetryPolicy, PERMANENT
+from varidock.execution.run import CompletedRun, PlanOutcome
+from varidock.execution.validate import PlanValidator, ExpectedOutputsValidator
+
+_DONE = object()
+
+
+def _read_tail(path: Path, limit: int = 8192) -> str:
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - limit))
+            return f.read().decode(errors="replace")
+    except OSError:
+        return ""
+
+
+@dataclass
+class AsyncLocalExecutor:
+    """Execute many RunPlans concurrently on the local machine with asyncio subprocesses.
+
+    Each plan goes through the same steps as LocalExecutor: materialize its
+    files, skip it if its outputs already validate, run it, then validate.
+    stdout and stderr are streamed to log files in the plan's work_dir rather
+    than held in memory.
+
+    Attributes:
+        materializer (PlanMaterializer): Writes plan input files.
+        validator (PlanValidator): Checks expected outputs before and after running.
+        stdout_name (str): File name, inside work_dir, receiving the command's stdout.
+        stderr_name (str): File name, inside work_dir, receiving the command's stderr.
+        terminate_timeout (float): Seconds to wait after SIGTERM before SIGKILL when a plan is cancelled.
+        ledger (RunLedger | None): If set, plans recorded as finished are skipped
+            without touching the filesystem, and every run is recorded.
+        retry (RetryPolicy | None): If set, transient failures are retried with
+            backoff; the stderr log of each attempt is used for classification,
+            and errors starting the command (e.g. EMFILE) are retried too.
+
+    """
+
+    materializer: PlanMaterializer = DefaultMaterializer()
+    validator: PlanValidator = ExpectedOutputsValidator()
+    stdout_name: str = "run.stdout.log"
+    stderr_name: str = "run.stderr.log"
+    terminate_timeout: float = 5.0
+    ledger: Optional[RunLedger] = None
+    retry: Optional[RetryPolicy] = None
+
+    async def execute(
+        self, plan: RunPlan, write_only: bool = False, overwrite_inputs: bool = False
+    ) -> CompletedRun:
+        """Run a single plan.
+
+        Args:
+            plan (RunPlan): The plan to execute.
+            write_only (bool): If True, only materialize the plan's files.
+            overwrite_inputs (bool): If True, overwrite existing input files.
+
+        Returns:
+            CompletedRun: The finished run. stdout/stderr are left in the log files.
+
+        Raises:
+            PlanFailedError: If the command exits non-zero; stdout and stderr hold the tails of the logs.
+            OSError: If the command cannot be started (after retries).
+            RuntimeError: If outputs fail validation.
+
+        """
+        if not write_only and self.ledger is not None and await asyncio.to_thread(self.ledger.is_done, plan):
+            return CompletedRun(
+                returncode=0,
+                argv=plan.argv,
+                stdout="(skipped: recorded in ledger)",
+                stderr="",
+            )
+
+        await asyncio.to_thread(self.materializer.materialize, plan, overwrite_inputs)
+        if write_only:
+            return CompletedRun(returncode=0, argv=plan.argv, stdout="", stderr="")
+
+        try:
+            await asyncio.to_thread(self.validator.validate, plan)
+            if self.ledger is not None:
+                await asyncio.to_thread(self.ledger.record_finish, plan, returncode=0)
+            return CompletedRun(
+                returncode=0,
+                argv=plan.argv,
+                stdout="(skipped: outputs already valid)",
+                stderr="",
+            )
+        except Exception:
+            pass
+
+        env = os.environ.copy()
+        if plan.env:
+            env.update({k: str(v) for k, v in plan.env.items()})
+
+        if self.ledger is not None:
+            await asyncio.to_thread(self.ledger.record_start, plan)
+        stdout_path = Path(plan.work_dir) / self.stdout_name
+        stderr_path = Path(plan.work_dir) / self.stderr_name
+        attempt = 1
+        while True:
+            try:
+                returncode = await self._run_once(plan, env, stdout_path, stderr_path)
+            except Exception as e:
+                # e.g. a missing binary, EMFILE or ESTALE from opening the logs or exec
+                kind = self.retry.classify_exception(e) if self.retry else PERMANENT
+                if self.retry is None or not self.retry.should_retry(kind, attempt):
+                    if self.ledger is not None:
+                        await asyncio.to_thread(self.ledger.record_finish, plan, returncode=-1, status=FAILED)
+                    raise
+            else:
+                if returncode == 0:
+                    break
+                stderr_tail = await asyncio.to_thread(_read_tail, stderr_path)
+                kind = self.retry.classify(returncode, stderr_tail) if self.retry else PERMANENT
+                if self.retry is None or not self.retry.should_retry(kind, attempt):
+                    if self.ledger is not None:
+                        await asyncio.to_thread(self.ledger.record_finish, plan, returncode=returncode)
+                    raise PlanFailedError(
+                        f"Command failed (returncode={returncode}): {list(plan.argv)}\n"
+                        f"stdout: {stdout_path}\n"
+                        f"stderr: {stderr_path}\n",
+                        returncode=returncode,
+                        stdout=await asyncio.to_thread(_read_tail, stdout_path),
+                        stderr=stderr_tail,
+                        kind=kind,
+                        attempts=attempt,
+                    )
+            await asyncio.sleep(self.retry.delay(attempt))
+            attempt += 1
+
+        try:
+            await asyncio.to_thread(self.validator.validate, plan)
+        except Exception:
+            if self.ledger is not None:
+                await asyncio.to_thread(self.ledger.record_finish, plan, returncode=returncode, status=FAILED)
+            raise
+        if self.ledger is not None:
+            await asyncio.to_thread(self.ledger.record_finish, plan, returncode=returncode)
+        return CompletedRun(returncode=returncode, argv=plan.argv)
+
+    async def _run_once(self, plan: RunPlan, env: dict, stdout_path: Path, stderr_path: Path) -> int:
+        # Opening a log on a shared filesystem can block; keep it off the event loop.
+        out = await asyncio.to_thread(open, stdout_path, "wb")
+        try:
+            err = await asyncio.to_thread(open, stderr_path, "wb")
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *plan.argv, cwd=str(plan.work_dir), env=env, stdout=out, stderr=err
+                )
+            finally:
+                err.close()
+        finally:
+            out.close()
+        try:
+            return await proc.wait()
+        except asyncio.CancelledError:
+            await self._terminate(proc)
+            raise
+
+    async def _terminate(self, proc: asyncio.subprocess.Process) -> None:
+        if proc.returncode is not None:
+            return
+        proc.terminate()
+        try:
+            await asyncio.wait_for(proc.wait(), timeout=self.terminate_timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+
+    async def execute_many(
+        self,
+        plans: Iterable[RunPlan],
+        concurrency: int = 8,
+        fail_fast: bool = False,
+        write_only: bool = False,
+        overwrite_inputs: bool = False,
+    ) -> AsyncIterator[PlanOutcome]:
+        """Run plans with at most ``concurrency`` in flight, yielding outcomes as they finish.
+
+        ``plans`` is consumed lazily, so a generator over a very large batch
+        never has more than ``concurrency`` plans materialized at once.
+
+        Example:
+            >>> async for outcome in AsyncLocalExecutor().execute_many(plans, concurrency=64):
+            ...     if not outcome.ok:
+            ...         print(outcome.plan.work_dir, outcome.error)
+
+        Args:
+            plans (Iterable[RunPlan]): Plans to execute.
+            concurrency (int): Maximum number of plans running at once.
+            fail_fast (bool): If True, cancel every running plan (terminating
+                its subprocess) on the first failure and raise that failure.
+                If False, failures are yielded as outcomes and the rest of the batch continues.
+            write_only (bool): If True, only materialize each plan's files.
+            overwrite_inputs (bool): If True, overwrite existing input files.
+
+        Yields:
+            PlanOutcome: One outcome per plan, in completion order.
+
+        Raises:
+            Exception: The first plan failure, when ``fail_fast`` is True.
+
+        """
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+
+        pending = enumerate(plans)
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def worker() -> None:
+            try:
+                # The shared iterator is safe: workers only interleave at await points.
+                for index, plan in pending:
+                    try:
+                        run = await self.execute(plan, write_only, overwrite_inputs)
+                        outcome = PlanOutcome(index=index, plan=plan, run=run)
+                    except Exception as e:
+                        outcome = PlanOutcome(index=index, plan=plan, error=e)
+                    await results.put(outcome)
+            finally:
+                results.put_nowait(_DONE)
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        running = len(workers)
+        try:
+            while running:
+                item = await results.get()
+                if item is _DONE:
+                    running -= 1
+                    continue
+                if fail_fast and not item.ok:
+                    raise item.error
+                yield item
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Mapping, Optional
+
+from varidock.plans import RunPlan
+
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    key TEXT PRIMARY KEY,
+    work_dir TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    returncode INTEGER,
+    fingerprints TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_status ON runs (status);
+"""
+
+
+def plan_key(plan: RunPlan) -> str:
+    """Hash everything that determines what a plan does: argv, input files, env and expected outputs.
+
+    Args:
+        plan (RunPlan): Plan to identify.
+
+    Returns:
+        str: Hex SHA-256 digest, stable across processes and machines.
+
+    """
+    payload = {
+        "work_dir": str(plan.work_dir),
+        "argv": [str(a) for a in plan.argv],
+        "files_text": {str(p): t for p, t in plan.files_text.items()},
+        "env": {k: str(v) for k, v in (plan.env or {}).items()},
+        "expected_outputs": [str(p) for p in plan.expected_outputs],
+    }
+    text = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def output_fingerprints(plan: RunPlan) -> dict[str, list[int]]:
+    """Return ``{path: [size, mtime_ns]}`` for every expected output that exists."""
+    fingerprints = {}
+    for p in plan.expected_outputs:
+        try:
+            st = Path(p).stat()
+        except FileNotFoundError:
+            continue
+        fingerprints[str(p)] = [st.st_size, st.st_mtime_ns]
+    return fingerprints
+
+
+@dataclass(frozen=True)
+class LedgerEntry:
+    """One recorded run.
+
+    Attributes:
+        key (str): plan_key() of the plan.
+        work_dir (str): Plan work directory.
+        status (str): One of 'running', 'succeeded' or 'failed'.
+        started_at (float | None): Unix time the run started.
+        finished_at (float | None): Unix time the run finished.
+        returncode (int | None): Exit code of the command.
+        fingerprints (dict[str, list[int]]): ``[size, mtime_ns]`` of each output at completion.
+
+    """
+
+    key: str
+    work_dir: str
+    status: str
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    returncode: Optional[int] = None
+    fingerprints: Optional[Mapping[str, list[int]]] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status == SUCCEEDED
+
+
+class RunLedger:
+    """Persistent record of executed RunPlans in a local SQLite file.
+
+    Executors consult the ledger before touching the filesystem, so resuming a
+    campaign decides what is left to run with one indexed query instead of
+    stat-ing every expected output on a shared filesystem. Keep the database
+    on local disk; SQLite locking is unreliable over NFS/Lustre.
+
+    Attributes:
+        path (Path): Location of the SQLite database.
+
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30.0, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "RunLedger":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __getstate__(self):
+        # Connections can't be pickled; worker processes reopen the same file.
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def lookup(self, plan: RunPlan) -> LedgerEntry | None:
+        """Return the recorded entry for a plan, or None if it has never been started."""
+        return self.lookup_key(plan_key(plan))
+
+    def lookup_key(self, key: str) -> LedgerEntry | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, work_dir, status, started_at, finished_at, returncode, fingerprints "
+                "FROM runs WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        fingerprints = json.loads(row[6]) if row[6] else None
+        return LedgerEntry(*row[:6], fingerprints=fingerprints)
+
+    def is_done(self, plan: RunPlan) -> bool:
+        """True if the plan has a recorded successful run."""
+        entry = self.lookup(plan)
+        return entry is not None and entry.done
+
+    def record_start(self, plan: RunPlan) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO runs (key, work_dir, status, started_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET status = excluded.status, "
+                "started_at = excluded.started_at, finished_at = NULL, returncode = NULL, fingerprints = NULL",
+                (plan_key(plan), str(plan.work_dir), RUNNING, time.time()),
+            )
+
+    def record_finish(
+        self,
+        plan: RunPlan,
+        returncode: int,
+        fingerprints: Mapping[str, list[int]] | None = None,
+        status: str | None = None,
+    ) -> None:
+        """Mark a plan finished. A zero returncode marks it succeeded, anything else failed.
+
+        Args:
+            plan (RunPlan): The plan that finished.
+            returncode (int): Exit code of the command.
+            fingerprints (Mapping[str, list[int]] | None): Output fingerprints. Defaults to
+                output_fingerprints(plan) for successful runs.
+            status (str | None): Override the status derived from returncode, e.g. FAILED
+                when the command exited 0 but its outputs did not validate.
+
+        """
+        if status is None:
+            status = SUCCEEDED if returncode == 0 else FAILED
+        if fingerprints is None and status == SUCCEEDED:
+            fingerprints = output_fingerprints(plan)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO runs (key, work_dir, status, finished_at, returncode, fingerprints) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET status = excluded.status, finished_at = excluded.finished_at, "
+                "returncode = excluded.returncode, fingerprints = excluded.fingerprints",
+                (
+                    plan_key(plan),
+                    str(plan.work_dir),
+                    status,
+                    time.time(),
+                    returncode,
+                    json.dumps(fingerprints) if fingerprints is not None else None,
+                ),
+            )
+
+    def done_keys(self) -> set[str]:
+        """Keys of every plan with a successful run, fetched in one query."""
+        with self._lock:
+            rows = self._conn.execute("SELECT key FROM runs WHERE status = ?", (SUCCEEDED,)).fetchall()
+        return {row[0] for row in rows}
+
+    def pending(self, plans: Iterable[RunPlan]) -> list[RunPlan]:
+        """Filter plans down to those without a recorded successful run."""
+        done = self.done_keys()
+        return [plan for plan in plans if plan_key(plan) not in done]
+
+    def counts(self) -> dict[str, int]:
+        """Number of recorded plans per status."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM runs GROUP BY status").fetchall()
+        return dict(rows)
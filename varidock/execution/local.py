@@ -1,19 +1,49 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional
 
 from varidock.plans import RunPlan
+from varidock.execution.ledger import FAILED, RunLedger
 from varidock.execution.materialize import PlanMaterializer, DefaultMaterializer
-from varidock.execution.run import CommandRunner, LocalCommandRunner, CompletedRun
+from varidock.execution.retry import FailureReport, PlanFailedError, RetryPolicy, PERMANENT
+from varidock.execution.run import CommandRunner, LocalCommandRunner, CompletedRun, PlanOutcome
 from varidock.execution.validate import PlanValidator, ExpectedOutputsValidator
 
+# Bytes of stderr kept for RetryPolicy.classify when the runner does not capture output.
+_RETRY_STDERR_TAIL = 8192
+
 @dataclass
 class LocalExecutor:
     materializer: PlanMaterializer = DefaultMaterializer()
     runner: CommandRunner = LocalCommandRunner(capture_output=False)
     validator: PlanValidator = ExpectedOutputsValidator()
+    # When set, finished plans are skipped without touching the filesystem.
+    ledger: Optional[RunLedger] = None
+    # When set, transient failures (signals, OOM, stale NFS handles) are retried with backoff.
+    retry: Optional[RetryPolicy] = None
+
+    def __post_init__(self):
+        # Without stderr the policy's patterns never match, so keep a tail of it
+        # (still passed through to the terminal) when the runner would drop it.
+        runner = self.runner
+        if (
+            self.retry is not None
+            and type(runner) is LocalCommandRunner
+            and not runner.capture_output
+            and not runner.stderr_tail
+        ):
+            self.runner = LocalCommandRunner(stderr_tail=_RETRY_STDERR_TAIL)
 
     def execute(self, plan: RunPlan, write_only:bool = False, overwrite_inputs: bool = False) -> CompletedRun:
+        if not write_only and self.ledger is not None and self.ledger.is_done(plan):
+            return CompletedRun(
+                returncode=0,
+                argv=plan.argv,
+                stdout="(skipped: recorded in ledger)",
+                stderr="",
+            )
+
         self.materializer.materialize(plan, overwrite=overwrite_inputs)
         if write_only:
             return CompletedRun(returncode=0, argv=plan.argv, stdout="", stderr="")
@@ -21,6 +51,8 @@ class LocalExecutor:
         try:
             self.validator.validate(plan)
             # If we reach here, outputs already look good → skip execution
+            if self.ledger is not None:
+                self.ledger.record_finish(plan, returncode=0)
             return CompletedRun(
                 returncode=0,
                 argv=plan.argv,
@@ -30,14 +62,84 @@ class LocalExecutor:
         except Exception:
             # Not valid yet → fall through and actually run
             pass
-        
-        result = self.runner.run(plan)
+
+        if self.ledger is not None:
+            self.ledger.record_start(plan)
+        result, attempts = self._run_with_retry(plan)
         if result.returncode != 0:
-            raise RuntimeError(
+            if self.ledger is not None:
+                self.ledger.record_finish(plan, returncode=result.returncode)
+            kind = self.retry.classify(result.returncode, result.stderr) if self.retry else PERMANENT
+            raise PlanFailedError(
                 f"Command failed (returncode={result.returncode}): {list(plan.argv)}\n"
                 f"stdout:\n{result.stdout}\n"
-                f"stderr:\n{result.stderr}\n"
+                f"stderr:\n{result.stderr}\n",
+                returncode=result.returncode,
+                stdout=result.stdout,
+                stderr=result.stderr,
+                kind=kind,
+                attempts=attempts,
             )
 
-        self.validator.validate(plan)
+        try:
+            self.validator.validate(plan)
+        except Exception:
+            if self.ledger is not None:
+                # A zero exit with invalid outputs is still a failure.
+                self.ledger.record_finish(plan, returncode=result.returncode, status=FAILED)
+            raise
+        if self.ledger is not None:
+            self.ledger.record_finish(plan, returncode=result.returncode)
         return result
+
+    def _run_with_retry(self, plan: RunPlan) -> tuple[CompletedRun, int]:
+        attempt = 1
+        while True:
+            try:
+                result = self.runner.run(plan)
+            except Exception as e:
+                # e.g. ESTALE/ENOMEM from fork or the working directory going away
+                if self.retry is None or not self.retry.should_retry(self.retry.classify_exception(e), attempt):
+                    raise
+            else:
+                if result.returncode == 0 or self.retry is None:
+                    return result, attempt
+                kind = self.retry.classify(result.returncode, result.stderr)
+                if not self.retry.should_retry(kind, attempt):
+                    return result, attempt
+            self.retry.sleep(self.retry.delay(attempt))
+            attempt += 1
+
+    def execute_many(
+        self,
+        plans: Iterable[RunPlan],
+        report: Optional[FailureReport] = None,
+        write_only: bool = False,
+        overwrite_inputs: bool = False,
+    ) -> Iterator[PlanOutcome]:
+        """Run plans one after another without letting a failure abort the batch.
+
+        Example:
+            >>> report = FailureReport(Path("failures.json"))
+            >>> ok = sum(o.ok for o in LocalExecutor(retry=RetryPolicy()).execute_many(plans, report))
+            >>> retry_list = FailureReport.load_plans(Path("failures.json"), kinds=[TRANSIENT])
+
+        Args:
+            plans (Iterable[RunPlan]): Plans to execute, consumed lazily.
+            report (FailureReport | None): Receives every failed plan.
+            write_only (bool): If True, only materialize each plan's files.
+            overwrite_inputs (bool): If True, overwrite existing input files.
+
+        Yields:
+            PlanOutcome: One outcome per plan, in input order.
+
+        """
+        for index, plan in enumerate(plans):
+            try:
+                run = self.execute(plan, write_only, overwrite_inputs)
+            except Exception as e:
+                if report is not None:
+                    report.add(plan, e, kind=(self.retry or RetryPolicy()).classify_exception(e))
+                yield PlanOutcome(index=index, plan=plan, error=e)
+            else:
+                yield PlanOutcome(index=index, plan=plan, run=run)
@@ -0,0 +1,518 @@
+from __future__ import annotations
+
+import os
+import re
+import shlex
+import signal
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from varidock.execution.slurm import SlurmConfig, SlurmExecutor
+from varidock.utils.slurm import (
+    DEPENDENCY_NEVER_SATISFIED,
+    ClusterState,
+    JobInfo,
+    parse_slurm_mem,
+    parse_slurm_time,
+    set_submit_backend,
+)
+
+PENDING = "PENDING"
+RUNNING = "RUNNING"
+COMPLETED = "COMPLETED"
+FAILED = "FAILED"
+CANCELLED = "CANCELLED"
+TIMEOUT = "TIMEOUT"
+_FINISHED = {COMPLETED, FAILED, CANCELLED, TIMEOUT}
+
+_OPTION_ALIASES = {
+    "-J": "--job-name",
+    "-o": "--output",
+    "-e": "--error",
+    "-c": "--cpus-per-task",
+    "-t": "--time",
+    "-a": "--array",
+    "-d": "--dependency",
+    "-G": "--gpus",
+}
+
+
+def parse_sbatch_directives(script: Path) -> dict[str, str]:
+    """The ``#SBATCH`` options of a batch script, keyed by long option name.
+
+    Like sbatch, parsing stops at the first line that is neither blank nor a comment.
+    """
+    options: dict[str, str] = {}
+    for line in Path(script).read_text().splitlines():
+        line = line.strip()
+        if not line or (line.startswith("#") and not line.startswith("#SBATCH")):
+            continue
+        if not line.startswith("#SBATCH"):
+            break
+        tokens = shlex.split(line[len("#SBATCH"):], comments=True)
+        while tokens:
+            token = tokens.pop(0)
+            if token.startswith("--"):
+                key, eq, value = token.partition("=")
+                if not eq:
+                    value = tokens.pop(0) if tokens and not tokens[0].startswith("-") else ""
+            else:
+                key = _OPTION_ALIASES.get(token[:2], token[:2])
+                value = token[2:] or (tokens.pop(0) if tokens else "")
+            options[key] = value
+    return options
+
+
+def _parse_array(spec: str) -> tuple[list[int], Optional[int]]:
+    """Indices and ``%`` throttle of an ``--array`` spec such as ``0-9%4`` or ``1,3,5-11:2``."""
+    spec, _, throttle = spec.partition("%")
+    indices: list[int] = []
+    for part in spec.split(","):
+        rng, _, step = part.partition(":")
+        first, _, last = rng.partition("-")
+        indices += range(int(first), int(last or first) + 1, int(step or 1))
+    return indices, int(throttle) if throttle else None
+
+
+def _parse_gpus(options: dict[str, str]) -> int:
+    if options.get("--gpus"):
+        return int(options["--gpus"].rsplit(":", 1)[-1])
+    gres = options.get("--gres", "")
+    match = re.match(r"gpu(?::[^:,]+)?:(\d+)", gres)
+    if match:
+        return int(match.group(1))
+    return 1 if gres.startswith("gpu") else 0
+
+
+def _parse_dependency(spec: str) -> list[str]:
+    if not spec:
+        return []
+    kind, _, ids = spec.partition(":")
+    if kind != "afterok":
+        raise ValueError(f"Only afterok dependencies are supported locally, got {spec!r}")
+    return [i for i in ids.split(":") if i]
+
+
+@dataclass
+class LocalJob:
+    """One job, or one task of an array, in a LocalCluster's job table.
+
+    Attributes:
+        job_id (str): '12', or '12_3' for task 3 of array 12.
+        name (str): Job name.
+        script (Path): Batch script.
+        work_dir (Path): Directory the job runs in (the submit directory).
+        cpus (int): Cores reserved while running.
+        mem_mb (int): Memory reserved while running.
+        gpus (int): GPUs reserved while running.
+        time_limit (int | None): Seconds before the job is killed with TIMEOUT.
+        depends_on (list[str]): Job IDs that must complete successfully first.
+        state (str): PENDING, RUNNING, COMPLETED, FAILED, CANCELLED or TIMEOUT.
+        returncode (int | None): Exit code once finished.
+        reason (str | None): Why a job cannot run, e.g. DependencyNeverSatisfied.
+
+    """
+
+    job_id: str
+    name: str
+    script: Path
+    work_dir: Path
+    cpus: int
+    mem_mb: int
+    gpus: int
+    time_limit: Optional[int]
+    depends_on: list[str]
+    output: str
+    error: Optional[str]
+    array_job_id: Optional[str] = None
+    array_task_id: Optional[int] = None
+    state: str = PENDING
+    returncode: Optional[int] = None
+    reason: Optional[str] = None
+    gpu_ids: list[int] = field(default_factory=list)
+    _proc: Optional[subprocess.Popen] = field(default=None, repr=False)
+
+    def info(self) -> JobInfo:
+        return JobInfo(
+            job_id=self.job_id, name=self.name, state=self.state, work_dir=str(self.work_dir.resolve()), reason=self.reason
+        )
+
+
+class LocalCluster:
+    """A one-node SLURM stand-in that runs batch scripts on this machine.
+
+    Scripts are submitted with the same ``#SBATCH`` directives SlurmExecutor
+    writes (cpus-per-task, mem, mem-per-cpu, gres, time, array, dependency, output,
+    error). Jobs wait in a local job table until their ``afterok``
+    dependencies have completed and enough cores, memory and GPUs are free,
+    then run with the usual SLURM_* environment. Jobs never oversubscribe
+    the node; a smaller job may start ahead of a larger one that does not fit
+    yet. A job whose dependency failed stays PENDING with reason
+    DependencyNeverSatisfied, as in SLURM, unless ``kill_invalid_depend`` is
+    set, in which case it is cancelled. ``squeue()`` and ``sacct()`` answer
+    from the table, so a ClusterState can use them as its fetch.
+
+    Example:
+        >>> with LocalCluster(cpus=32, mem="128G") as cluster, cluster.activate():
+        ...     NAMDCampaign(systems, NAMDCampaignConfig(target_ns=10)).run()
+
+    Attributes:
+        cpus (int): Cores on the node. Defaults to os.cpu_count().
+        mem_mb (int): Memory on the node. Defaults to the physical memory.
+        gpus (int): GPUs on the node, handed out through CUDA_VISIBLE_DEVICES.
+        def_mem_per_cpu_mb (int): Memory reserved per core by jobs that set
+            neither ``--mem`` nor ``--mem-per-cpu`` (SLURM's DefMemPerCPU).
+            Defaults to the node's memory divided evenly over its cores.
+        kill_invalid_depend (bool): Cancel jobs whose dependency failed
+            instead of leaving them pending (SLURM's kill_invalid_depend).
+
+    """
+
+    def __init__(
+        self,
+        cpus: Optional[int] = None,
+        mem: Optional[str] = None,
+        gpus: int = 0,
+        def_mem_per_cpu: Optional[str] = None,
+        kill_invalid_depend: bool = False,
+    ):
+        self.cpus = cpus or os.cpu_count() or 1
+        self.mem_mb = parse_slurm_mem(mem) if mem else _physical_mem_mb()
+        self.gpus = gpus
+        self.def_mem_per_cpu_mb = parse_slurm_mem(def_mem_per_cpu) if def_mem_per_cpu else self.mem_mb // self.cpus
+        self.kill_invalid_depend = kill_invalid_depend
+        self._jobs: dict[str, LocalJob] = {}
+        self._arrays: dict[str, list[LocalJob]] = {}
+        self._throttles: dict[str, int] = {}
+        self._next_id = 1
+        self._cond = threading.Condition()
+        self._free_cpus = self.cpus
+        self._free_mem = self.mem_mb
+        self._free_gpus = list(range(gpus))
+
+    # Submission
+
+    def submit(
+        self,
+        script: Path,
+        depends_on: int | str | Iterable[int | str] | None = None,
+        array: Optional[str] = None,
+    ) -> int:
+        """Queue a batch script, like ``sbatch --parsable``, and return its job ID.
+
+        Args:
+            script (Path): Batch script; it runs in its own directory.
+            depends_on (int | str | Iterable | None): afterok dependencies, added to any in the script.
+            array (str | None): Array spec overriding the script's ``--array``.
+
+        Raises:
+            ValueError: If the request does not fit the node, or a dependency is unknown.
+
+        """
+        script = Path(script).resolve()
+        options = parse_sbatch_directives(script)
+        deps = _parse_dependency(options.get("--dependency", ""))
+        if depends_on is not None:
+            extra = [depends_on] if isinstance(depends_on, (int, str)) else depends_on
+            deps += [str(d) for d in extra]
+
+        cpus = int(options.get("--cpus-per-task", 1))
+        if options.get("--mem"):
+            mem = parse_slurm_mem(options["--mem"]) or self.mem_mb  # --mem=0 means the whole node
+        elif options.get("--mem-per-cpu"):
+            mem = parse_slurm_mem(options["--mem-per-cpu"]) * cpus
+        else:
+            mem = self.def_mem_per_cpu_mb * cpus
+        gpus = _parse_gpus(options)
+        if cpus > self.cpus or mem > self.mem_mb or gpus > self.gpus:
+            raise ValueError(
+                f"Requested node configuration is not available: cpus={cpus} mem={mem}M gpus={gpus} "
+                f"(node has cpus={self.cpus} mem={self.mem_mb}M gpus={self.gpus})"
+            )
+        time_limit = parse_slurm_time(options["--time"]) if options.get("--time") else None
+        name = options.get("--job-name") or script.name
+        array = array or options.get("--array")
+
+        with self._cond:
+            for dep in deps:
+                if dep not in self._jobs and dep not in self._arrays:
+                    raise ValueError(f"Invalid job id specified in dependency: {dep}")
+            job_id = str(self._next_id)
+            self._next_id += 1
+
+            def make(jid: str, output: str, task: Optional[int]) -> LocalJob:
+                return LocalJob(
+                    job_id=jid, name=name, script=script, work_dir=script.parent,
+                    cpus=cpus, mem_mb=mem, gpus=gpus, time_limit=time_limit, depends_on=list(deps),
+                    output=output, error=options.get("--error"),
+                    array_job_id=job_id if task is not None else None, array_task_id=task,
+                )
+
+            if array:
+                indices, throttle = _parse_array(array)
+                tasks = [make(f"{job_id}_{i}", options.get("--output", "slurm-%A_%a.out"), i) for i in indices]
+                self._arrays[job_id] = tasks
+                if throttle:
+                    self._throttles[job_id] = throttle
+                for task in tasks:
+                    self._jobs[task.job_id] = task
+            else:
+                self._jobs[job_id] = make(job_id, options.get("--output", "slurm-%j.out"), None)
+            self._schedule()
+        return int(job_id)
+
+    def _sbatch(self, script: Path, depends_on: int | None) -> int:
+        return self.submit(script, depends_on)
+
+    @contextmanager
+    def activate(self) -> Iterator["LocalCluster"]:
+        """Send ``_sbatch``, ``scancel`` and SlurmExecutor submissions to this cluster while active.
+
+        The process-wide ClusterState is replaced by one that reads this
+        cluster's job table, so create executors and campaigns inside the block.
+        """
+        previous = set_submit_backend(self._sbatch, ClusterState(ttl=0, fetch=self.squeue), self.scancel)
+        try:
+            yield self
+        finally:
+            set_submit_backend(*previous)
+
+    # Scheduling
+
+    def _dependency_state(self, dep: str) -> str:
+        jobs = self._arrays.get(dep) or [self._jobs[dep]]
+        states = {j.state for j in jobs}
+        if states <= {COMPLETED}:
+            return COMPLETED
+        if states & {PENDING, RUNNING}:
+            return PENDING
+        return FAILED
+
+    def _schedule(self) -> None:
+        # Called with the lock held, on every submission and job exit.
+        running_per_array: dict[str, int] = {}
+        for job in self._jobs.values():
+            if job.state == RUNNING and job.array_job_id:
+                running_per_array[job.array_job_id] = running_per_array.get(job.array_job_id, 0) + 1
+
+        for job in self._jobs.values():
+            if job.state != PENDING:
+                continue
+            dep_states = {self._dependency_state(d) for d in job.depends_on}
+            if FAILED in dep_states:
+                if self.kill_invalid_depend:
+                    job.state, job.reason = CANCELLED, DEPENDENCY_NEVER_SATISFIED
+                    self._cond.notify_all()
+                elif job.reason != DEPENDENCY_NEVER_SATISFIED:
+                    job.reason = DEPENDENCY_NEVER_SATISFIED
+                    self._cond.notify_all()
+                continue
+            if PENDING in dep_states:
+                continue
+            throttle = self._throttles.get(job.array_job_id or "")
+            if throttle and running_per_array.get(job.array_job_id, 0) >= throttle:
+                continue
+            if job.cpus > self._free_cpus or job.mem_mb > self._free_mem or job.gpus > len(self._free_gpus):
+                continue
+            self._start(job)
+            if job.array_job_id:
+                running_per_array[job.array_job_id] = running_per_array.get(job.array_job_id, 0) + 1
+
+    def _expand(self, pattern: str, job: LocalJob) -> Path:
+        values = {
+            "j": job.array_job_id or job.job_id,
+            "A": job.array_job_id or job.job_id,
+            "a": str(job.array_task_id) if job.array_task_id is not None else "4294967294",
+            "x": job.name,
+            "%": "%",
+        }
+        path = Path(re.sub(r"%([jAax%])", lambda m: values[m.group(1)], pattern))
+        return path if path.is_absolute() else job.work_dir / path
+
+    def _start(self, job: LocalJob) -> None:
+        self._free_cpus -= job.cpus
+        self._free_mem -= job.mem_mb
+        job.gpu_ids, self._free_gpus = self._free_gpus[: job.gpus], self._free_gpus[job.gpus :]
+
+        env = dict(os.environ)
+        env.update(
+            SLURM_JOB_ID=job.array_job_id or job.job_id,
+            SLURM_JOB_NAME=job.name,
+            SLURM_SUBMIT_DIR=str(job.work_dir),
+            SLURM_CPUS_PER_TASK=str(job.cpus),
+            SLURM_CPUS_ON_NODE=str(job.cpus),
+            SLURM_MEM_PER_NODE=str(job.mem_mb),
+            SLURM_NNODES="1",
+            SLURM_JOB_NODELIST="localhost",
+        )
+        if job.array_job_id:
+            env.update(SLURM_ARRAY_JOB_ID=job.array_job_id, SLURM_ARRAY_TASK_ID=str(job.array_task_id))
+        if job.gpus:
+            env["CUDA_VISIBLE_DEVICES"] = ",".join(map(str, job.gpu_ids))
+
+        out_path = self._expand(job.output, job)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        stdout = open(out_path, "ab")
+        if job.error:
+            err_path = self._expand(job.error, job)
+            err_path.parent.mkdir(parents=True, exist_ok=True)
+            stderr = open(err_path, "ab")
+        else:
+            stderr = subprocess.STDOUT
+        try:
+            job._proc = subprocess.Popen(
+                ["bash", str(job.script)], cwd=job.work_dir, env=env, stdout=stdout, stderr=stderr,
+                start_new_session=True,
+            )
+        except OSError:
+            job.state, job.returncode = FAILED, -1
+            self._release(job)
+            return
+        finally:
+            stdout.close()
+            if stderr is not subprocess.STDOUT:
+                stderr.close()
+        job.state = RUNNING
+        threading.Thread(target=self._watch, args=(job,), name=f"local-cluster-{job.job_id}", daemon=True).start()
+
+    def _watch(self, job: LocalJob) -> None:
+        proc = job._proc
+        assert proc is not None
+        timed_out = False
+        try:
+            returncode = proc.wait(timeout=job.time_limit)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            _kill(proc)
+            returncode = proc.wait()
+        with self._cond:
+            job.returncode = returncode
+            if job.state == RUNNING:  # not already CANCELLED by scancel()
+                job.state = TIMEOUT if timed_out else (COMPLETED if returncode == 0 else FAILED)
+            self._release(job)
+            job._proc = None
+
+    def _release(self, job: LocalJob) -> None:
+        self._free_cpus += job.cpus
+        self._free_mem += job.mem_mb
+        self._free_gpus = sorted(self._free_gpus + job.gpu_ids)
+        job.gpu_ids = []
+        self._cond.notify_all()
+        self._schedule()
+
+    # Queries and control
+
+    def job(self, job_id: int | str) -> LocalJob:
+        with self._cond:
+            return self._jobs[str(job_id)]
+
+    def squeue(self) -> list[JobInfo]:
+        """Pending and running jobs, array tasks expanded, like ``squeue --me -r``."""
+        with self._cond:
+            return [j.info() for j in self._jobs.values() if j.state not in _FINISHED]
+
+    def sacct(self) -> list[JobInfo]:
+        """Every job in the table, including finished ones."""
+        with self._cond:
+            return [j.info() for j in self._jobs.values()]
+
+    def scancel(self, job_id: int | str) -> None:
+        """Cancel a job, or every task of an array."""
+        with self._cond:
+            job_id = str(job_id)
+            jobs = self._arrays.get(job_id) or ([self._jobs[job_id]] if job_id in self._jobs else [])
+            for job in jobs:
+                if job.state == PENDING:
+                    job.state = CANCELLED
+                elif job.state == RUNNING:
+                    job.state = CANCELLED
+                    if job._proc is not None:
+                        _kill(job._proc)
+            self._schedule()
+            self._cond.notify_all()
+
+    def wait(self, job_ids: Iterable[int | str] | None = None, timeout: Optional[float] = None) -> bool:
+        """Block until the given jobs (default: all) have finished, or are pending
+        on a dependency that failed and so will never start. Returns False on timeout."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            while True:
+                if job_ids is None:
+                    jobs = list(self._jobs.values())
+                else:
+                    jobs = []
+                    for jid in map(str, job_ids):
+                        jobs += self._arrays.get(jid) or [self._jobs[jid]]
+                if all(j.state in _FINISHED or j.reason == DEPENDENCY_NEVER_SATISFIED for j in jobs):
+                    return True
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+
+    def shutdown(self) -> None:
+        """Cancel everything still pending or running."""
+        with self._cond:
+            ids = [j.job_id for j in self._jobs.values() if j.state not in _FINISHED]
+        for job_id in ids:
+            self.scancel(job_id)
+        self.wait()
+
+    def __enter__(self) -> "LocalCluster":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+
+
+def _kill(proc: subprocess.Popen) -> None:
+    # Each job runs in its own session, so this also stops the script's children.
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _physical_mem_mb() -> int:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return 1 << 20
+
+
+class LocalClusterExecutor(SlurmExecutor):
+    """SlurmExecutor that submits to a LocalCluster instead of sbatch.
+
+    Scripts, arrays and manifests are written exactly as for SLURM, so
+    workstation and CI runs exercise the same files a cluster run would.
+
+    Example:
+        >>> cluster = LocalCluster(cpus=16, mem="64G")
+        >>> executor = LocalClusterExecutor(SlurmConfig(cpus=4, mem="8G"), cluster)
+        >>> jobs = executor.execute_many(plans, max_concurrent=4)
+        >>> cluster.wait([j.job_id for j in jobs])
+
+    Attributes:
+        cluster (LocalCluster): Where jobs run.
+
+    """
+
+    def __init__(
+        self,
+        config: SlurmConfig,
+        cluster: Optional[LocalCluster] = None,
+        cluster_state: Optional[ClusterState] = None,
+    ):
+        self.cluster = cluster or LocalCluster()
+        super().__init__(config, cluster_state or ClusterState(ttl=0, fetch=self.cluster.squeue))
+
+    def _submit(self, script: Path) -> int:
+        return self.cluster.submit(script)
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from varidock.stages.namd_eq import NAMDEq, NAMDEqConfig
+from varidock.stages.namd_eq2 import NAMDEq2, NAMDEq2Config
+from varidock.stages.namd_prod import NAMDProduction, NAMDProductionConfig
+from varidock.types import NAMDCheckpoint, NAMDSimulationDir
+from varidock.utils.namd import get_namd_ns, is_namd_done
+from varidock.utils.slurm import ClusterState, get_cluster_state, scancel
+
+EQ = "eq"
+EQ2 = "eq2"
+PRODUCTION = "production"
+DONE = "done"
+QUEUED = "queued"
+STALLED = "stalled"
+
+
+@dataclass
+class NAMDCampaignConfig:
+    """Targets and log locations for an MD campaign.
+
+    Attributes:
+        target_ns (float): Production length at which a system is done.
+        timestep_fs (float): Integration timestep used to convert steps to ns.
+        eq_log (str): Log written by eq.sh, relative to the simulation dir.
+        eq2_log (str): Log written by eq2.sh.
+        prod_log (str): Log written by run.sh; its last step is the total production length.
+        segments_per_submit (int): Production segments chained with afterok per submission.
+        max_stalled_submissions (int): Stop resubmitting a system after this many
+            resubmissions in a row that did not move it forward (same step, same
+            production length), e.g. a system whose eq keeps crashing.
+
+    """
+
+    target_ns: float
+    timestep_fs: float = 2.0
+    eq_log: str = "eq.log"
+    eq2_log: str = "eq2.log"
+    prod_log: str = "run.log"
+    segments_per_submit: int = 1
+    max_stalled_submissions: int = 2
+
+
+def _finished(log: Path, timestep_fs: float) -> bool:
+    result = get_namd_ns(log, timestep_fs)
+    return result is not None and result[1]
+
+
+@dataclass
+class _Progress:
+    last: Optional[tuple[str, float]] = None
+    stalls: int = 0
+
+
+class NAMDCampaign:
+    """Drive many NAMD systems from equilibration to a production target.
+
+    Each pass looks at every system once. Systems with a pending or running
+    job (matched by working directory in one cached squeue snapshot) are left
+    alone, except that jobs pending with DependencyNeverSatisfied (an earlier
+    link of their chain failed) are cancelled and do not count as queued.
+    Otherwise the next missing step is submitted with everything after it
+    chained by ``afterok``: eq -> eq2 -> production for a fresh system,
+    eq2 -> production after equilibration, and another production segment
+    while ``is_namd_done(prod_log, target_ns)`` is false. Call ``run()`` to
+    keep passing until every system is done or stalled.
+
+    Example:
+        >>> campaign = NAMDCampaign(sim_dirs, NAMDCampaignConfig(target_ns=100))
+        >>> campaign.run()
+
+    Attributes:
+        systems (list[NAMDSimulationDir]): Systems in the campaign.
+        config (NAMDCampaignConfig): Targets and log names.
+        poll_seconds (float): Wait between passes in run().
+
+    """
+
+    def __init__(
+        self,
+        systems: Iterable[NAMDSimulationDir],
+        config: NAMDCampaignConfig,
+        poll_seconds: float = 300.0,
+        cluster_state: Optional[ClusterState] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        log: Callable[[str], None] = print,
+    ):
+        if config.segments_per_submit < 1:
+            raise ValueError(f"segments_per_submit must be at least 1, got {config.segments_per_submit}")
+        self.systems = list(systems)
+        self.config = config
+        self.poll_seconds = poll_seconds
+        self.cluster_state = cluster_state or get_cluster_state()
+        self._sleep = sleep
+        self._log = log
+        self._stop = False
+        self._eq = NAMDEq(NAMDEqConfig())
+        self._eq2 = NAMDEq2(NAMDEq2Config())
+        self._prod = NAMDProduction(NAMDProductionConfig())
+        self._progress: dict[Path, _Progress] = {}
+
+    def stop(self) -> None:
+        """Ask run() to return after the current pass (e.g. from a signal handler)."""
+        self._stop = True
+
+    def status(self, system: NAMDSimulationDir) -> str:
+        """DONE, QUEUED, STALLED, or the next step to submit (EQ, EQ2, PRODUCTION)."""
+        cfg = self.config
+        path = system.path
+        if is_namd_done(path / cfg.prod_log, cfg.target_ns, cfg.timestep_fs):
+            return DONE
+        if any(not job.never_starts for job in self.cluster_state.by_work_dir(path)):
+            return QUEUED
+        if self._progress.get(path, _Progress()).stalls >= cfg.max_stalled_submissions:
+            return STALLED
+        if not _finished(path / cfg.eq_log, cfg.timestep_fs):
+            return EQ
+        if not _finished(path / cfg.eq2_log, cfg.timestep_fs):
+            return EQ2
+        return PRODUCTION
+
+    def submit(self, system: NAMDSimulationDir) -> Optional[int]:
+        """Submit the remaining chain for one system. Returns the last job ID, or None."""
+        self._cancel_dead(system)
+        step = self.status(system)
+        if step not in (EQ, EQ2, PRODUCTION):
+            return None
+        return self._submit(system, step)
+
+    def _cancel_dead(self, system: NAMDSimulationDir) -> None:
+        # A chain whose earlier job failed stays pending forever; clear it so
+        # the system can be resubmitted (or counted as stalled).
+        for job in self.cluster_state.by_work_dir(system.path):
+            if not job.never_starts:
+                continue
+            try:
+                scancel(job.job_id)
+            except (subprocess.CalledProcessError, OSError) as e:
+                self._log(f"{system.path}: could not cancel job {job.job_id}: {e}")
+            else:
+                self._log(f"{system.path}: cancelled job {job.job_id} ({job.reason})")
+
+    def _submit(self, system: NAMDSimulationDir, step: str) -> Optional[int]:
+        self._note_submission(system, step)
+        if step == EQ:
+            checkpoint = self._eq.submit(system)
+            checkpoint = self._eq2.submit(checkpoint)
+        elif step == EQ2:
+            checkpoint = self._eq2.submit(NAMDCheckpoint(path=system.path, restart_prefix=EQ, source_namd_sim_dir=system))
+        else:
+            checkpoint = NAMDCheckpoint(path=system.path, restart_prefix=EQ2, source_namd_sim_dir=system)
+
+        job_id = checkpoint.job_id
+        for _ in range(self.config.segments_per_submit):
+            job_id = self._prod.submit(checkpoint, depends_on=job_id).job_id
+        self._log(f"{system.path}: submitted {step} chain, last job {job_id}")
+        return job_id
+
+    def _note_submission(self, system: NAMDSimulationDir, step: str) -> None:
+        # Submitting the same step again with the production log unchanged means
+        # the previous chain finished without making progress.
+        result = get_namd_ns(system.path / self.config.prod_log, self.config.timestep_fs)
+        current = (step, result[0] if result else -1.0)
+        progress = self._progress.setdefault(system.path, _Progress())
+        progress.stalls = progress.stalls + 1 if progress.last == current else 0
+        progress.last = current
+
+    def run_once(self) -> dict[str, int]:
+        """One pass over every system. Returns a count of systems per status."""
+        self.cluster_state.refresh()
+        counts: dict[str, int] = {}
+        for system in self.systems:
+            self._cancel_dead(system)
+            step = self.status(system)
+            if step in (EQ, EQ2, PRODUCTION):
+                self._submit(system, step)
+            counts[step] = counts.get(step, 0) + 1
+        return counts
+
+    def run(self) -> dict[str, int]:
+        """Pass until every system is done or stalled, or stop() is called."""
+        while True:
+            counts = self.run_once()
+            self._log(", ".join(f"{k}: {v}" for k, v in sorted(counts.items())))
+            if self._stop or set(counts) <= {DONE, STALLED}:
+                return counts
+            self._sleep(self.poll_seconds)
@@ -0,0 +1,432 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import pickle
+import re
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from varidock.plans import RunPlan
+from varidock.execution.ledger import RunLedger, plan_key
+from varidock.execution.local import LocalExecutor
+from varidock.execution.retry import plan_from_dict, plan_to_dict
+from varidock.execution.run import LocalCommandRunner
+from varidock.execution.slurm import SlurmConfig, SlurmExecutor
+from varidock.utils.slurm import _sbatch, parse_slurm_time
+
+PENDING = "pending"
+CLAIMED = "claimed"
+DONE = "done"
+FAILED = "failed"
+
+
+class FileQueue:
+    """A work queue of files that several processes, on several nodes, can share.
+
+    Items move between ``pending/``, ``claimed/``, ``done/`` and ``failed/``
+    directories under ``root``. A worker claims an item by renaming it into
+    ``claimed/``; rename is atomic, so exactly one worker wins. RunPlans are
+    stored as JSON, stage invocations as pickles of ``(stage, input)``.
+
+    Attributes:
+        root (Path): Queue directory; put it on a filesystem every pilot can see.
+
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        for state in (PENDING, CLAIMED, DONE, FAILED):
+            (self.root / state).mkdir(parents=True, exist_ok=True)
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+        # Snapshot of pending/ shared by this process's workers, so each claim
+        # does not list a directory of 100k files. Entries other pilots took
+        # first simply fail to rename and are skipped.
+        self._listing: list[Path] = []
+
+    def _name(self, tag: str, suffix: str) -> str:
+        return f"{time.time_ns():020d}-{os.getpid()}-{next(self._seq):06d}-{tag}{suffix}"
+
+    def _publish(self, name: str, data: bytes) -> Path:
+        tmp = self.root / f".{name}.tmp"
+        tmp.write_bytes(data)
+        dest = self.root / PENDING / name
+        os.replace(tmp, dest)
+        return dest
+
+    def put(self, plan: RunPlan) -> Path:
+        """Enqueue a RunPlan."""
+        data = json.dumps(plan_to_dict(plan)).encode()
+        return self._publish(self._name(plan_key(plan)[:12], ".json"), data)
+
+    def put_call(self, stage: Any, input: Any) -> Path:
+        """Enqueue ``stage.run(input)``. Stage and input must be picklable."""
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", getattr(stage, "name", type(stage).__name__))
+        return self._publish(self._name(name, ".pkl"), pickle.dumps((stage, input)))
+
+    def claim(self) -> Optional[Path]:
+        """Atomically take the oldest pending item, or return None if there is none."""
+        owner = f"{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}"
+        relisted = False
+        while True:
+            with self._lock:
+                if not self._listing:
+                    if relisted:
+                        return None
+                    self._listing = sorted((self.root / PENDING).iterdir(), reverse=True)
+                    relisted = True
+                    continue
+                path = self._listing.pop()
+            dest = self.root / CLAIMED / f"{path.name}@{owner}"
+            try:
+                # requeue_stale ages claims by mtime, so restart the clock
+                # before the item shows up in claimed/.
+                os.utime(path)
+                os.rename(path, dest)
+            except FileNotFoundError:
+                continue  # another worker got it first
+            return dest
+
+    def complete(self, claimed: Path, ok: bool, info: Optional[dict] = None) -> Path:
+        """Move a claimed item to done/ or failed/, with an optional JSON sidecar."""
+        name = claimed.name.split("@", 1)[0]
+        dest = self.root / (DONE if ok else FAILED) / name
+        os.replace(claimed, dest)
+        if info is not None:
+            dest.with_name(dest.name + ".info.json").write_text(json.dumps(info, indent=1, default=str))
+        return dest
+
+    def release(self, claimed: Path) -> Path:
+        """Put a claimed item back in pending/."""
+        dest = self.root / PENDING / claimed.name.split("@", 1)[0]
+        os.replace(claimed, dest)
+        return dest
+
+    def requeue_stale(self, max_age_seconds: float) -> int:
+        """Return items claimed more than ``max_age_seconds`` ago to pending, e.g. after a pilot was killed."""
+        cutoff = time.time() - max_age_seconds
+        moved = 0
+        for path in (self.root / CLAIMED).iterdir():
+            try:
+                if path.stat().st_mtime < cutoff:
+                    self.release(path)
+                    moved += 1
+            except FileNotFoundError:
+                continue
+        return moved
+
+    def result(self, item: Path) -> Any:
+        """Unpickle the output of a completed stage invocation."""
+        name = Path(item).name.split("@", 1)[0]
+        return pickle.loads((self.root / DONE / f"{name}.result.pkl").read_bytes())
+
+    def counts(self) -> dict[str, int]:
+        return {
+            state: sum(1 for p in (self.root / state).iterdir() if not p.name.endswith((".info.json", ".result.pkl")))
+            for state in (PENDING, CLAIMED, DONE, FAILED)
+        }
+
+
+def slurm_time_left() -> Optional[float]:
+    """Seconds left in the current SLURM allocation, or None outside SLURM."""
+    job_id = os.environ.get("SLURM_JOB_ID")
+    if not job_id:
+        return None
+    try:
+        out = subprocess.run(
+            ["squeue", "-h", "-j", job_id, "-o", "%L"], capture_output=True, text=True, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return parse_slurm_time(out)
+
+
+@dataclass
+class PilotReport:
+    """What one pilot did.
+
+    Attributes:
+        done (int): Items completed successfully.
+        failed (int): Items that failed.
+        stopped_for_walltime (bool): True if the pilot stopped claiming because walltime was close.
+        stopped_for_signal (bool): True if SIGTERM stopped the pilot and its claims were released.
+
+    """
+
+    done: int = 0
+    failed: int = 0
+    stopped_for_walltime: bool = False
+    stopped_for_signal: bool = False
+
+
+def _run_item(item: Path, executor: LocalExecutor, queue: FileQueue) -> dict:
+    if item.name.split("@", 1)[0].endswith(".pkl"):
+        result_path = queue.root / DONE / (item.name.split("@", 1)[0] + ".result.pkl")
+        proc = subprocess.run(
+            [sys.executable, "-m", "varidock.execution.pilot", "--run-call", str(item), str(result_path)],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"Stage call failed (returncode={proc.returncode}):\n{proc.stderr[-4000:]}")
+        return {"returncode": 0}
+    plan = plan_from_dict(json.loads(item.read_text()))
+    run = executor.execute(plan)
+    return {"returncode": run.returncode, "work_dir": str(plan.work_dir)}
+
+
+def run_pilot(
+    queue: FileQueue,
+    workers: Optional[int] = None,
+    walltime_seconds: Optional[float] = None,
+    margin_seconds: float = 600.0,
+    ledger: Optional[RunLedger] = None,
+    executor: Optional[LocalExecutor] = None,
+) -> PilotReport:
+    """Pull items from ``queue`` with a pool of workers until it is empty or walltime is close.
+
+    Workers stop claiming new items ``margin_seconds`` before the end of the
+    allocation; items already running are allowed to finish, so the margin
+    should cover the longest expected item.
+
+    When called from the main thread, run_pilot handles SIGTERM (what SLURM
+    sends at walltime or on scancel) while it runs: workers stop claiming,
+    every item still in flight is put back in pending/ at once, and the
+    results of those items are discarded when they finish, since another
+    pilot may already be running them. The previous handler is restored on
+    return.
+
+    Args:
+        queue (FileQueue): Shared queue to drain.
+        workers (int | None): Concurrent items. Defaults to SLURM_CPUS_ON_NODE, else os.cpu_count().
+        walltime_seconds (float | None): Seconds this pilot may run. Defaults to the time left
+            in the SLURM allocation, or unlimited outside SLURM.
+        margin_seconds (float): Safety margin before walltime.
+        ledger (RunLedger | None): Records each plan's completion; plans already done are skipped.
+        executor (LocalExecutor | None): Runs plans. Defaults to a LocalExecutor with the ledger.
+
+    Returns:
+        PilotReport: Counts of completed and failed items.
+
+    """
+    workers = workers or int(os.environ.get("SLURM_CPUS_ON_NODE", 0)) or os.cpu_count() or 1
+    if walltime_seconds is None:
+        walltime_seconds = slurm_time_left()
+    deadline = time.monotonic() + walltime_seconds - margin_seconds if walltime_seconds is not None else None
+    executor = executor or LocalExecutor(runner=LocalCommandRunner(capture_output=True), ledger=ledger)
+
+    report = PilotReport()
+    lock = threading.Lock()
+    stop = threading.Event()
+    in_flight: set[Path] = set()
+
+    def on_sigterm(signum, frame) -> None:
+        stop.set()
+        with lock:
+            report.stopped_for_signal = True
+            for item in in_flight:
+                try:
+                    queue.release(item)
+                except FileNotFoundError:
+                    pass
+            in_flight.clear()
+
+    def finish(item: Path) -> bool:
+        """Claim the right to complete ``item``; False once SIGTERM released it."""
+        with lock:
+            if item not in in_flight:
+                return False
+            in_flight.discard(item)
+            return True
+
+    def worker() -> None:
+        while not stop.is_set():
+            if deadline is not None and time.monotonic() >= deadline:
+                with lock:
+                    report.stopped_for_walltime = True
+                return
+            item = queue.claim()
+            if item is None:
+                return
+            with lock:
+                in_flight.add(item)
+            try:
+                try:
+                    info = _run_item(item, executor, queue)
+                except Exception as e:
+                    if finish(item):
+                        queue.complete(item, ok=False, info={"error": f"{type(e).__name__}: {e}"})
+                        with lock:
+                            report.failed += 1
+                else:
+                    if finish(item):
+                        queue.complete(item, ok=True, info=info)
+                        with lock:
+                            report.done += 1
+            except BaseException:
+                if finish(item) and item.exists():
+                    queue.release(item)
+                raise
+
+    previous = None
+    if threading.current_thread() is threading.main_thread():
+        previous = signal.signal(signal.SIGTERM, on_sigterm)
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="varidock-pilot") as pool:
+            futures = [pool.submit(worker) for _ in range(workers)]
+            for f in futures:
+                f.result()
+    finally:
+        if previous is not None:
+            signal.signal(signal.SIGTERM, previous)
+    return report
+
+
+class PilotExecutor:
+    """Submit pilot jobs that drain a FileQueue inside long SLURM allocations.
+
+    Short tasks (ligand prep, CIF conversion, Vina docks) spend more time
+    queued than running when each is its own sbatch job. A pilot asks for one
+    allocation and runs ``python -m varidock.execution.pilot`` inside it,
+    which calls run_pilot() on the shared queue.
+
+    Example:
+        >>> queue = FileQueue(Path("/scratch/screen/queue"))
+        >>> pilot = PilotExecutor(queue, SlurmConfig(cpus=64, time="12:00:00"))
+        >>> pilot.execute_many(plans, pilots=2)
+
+    The same queue can be drained without SLURM with ``run_pilot(queue, workers=8)``.
+
+    Pilots run on different nodes, and SQLite must not be written from
+    several hosts over NFS, so each pilot records to its own ledger next to
+    ``ledger_path``: ``ledger.sqlite`` becomes ``ledger.<job id>.sqlite``.
+    ``done_keys()`` and ``pending()`` read all of them, and execute_many()
+    uses them to skip plans an earlier pilot already finished.
+
+    Attributes:
+        queue (FileQueue): Queue the pilots drain.
+        config (SlurmConfig): Allocation each pilot requests, e.g. 1 node, 64 cores, 12 h.
+        margin_seconds (float): Stop claiming work this long before walltime.
+        ledger_path (Path | None): Base name of the per-pilot ledgers.
+
+    """
+
+    def __init__(
+        self,
+        queue: FileQueue,
+        config: SlurmConfig,
+        margin_seconds: float = 600.0,
+        ledger_path: Optional[Path] = None,
+    ):
+        self.queue = queue
+        self.config = config
+        self.margin_seconds = margin_seconds
+        self.ledger_path = ledger_path
+
+    def execute_many(self, plans, pilots: int = 1, write_only: bool = False) -> list[Path]:
+        """Enqueue plans not yet done in any pilot ledger and submit ``pilots`` pilot jobs to run them."""
+        for plan in self.pending(plans):
+            self.queue.put(plan)
+        return self.submit(pilots, write_only=write_only)
+
+    def ledger_paths(self) -> list[Path]:
+        """The per-pilot ledgers written so far."""
+        if self.ledger_path is None:
+            return []
+        base = Path(self.ledger_path)
+        return sorted(base.parent.glob(f"{base.stem}.*{base.suffix}"))
+
+    def done_keys(self) -> set[str]:
+        """Keys of plans recorded as succeeded in any pilot's ledger."""
+        keys: set[str] = set()
+        for path in self.ledger_paths():
+            with RunLedger(path) as ledger:
+                keys |= ledger.done_keys()
+        return keys
+
+    def pending(self, plans) -> list[RunPlan]:
+        """Filter plans down to those no pilot has recorded as succeeded."""
+        done = self.done_keys()
+        return [plan for plan in plans if plan_key(plan) not in done]
+
+    def submit(self, pilots: int = 1, write_only: bool = False) -> list[Path]:
+        """Write the pilot batch script and submit it ``pilots`` times."""
+        script = self.write_script()
+        if not write_only:
+            for _ in range(pilots):
+                print(f"Submitted pilot {_sbatch(script)}")
+        return [script]
+
+    def write_script(self) -> Path:
+        root = self.queue.root.resolve()
+        lines = SlurmExecutor(self.config).header_lines(
+            job_name="varidock-pilot",
+            output=root / "pilot-%j.out",
+            error=root / "pilot-%j.err",
+        )
+        argv = [
+            "python", "-m", "varidock.execution.pilot", str(root),
+            "--workers", str(self.config.cpus),
+            "--margin", str(self.margin_seconds),
+        ]
+        if self.ledger_path is not None:
+            # One ledger per pilot job; the shell expands the job ID at run time.
+            base = Path(self.ledger_path)
+            argv += ["--ledger", str(base.with_suffix(".${SLURM_JOB_ID:-$$}" + base.suffix))]
+        lines.append(" ".join(argv))
+        lines.append("")
+        script = root / "pilot.sh"
+        script.write_text("\n".join(lines))
+        script.chmod(0o755)
+        return script
+
+
+def _run_call(item: Path, result_path: Path) -> None:
+    stage, input = pickle.loads(Path(item).read_bytes())
+    output = stage.run(input)
+    tmp = result_path.with_name(f".{result_path.name}.tmp")
+    tmp.write_bytes(pickle.dumps(output))
+    os.replace(tmp, result_path)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Drain a varidock FileQueue inside this allocation.")
+    parser.add_argument("queue", type=Path, nargs="?")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--walltime", type=float, default=None, help="Seconds this pilot may run (default: SLURM time left).")
+    parser.add_argument("--margin", type=float, default=600.0)
+    parser.add_argument("--ledger", type=Path, default=None)
+    parser.add_argument("--requeue-stale", type=float, default=None, metavar="SECONDS",
+                        help="First return items claimed longer ago than this to pending.")
+    parser.add_argument("--run-call", nargs=2, type=Path, metavar=("ITEM", "RESULT"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_call:
+        _run_call(*args.run_call)
+        return 0
+    if args.queue is None:
+        parser.error("queue is required")
+
+    queue = FileQueue(args.queue)
+    if args.requeue_stale is not None:
+        queue.requeue_stale(args.requeue_stale)
+    ledger = RunLedger(args.ledger) if args.ledger else None
+    report = run_pilot(queue, args.workers, args.walltime, args.margin, ledger=ledger)
+    stopped = " (stopped by SIGTERM)" if report.stopped_for_signal else ""
+    print(f"pilot finished{stopped}: {report.done} done, {report.failed} failed, queue {queue.counts()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
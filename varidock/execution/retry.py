@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import errno
+import json
+import random
+import re
+import signal
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Sequence
+
+from varidock.plans import RunPlan
+
+TRANSIENT = "transient"
+PERMANENT = "permanent"
+
+# Exit codes a shell or container runtime reports for a child killed by a signal (128 + signo).
+_SIGNAL_EXIT_CODES = {128 + s for s in (signal.SIGKILL, signal.SIGTERM, signal.SIGBUS, signal.SIGHUP)}
+
+DEFAULT_TRANSIENT_PATTERNS = (
+    r"Stale file handle",
+    r"ESTALE",
+    r"Cannot allocate memory",
+    r"ENOMEM",
+    r"[Oo]ut of memory",
+    r"oom[-_ ]kill",
+    r"Resource temporarily unavailable",
+    r"Input/output error",
+    r"Transport endpoint is not connected",
+    r"Device or resource busy",
+    r"Connection (timed out|reset by peer)",
+)
+
+_TRANSIENT_ERRNOS = {
+    errno.ESTALE, errno.ENOMEM, errno.EIO, errno.EAGAIN, errno.EBUSY, errno.ETIMEDOUT, errno.EMFILE, errno.ENFILE,
+}
+
+
+class PlanFailedError(RuntimeError):
+    """A RunPlan's command exited non-zero.
+
+    Attributes:
+        returncode (int): Exit code of the last attempt. Negative values are signals.
+        stdout (str | None): Captured stdout, or a pointer to its log file.
+        stderr (str | None): Captured stderr, or a pointer to its log file.
+        kind (str): TRANSIENT or PERMANENT, as classified by the RetryPolicy.
+        attempts (int): Number of attempts made.
+
+    """
+
+    def __init__(
+        self,
+        message: str,
+        returncode: int,
+        stdout: Optional[str] = None,
+        stderr: Optional[str] = None,
+        kind: str = PERMANENT,
+        attempts: int = 1,
+    ):
+        super().__init__(message)
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.kind = kind
+        self.attempts = attempts
+
+
+@dataclass
+class RetryPolicy:
+    """When and how often to retry a failed plan.
+
+    A failure is transient if the command was killed by a signal (negative
+    return code, or 128 + SIGKILL/SIGTERM/SIGBUS/SIGHUP from a shell or
+    container runtime), exited with one of ``transient_returncodes``, or its
+    stderr matches one of ``transient_patterns`` (NFS stale handles, ENOMEM,
+    OOM kills, Lustre I/O errors). Everything else is permanent and is not
+    retried. LocalExecutor gives a non-capturing LocalCommandRunner a
+    bounded stderr tail when a policy is set, so the patterns see stderr
+    either way; a custom runner must fill ``CompletedRun.stderr`` itself.
+
+    Attributes:
+        max_attempts (int): Total attempts per plan, including the first.
+        backoff_seconds (float): Delay before the second attempt.
+        backoff_factor (float): Multiplier applied to the delay after each attempt.
+        max_backoff_seconds (float): Upper bound on a single delay.
+        jitter (float): Random fraction added to each delay, so retries from
+            many workers do not hit a recovering filesystem at the same moment.
+        transient_returncodes (set[int]): Exit codes that are always transient.
+        transient_patterns (Sequence[str]): Regexes searched in stderr.
+        sleep (Callable[[float], None]): Used to wait between attempts.
+
+    """
+
+    max_attempts: int = 3
+    backoff_seconds: float = 10.0
+    backoff_factor: float = 2.0
+    max_backoff_seconds: float = 600.0
+    jitter: float = 0.1
+    transient_returncodes: set[int] = field(default_factory=lambda: set(_SIGNAL_EXIT_CODES))
+    transient_patterns: Sequence[str] = DEFAULT_TRANSIENT_PATTERNS
+    sleep: Callable[[float], None] = time.sleep
+
+    def __post_init__(self):
+        if self.max_attempts < 1:
+            raise ValueError(f"max_attempts must be at least 1, got {self.max_attempts}")
+        self._pattern = re.compile("|".join(f"(?:{p})" for p in self.transient_patterns)) if self.transient_patterns else None
+
+    def classify(self, returncode: int, stderr: Optional[str] = None) -> str:
+        """Return TRANSIENT or PERMANENT for a non-zero exit."""
+        if returncode < 0 or returncode in self.transient_returncodes:
+            return TRANSIENT
+        if stderr and self._pattern is not None and self._pattern.search(stderr):
+            return TRANSIENT
+        return PERMANENT
+
+    def classify_exception(self, error: BaseException) -> str:
+        """Return TRANSIENT or PERMANENT for an exception raised while running a plan."""
+        if isinstance(error, PlanFailedError):
+            return self.classify(error.returncode, error.stderr)
+        if isinstance(error, MemoryError):
+            return TRANSIENT
+        if isinstance(error, OSError) and error.errno in _TRANSIENT_ERRNOS:
+            return TRANSIENT
+        return PERMANENT
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait after failed attempt number ``attempt`` (1-based)."""
+        base = min(self.backoff_seconds * self.backoff_factor ** (attempt - 1), self.max_backoff_seconds)
+        return base * (1 + self.jitter * random.random())
+
+    def should_retry(self, kind: str, attempt: int) -> bool:
+        return kind == TRANSIENT and attempt < self.max_attempts
+
+
+def _tail(text: Optional[str], limit: int = 2000) -> Optional[str]:
+    if text is None or len(text) <= limit:
+        return text
+    return "..." + text[-limit:]
+
+
+def plan_to_dict(plan: RunPlan) -> dict:
+    return {
+        "work_dir": str(plan.work_dir),
+        "files_text": {str(p): t for p, t in plan.files_text.items()},
+        "argv": [str(a) for a in plan.argv],
+        "expected_outputs": [str(p) for p in plan.expected_outputs],
+        "env": dict(plan.env) if plan.env else None,
+        "resource_class": plan.resource_class,
+        "metadata": dict(plan.metadata) if plan.metadata else None,
+    }
+
+
+def plan_from_dict(data: dict) -> RunPlan:
+    return RunPlan(
+        work_dir=Path(data["work_dir"]),
+        files_text={Path(p): t for p, t in data["files_text"].items()},
+        argv=list(data["argv"]),
+        expected_outputs=[Path(p) for p in data["expected_outputs"]],
+        env=data.get("env"),
+        resource_class=data.get("resource_class"),
+        metadata=data.get("metadata"),
+    )
+
+
+@dataclass
+class FailureReport:
+    """Quarantine for plans that failed in a batch.
+
+    Each failure keeps the full plan, so the report doubles as a retry list:
+    ``FailureReport.load_plans(path)`` returns the plans to run again.
+
+    Attributes:
+        path (Path | None): If set, the report is rewritten here after every failure,
+            so it survives the driver being killed.
+        failures (list[dict]): One entry per failed plan.
+
+    """
+
+    path: Optional[Path] = None
+    failures: list[dict] = field(default_factory=list)
+
+    def add(self, plan: RunPlan, error: BaseException, kind: Optional[str] = None) -> None:
+        entry = {
+            "work_dir": str(plan.work_dir),
+            "error": f"{type(error).__name__}: {error}".strip()[:2000],
+            "kind": kind or getattr(error, "kind", PERMANENT),
+            "returncode": getattr(error, "returncode", None),
+            "attempts": getattr(error, "attempts", 1),
+            "stderr_tail": _tail(getattr(error, "stderr", None)),
+            "plan": plan_to_dict(plan),
+        }
+        self.failures.append(entry)
+        if self.path is not None:
+            self.write()
+
+    def __len__(self) -> int:
+        return len(self.failures)
+
+    def write(self, path: Optional[Path] = None) -> Path:
+        path = Path(path or self.path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(json.dumps({"failures": self.failures}, indent=2) + "\n")
+        tmp.replace(path)
+        return path
+
+    def plans(self) -> list[RunPlan]:
+        return [plan_from_dict(f["plan"]) for f in self.failures]
+
+    @staticmethod
+    def load_plans(path: Path, kinds: Iterable[str] = (TRANSIENT, PERMANENT)) -> list[RunPlan]:
+        """Read a written report and return the failed plans of the given kinds."""
+        data = json.loads(Path(path).read_text())
+        kinds = set(kinds)
+        return [plan_from_dict(f["plan"]) for f in data["failures"] if f["kind"] in kinds]
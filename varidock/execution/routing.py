@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable, Mapping, Optional, Union
+
+from varidock.plans import RunPlan
+from varidock.execution.local import LocalExecutor
+from varidock.execution.run import CompletedRun
+from varidock.execution.slurm import SlurmConfig, SlurmExecutor
+from varidock.utils.slurm import parse_slurm_mem, parse_slurm_time
+
+Executor = Union[LocalExecutor, SlurmExecutor]
+Sizer = Callable[[RunPlan, SlurmConfig], SlurmConfig]
+
+
+def _format_time(minutes: float) -> str:
+    minutes = math.ceil(minutes)
+    days, minutes = divmod(minutes, 24 * 60)
+    hours, minutes = divmod(minutes, 60)
+    hms = f"{hours:02d}:{minutes:02d}:00"
+    return f"{days}-{hms}" if days else hms
+
+
+@dataclass(frozen=True)
+class SequenceLengthSizer:
+    """Scale memory and walltime linearly with ``plan.metadata["sequence_length"]``.
+
+    Plans without a sequence length keep the route's config unchanged. The
+    sized request never drops below the route's own ``mem`` and ``time``.
+
+    Example:
+        >>> # AF3 inference: ~16 GB + 20 GB per 1000 residues, 30 min + 60 min per 1000
+        >>> SequenceLengthSizer(mem_gb=16, mem_gb_per_1k=20, minutes=30, minutes_per_1k=60)
+
+    Attributes:
+        mem_gb (float): Memory for a zero-length input.
+        mem_gb_per_1k (float): Additional memory per 1000 residues.
+        minutes (float): Walltime for a zero-length input.
+        minutes_per_1k (float): Additional walltime per 1000 residues.
+        max_mem_gb (float | None): Upper bound on memory, e.g. the node size.
+        max_minutes (float | None): Upper bound on walltime, e.g. the partition limit.
+
+    """
+
+    mem_gb: float
+    mem_gb_per_1k: float
+    minutes: float
+    minutes_per_1k: float
+    max_mem_gb: Optional[float] = None
+    max_minutes: Optional[float] = None
+
+    def __call__(self, plan: RunPlan, config: SlurmConfig) -> SlurmConfig:
+        length = (plan.metadata or {}).get("sequence_length")
+        if not length:
+            return config
+        mem = max(self.mem_gb + self.mem_gb_per_1k * length / 1000, parse_slurm_mem(config.mem) / 1024)
+        if self.max_mem_gb is not None:
+            mem = min(mem, self.max_mem_gb)
+        base_minutes = (parse_slurm_time(config.time) or 0) / 60
+        minutes = max(self.minutes + self.minutes_per_1k * length / 1000, base_minutes)
+        if self.max_minutes is not None:
+            minutes = min(minutes, self.max_minutes)
+        return replace(config, mem=f"{math.ceil(mem)}G", time=_format_time(minutes))
+
+
+@dataclass(frozen=True)
+class Route:
+    """Where plans of one resource class go.
+
+    Attributes:
+        executor (LocalExecutor | SlurmExecutor): Runs or submits the plan.
+        sizer (Callable[[RunPlan, SlurmConfig], SlurmConfig] | None): For SLURM
+            routes, adjusts the route's config per plan (memory, time, ...).
+
+    """
+
+    executor: Executor
+    sizer: Optional[Sizer] = None
+
+
+class RoutingExecutor:
+    """Send each plan to the executor registered for its ``resource_class``.
+
+    A drop-in replacement for the single executor a stage takes, so one
+    driver can send AF3MSA plans (``cpu-heavy``) to a CPU partition and
+    AF3Inference plans (``gpu``) to a GPU partition.
+
+    Example:
+        >>> router = RoutingExecutor(
+        ...     {
+        ...         CPU_HEAVY: SlurmExecutor(SlurmConfig(partition="cpu", cpus=16, mem="32G")),
+        ...         GPU: Route(
+        ...             SlurmExecutor(SlurmConfig(partition="gpu", gpus=1, mem="64G")),
+        ...             sizer=SequenceLengthSizer(mem_gb=16, mem_gb_per_1k=20, minutes=30, minutes_per_1k=60),
+        ...         ),
+        ...         SHORT: LocalExecutor(),
+        ...     },
+        ...     default=SHORT,
+        ... )
+        >>> AF3MSA(af3_config, executor=router)
+
+    Attributes:
+        routes (dict[str, Route]): Resource class -> route.
+        default (str | None): Class used for untagged plans and classes without a route.
+
+    Raises:
+        KeyError: From route() if a plan's class has no route and there is no default.
+
+    """
+
+    def __init__(self, routes: Mapping[str, Union[Route, Executor]], default: Optional[str] = None):
+        self.routes = {k: r if isinstance(r, Route) else Route(r) for k, r in routes.items()}
+        if default is not None and default not in self.routes:
+            raise ValueError(f"default route {default!r} is not one of {sorted(self.routes)}")
+        self.default = default
+
+    def route(self, plan: RunPlan) -> Executor:
+        """The executor that will handle ``plan``, with its SLURM request sized if applicable."""
+        route = self.routes.get(plan.resource_class) if plan.resource_class else None
+        if route is None:
+            if self.default is None:
+                raise KeyError(f"No route for resource class {plan.resource_class!r} and no default")
+            route = self.routes[self.default]
+        executor = route.executor
+        if route.sizer is not None and isinstance(executor, SlurmExecutor):
+            config = route.sizer(plan, executor.config)
+            if config != executor.config:
+                executor = SlurmExecutor(config, executor.cluster_state)
+        return executor
+
+    def execute(
+        self,
+        plan: RunPlan,
+        write_only: bool = False,
+        overwrite_inputs: bool = False,
+    ) -> Union[CompletedRun, Path]:
+        return self.route(plan).execute(plan, write_only=write_only, overwrite_inputs=overwrite_inputs)
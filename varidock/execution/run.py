@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 import subprocess
+import sys
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Optional, Sequence
@@ -16,6 +17,28 @@ class CompletedRun:
     stderr: Optional[str] = None
 
 
+@dataclass(frozen=True)
+class PlanOutcome:
+    """Result of one plan in a batch: either a completed run or the error it raised.
+
+    Attributes:
+        index (int): Position of the plan in the submitted batch.
+        plan (RunPlan): The plan that was executed.
+        run (CompletedRun | None): The completed run, if the plan succeeded.
+        error (BaseException | None): The error raised, if the plan failed.
+
+    """
+
+    index: int
+    plan: RunPlan
+    run: Optional[CompletedRun] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
 class CommandRunner(ABC):
     @abstractmethod
     def run(self, plan: RunPlan) -> CompletedRun:
@@ -23,14 +46,30 @@ class CommandRunner(ABC):
 
 
 class LocalCommandRunner(CommandRunner):
-    def __init__(self, capture_output: bool = False):
+    """Run a plan's argv as a local subprocess.
+
+    Args:
+        capture_output (bool): Capture stdout and stderr into the CompletedRun
+            instead of letting them through to this process.
+        stderr_tail (int): When not capturing, still keep the last this many
+            bytes of stderr in ``CompletedRun.stderr`` while passing all of it
+            through, so failures can be classified. 0 disables it.
+
+    """
+
+    def __init__(self, capture_output: bool = False, stderr_tail: int = 0):
         self.capture_output = capture_output
+        self.stderr_tail = stderr_tail
 
     def run(self, plan: RunPlan) -> CompletedRun:
         env = os.environ.copy()
         if plan.env:
             env.update({k: str(v) for k, v in plan.env.items()})
-    
+
+        if self.stderr_tail and not self.capture_output:
+            returncode, stderr = self._run_with_stderr_tail(plan, env)
+            return CompletedRun(returncode=returncode, argv=plan.argv, stderr=stderr)
+
         proc = subprocess.run(
             list(plan.argv),
             cwd=str(plan.work_dir),
@@ -46,3 +85,19 @@ class LocalCommandRunner(CommandRunner):
             stdout=proc.stdout,
             stderr=proc.stderr,
         )
+
+    def _run_with_stderr_tail(self, plan: RunPlan, env: dict) -> tuple[int, str]:
+        # Tee stderr: copy every chunk to our own stderr, keep only the tail.
+        sink = getattr(sys.stderr, "buffer", None)
+        tail = bytearray()
+        with subprocess.Popen(list(plan.argv), cwd=str(plan.work_dir), env=env, stderr=subprocess.PIPE) as proc:
+            for chunk in iter(lambda: proc.stderr.read1(65536), b""):
+                if sink is not None:
+                    sink.write(chunk)
+                    sink.flush()
+                else:
+                    sys.stderr.write(chunk.decode(errors="replace"))
+                tail += chunk
+                del tail[: -self.stderr_tail]
+            returncode = proc.wait()
+        return returncode, tail.decode(errors="replace")
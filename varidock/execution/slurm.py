@@ -1,8 +1,13 @@
-from dataclasses import dataclass
+import json
+import shlex
+import subprocess
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Sequence
+from typing import Iterable, Sequence
 
 from varidock.plans import RunPlan
+from varidock.execution.validate import PlanValidator, ExpectedOutputsValidator
+from varidock.utils.slurm import ClusterState, get_cluster_state, get_submit_backend
 
 @dataclass
 class SlurmConfig:
@@ -36,11 +41,18 @@ class SlurmExecutor:
 
     Attributes:
         config (SlurmConfig): SLURM resource configuration.
+        cluster_state (ClusterState): Snapshot of the user's jobs. Submitted
+            jobs are recorded in it, and is_queued() answers from it.
 
     """
 
-    def __init__(self, config: SlurmConfig):
+    def __init__(self, config: SlurmConfig, cluster_state: ClusterState | None = None):
         self.config = config
+        self.cluster_state = cluster_state or get_cluster_state()
+
+    def is_queued(self, plan: "RunPlan") -> bool:
+        """True if a pending or running job was submitted from the plan's work_dir."""
+        return bool(self.cluster_state.by_work_dir(plan.work_dir))
 
     def execute(
         self,
@@ -70,17 +82,9 @@ class SlurmExecutor:
         script_path.chmod(0o755)
 
         if not write_only:
-            import subprocess
-
-            result = subprocess.run(
-                ["sbatch", str(script_path)],
-                capture_output=True,
-                text=True,
-                cwd=plan.work_dir,
-            )
-            if result.returncode != 0:
-                raise RuntimeError(f"sbatch failed: {result.stderr}")
-            print(result.stdout.strip())
+            job_id = self._submit(script_path)
+            print(f"Submitted batch job {job_id}")
+            self.cluster_state.note_submitted(job_id, plan.work_dir.name, plan.work_dir)
 
         return script_path
 
@@ -93,19 +97,45 @@ class SlurmExecutor:
         Returns:
             str: Complete SLURM batch script as a string.
 
+        """
+        lines = self.header_lines(
+            job_name=plan.work_dir.name,
+            output=plan.work_dir / "slurm-%j.out",
+            error=plan.work_dir / "slurm-%j.err",
+        )
+
+        if plan.env:
+            for k, v in plan.env.items():
+                lines.append(f"export {k}={v}")
+            lines.append("")
+
+        lines.append(" \\\n    ".join(plan.argv))
+        lines.append("")
+
+        return "\n".join(lines)
+
+    def header_lines(self, job_name: str, output: Path, error: Path, array: str | None = None) -> list[str]:
+        """Build the shebang, #SBATCH directives and module loads for a batch script.
+
+        Shared by single and array jobs, and by other executors (e.g. pilot
+        jobs) that submit their own scripts under this config. The caller
+        appends the commands to run.
         """
         cfg = self.config
         lines = [
             "#!/bin/bash --login",
-            f"#SBATCH --job-name={plan.work_dir.name}",
-            f"#SBATCH --output={plan.work_dir / 'slurm-%j.out'}",
-            f"#SBATCH --error={plan.work_dir / 'slurm-%j.err'}",
+            f"#SBATCH --job-name={job_name}",
+            f"#SBATCH --output={output}",
+            f"#SBATCH --error={error}",
             f"#SBATCH --partition={cfg.partition}",
             f"#SBATCH --time={cfg.time}",
             f"#SBATCH --cpus-per-task={cfg.cpus}",
             f"#SBATCH --mem={cfg.mem}",
-            f"#SBATCH --account={cfg.account}" if hasattr(cfg, "account") else "",
         ]
+        if cfg.account:
+            lines.append(f"#SBATCH --account={cfg.account}")
+        if array is not None:
+            lines.append(f"#SBATCH --array={array}")
 
         if cfg.gpus > 0:
             gpu_str = f"{cfg.gpu_type}:{cfg.gpus}" if cfg.gpu_type else str(cfg.gpus)
@@ -122,12 +152,203 @@ class SlurmExecutor:
         if cfg.modules:
             lines.append("")
 
-        if plan.env:
-            for k, v in plan.env.items():
-                lines.append(f"export {k}={v}")
-            lines.append("")
+        return lines
 
-        lines.append(" \\\n    ".join(plan.argv))
-        lines.append("")
+    def execute_many(
+        self,
+        plans: Iterable[RunPlan],
+        array_dir: Path | None = None,
+        name: str | None = None,
+        max_concurrent: int | None = None,
+        max_array_size: int = 1000,
+        write_only: bool = False,
+        overwrite_inputs: bool = False,
+        validator: PlanValidator | None = None,
+    ) -> list["ArrayJob"]:
+        """Submit many plans as SLURM job arrays instead of one job per plan.
 
-        return "\n".join(lines)
+        Every plan runs with this executor's SlurmConfig, so plans passed
+        together should need the same resources. Plans whose expected outputs
+        already validate are skipped. The rest are packed into arrays of at
+        most ``max_array_size`` tasks, each submitted with a single sbatch
+        call as ``--array=0-N%K``.
+
+        Each plan gets an ``array_task.sh`` in its work_dir that exports its
+        env, runs its argv there, writes ``slurm-<jobid>_<index>.out/.err`` into
+        the work_dir, and fails the task if an expected output is missing.
+        The array script looks up its task script by ``SLURM_ARRAY_TASK_ID``
+        in ``<name>.tasks``; ``<name>.manifest.json`` records argv, env,
+        work_dir and expected outputs per index.
+
+        Args:
+            plans (Iterable[RunPlan]): Plans to submit.
+            array_dir (Path | None): Where array scripts and manifests are written.
+                Defaults to ``slurm_arrays/`` next to the first plan's work_dir.
+            name (str | None): Job name prefix. Defaults to the array_dir's parent name.
+            max_concurrent (int | None): Maximum tasks running at once (the ``%K`` throttle).
+            max_array_size (int): Maximum tasks per array; larger batches are split.
+                Keep this at or below the cluster's MaxArraySize.
+            write_only (bool): If True, write the scripts but don't submit.
+            overwrite_inputs (bool): If True, overwrite existing input files.
+            validator (PlanValidator | None): Decides which plans are already done.
+                Defaults to ExpectedOutputsValidator.
+
+        Returns:
+            list[ArrayJob]: One entry per array, with its job ID when submitted.
+
+        Raises:
+            RuntimeError: If sbatch fails.
+
+        """
+        if max_array_size < 1:
+            raise ValueError(f"max_array_size must be at least 1, got {max_array_size}")
+        validator = validator or ExpectedOutputsValidator()
+
+        todo = []
+        for plan in plans:
+            try:
+                validator.validate(plan)
+                continue
+            except Exception:
+                todo.append(plan)
+        if not todo:
+            return []
+
+        array_dir = Path(array_dir) if array_dir else todo[0].work_dir.parent / "slurm_arrays"
+        array_dir.mkdir(parents=True, exist_ok=True)
+        name = name or array_dir.resolve().parent.name or "varidock"
+
+        jobs = []
+        for chunk_index, start in enumerate(range(0, len(todo), max_array_size)):
+            chunk = todo[start : start + max_array_size]
+            job = self._write_array(chunk, array_dir, f"{name}_{chunk_index:03d}", max_concurrent, overwrite_inputs)
+            if not write_only:
+                job.job_id = self._submit(job.script)
+                for index, plan in enumerate(chunk):
+                    self.cluster_state.note_submitted(f"{job.job_id}_{index}", job.script.stem, plan.work_dir)
+                print(f"Submitted array {job.job_id} ({len(chunk)} tasks): {job.script}")
+            jobs.append(job)
+        return jobs
+
+    def _write_array(
+        self,
+        plans: list[RunPlan],
+        array_dir: Path,
+        job_name: str,
+        max_concurrent: int | None,
+        overwrite_inputs: bool,
+    ) -> "ArrayJob":
+        task_scripts = []
+        manifest = []
+        for index, plan in enumerate(plans):
+            for path, content in plan.files_text.items():
+                if overwrite_inputs or not path.exists():
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    path.write_text(content)
+            plan.work_dir.mkdir(parents=True, exist_ok=True)
+            task = plan.work_dir / "array_task.sh"
+            task.write_text(_task_script(plan))
+            task.chmod(0o755)
+            task_scripts.append(task)
+            manifest.append(
+                {
+                    "index": index,
+                    "work_dir": str(plan.work_dir),
+                    "argv": [str(a) for a in plan.argv],
+                    "env": {k: str(v) for k, v in (plan.env or {}).items()},
+                    "expected_outputs": [str(p) for p in plan.expected_outputs],
+                    "task_script": str(task),
+                }
+            )
+
+        tasks_path = array_dir / f"{job_name}.tasks"
+        tasks_path.write_text("".join(f"{t.resolve()}\n" for t in task_scripts))
+        manifest_path = array_dir / f"{job_name}.manifest.json"
+        manifest_path.write_text(json.dumps(manifest, indent=2) + "\n")
+
+        array = f"0-{len(plans) - 1}"
+        if max_concurrent:
+            array += f"%{max_concurrent}"
+        lines = self.header_lines(
+            job_name=job_name,
+            output=array_dir / f"{job_name}-%A_%a.out",
+            error=array_dir / f"{job_name}-%A_%a.err",
+            array=array,
+        )
+        lines += [
+            f"TASK=$(sed -n \"$((SLURM_ARRAY_TASK_ID + 1))p\" {shlex.quote(str(tasks_path.resolve()))})",
+            'if [ -z "$TASK" ]; then',
+            '    echo "No task for array index $SLURM_ARRAY_TASK_ID" >&2',
+            "    exit 1",
+            "fi",
+            'exec bash "$TASK"',
+            "",
+        ]
+        script = array_dir / f"{job_name}.sh"
+        script.write_text("\n".join(lines))
+        script.chmod(0o755)
+        return ArrayJob(script=script, manifest=manifest_path, plans=plans)
+
+    def _submit(self, script: Path) -> int:
+        """Submit a script from its directory and return the job ID."""
+        backend = get_submit_backend()
+        if backend is not None:
+            return backend(script, None)
+        result = subprocess.run(
+            ["sbatch", "--parsable", str(script)],
+            capture_output=True,
+            text=True,
+            cwd=script.parent,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"sbatch failed: {result.stderr}")
+        # --parsable prints "jobid" or "jobid;cluster"
+        return int(result.stdout.strip().split(";")[0])
+
+
+@dataclass
+class ArrayJob:
+    """A SLURM job array written (and possibly submitted) by SlurmExecutor.execute_many.
+
+    Attributes:
+        script (Path): The array batch script.
+        manifest (Path): JSON manifest describing each array index.
+        plans (list[RunPlan]): Plans in array-index order.
+        job_id (int | None): SLURM job ID, or None if only written.
+
+    """
+
+    script: Path
+    manifest: Path
+    plans: list[RunPlan] = field(default_factory=list)
+    job_id: int | None = None
+
+    def task_id(self, plan: RunPlan) -> str | None:
+        """SLURM ID (``<jobid>_<index>``) of the task running ``plan``."""
+        if self.job_id is None:
+            return None
+        for index, p in enumerate(self.plans):
+            if p is plan:
+                return f"{self.job_id}_{index}"
+        return None
+
+
+def _task_script(plan: RunPlan) -> str:
+    """Per-plan script run by one array task: logs into its work_dir and checks expected outputs."""
+    work_dir = shlex.quote(str(plan.work_dir.resolve()))
+    lines = [
+        "#!/bin/bash",
+        f"cd {work_dir} || exit 1",
+        'LOG="slurm-${SLURM_ARRAY_JOB_ID:-local}_${SLURM_ARRAY_TASK_ID:-0}"',
+        'exec >"$LOG.out" 2>"$LOG.err"',
+    ]
+    for k, v in (plan.env or {}).items():
+        lines.append(f"export {k}={shlex.quote(str(v))}")
+    lines.append(" \\\n    ".join(shlex.quote(str(a)) for a in plan.argv))
+    lines.append("status=$?")
+    lines.append('[ "$status" -eq 0 ] || exit "$status"')
+    for p in plan.expected_outputs:
+        q = shlex.quote(str(p))
+        lines.append(f'[ -e {q} ] || {{ echo "Missing expected output: "{q} >&2; exit 1; }}')
+    lines.append("")
+    return "\n".join(lines)
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from varidock.plans import RunPlan
+from varidock.execution.ledger import RunLedger
+from varidock.execution.retry import plan_from_dict, plan_to_dict
+from varidock.utils.slurm import _sbatch, get_cluster_state
+
+
+def scan_scripts(root: Path, pattern: str = "submit.sh") -> list[Path]:
+    """Find batch scripts under ``root`` in a stable (sorted) order."""
+    return sorted(p.resolve() for p in Path(root).rglob(pattern))
+
+
+def write_plan_scripts(
+    plans: Iterable[RunPlan],
+    executor,
+    ledger: Optional[RunLedger] = None,
+) -> list[Path]:
+    """Write a SLURM script for every pending plan without submitting it.
+
+    Args:
+        plans (Iterable[RunPlan]): Plans to prepare.
+        executor (SlurmExecutor): Writes each plan's ``submit.sh``.
+        ledger (RunLedger | None): If set, plans already recorded as done are skipped.
+
+    Returns:
+        list[Path]: Scripts ready for a Submitter.
+
+    """
+    plans = list(plans)
+    if ledger is not None:
+        plans = ledger.pending(plans)
+    return [executor.execute(plan, write_only=True) for plan in plans]
+
+
+def write_plan_file(plans: Iterable[RunPlan], path: Path) -> Path:
+    """Save plans as JSON for ``varidock submit --plans``."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"plans": [plan_to_dict(p) for p in plans]}, indent=1) + "\n")
+    os.replace(tmp, path)
+    return path
+
+
+def read_plan_file(path: Path) -> list[RunPlan]:
+    """Load plans saved by write_plan_file, a bare JSON list of plans, or a FailureReport (all its failures)."""
+    data = json.loads(Path(path).read_text())
+    if isinstance(data, dict) and "failures" in data:
+        return [plan_from_dict(f["plan"]) for f in data["failures"]]
+    if isinstance(data, dict):
+        data = data["plans"]
+    return [plan_from_dict(d) for d in data]
+
+
+def _fresh_queue_count() -> int:
+    return get_cluster_state().refresh().count()
+
+
+@dataclass
+class SubmitterState:
+    """Progress persisted between restarts.
+
+    Attributes:
+        submitted (dict[str, int]): Script path -> SLURM job ID.
+        last_error (str | None): Last sbatch or queue-count error, if any.
+
+    """
+
+    submitted: dict[str, int] = field(default_factory=dict)
+    last_error: Optional[str] = None
+
+    @classmethod
+    def load(cls, path: Path) -> "SubmitterState":
+        try:
+            data = json.loads(Path(path).read_text())
+        except FileNotFoundError:
+            return cls()
+        return cls(submitted=dict(data.get("submitted", {})), last_error=data.get("last_error"))
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"submitted": self.submitted, "last_error": self.last_error}, indent=1))
+        os.replace(tmp, path)
+
+
+class Submitter:
+    """Keep the SLURM queue topped up from a list of batch scripts.
+
+    Each pass asks the scheduler once how many of the user's jobs are queued
+    or running, then submits scripts in order until that count reaches
+    ``max_in_flight``. Every submission is written to the state file
+    immediately, so a restarted submitter resumes where it stopped and never
+    submits a script twice. If sbatch fails (e.g. a QOS submit limit), the
+    pass ends and the same script is retried on the next pass; if the queue
+    count fails (e.g. squeue timing out while slurmctld is busy), the pass
+    submits nothing. Either way the error is kept in ``state.last_error``.
+
+    Attributes:
+        scripts (list[Path]): Scripts to submit, in order.
+        state_path (Path): JSON file holding the cursor.
+        max_in_flight (int): Cap on the user's pending + running jobs.
+        poll_seconds (float): Wait between passes.
+
+    """
+
+    def __init__(
+        self,
+        scripts: Iterable[Path],
+        state_path: Path,
+        max_in_flight: int = 500,
+        poll_seconds: float = 60.0,
+        queue_count: Callable[[], int] = _fresh_queue_count,
+        submit: Callable[[Path], int] = _sbatch,
+        sleep: Callable[[float], None] = time.sleep,
+        log: Callable[[str], None] = print,
+    ):
+        if max_in_flight < 1:
+            raise ValueError(f"max_in_flight must be at least 1, got {max_in_flight}")
+        self.scripts = [Path(s).resolve() for s in scripts]
+        self.state_path = Path(state_path)
+        self.state = SubmitterState.load(self.state_path)
+        self.max_in_flight = max_in_flight
+        self.poll_seconds = poll_seconds
+        self._queue_count = queue_count
+        self._submit = submit
+        self._sleep = sleep
+        self._log = log
+        self._stop = False
+
+    @property
+    def pending(self) -> list[Path]:
+        return [s for s in self.scripts if str(s) not in self.state.submitted]
+
+    def stop(self) -> None:
+        """Ask run() to return after the current pass (e.g. from a signal handler)."""
+        self._stop = True
+
+    def run_once(self) -> int:
+        """Submit as many pending scripts as the cap allows. Returns the number submitted."""
+        pending = self.pending
+        if not pending:
+            return 0
+        try:
+            room = self.max_in_flight - self._queue_count()
+        except (subprocess.CalledProcessError, OSError) as e:
+            stderr = getattr(e, "stderr", None) or str(e)
+            self.state.last_error = f"queue count: {stderr.strip()}"
+            self.state.save(self.state_path)
+            self._log(f"Could not count queued jobs, retrying next pass: {stderr.strip()}")
+            return 0
+        submitted = 0
+        for script in pending[: max(room, 0)]:
+            try:
+                job_id = self._submit(script)
+            except (subprocess.CalledProcessError, OSError, ValueError) as e:
+                stderr = getattr(e, "stderr", None) or str(e)
+                self.state.last_error = f"{script}: {stderr.strip()}"
+                self.state.save(self.state_path)
+                self._log(f"sbatch failed for {script}, retrying next pass: {stderr.strip()}")
+                break
+            self.state.submitted[str(script)] = job_id
+            self.state.last_error = None
+            self.state.save(self.state_path)
+            submitted += 1
+        if submitted:
+            self._log(f"Submitted {submitted} jobs ({len(self.pending)} pending)")
+        return submitted
+
+    def run(self) -> int:
+        """Submit until every script is submitted or stop() is called. Returns the number submitted."""
+        total = 0
+        while not self._stop:
+            total += self.run_once()
+            if not self.pending:
+                break
+            self._sleep(self.poll_seconds)
+        return total
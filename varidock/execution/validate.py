@@ -1,10 +1,22 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
 from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Callable
 
 from varidock.plans import RunPlan
 
+try:
+    import xxhash as _xxhash
+except ImportError:  # optional; blake2b is fast enough for head/tail blocks
+    _xxhash = None
+
+MANIFEST_NAME = ".varidock_outputs.json"
+
 
 class PlanValidator(ABC):
     @abstractmethod
@@ -17,3 +29,129 @@ class ExpectedOutputsValidator(PlanValidator):
         missing = [Path(p) for p in plan.expected_outputs if not Path(p).exists()]
         if missing:
             raise RuntimeError(f"Missing expected outputs: {missing}")
+
+
+def _content_hash(path: Path, block_size: int) -> str:
+    """Hash the first and last ``block_size`` bytes of a file (the whole file if it is smaller)."""
+    h = _xxhash.xxh3_64() if _xxhash is not None else hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        head = f.read(block_size)
+        h.update(head)
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size > 2 * block_size:
+            f.seek(size - block_size)
+            h.update(f.read(block_size))
+        elif size > len(head):
+            f.seek(len(head))
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def check_json(path: Path) -> None:
+    """Raise if ``path`` is not a complete JSON document."""
+    with open(path, "rb") as f:
+        try:
+            json.load(f)
+        except ValueError as e:
+            raise RuntimeError(f"Output is not valid JSON: {path} ({e})") from e
+
+
+def check_cif(path: Path) -> None:
+    """Raise if ``path`` has no ``_atom_site`` loop with at least one atom record."""
+    in_atom_site = False
+    with open(path, "r", errors="replace") as f:
+        for line in f:
+            if line.startswith("_atom_site."):
+                in_atom_site = True
+            elif in_atom_site and line.strip() and not line.startswith("#"):
+                return
+    raise RuntimeError(f"Output has no _atom_site records: {path}")
+
+
+DEFAULT_READINESS_CHECKS: dict[str, Callable[[Path], None]] = {
+    ".json": check_json,
+    ".cif": check_cif,
+}
+
+
+@dataclass
+class FingerprintValidator(PlanValidator):
+    """Validate outputs against a fingerprint manifest kept in the plan's work_dir.
+
+    The first time an output validates, its size, mtime and (optionally) a hash
+    of its head and tail blocks are recorded in ``MANIFEST_NAME``. Later calls
+    only stat each output and compare it with the manifest; readiness checks
+    (JSON must parse, CIF must contain atoms) run again only when a fingerprint
+    changes. This catches truncated outputs left by killed jobs, which
+    ExpectedOutputsValidator counts as done.
+
+    Attributes:
+        hash_block_size (int): Bytes hashed from each end of a file when its
+            size or mtime changed. 0 disables content hashing, so any
+            size/mtime change re-runs the readiness check.
+        checks (dict[str, Callable[[Path], None]]): Readiness check per file
+            suffix. Each check raises if the file is not complete.
+        manifest_name (str): Manifest file name inside work_dir.
+
+    """
+
+    hash_block_size: int = 1 << 16
+    checks: dict[str, Callable[[Path], None]] = field(
+        default_factory=lambda: dict(DEFAULT_READINESS_CHECKS)
+    )
+    manifest_name: str = MANIFEST_NAME
+
+    def validate(self, plan: RunPlan) -> None:
+        missing = [Path(p) for p in plan.expected_outputs if not Path(p).exists()]
+        if missing:
+            raise RuntimeError(f"Missing expected outputs: {missing}")
+
+        manifest_path = Path(plan.work_dir) / self.manifest_name
+        manifest = self._load(manifest_path)
+        updated = dict(manifest)
+        for p in plan.expected_outputs:
+            path = Path(p)
+            key = str(path)
+            st = path.stat()
+            recorded = manifest.get(key)
+            if recorded and recorded["size"] == st.st_size and recorded["mtime_ns"] == st.st_mtime_ns:
+                continue
+
+            digest = _content_hash(path, self.hash_block_size) if self.hash_block_size else None
+            unchanged = (
+                recorded is not None
+                and digest is not None
+                and recorded["size"] == st.st_size
+                and recorded.get("hash") == digest
+            )
+            if not unchanged:
+                check = self.checks.get(path.suffix)
+                if check is not None:
+                    try:
+                        check(path)
+                    except Exception:
+                        # Drop the stale entry so a rewrite is checked from scratch.
+                        updated.pop(key, None)
+                        self._save(manifest_path, updated, manifest)
+                        raise
+            updated[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digest}
+
+        self._save(manifest_path, updated, manifest)
+
+    @staticmethod
+    def _load(path: Path) -> dict:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    @staticmethod
+    def _save(path: Path, updated: dict, original: dict) -> None:
+        if updated == original:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(updated, indent=1, sort_keys=True))
+        os.replace(tmp, path)
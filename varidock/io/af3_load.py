@@ -1,38 +1,162 @@
-"""Loads MSA data from AlphaFold 3 output directories. The main function, `extract_msas_from_af3_output`, takes a path to an AF3 output directory, searches for the expected JSON files containing the MSA data, and extracts this information into a dictionary mapping chain IDs to `MSAData` objects. This allows users to easily access the paired and unpaired MSA data for each protein chain predicted by AF3, facilitating downstream analysis or integration with other tools in the Varidock pipeline."""
+"""Loads MSA data from AlphaFold 3 output directories. `load_msas` indexes every ``*_data.json`` in a directory: one scan through a small buffer records the byte offsets of each protein chain's ``pairedMsa`` and ``unpairedMsa`` strings, without decoding them or the template blobs beside them, and the index is cached in a hidden sidecar next to the JSON so later loads skip the scan. It returns `LazyMSAData` objects that read a string only when it is accessed, optionally limited to selected chains. `extract_msas_from_af3_output` keeps the original flat ``{chain_id: MSAData}`` result on top of it; since that shape cannot hold one chain ID from two files, it raises on such a clash rather than picking a file, and `load_msas` (keyed by file, then chain) is the loader for those directories."""
 # varidock/io/af3_load.py
 from __future__ import annotations
 
 import json
+import os
 from pathlib import Path
-from varidock.structure import MSAData
+from typing import Iterable, Optional
 
+from varidock.io.json_spans import scan_spans
+from varidock.structure import LazyMSAData, MSAData
 
-def extract_msas_from_af3_output(af3_output_dir: Path) -> dict[str, MSAData]:
-    """Extract MSA data for all proteins in an AF3 output directory.
+INDEX_SUFFIX = ".msaidx"
+_MSA_FIELDS = ("pairedMsa", "unpairedMsa")
+
+
+def _stamp(path: Path) -> list[int]:
+    st = path.stat()
+    return [st.st_size, st.st_mtime_ns]
+
+
+def index_msas(data_json: Path, cache: bool = True) -> dict[str, dict[str, Optional[list[int]]]]:
+    """Byte spans of each protein chain's MSA strings in an AF3 data JSON.
+
+    Args:
+        data_json (Path): The ``*_data.json`` file.
+        cache (bool): Read and write the ``.<name>.msaidx`` sidecar. A sidecar
+            is reused only while the JSON's size and mtime match; an unwritable
+            directory just means no cache.
+
+    Returns:
+        dict[str, dict[str, list[int] | None]]: chain_id -> {'pairedMsa': [start, end] or None,
+            'unpairedMsa': ...}, None meaning null or absent. Every ID of a
+            multi-copy entry maps to the same spans.
 
-    Returns: {chain_id: MSAData}
     """
-    af3_output_dir = Path(af3_output_dir)
+    data_json = Path(data_json)
+    sidecar = data_json.with_name(f".{data_json.name}{INDEX_SUFFIX}")
+    stamp = _stamp(data_json)
+    if cache:
+        try:
+            cached = json.loads(sidecar.read_text())
+            if cached.get("stamp") == stamp:
+                return cached["chains"]
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    spans = scan_spans(
+        data_json,
+        lambda p: len(p) == 4 and p[0] == "sequences" and p[2] == "protein" and p[3] in ("id", *_MSA_FIELDS),
+    )
+    chains: dict[str, dict[str, Optional[list[int]]]] = {}
+    with open(data_json, "rb") as f:
+
+        def value_span(index: int, key: str) -> Optional[list[int]]:
+            span = spans.get(("sequences", index, "protein", key))
+            if span is None:
+                return None
+            if span[1] - span[0] == 4:
+                f.seek(span[0])
+                if f.read(4) == b"null":
+                    return None
+            return list(span)
+
+        for index in sorted({p[1] for p in spans}):
+            id_span = spans.get(("sequences", index, "protein", "id"))
+            if id_span is None:
+                continue
+            f.seek(id_span[0])
+            ids = json.loads(f.read(id_span[1] - id_span[0]))
+            fields = {key: value_span(index, key) for key in _MSA_FIELDS}
+            for chain_id in ids if isinstance(ids, list) else [ids]:
+                chains.setdefault(chain_id, fields)
+
+    if cache:
+        tmp = sidecar.with_name(f"{sidecar.name}.{os.getpid()}.tmp")
+        try:
+            tmp.write_text(json.dumps({"stamp": stamp, "chains": chains}))
+            os.replace(tmp, sidecar)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+    return chains
+
 
+def load_msas(
+    af3_output_dir: Path,
+    chains: Optional[Iterable[str]] = None,
+    lazy: bool = True,
+    cache_index: bool = True,
+) -> dict[str, dict[str, MSAData | LazyMSAData]]:
+    """Load the MSAs of every ``*_data.json`` in an AF3 output directory.
+
+    Example:
+        >>> msas = load_msas(out / "af_output" / "job", chains=["A"])
+        >>> msas["job"]["A"].write_unpaired_a3m(Path("A.a3m"))  # the only read of the file's MSA bytes
+
+    Args:
+        af3_output_dir (Path): Directory containing the data JSONs.
+        chains (Iterable[str] | None): Only these chain IDs; None for all.
+        lazy (bool): Return LazyMSAData that reads on access; False reads the
+            selected strings now and returns plain MSAData.
+        cache_index (bool): Use the sidecar index cache (see index_msas).
+
+    Returns:
+        dict[str, dict[str, MSAData | LazyMSAData]]: Job name (file name without ``_data.json``)
+            -> chain_id -> MSA data, in file name order.
+
+    Raises:
+        FileNotFoundError: If the directory has no ``*_data.json``.
+
+    """
+    af3_output_dir = Path(af3_output_dir)
     data_files = sorted(af3_output_dir.glob("*_data.json"))
     if not data_files:
         raise FileNotFoundError(f"No *_data.json found in {af3_output_dir}")
-
-    data = json.loads(data_files[0].read_text())
+    wanted = set(chains) if chains is not None else None
 
     result = {}
-    for seq in data.get("sequences", []):
-        protein = seq.get("protein")
-        if protein is None:
-            continue
+    for data_json in data_files:
+        index = index_msas(data_json, cache=cache_index)
+        stamp = tuple(_stamp(data_json))
+        msas: dict[str, MSAData | LazyMSAData] = {}
+        for chain_id, fields in index.items():
+            if wanted is not None and chain_id not in wanted:
+                continue
+            msa = LazyMSAData(data_json, fields["pairedMsa"], fields["unpairedMsa"], stamp=stamp)
+            msas[chain_id] = msa if lazy else msa.load()
+        result[data_json.name[: -len("_data.json")]] = msas
+    return result
+
 
-        chain_id = protein.get("id")
-        if isinstance(chain_id, list):
-            chain_id = chain_id[0]  # AF3 uses ["A"] format
+def extract_msas_from_af3_output(
+    af3_output_dir: Path,
+    chains: Optional[Iterable[str]] = None,
+    lazy: bool = False,
+) -> dict[str, MSAData | LazyMSAData]:
+    """Extract MSA data for all proteins in an AF3 output directory.
+
+    Every ``*_data.json`` in the directory is read. Chain IDs must be unique
+    across those files: a chain ID found in two files raises ValueError
+    instead of one file silently winning. Use load_msas, which keys results
+    by file and then chain, when outputs may share chain IDs (for example
+    several monomer outputs side by side).
 
-        result[chain_id] = MSAData(
-            paired=protein.get("pairedMsa"),
-            unpaired=protein.get("unpairedMsa"),
-        )
+    Returns: {chain_id: MSAData}, or LazyMSAData when ``lazy`` is True
 
-    return result
\ No newline at end of file
+    Raises:
+        FileNotFoundError: If the directory has no ``*_data.json``.
+        ValueError: If two data JSONs contain the same chain ID.
+    """
+    result: dict[str, MSAData | LazyMSAData] = {}
+    owner: dict[str, str] = {}
+    for job, msas in load_msas(af3_output_dir, chains=chains, lazy=lazy).items():
+        for chain_id, msa in msas.items():
+            if chain_id in result:
+                raise ValueError(
+                    f"Chain {chain_id!r} is in both {owner[chain_id]}_data.json and {job}_data.json "
+                    f"in {af3_output_dir}; use load_msas to keep them apart"
+                )
+            result[chain_id] = msa
+            owner[chain_id] = job
+    return result
@@ -0,0 +1,270 @@
+"""Locates values inside large JSON files as raw byte spans, without parsing them into Python objects. The main function, `scan_spans`, reads a file through a small fixed-size buffer and returns the (start, end) byte offsets of every value whose path (a tuple of object keys and list indices, e.g. ``("sequences", 0, "protein", "unpairedMsa")``) is selected by a predicate; `copy_span` then copies such a span into another file in bounded chunks, and `splice_spans` copies a whole file with a few spans replaced. Together they let AF3 data JSONs of hundreds of MB be recombined by copying their MSA and template values verbatim, so those values are never decoded, re-escaped or held in memory."""
+# varidock/io/json_spans.py
+from __future__ import annotations
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import BinaryIO, Callable, Mapping, Union
+
+JSONPath = tuple[Union[str, int], ...]
+
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+_BACKSLASH = ord("\\")
+_WHITESPACE = b" \t\r\n"
+_SCALAR_END = re.compile(rb"[,\]}\s]")
+
+
+def _string_end(buf: bytes, pos: int) -> int:
+    """Index of the quote closing a string body that starts at ``pos``, or -1 if not in ``buf``.
+
+    ``pos`` must not be inside an escape. A quote closes the string when it is
+    preceded by an even number of backslashes.
+    """
+    while True:
+        j = buf.find(b'"', pos)
+        if j < 0:
+            return -1
+        k = j
+        while k > pos and buf[k - 1] == _BACKSLASH:
+            k -= 1
+        if (j - k) % 2 == 0:
+            return j
+        pos = j + 1
+
+
+def _safe_end(buf: bytes, pos: int) -> int:
+    """End of ``buf`` minus any trailing backslashes, whose escapes may continue in the next chunk."""
+    end = len(buf)
+    while end > pos and buf[end - 1] == _BACKSLASH:
+        end -= 1
+    return end
+
+
+class _Scanner:
+    """Recursive-descent walk over a JSON byte stream that only materializes object keys."""
+
+    def __init__(self, f: BinaryIO, want: Callable[[JSONPath], bool], buffer_size: int):
+        self.f = f
+        self.want = want
+        self.buffer_size = buffer_size
+        self.buf = b""
+        self.pos = 0  # index into buf
+        self.base = 0  # file offset of buf[0]
+        self.spans: dict[JSONPath, tuple[int, int]] = {}
+
+    # Buffer handling
+
+    def _fill(self) -> bool:
+        """Drop consumed bytes and read another chunk. Returns False at EOF."""
+        chunk = self.f.read(self.buffer_size)
+        self.base += self.pos
+        self.buf = self.buf[self.pos :] + chunk
+        self.pos = 0
+        return bool(chunk)
+
+    def _peek(self) -> int:
+        while self.pos >= len(self.buf):
+            if not self._fill():
+                raise ValueError(f"Unexpected end of JSON at byte {self.base + self.pos}")
+        return self.buf[self.pos]
+
+    def _skip_ws(self) -> int:
+        while True:
+            c = self._peek()
+            if c not in _WHITESPACE:
+                return c
+            self.pos += 1
+
+    def _expect(self, char: bytes) -> None:
+        if self._skip_ws() != char[0]:
+            raise ValueError(f"Expected {char.decode()!r} at byte {self.offset}, got {chr(self.buf[self.pos])!r}")
+        self.pos += 1
+
+    @property
+    def offset(self) -> int:
+        return self.base + self.pos
+
+    # Values
+
+    def _skip_string(self, keep: bool = False) -> bytes:
+        """Consume a string starting at its opening quote; return its raw bytes if ``keep``."""
+        self.pos += 1
+        parts = []
+        while True:
+            j = _string_end(self.buf, self.pos)
+            if j >= 0:
+                if keep:
+                    parts.append(self.buf[self.pos : j])
+                self.pos = j + 1
+                return b"".join(parts)
+            end = _safe_end(self.buf, self.pos)
+            if keep:
+                parts.append(self.buf[self.pos : end])
+            self.pos = end
+            if not self._fill():
+                raise ValueError("Unterminated string")
+
+    def _skip_scalar(self) -> None:
+        while True:
+            m = _SCALAR_END.search(self.buf, self.pos)
+            if m is not None:
+                self.pos = m.start()
+                return
+            self.pos = len(self.buf)
+            if not self._fill():
+                return  # a bare scalar at the end of the document
+
+    def value(self, path: JSONPath) -> None:
+        c = self._skip_ws()
+        start = self.offset
+        if c == ord("{"):
+            self._object(path)
+        elif c == ord("["):
+            self._array(path)
+        elif c == ord('"'):
+            self._skip_string()
+        else:
+            self._skip_scalar()
+        if self.want(path):
+            self.spans[path] = (start, self.offset)
+
+    def _object(self, path: JSONPath) -> None:
+        self.pos += 1
+        if self._skip_ws() == ord("}"):
+            self.pos += 1
+            return
+        while True:
+            if self._skip_ws() != ord('"'):
+                raise ValueError(f"Expected object key at byte {self.offset}")
+            key = json.loads(b'"' + self._skip_string(keep=True) + b'"')
+            self._expect(b":")
+            self.value(path + (key,))
+            c = self._skip_ws()
+            self.pos += 1
+            if c == ord("}"):
+                return
+            if c != ord(","):
+                raise ValueError(f"Expected ',' or '}}' at byte {self.offset - 1}")
+
+    def _array(self, path: JSONPath) -> None:
+        self.pos += 1
+        if self._skip_ws() == ord("]"):
+            self.pos += 1
+            return
+        index = 0
+        while True:
+            self.value(path + (index,))
+            index += 1
+            c = self._skip_ws()
+            self.pos += 1
+            if c == ord("]"):
+                return
+            if c != ord(","):
+                raise ValueError(f"Expected ',' or ']' at byte {self.offset - 1}")
+
+
+def scan_spans(
+    path: Path,
+    want: Callable[[JSONPath], bool],
+    buffer_size: int | None = None,
+) -> dict[JSONPath, tuple[int, int]]:
+    """Find the byte spans of selected values in a JSON file.
+
+    Args:
+        path (Path): JSON file to scan.
+        want (Callable[[JSONPath], bool]): Selects the paths whose spans are returned.
+        buffer_size (int | None): Read size (default DEFAULT_BUFFER_SIZE); memory
+            use stays within a small multiple of it.
+
+    Returns:
+        dict[JSONPath, tuple[int, int]]: Path -> (start, end) byte offsets, end exclusive.
+
+    Raises:
+        ValueError: If the file is not well-formed JSON.
+
+    """
+    with open(path, "rb") as f:
+        scanner = _Scanner(f, want, buffer_size or DEFAULT_BUFFER_SIZE)
+        scanner.value(())
+        return scanner.spans
+
+
+def copy_span(
+    src: BinaryIO,
+    start: int,
+    end: int,
+    dst: BinaryIO,
+    buffer_size: int | None = None,
+    compact: bool = False,
+) -> None:
+    """Copy bytes ``[start, end)`` of ``src`` to ``dst`` in chunks of at most ``buffer_size``.
+
+    With ``compact=True`` the span must be a complete JSON value; whitespace
+    outside its strings is dropped, and string contents are copied verbatim.
+    """
+    buffer_size = buffer_size or DEFAULT_BUFFER_SIZE
+    src.seek(start)
+    remaining = end - start
+    in_string = False
+    pending = b""
+    while remaining > 0:
+        chunk = src.read(min(buffer_size, remaining))
+        if not chunk:
+            raise ValueError(f"{getattr(src, 'name', 'source')} ended before byte {end}")
+        remaining -= len(chunk)
+        if not compact:
+            dst.write(chunk)
+            continue
+        if pending:
+            chunk = pending + chunk
+            pending = b""
+        i = 0
+        while i < len(chunk):
+            if in_string:
+                j = _string_end(chunk, i)
+                if j < 0:
+                    # Hold back trailing backslashes until their escaped bytes arrive.
+                    safe = _safe_end(chunk, i)
+                    dst.write(chunk[i:safe])
+                    pending = chunk[safe:]
+                    break
+                dst.write(chunk[i : j + 1])
+                in_string = False
+                i = j + 1
+            else:
+                j = chunk.find(b'"', i)
+                dst.write(chunk[i : len(chunk) if j < 0 else j].translate(None, _WHITESPACE))
+                if j < 0:
+                    break
+                dst.write(b'"')
+                in_string = True
+                i = j + 1
+    dst.write(pending)
+
+
+def splice_spans(
+    src: Path,
+    dst: BinaryIO,
+    replacements: Mapping[tuple[int, int], bytes],
+    buffer_size: int | None = None,
+) -> None:
+    """Copy the file ``src`` to ``dst``, writing ``replacements[(start, end)]`` in place of each span.
+
+    Everything outside the spans is copied verbatim in bounded chunks, so
+    small values (e.g. a name) can be rewritten in a file of any size.
+
+    Raises:
+        ValueError: If two spans overlap.
+    """
+    with open(src, "rb") as f:
+        pos = 0
+        for (start, end), data in sorted(replacements.items()):
+            if start < pos:
+                raise ValueError(f"Overlapping spans in {src} at byte {start}")
+            copy_span(f, pos, start, dst, buffer_size)
+            dst.write(data)
+            pos = end
+        copy_span(f, pos, os.fstat(f.fileno()).st_size, dst, buffer_size)
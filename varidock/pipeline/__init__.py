@@ -1,10 +1,27 @@
 """The pipeline module defines the core Pipeline class, which orchestrates the entire structure prediction process. It manages the sequence of stages, handles data flow between stages, and provides a high-level interface for running predictions."""
 # varidock/pipeline/__init__.py
 from varidock.pipeline.pipeline import Pipeline
-from varidock.pipeline.stage import Stage
+from varidock.pipeline.stage import Stage, MultiInputStage, StreamingStage
+from varidock.pipeline.dag import DAGPipeline, DAGResult, NodeTiming
+from varidock.pipeline.streaming import StreamingPipeline
+from varidock.pipeline.cache import StageCache, CachedStage, CacheStats
+from varidock.pipeline.profiling import Profiler, ProfiledStage, ProfiledRunner, ProfileRecord
 
 
 __all__ = [
     "Pipeline",
     "Stage",
+    "MultiInputStage",
+    "StreamingStage",
+    "StreamingPipeline",
+    "DAGPipeline",
+    "DAGResult",
+    "NodeTiming",
+    "StageCache",
+    "CachedStage",
+    "CacheStats",
+    "Profiler",
+    "ProfiledStage",
+    "ProfiledRunner",
+    "ProfileRecord",
 ]
@@ -0,0 +1,339 @@
+"""The cache module provides a content-addressed, on-disk cache for stage results. Wrapping a stage in CachedStage skips re-running it when the same stage, with the same configuration, has already been run on inputs whose files have the same content. The key combines the stage name, a canonical hash of the stage's config dataclass, and content hashes of every file referenced by the input dataclass; the stored value is the pickled output dataclass together with content hashes of the files it references, so an output that was modified after it was cached is not served.
+
+Example:
+    >>> cache = StageCache.from_config()
+    >>> prep = CachedStage(ADFRReceptorPrep(cfg), cache)
+    >>> pdbqt = prep.run(pdb)  # second call with the same PDB content returns instantly
+"""
+# varidock/pipeline/cache.py
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Any
+
+from varidock.pipeline.stage import Stage
+
+_CHUNK = 1 << 20
+
+# (path, size, mtime_ns) -> sha256, so a file is only read once per process.
+_file_hashes: dict[tuple[str, int, int], str] = {}
+
+
+def _hash_file(path: Path) -> str:
+    st = path.stat()
+    memo_key = (str(path), st.st_size, st.st_mtime_ns)
+    digest = _file_hashes.get(memo_key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(_CHUNK):
+                h.update(chunk)
+        digest = h.hexdigest()
+        _file_hashes[memo_key] = digest
+    return digest
+
+
+def _hash_path(path: Path) -> str:
+    if path.is_file():
+        return _hash_file(path)
+    if path.is_dir():
+        h = hashlib.sha256()
+        for p in sorted(path.rglob("*")):
+            if p.is_file():
+                h.update(str(p.relative_to(path)).encode())
+                h.update(_hash_file(p).encode())
+        return h.hexdigest()
+    return "missing"
+
+
+def _canonical(obj: Any, hash_files: bool, strict: bool = False) -> Any:
+    """Convert obj into JSON-serializable data that is stable across runs.
+
+    Args:
+        obj (Any): Value to convert (dataclass, path, container or scalar).
+        hash_files (bool): If True, paths are recorded with a hash of their content.
+        strict (bool): If True, raise instead of falling back to ``repr`` for
+            other objects, whose repr may not reflect their settings.
+
+    Returns:
+        Any: Nested dicts/lists/scalars suitable for ``json.dumps(sort_keys=True)``.
+
+    Raises:
+        TypeError: If ``strict`` and obj contains a value of another type.
+
+    """
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        fields = {f.name: _canonical(getattr(obj, f.name), hash_files, strict) for f in dataclasses.fields(obj)}
+        return {"__type__": type(obj).__qualname__, **fields}
+    if isinstance(obj, Path):
+        if hash_files:
+            return {"path": str(obj), "sha256": _hash_path(obj)}
+        return str(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, dict):
+        return {str(k): _canonical(v, hash_files, strict) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        items = [_canonical(v, hash_files, strict) for v in obj]
+        return sorted(items, key=repr) if isinstance(obj, (set, frozenset)) else items
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    if strict:
+        raise TypeError(f"Cannot fingerprint {type(obj).__qualname__} object {obj!r}")
+    return repr(obj)
+
+
+def _iter_paths(obj: Any):
+    """Yield every Path referenced by a (possibly nested) dataclass."""
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        for f in dataclasses.fields(obj):
+            yield from _iter_paths(getattr(obj, f.name))
+    elif isinstance(obj, Path):
+        yield obj
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for v in obj:
+            yield from _iter_paths(v)
+    elif isinstance(obj, dict):
+        for v in obj.values():
+            yield from _iter_paths(v)
+
+
+def _output_stamps(output: Any) -> dict[str, str]:
+    """Content hash of every file or directory an output references, keyed by path."""
+    return {str(p): _hash_path(p) for p in _iter_paths(output)}
+
+
+@dataclass(frozen=True)
+class _Entry:
+    """What a cache file holds: the output plus the stamps of its files when it was stored."""
+
+    output: Any
+    stamps: dict[str, str]
+
+
+# Attributes that hold where or how a stage runs, not what it computes.
+_RUNTIME_ATTRS = frozenset({"executor", "runner", "ledger", "cache", "msa_store"})
+
+
+def _stage_config(stage: Stage) -> Any:
+    """The part of a stage that determines its output, for the cache key.
+
+    Stages with a ``config`` contribute that. Stages without a single config
+    object (e.g. AF3MSA) contribute every public instance attribute except
+    execution handles (``_RUNTIME_ATTRS`` and any names in the stage's
+    ``cache_exclude``), and each of those must be fingerprintable: a
+    dataclass, path, enum, scalar or container of them.
+
+    Raises:
+        TypeError: If such an attribute cannot be fingerprinted, since a
+            cache key without it could serve stale results.
+
+    """
+    config = getattr(stage, "config", None)
+    if config is not None:
+        return config
+    exclude = _RUNTIME_ATTRS | set(getattr(stage, "cache_exclude", ()))
+    settings = {}
+    for name, value in vars(stage).items():
+        if name.startswith("_") or name in exclude:
+            continue
+        try:
+            settings[name] = _canonical(value, hash_files=False, strict=True)
+        except TypeError as e:
+            raise TypeError(
+                f"Cannot cache stage {stage.name!r}: attribute {name!r} is not fingerprintable ({e}). "
+                "Give the stage a config dataclass or list the attribute in its cache_exclude."
+            ) from None
+    return settings
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Summary of a StageCache directory.
+
+    Attributes:
+        entries (int): Number of cached results.
+        total_bytes (int): Disk space used by cached results.
+        hits (int): Cache hits served by this process.
+        misses (int): Cache misses seen by this process.
+
+    """
+
+    entries: int
+    total_bytes: int
+    hits: int = 0
+    misses: int = 0
+
+
+class StageCache:
+    """Content-addressed store of pickled stage outputs with LRU eviction.
+
+    Entries live under ``root/<key[:2]>/<key>.pkl``. Every hit refreshes the
+    entry's mtime, so pruning by oldest mtime evicts the least recently used.
+
+    Attributes:
+        root (Path): Cache directory.
+        max_entries (int): Number of entries kept after pruning.
+
+    """
+
+    def __init__(self, root: Path, max_entries: int = 100_000):
+        self.root = Path(root)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._count: int | None = None
+
+    @classmethod
+    def from_config(cls, **overrides) -> "StageCache":
+        """Create a StageCache from the ``[cache]`` section of the VariDock config."""
+        from varidock.config import VaridockConfig
+
+        cache = VaridockConfig.load().cache
+        return cls(
+            root=overrides.pop("root", cache.dir),
+            max_entries=overrides.pop("max_entries", cache.max_entries),
+            **overrides,
+        )
+
+    def key(self, stage: Stage, input: Any) -> str:
+        """Compute the cache key for running stage on input.
+
+        Args:
+            stage (Stage): Stage to run. Its name and config (see _stage_config) are part of the key.
+            input (Any): Stage input. Every file it references is hashed by content.
+
+        Returns:
+            str: Hex SHA-256 digest.
+
+        """
+        payload = {
+            "stage": stage.name,
+            "config": _canonical(_stage_config(stage), hash_files=False),
+            "input": _canonical(input, hash_files=True),
+        }
+        text = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.pkl"
+
+    def _entries(self) -> list[Path]:
+        return list(self.root.glob("??/*.pkl")) if self.root.exists() else []
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        """Look up a cached output.
+
+        A stored output whose files have since been deleted or changed counts
+        as a miss and its entry is dropped.
+
+        Returns:
+            tuple[bool, Any]: ``(True, output)`` on a hit, ``(False, None)`` otherwise.
+
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return False, None
+
+        if not isinstance(entry, _Entry) or entry.stamps != _output_stamps(entry.output):
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return False, None
+
+        os.utime(path)
+        self.hits += 1
+        return True, entry.output
+
+    def put(self, key: str, output: Any) -> None:
+        """Store an output atomically, pruning old entries if the cache is over its limit.
+
+        The content hash of every file the output references is stored with
+        it, so a later get() can tell whether those files are still the ones
+        the stage wrote.
+        """
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = _Entry(output=output, stamps=_output_stamps(output))
+        existed = path.exists()
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(entry, f)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+        if self._count is None:
+            self._count = len(self._entries())
+        elif not existed:
+            self._count += 1
+        if self._count > self.max_entries:
+            self.prune()
+
+    def stats(self) -> CacheStats:
+        """Return the number and size of cached entries plus this process's hit/miss counts."""
+        entries = self._entries()
+        total = sum(p.stat().st_size for p in entries)
+        return CacheStats(entries=len(entries), total_bytes=total, hits=self.hits, misses=self.misses)
+
+    def prune(self, max_entries: int | None = None) -> int:
+        """Evict least recently used entries until at most max_entries remain.
+
+        Args:
+            max_entries (int | None): Entries to keep. Defaults to ``self.max_entries``; 0 clears the cache.
+
+        Returns:
+            int: Number of entries removed.
+
+        """
+        keep = self.max_entries if max_entries is None else max_entries
+        entries = sorted(self._entries(), key=lambda p: p.stat().st_mtime_ns, reverse=True)
+        removed = 0
+        for path in entries[keep:]:
+            path.unlink(missing_ok=True)
+            removed += 1
+        self._count = min(len(entries), keep)
+        return removed
+
+
+class CachedStage:
+    """Wrap a stage so its results are served from a StageCache when possible.
+
+    The wrapper exposes the same name, input_type and output_type as the
+    wrapped stage, so it can be used anywhere a Stage is expected.
+
+    Attributes:
+        stage (Stage): The wrapped stage.
+        cache (StageCache): Where results are stored.
+
+    """
+
+    def __init__(self, stage: Stage, cache: StageCache):
+        _stage_config(stage)  # refuse stages whose settings cannot be part of the key
+        self.stage = stage
+        self.cache = cache
+        self.name = stage.name
+        self.input_type = getattr(stage, "input_type", None)
+        self.output_type = getattr(stage, "output_type", None)
+
+    def run(self, input):
+        key = self.cache.key(self.stage, input)
+        hit, output = self.cache.get(key)
+        if hit:
+            return output
+        output = self.stage.run(input)
+        self.cache.put(key, output)
+        return output
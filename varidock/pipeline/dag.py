@@ -0,0 +1,295 @@
+"""The dag module defines the DAGPipeline class, which runs stages arranged as a directed acyclic graph instead of a linear chain. Nodes may take several typed inputs (for example AF3MSAMerger taking many AF3MSAOutputs, or a docking node joining a receptor PDBQT, a ligand PDBQT and a pocket center), and nodes whose inputs are ready run concurrently.
+
+Example:
+    >>> dag = DAGPipeline(sources={"conf0": PDB, "conf1": PDB, "ligand": LigandPrepInput})
+    >>> dag.add("receptor0", ADFRReceptorPrep(adfr_cfg), inputs="conf0")
+    >>> dag.add("receptor1", ADFRReceptorPrep(adfr_cfg), inputs="conf1")
+    >>> dag.add("ligand_pdbqt", MeekoLigandPrep(meeko_cfg), inputs="ligand")
+    >>> result = dag.run({"conf0": pdb0, "conf1": pdb1, "ligand": lig}, max_workers=4)
+    >>> result.outputs["receptor0"], result.critical_path
+"""
+# varidock/pipeline/dag.py
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Mapping, Sequence
+
+from varidock.pipeline.stage import MultiInputStage, Stage
+
+
+def _run_node(stage, args: tuple, kwargs: dict) -> tuple[Any, float, float]:
+    """Run one node and time it. Module-level so it can be pickled into worker processes."""
+    start = time.monotonic()
+    output = stage.run(*args, **kwargs)
+    return output, start, time.monotonic()
+
+
+@dataclass(frozen=True)
+class NodeTiming:
+    """Wall-clock timing of a single node, in seconds relative to the start of the run.
+
+    Attributes:
+        start (float): When the node started running.
+        end (float): When the node finished running.
+
+    """
+
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class DAGResult:
+    """Outputs and timings of a DAGPipeline run.
+
+    Attributes:
+        outputs (dict[str, Any]): Output of every node, keyed by node name.
+        timings (dict[str, NodeTiming]): Timing of every node, keyed by node name.
+        critical_path (list[str]): Node names on the longest chain of dependent nodes, in execution order.
+        critical_path_seconds (float): Summed run time of the nodes on the critical path.
+        wall_seconds (float): Total wall-clock time of the run.
+
+    """
+
+    outputs: dict[str, Any] = field(default_factory=dict)
+    timings: dict[str, NodeTiming] = field(default_factory=dict)
+    critical_path: list[str] = field(default_factory=list)
+    critical_path_seconds: float = 0.0
+    wall_seconds: float = 0.0
+
+
+@dataclass(frozen=True)
+class _Node:
+    name: str
+    stage: Stage | MultiInputStage
+    # Either a single upstream name (passed positionally) or a mapping of keyword -> upstream name(s).
+    inputs: str | Mapping[str, str | Sequence[str]]
+
+    def upstreams(self) -> list[str]:
+        if isinstance(self.inputs, str):
+            return [self.inputs]
+        names: list[str] = []
+        for ref in self.inputs.values():
+            names.extend([ref] if isinstance(ref, str) else ref)
+        return names
+
+
+class DAGPipeline:
+    """Orchestrates stages arranged as a directed acyclic graph.
+
+    Every node wraps a stage and names where its inputs come from: either pipeline sources (values passed to run()) or other nodes. A node that takes a single input uses the stage's ``input_type``; a node that takes several inputs calls ``stage.run(**kwargs)`` and is type checked against the stage's ``input_types`` mapping when the stage declares one. Since upstream nodes must be added before the nodes that consume them, the graph can never contain a cycle.
+    """
+
+    def __init__(self, sources: Mapping[str, type | None] | None = None):
+        """Initialize an empty DAG with the given named sources.
+
+        :param self: The instance of the DAGPipeline being created.
+        :param sources: Names of the values passed to run(), mapped to their expected types (or None to skip type checks).
+        :type sources: Mapping[str, type | None] | None
+        """
+        self.sources: dict[str, type | None] = dict(sources or {})
+        self.nodes: dict[str, _Node] = {}
+
+    def add(
+        self,
+        name: str,
+        stage: Stage | MultiInputStage,
+        inputs: str | Mapping[str, str | Sequence[str]],
+    ) -> "DAGPipeline":
+        """Add a node to the graph, ensuring its inputs exist and have compatible types.
+
+        :param self: The instance of the DAGPipeline to which the node is being added.
+        :param name: Unique name of the node. Its output is stored under this name.
+        :type name: str
+        :param stage: The stage to run for this node.
+        :type stage: Stage | MultiInputStage
+        :param inputs: A single source or node name whose value is passed positionally to ``stage.run``, or a mapping of keyword argument to source/node name. A sequence of names is gathered into a list, e.g. ``{"msa_outputs": ["msa_a", "msa_b"]}``.
+        :type inputs: str | Mapping[str, str | Sequence[str]]
+        :return: The DAGPipeline instance itself, allowing for method chaining.
+        :rtype: DAGPipeline
+        :raises ValueError: If the name is already used or an input refers to an unknown source or node.
+        :raises TypeError: If an input's type does not match what the stage expects.
+        """
+        if name in self.nodes or name in self.sources:
+            raise ValueError(f"Node name '{name}' is already used")
+
+        node = _Node(name=name, stage=stage, inputs=inputs)
+        for ref in node.upstreams():
+            if ref not in self.nodes and ref not in self.sources:
+                raise ValueError(f"Node '{name}' depends on unknown source or node '{ref}'")
+
+        if isinstance(inputs, str):
+            self._check_type(name, inputs, getattr(stage, "input_type", None))
+        else:
+            input_types = getattr(stage, "input_types", None) or {}
+            for param, ref in inputs.items():
+                refs = [ref] if isinstance(ref, str) else ref
+                for r in refs:
+                    self._check_type(name, r, input_types.get(param))
+
+        self.nodes[name] = node
+        return self
+
+    def _check_type(self, name: str, ref: str, expected: type | None) -> None:
+        if ref in self.nodes:
+            actual = getattr(self.nodes[ref].stage, "output_type", None)
+        else:
+            actual = self.sources[ref]
+        if expected is not None and actual is not None and actual != expected:
+            raise TypeError(
+                f"Node '{name}' expects {expected.__name__}, "
+                f"but '{ref}' provides {actual.__name__}"
+            )
+
+    def dependencies(self, name: str) -> list[str]:
+        """Return the upstream nodes (not sources) of a node, without duplicates."""
+        return list(dict.fromkeys(r for r in self.nodes[name].upstreams() if r in self.nodes))
+
+    def topological_order(self) -> list[str]:
+        """Return node names so that every node comes after all of its dependencies (Kahn's algorithm)."""
+        remaining = {name: len(self.dependencies(name)) for name in self.nodes}
+        dependents: dict[str, list[str]] = {name: [] for name in self.nodes}
+        for name in self.nodes:
+            for dep in self.dependencies(name):
+                dependents[dep].append(name)
+
+        ready = deque(name for name, count in remaining.items() if count == 0)
+        order = []
+        while ready:
+            name = ready.popleft()
+            order.append(name)
+            for child in dependents[name]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+        return order
+
+    def run(
+        self,
+        sources: Mapping[str, Any] | None = None,
+        max_workers: int | None = None,
+        per_stage_limits: Mapping[str, int] | None = None,
+        executor: Executor | None = None,
+    ) -> DAGResult:
+        """Execute the graph, starting each node as soon as all of its inputs exist.
+
+        Independent branches run at the same time on a thread pool (stages mostly wait on external tools). Pass a ProcessPoolExecutor as ``executor`` for CPU-bound Python stages.
+
+        :param self: The instance of the DAGPipeline being executed.
+        :param sources: Values for every declared source, keyed by source name.
+        :type sources: Mapping[str, Any] | None
+        :param max_workers: Number of nodes running at once. Defaults to 4; required when ``executor`` is given, and should match its size.
+        :type max_workers: int | None
+        :param per_stage_limits: Maximum number of concurrent runs per stage name, shared by all nodes using that stage.
+        :type per_stage_limits: Mapping[str, int] | None
+        :param executor: Optional pre-built executor to run nodes on. It is not shut down afterwards.
+        :type executor: Executor | None
+        :return: Outputs of every node plus per-node and critical-path timings.
+        :rtype: DAGResult
+        :raises ValueError: If a declared source has no value, a per-stage limit is below 1, or ``executor`` is given without ``max_workers``.
+        """
+        values: dict[str, Any] = dict(sources or {})
+        missing = [name for name in self.sources if name not in values]
+        if missing:
+            raise ValueError(f"Missing values for sources: {missing}")
+        limits = dict(per_stage_limits or {})
+        bad = {stage: limit for stage, limit in limits.items() if limit < 1}
+        if bad:
+            raise ValueError(f"per_stage_limits must be at least 1, got {bad}")
+        if executor is not None and max_workers is None:
+            raise ValueError("max_workers is required when an executor is given")
+
+        capacity = max_workers or 4
+        pool: Executor = executor or ThreadPoolExecutor(max_workers=capacity)
+
+        order = self.topological_order()
+        position = {name: i for i, name in enumerate(order)}
+        remaining = {name: len(self.dependencies(name)) for name in order}
+        dependents: dict[str, list[str]] = {name: [] for name in order}
+        for name in order:
+            for dep in self.dependencies(name):
+                dependents[dep].append(name)
+
+        ready = [name for name in order if remaining[name] == 0]
+        in_flight: dict[str, int] = {}
+        futures: dict[Future, str] = {}
+        result = DAGResult()
+        t0 = time.monotonic()
+
+        def call_args(node: _Node) -> tuple[tuple, dict]:
+            if isinstance(node.inputs, str):
+                return (values[node.inputs],), {}
+            kwargs = {
+                param: values[ref] if isinstance(ref, str) else [values[r] for r in ref]
+                for param, ref in node.inputs.items()
+            }
+            return (), kwargs
+
+        def fill() -> None:
+            for name in list(ready):
+                if len(futures) >= capacity:
+                    return
+                node = self.nodes[name]
+                stage_name = node.stage.name
+                limit = limits.get(stage_name)
+                if limit is not None and in_flight.get(stage_name, 0) >= limit:
+                    continue
+                ready.remove(name)
+                args, kwargs = call_args(node)
+                futures[pool.submit(_run_node, node.stage, args, kwargs)] = name
+                in_flight[stage_name] = in_flight.get(stage_name, 0) + 1
+
+        try:
+            fill()
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = futures.pop(future)
+                    stage_name = self.nodes[name].stage.name
+                    in_flight[stage_name] -= 1
+                    output, start, end = future.result()
+                    values[name] = output
+                    result.outputs[name] = output
+                    result.timings[name] = NodeTiming(start=start - t0, end=end - t0)
+                    for child in dependents[name]:
+                        remaining[child] -= 1
+                        if remaining[child] == 0:
+                            ready.append(child)
+                ready.sort(key=position.__getitem__)
+                fill()
+        finally:
+            for future in futures:
+                future.cancel()
+            if executor is None:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+        result.wall_seconds = time.monotonic() - t0
+        result.critical_path, result.critical_path_seconds = self._critical_path(order, result.timings)
+        return result
+
+    def _critical_path(
+        self, order: list[str], timings: Mapping[str, NodeTiming]
+    ) -> tuple[list[str], float]:
+        """Find the chain of dependent nodes with the largest summed run time."""
+        cost: dict[str, float] = {}
+        parent: dict[str, str | None] = {}
+        for name in order:
+            deps = self.dependencies(name)
+            best = max(deps, key=cost.__getitem__, default=None)
+            parent[name] = best
+            cost[name] = timings[name].duration + (cost[best] if best is not None else 0.0)
+
+        if not cost:
+            return [], 0.0
+        tail: str | None = max(cost, key=cost.__getitem__)
+        total = cost[tail]
+        path = []
+        while tail is not None:
+            path.append(tail)
+            tail = parent[tail]
+        return path[::-1], total
@@ -1,12 +1,22 @@
 """The pipeline module defines the core Pipeline class, which orchestrates the entire structure prediction process. It manages the sequence of stages, handles data flow between stages, and provides a high-level interface for running predictions."""
 # varidock/pipeline/pipeline.py 
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from typing import Any, Iterable, Iterator, Mapping
+
 from varidock.pipeline.stage import Stage
 
 
+def _run_stage(stage: Stage, input):
+    """Run a single stage on a single input. Module-level so it can be pickled into worker processes."""
+    return stage.run(input)
+
+
 class Pipeline:
     """Orchestrates a sequence of stages to run a complete structure prediction workflow.
 
-    The Pipeline class manages a list of stages, ensuring that the output type of each stage matches the input type of the next stage. It provides an add() method to append stages to the pipeline, and a run() method to execute the stages in sequence, passing the output of one stage as the input to the next.
+    The Pipeline class manages a list of stages, ensuring that the output type of each stage matches the input type of the next stage. It provides an add() method to append stages to the pipeline, and a run() method to execute the stages in sequence, passing the output of one stage as the input to the next. run_many() fans many inputs out over a process pool.
     """
 
     def __init__(self, *stages: Stage):
@@ -50,4 +60,109 @@ class Pipeline:
         result = input
         for stage in self.stages:
             result = stage.run(result)
-        return result
\ No newline at end of file
+        return result
+
+    def run_many(
+        self,
+        inputs: Iterable[Any],
+        max_workers: int | None = None,
+        per_stage_limits: Mapping[str, int] | None = None,
+        ordered: bool = True,
+        executor: Executor | None = None,
+    ) -> Iterator[tuple[int, Any]]:
+        """Push many inputs through the stage chain concurrently on a process pool.
+
+        Each input walks the stages in order, but different inputs are free to be at different stages at the same time. Work is handed to the pool only when a worker is free, and later stages are served first, so finished results stream out early instead of every input being stuck behind the first stage. Stages named in ``per_stage_limits`` never have more than that many inputs in flight, which keeps heavy stages (e.g. DeepSurfPockets, VinaDocking) capped while light ones run wide.
+
+        Stages and inputs must be picklable when the default process pool is used.
+
+        :param self: The instance of the Pipeline being executed.
+        :param inputs: The initial inputs, each compatible with the input type of the first stage.
+        :type inputs: Iterable[Any]
+        :param max_workers: Number of stage runs in flight at once. Defaults to the number of CPUs; required when ``executor`` is given, and should match its size.
+        :type max_workers: int | None
+        :param per_stage_limits: Maximum number of concurrent runs per stage, keyed by stage name. Stages not listed are only bounded by the pool size.
+        :type per_stage_limits: Mapping[str, int] | None
+        :param ordered: If True, yield results in input order. If False, yield them as they finish.
+        :type ordered: bool
+        :param executor: Optional pre-built executor to run stages on instead of a fresh ProcessPoolExecutor. It is not shut down afterwards.
+        :type executor: Executor | None
+        :return: An iterator of ``(index, output)`` pairs, where ``index`` is the position of the input in ``inputs``.
+        :rtype: Iterator[tuple[int, Any]]
+        :raises ValueError: If ``per_stage_limits`` names an unknown stage or a limit is below 1, if ``max_workers`` is below 1, or if ``executor`` is given without ``max_workers``.
+        """
+        # Validate here rather than in the generator so bad arguments raise at the call, not on the first next().
+        limits = dict(per_stage_limits or {})
+        unknown = set(limits) - {stage.name for stage in self.stages}
+        if unknown:
+            raise ValueError(f"per_stage_limits refers to unknown stages: {sorted(unknown)}")
+        for stage_name, limit in limits.items():
+            if limit < 1:
+                raise ValueError(f"Limit for stage '{stage_name}' must be at least 1, got {limit}")
+        if max_workers is not None and max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1, got {max_workers}")
+        if executor is not None and max_workers is None:
+            raise ValueError("max_workers is required when an executor is given")
+        capacity = max_workers or os.cpu_count() or 1
+        return self._run_many(inputs, capacity, limits, ordered, executor)
+
+    def _run_many(
+        self,
+        inputs: Iterable[Any],
+        capacity: int,
+        limits: dict[str, int],
+        ordered: bool,
+        executor: Executor | None,
+    ) -> Iterator[tuple[int, Any]]:
+        """Generator behind run_many(); arguments are already validated."""
+        if not self.stages:
+            yield from enumerate(inputs)
+            return
+
+        # Never hand the pool more than it can run, otherwise its own FIFO queue decides the order.
+        pool: Executor = executor or ProcessPoolExecutor(max_workers=capacity)
+
+        waiting: list[deque[tuple[int, Any]]] = [deque() for _ in self.stages]
+        waiting[0].extend(enumerate(inputs))
+        in_flight = [0] * len(self.stages)
+        futures: dict[Future, tuple[int, int]] = {}
+        finished: dict[int, Any] = {}
+        next_index = 0
+
+        def fill() -> None:
+            # Serve the most downstream stage first so results drain before new inputs start.
+            for level in reversed(range(len(self.stages))):
+                stage = self.stages[level]
+                limit = limits.get(stage.name)
+                while (
+                    waiting[level]
+                    and len(futures) < capacity
+                    and (limit is None or in_flight[level] < limit)
+                ):
+                    index, item = waiting[level].popleft()
+                    futures[pool.submit(_run_stage, stage, item)] = (level, index)
+                    in_flight[level] += 1
+
+        try:
+            fill()
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    level, index = futures.pop(future)
+                    in_flight[level] -= 1
+                    result = future.result()
+                    if level + 1 < len(self.stages):
+                        waiting[level + 1].append((index, result))
+                    elif ordered:
+                        finished[index] = result
+                    else:
+                        yield index, result
+                while next_index in finished:
+                    yield next_index, finished.pop(next_index)
+                    next_index += 1
+                fill()
+        finally:
+            for future in futures:
+                future.cancel()
+            if executor is None:
+                pool.shutdown(wait=True, cancel_futures=True)
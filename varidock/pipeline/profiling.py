@@ -0,0 +1,419 @@
+"""The profiling module records where wall time and resources go in a screen. A Profiler wraps stages (ProfiledStage) and command runners (ProfiledRunner), and can time any other block with ``measure()``, for example DeepSurf's in-process TensorFlow work. Each measurement records wall time, user/sys CPU of the Python process and of waited-for child processes, peak RSS of both, bytes read and written by the process (Linux ``/proc/self/io``), and an identifier of the input. Records are appended to a JSONL file and aggregated into a Prometheus textfile-collector file.
+
+Example:
+    >>> profiler = Profiler(Path("screen.profile.jsonl"), prometheus_path=Path("/var/lib/node_exporter/varidock.prom"))
+    >>> pipeline = Pipeline(*[profiler.stage(s) for s in stages])
+    >>> executor = LocalExecutor(runner=profiler.runner(LocalCommandRunner()))
+
+``varidock profile summarize screen.profile.jsonl`` prints per-stage percentiles.
+"""
+# varidock/pipeline/profiling.py
+from __future__ import annotations
+
+import json
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+from varidock.pipeline.stage import Stage
+
+_PROC_IO = Path("/proc/self/io")
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+_RSS_SCALE = 1 if os.uname().sysname == "Darwin" else 1024
+
+
+@dataclass
+class ProfileRecord:
+    """One profiled call.
+
+    Attributes:
+        kind (str): 'stage' for Stage.run, 'plan' for an executed RunPlan, or any label passed to measure().
+        name (str): Stage name, or the command for a plan.
+        input_id (str): Identifier of the input (its path, name or work_dir).
+        start (float): Unix time the call started.
+        wall_seconds (float): Elapsed wall time.
+        user_seconds (float): User CPU used by the Python process during the call.
+        sys_seconds (float): System CPU used by the Python process during the call.
+        child_user_seconds (float): User CPU of child processes reaped during the call.
+        child_sys_seconds (float): System CPU of child processes reaped during the call.
+        max_rss_bytes (int): Peak RSS of the Python process so far.
+        child_max_rss_bytes (int): Peak RSS of the largest child process reaped so far.
+        read_bytes (int | None): Bytes the process read from storage during the call, if known.
+        write_bytes (int | None): Bytes the process wrote to storage during the call, if known.
+        ok (bool): False if the call raised or the command exited non-zero.
+        error (str | None): The error, if the call failed.
+
+    """
+
+    kind: str
+    name: str
+    input_id: str
+    start: float
+    wall_seconds: float
+    user_seconds: float
+    sys_seconds: float
+    child_user_seconds: float
+    child_sys_seconds: float
+    max_rss_bytes: int
+    child_max_rss_bytes: int
+    read_bytes: Optional[int] = None
+    write_bytes: Optional[int] = None
+    ok: bool = True
+    error: Optional[str] = None
+
+
+@dataclass
+class _Snapshot:
+    wall: float
+    self_usage: resource.struct_rusage
+    child_usage: resource.struct_rusage
+    io: Optional[dict[str, int]]
+
+    @classmethod
+    def take(cls) -> "_Snapshot":
+        return cls(
+            wall=time.perf_counter(),
+            self_usage=resource.getrusage(resource.RUSAGE_SELF),
+            child_usage=resource.getrusage(resource.RUSAGE_CHILDREN),
+            io=_read_proc_io(),
+        )
+
+
+def _read_proc_io() -> Optional[dict[str, int]]:
+    try:
+        text = _PROC_IO.read_text()
+    except OSError:
+        return None
+    counters = {}
+    for line in text.splitlines():
+        key, _, value = line.partition(":")
+        counters[key.strip()] = int(value)
+    return counters
+
+
+def input_id(input: Any) -> str:
+    """Short identifier for a stage input or plan: its path, name or work_dir if it has one."""
+    for attr in ("path", "work_dir", "name"):
+        value = getattr(input, attr, None)
+        if value is not None:
+            return str(value)
+    return type(input).__name__
+
+
+class Profiler:
+    """Collects ProfileRecords into a JSONL file and a Prometheus textfile.
+
+    CPU and I/O counters are process-wide, so when several stages run in
+    threads of the same process their measurements overlap; run_many() uses
+    processes, which keeps them separate. Child CPU and RSS only count
+    processes that have exited and been waited for within the call.
+
+    The Prometheus file holds counters aggregated over the records written by
+    this Profiler instance. Copies sent to worker processes only append to the
+    JSONL file; call ``write_prometheus(load_records(profiler.path))`` in the
+    parent to export everything.
+
+    Attributes:
+        path (Path): JSONL file records are appended to.
+        prometheus_path (Path | None): Prometheus textfile-collector file, rewritten atomically after each record.
+
+    """
+
+    def __init__(self, path: Path, prometheus_path: Path | None = None):
+        self.path = Path(path)
+        self.prometheus_path = Path(prometheus_path) if prometheus_path else None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._totals: dict[tuple[str, str], dict[str, float]] = {}
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def stage(self, stage: Stage) -> "ProfiledStage":
+        """Wrap a stage so every run() is recorded."""
+        return ProfiledStage(stage, self)
+
+    def runner(self, runner) -> "ProfiledRunner":
+        """Wrap a CommandRunner so every executed RunPlan is recorded."""
+        return ProfiledRunner(runner, self)
+
+    @contextmanager
+    def measure(self, kind: str, name: str, input: Any = None) -> Iterator[None]:
+        """Record the enclosed block as one call.
+
+        Args:
+            kind (str): Record kind, e.g. 'stage' or 'plan'.
+            name (str): Name to aggregate under.
+            input (Any): The input being processed, used for ``input_id``.
+
+        """
+        start = time.time()
+        before = _Snapshot.take()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.record(_make_record(kind, name, input, start, before, _Snapshot.take(), error))
+
+    def record(self, record: ProfileRecord) -> None:
+        line = json.dumps(asdict(record), separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line)
+            if self.prometheus_path is not None:
+                _accumulate(self._totals, [record])
+                self._write_textfile(_render_prometheus(self._totals))
+
+    def write_prometheus(self, records: Iterable[ProfileRecord]) -> None:
+        """Rewrite the Prometheus textfile with counters aggregated over ``records``."""
+        if self.prometheus_path is None:
+            return
+        with self._lock:
+            self._totals = {}
+            _accumulate(self._totals, records)
+            self._write_textfile(_render_prometheus(self._totals))
+
+    def _write_textfile(self, text: str) -> None:
+        self.prometheus_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.prometheus_path.with_name(f".{self.prometheus_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(text)
+        os.replace(tmp, self.prometheus_path)
+
+
+def _make_record(
+    kind: str,
+    name: str,
+    input: Any,
+    start: float,
+    before: _Snapshot,
+    after: _Snapshot,
+    error: str | None,
+) -> ProfileRecord:
+    read_bytes = write_bytes = None
+    if before.io is not None and after.io is not None:
+        read_bytes = after.io.get("read_bytes", 0) - before.io.get("read_bytes", 0)
+        write_bytes = after.io.get("write_bytes", 0) - before.io.get("write_bytes", 0)
+    return ProfileRecord(
+        kind=kind,
+        name=name,
+        input_id=input_id(input) if input is not None else "",
+        start=start,
+        wall_seconds=after.wall - before.wall,
+        user_seconds=after.self_usage.ru_utime - before.self_usage.ru_utime,
+        sys_seconds=after.self_usage.ru_stime - before.self_usage.ru_stime,
+        child_user_seconds=after.child_usage.ru_utime - before.child_usage.ru_utime,
+        child_sys_seconds=after.child_usage.ru_stime - before.child_usage.ru_stime,
+        max_rss_bytes=after.self_usage.ru_maxrss * _RSS_SCALE,
+        child_max_rss_bytes=after.child_usage.ru_maxrss * _RSS_SCALE,
+        read_bytes=read_bytes,
+        write_bytes=write_bytes,
+        ok=error is None,
+        error=error,
+    )
+
+
+class ProfiledStage:
+    """Wrap a stage so each run() is recorded by a Profiler.
+
+    The wrapper exposes the same name, input_type and output_type as the
+    wrapped stage, so it can be used anywhere a Stage is expected.
+
+    Attributes:
+        stage (Stage): The wrapped stage.
+        profiler (Profiler): Where records go.
+
+    """
+
+    def __init__(self, stage: Stage, profiler: Profiler):
+        self.stage = stage
+        self.profiler = profiler
+        self.name = stage.name
+        self.input_type = getattr(stage, "input_type", None)
+        self.output_type = getattr(stage, "output_type", None)
+
+    def run(self, input):
+        with self.profiler.measure("stage", self.name, input):
+            return self.stage.run(input)
+
+
+class ProfiledRunner:
+    """Wrap a CommandRunner so each executed RunPlan is recorded by a Profiler.
+
+    A non-zero exit is recorded as a failed call; the CompletedRun is still
+    returned unchanged.
+
+    Attributes:
+        runner (CommandRunner): The wrapped runner.
+        profiler (Profiler): Where records go.
+
+    """
+
+    def __init__(self, runner, profiler: Profiler):
+        self.runner = runner
+        self.profiler = profiler
+
+    def run(self, plan):
+        name = Path(str(plan.argv[0])).name if plan.argv else "plan"
+        start = time.time()
+        before = _Snapshot.take()
+        error = None
+        try:
+            result = self.runner.run(plan)
+            if result.returncode != 0:
+                error = f"returncode={result.returncode}"
+            return result
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.profiler.record(_make_record("plan", name, plan, start, before, _Snapshot.take(), error))
+
+
+def load_records(path: Path) -> list[ProfileRecord]:
+    """Read every record from a profile JSONL file, skipping partial lines."""
+    records = []
+    with open(path) as f:
+        for line in f:
+            try:
+                records.append(ProfileRecord(**json.loads(line)))
+            except (ValueError, TypeError):
+                continue
+    return records
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 <= q <= 100)."""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(min(rank, len(ordered))) - 1]
+
+
+@dataclass
+class StageSummary:
+    """Aggregated timings for one (kind, name) pair.
+
+    Attributes:
+        kind (str): Record kind.
+        name (str): Stage or command name.
+        count (int): Number of calls.
+        failures (int): Number of failed calls.
+        p50 (float): Median wall seconds.
+        p90 (float): 90th percentile wall seconds.
+        p99 (float): 99th percentile wall seconds.
+        max (float): Slowest call in wall seconds.
+        total_wall_seconds (float): Sum of wall seconds.
+        total_cpu_seconds (float): Sum of user+sys CPU of the process and its children.
+        max_rss_bytes (int): Largest peak RSS seen, process or child.
+
+    """
+
+    kind: str
+    name: str
+    count: int
+    failures: int
+    p50: float
+    p90: float
+    p99: float
+    max: float
+    total_wall_seconds: float
+    total_cpu_seconds: float
+    max_rss_bytes: int
+
+
+def summarize(records: Iterable[ProfileRecord]) -> list[StageSummary]:
+    """Group records by (kind, name) and compute wall-time percentiles, slowest total first."""
+    groups: dict[tuple[str, str], list[ProfileRecord]] = {}
+    for r in records:
+        groups.setdefault((r.kind, r.name), []).append(r)
+
+    summaries = []
+    for (kind, name), rs in groups.items():
+        walls = [r.wall_seconds for r in rs]
+        summaries.append(
+            StageSummary(
+                kind=kind,
+                name=name,
+                count=len(rs),
+                failures=sum(not r.ok for r in rs),
+                p50=percentile(walls, 50),
+                p90=percentile(walls, 90),
+                p99=percentile(walls, 99),
+                max=max(walls),
+                total_wall_seconds=sum(walls),
+                total_cpu_seconds=sum(
+                    r.user_seconds + r.sys_seconds + r.child_user_seconds + r.child_sys_seconds
+                    for r in rs
+                ),
+                max_rss_bytes=max(max(r.max_rss_bytes, r.child_max_rss_bytes) for r in rs),
+            )
+        )
+    summaries.sort(key=lambda s: s.total_wall_seconds, reverse=True)
+    return summaries
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_prometheus(records: Iterable[ProfileRecord]) -> str:
+    """Render counters aggregated per (kind, name) in the Prometheus text exposition format."""
+    totals: dict[tuple[str, str], dict[str, float]] = {}
+    _accumulate(totals, records)
+    return _render_prometheus(totals)
+
+
+def _accumulate(totals: dict[tuple[str, str], dict[str, float]], records: Iterable[ProfileRecord]) -> None:
+    for r in records:
+        t = totals.setdefault(
+            (r.kind, r.name),
+            {"runs": 0, "failures": 0, "wall": 0.0, "user": 0.0, "system": 0.0,
+             "child_user": 0.0, "child_system": 0.0, "read": 0, "write": 0, "rss": 0},
+        )
+        t["runs"] += 1
+        t["failures"] += not r.ok
+        t["wall"] += r.wall_seconds
+        t["user"] += r.user_seconds
+        t["system"] += r.sys_seconds
+        t["child_user"] += r.child_user_seconds
+        t["child_system"] += r.child_sys_seconds
+        t["read"] += r.read_bytes or 0
+        t["write"] += r.write_bytes or 0
+        t["rss"] = max(t["rss"], r.max_rss_bytes, r.child_max_rss_bytes)
+
+
+def _render_prometheus(totals: dict[tuple[str, str], dict[str, float]]) -> str:
+    metrics = [
+        ("varidock_stage_runs_total", "counter", "Profiled calls.", "runs", None),
+        ("varidock_stage_failures_total", "counter", "Profiled calls that failed.", "failures", None),
+        ("varidock_stage_wall_seconds_total", "counter", "Wall time spent in profiled calls.", "wall", None),
+        ("varidock_stage_cpu_seconds_total", "counter", "CPU time spent in profiled calls.", None,
+         ("user", "system", "child_user", "child_system")),
+        ("varidock_stage_read_bytes_total", "counter", "Bytes read from storage by profiled calls.", "read", None),
+        ("varidock_stage_write_bytes_total", "counter", "Bytes written to storage by profiled calls.", "write", None),
+        ("varidock_stage_max_rss_bytes", "gauge", "Largest peak RSS seen, process or child.", "rss", None),
+    ]
+    lines = []
+    for metric, mtype, help_text, field_name, modes in metrics:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {mtype}")
+        for (kind, name), t in sorted(totals.items()):
+            labels = f'kind="{_escape(kind)}",name="{_escape(name)}"'
+            if modes is None:
+                lines.append(f"{metric}{{{labels}}} {t[field_name]}")
+            else:
+                for mode in modes:
+                    lines.append(f'{metric}{{{labels},mode="{mode}"}} {t[mode]}')
+    return "\n".join(lines) + "\n"
@@ -3,10 +3,11 @@
 A stage is a self-contained unit of work that transforms data from one form to another. For example, a stage might take a protein sequence as input and produce an AF3 input JSON as output. The Stage protocol allows us to define these transformations in a modular way, enabling flexible composition of different stages to create complex workflows.
 """
 # varidock/pipeline/stage.py
-from typing import Protocol, TypeVar
+from typing import Iterator, Mapping, Protocol, TypeVar
 
 In = TypeVar("In")
 Out = TypeVar("Out")
+Item = TypeVar("Item")
 
 
 class Stage(Protocol[In, Out]):
@@ -22,4 +23,34 @@ class Stage(Protocol[In, Out]):
         :param input: The input data for the stage, which must be of the type specified by input_type.
         :return: The output data produced by the stage, which will be of the type specified by output_type.
         """
-        ...
\ No newline at end of file
+        ...
+
+
+class MultiInputStage(Protocol[Out]):
+    """Represents a step that takes several named inputs, such as a merge or join. Used as a node in a DAGPipeline."""
+
+    name: str
+    input_types: Mapping[str, type]
+    output_type: type[Out]
+
+    def run(self, **inputs) -> Out:
+        """Execute the stage's transformation logic.
+
+        :param inputs: The named inputs of the stage. Each value is of the type given by input_types, or a list of such values when the node gathers several upstream outputs.
+        :return: The output data produced by the stage, which will be of the type specified by output_type.
+        """
+        ...
+
+
+class StreamingStage(Stage[In, Out], Protocol[In, Out, Item]):
+    """A stage that can also emit its results one item at a time, e.g. one PDB per extracted frame. Used by StreamingPipeline so downstream stages start before this one finishes."""
+
+    item_type: type[Item]
+
+    def stream(self, input: In) -> Iterator[Item]:
+        """Yield the stage's results as soon as each one is ready.
+
+        :param input: The input data for the stage, which must be of the type specified by input_type.
+        :return: An iterator of items of the type specified by item_type.
+        """
+        ...
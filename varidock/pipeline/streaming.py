@@ -0,0 +1,151 @@
+"""The streaming module defines the StreamingPipeline class, which runs a linear chain of stages as a set of concurrent workers connected by bounded queues. Stages that implement ``stream()`` (see StreamingStage) hand each item downstream as soon as it is produced, for example one PDB per extracted MD frame, so pocket detection and docking start long before the upstream stage finishes. Because every queue is bounded, a fast producer blocks instead of piling up items in memory; a producer that writes files can hold its external tool back too, as VMDFrameExtraction.stream does (see its ``keep_frames`` for bounding frames on scratch disk).
+"""
+# varidock/pipeline/streaming.py
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+from varidock.pipeline.stage import Stage
+
+_DONE = object()
+_POLL_SECONDS = 0.1
+
+
+@dataclass
+class _Failed:
+    error: BaseException
+
+
+def _emitted_type(stage: Stage) -> type:
+    """Type that reaches the next stage: the item type for streaming stages, else the output type."""
+    if hasattr(stage, "stream"):
+        return getattr(stage, "item_type", stage.output_type)
+    return stage.output_type
+
+
+class StreamingPipeline:
+    """Orchestrates a chain of stages where items flow downstream one at a time.
+
+    Each stage runs in its own thread. A streaming stage (one with a ``stream()`` method) may turn one input into many items; any other stage maps each item through ``run()``. Stages are connected by queues of at most ``queue_size`` items, which provides backpressure between stages.
+    """
+
+    def __init__(self, *stages: Stage, queue_size: int = 4):
+        """Initialize the pipeline with an optional sequence of stages.
+
+        :param self: The instance of the StreamingPipeline being created.
+        :param stages: Stages to chain. The item type of a streaming stage (or the output type of a regular stage) must match the input type of the next stage.
+        :type stages: Stage
+        :param queue_size: Maximum number of items buffered between two stages.
+        :type queue_size: int
+        """
+        if queue_size < 1:
+            raise ValueError(f"queue_size must be at least 1, got {queue_size}")
+        self.queue_size = queue_size
+        self.stages: list[Stage] = []
+        for stage in stages:
+            self.add(stage)
+
+    def add(self, stage: Stage) -> "StreamingPipeline":
+        """Add a stage to the pipeline, ensuring type compatibility with the previous stage.
+
+        :param self: The instance of the StreamingPipeline to which the stage is being added.
+        :param stage: The Stage instance to add to the pipeline.
+        :type stage: Stage
+        :return: The StreamingPipeline instance itself, allowing for method chaining.
+        :rtype: StreamingPipeline
+        """
+        if self.stages:
+            prev_output = _emitted_type(self.stages[-1])
+            curr_input = stage.input_type
+            if prev_output != curr_input:
+                raise TypeError(
+                    f"Stage '{stage.name}' expects {curr_input.__name__}, "
+                    f"but previous stage emits {prev_output.__name__}"
+                )
+        self.stages.append(stage)
+        return self
+
+    def stream(self, input) -> Iterator[Any]:
+        """Run the pipeline on one input and yield final items as soon as they are produced.
+
+        If any stage raises, the error is re-raised here and the remaining stages are stopped. Closing the iterator early also stops every stage after its current item.
+
+        :param self: The instance of the StreamingPipeline being executed.
+        :param input: The initial input, compatible with the input type of the first stage.
+        :return: An iterator over the items emitted by the last stage.
+        :rtype: Iterator[Any]
+        """
+        if not self.stages:
+            yield input
+            return
+
+        stop = threading.Event()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+
+        def put(q: queue.Queue, item) -> bool:
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=_POLL_SECONDS)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def drain(q: queue.Queue) -> Iterator[Any]:
+            while not stop.is_set():
+                try:
+                    item = q.get(timeout=_POLL_SECONDS)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failed):
+                    raise item.error
+                yield item
+
+        def worker(level: int) -> None:
+            stage = self.stages[level]
+            out = queues[level]
+            source = iter([input]) if level == 0 else drain(queues[level - 1])
+            try:
+                for item in source:
+                    if hasattr(stage, "stream"):
+                        results = stage.stream(item)
+                    else:
+                        results = iter([stage.run(item)])
+                    try:
+                        for result in results:
+                            if not put(out, result):
+                                return
+                    finally:
+                        close = getattr(results, "close", None)
+                        if close is not None:
+                            close()
+            except BaseException as e:
+                put(out, _Failed(e))
+                return
+            put(out, _DONE)
+
+        threads = [
+            threading.Thread(target=worker, args=(level,), name=f"varidock-stream-{stage.name}", daemon=True)
+            for level, stage in enumerate(self.stages)
+        ]
+        for t in threads:
+            t.start()
+        try:
+            yield from drain(queues[-1])
+        finally:
+            stop.set()
+            for t in threads:
+                t.join()
+
+    def run(self, input) -> list[Any]:
+        """Run the pipeline on one input and collect every final item.
+
+        :param self: The instance of the StreamingPipeline being executed.
+        :param input: The initial input, compatible with the input type of the first stage.
+        :return: All items emitted by the last stage, in the order they were produced.
+        :rtype: list[Any]
+        """
+        return list(self.stream(input))
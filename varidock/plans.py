@@ -1,6 +1,13 @@
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Mapping, Sequence, Optional
+from typing import Any, Mapping, Sequence, Optional
+
+# Resource classes a plan can be tagged with, so a RoutingExecutor can send
+# it to a matching SlurmConfig or local pool.
+CPU_HEAVY = "cpu-heavy"
+GPU = "gpu"
+IO_BOUND = "io-bound"
+SHORT = "short"
 
 
 @dataclass(frozen=True)
@@ -27,3 +34,9 @@ class RunPlan:
 
     # Optional environment variables
     env: Optional[Mapping[str, str]] = None
+
+    # What the run mostly needs (CPU_HEAVY, GPU, IO_BOUND, SHORT); None if untagged
+    resource_class: Optional[str] = None
+
+    # Facts used to size the request, e.g. {"sequence_length": 812}
+    metadata: Optional[Mapping[str, Any]] = None
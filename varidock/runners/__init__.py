@@ -4,8 +4,10 @@ This module defines the base runner interface and specific implementations for d
 """
 from .base import StructurePredictionRunner
 from .af3 import AF3Config
+from .af3_instance import AF3InstanceRunner
 
 __all__ = [
     "StructurePredictionRunner",
     "AF3Config",
+    "AF3InstanceRunner",
 ]
\ No newline at end of file
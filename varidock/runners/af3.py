@@ -6,12 +6,13 @@ for executing AF3 with the specified configuration.
 
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Sequence
 
 
-from varidock.plans import RunPlan
+from varidock.plans import CPU_HEAVY, GPU, RunPlan
 
 @dataclass(frozen=True)
 class AF3Config:
@@ -25,11 +26,15 @@ class AF3Config:
         python_entrypoint (str): Python binary inside the container.
         singularity_args (Sequence[str]): Extra args for singularity exec.
         script_args (Sequence[str]): Extra args for run_alphafold.py.
+        msa_dir (Path | None): Host directory of MSA/template files referenced by
+            ``unpairedMsaPath``/``pairedMsaPath``/``mmcifPath`` in the input JSON
+            (see AF3MSAMergerConfig.msa_dir). Bound at ``container_msa_dir`` when set.
         container_input_dir (str): Container mount point for input JSON.
         container_output_dir (str): Container mount point for AF3 output.
         container_model_dir (str): Container mount point for model parameters.
         container_db_dir (str): Container mount point for genetic databases.
         container_runner_dir (str): Container mount point for run_alphafold.py.
+        container_msa_dir (str): Container mount point for ``msa_dir``.
 
     """
 
@@ -41,6 +46,7 @@ class AF3Config:
     python_entrypoint: str = "python"
     singularity_args: Sequence[str] = ("--nv",)
     script_args: Sequence[str] = ()
+    msa_dir: Path | None = None
 
     # Inside-container mount points
     container_input_dir: str = "/root/af_input"
@@ -48,6 +54,7 @@ class AF3Config:
     container_model_dir: str = "/root/models"
     container_db_dir: str = "/root/public_databases"
     container_runner_dir: str = "/root/runner"
+    container_msa_dir: str = "/root/af_msas"
 
 
     @classmethod
@@ -114,6 +121,8 @@ def plan_af3(
         cfg.db_dir: cfg.container_db_dir,
         script_path.parent: cfg.container_runner_dir,
     }
+    if cfg.msa_dir is not None:
+        binds[cfg.msa_dir] = cfg.container_msa_dir
 
     argv = ["singularity", "exec", *cfg.singularity_args]
     for host, container in binds.items():
@@ -137,11 +146,39 @@ def plan_af3(
     suffix = "_data.json" if norun_inference else "_model.cif"
     expected = [af_output / name / f"{name}{suffix}"]
 
-
     return RunPlan(
         work_dir=output_dir,
         files_text=files,
         argv=argv,
         expected_outputs=expected,
         env=None,
-    )
\ No newline at end of file
+        # The data pipeline is jackhmmer/nhmmer on CPUs; inference needs a GPU.
+        resource_class=CPU_HEAVY if norun_inference else GPU,
+        metadata={
+            "tool": "af3",
+            **_input_size(input_json),
+            # Host-side view of the run, for runners that reuse one container (AF3InstanceRunner).
+            "af3_job": {
+                "json_path": str((input_dir / f"{name}.json").resolve()),
+                "output_dir": str(af_output.resolve()),
+                "script_args": list(cfg.script_args),
+            },
+        },
+    )
+
+
+def _input_size(input_json: str) -> dict:
+    """Residue and chain counts of an AF3 input JSON, for sizing the job request."""
+    try:
+        sequences = json.loads(input_json).get("sequences", [])
+    except (ValueError, AttributeError):
+        return {}
+    length = chains = 0
+    for entry in sequences:
+        for kind in ("protein", "rna", "dna"):
+            if kind in entry:
+                ids = entry[kind].get("id", "A")
+                copies = len(ids) if isinstance(ids, list) else 1
+                length += copies * len(entry[kind].get("sequence", ""))
+                chains += copies
+    return {"sequence_length": length, "num_chains": chains}
\ No newline at end of file
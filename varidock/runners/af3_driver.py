@@ -0,0 +1,134 @@
+"""Long-lived AF3 driver that runs inside the AF3 container and serves many jobs from one Python process. It imports ``run_alphafold.py`` once, memoizes its ``ModelRunner`` so model parameters are loaded and JAX functions compiled only once per configuration, then polls a queue directory for job requests and runs each through the script's own ``main`` with that job's flags. The file uses only the standard library because it executes under the container's Python, where varidock is not installed; the host side is `AF3InstanceRunner` in varidock.runners.af3_instance.
+
+Queue layout (all paths are the same inside and outside the container):
+``pending/<id>.json`` holds ``{"args": [...]}``, the flags for one run; the
+driver moves it to ``running/``, writes the job's output to ``logs/<id>.log``
+and its result ``{"returncode", "error", "seconds"}`` to ``done/<id>.json``.
+A ``stop`` file makes the driver exit once the current job is finished.
+"""
+# varidock/runners/af3_driver.py
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import sys
+import time
+import traceback
+from pathlib import Path
+
+STOP = "stop"
+
+
+def load_runner(script: Path):
+    """Import ``run_alphafold.py`` (or a site wrapper of it) as a module without running it."""
+    sys.path.insert(0, str(script.parent))
+    spec = importlib.util.spec_from_file_location("run_alphafold", script)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["run_alphafold"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def memoize_model_runner(module) -> None:
+    """Make ``module.ModelRunner(...)`` return the previous instance when called with the same arguments.
+
+    ``main`` looks the class up as a module global on every call, so this is
+    what keeps loaded parameters and compiled JAX functions across jobs.
+    """
+    cls = getattr(module, "ModelRunner", None)
+    if cls is None:
+        return
+    cache: dict[str, object] = {}
+
+    def model_runner(*args, **kwargs):
+        key = repr((args, sorted(kwargs.items())))
+        if key not in cache:
+            cache.clear()  # one model in GPU memory at a time
+            cache[key] = cls(*args, **kwargs)
+        return cache[key]
+
+    module.ModelRunner = model_runner
+
+
+def _flag_values(module):
+    if hasattr(module, "FLAGS"):
+        return module.FLAGS
+    return module.flags.FLAGS  # absl, as imported by run_alphafold.py
+
+
+def run_job(module, script: Path, args: list[str]) -> None:
+    """Run one job through ``module.main`` with exactly ``args`` as its flags.
+
+    absl's FLAGS keeps values across parses, so every flag is reset to its
+    default first; otherwise e.g. ``--norun_inference`` from an MSA job
+    would carry over into the next inference job.
+    """
+    argv = [str(script), *args]
+    flags = _flag_values(module)
+    flags.unparse_flags()
+    flags(argv)
+    module.main(argv)
+
+
+def _write_json(path: Path, data: dict) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+def claim(queue: Path) -> Path | None:
+    for request in sorted((queue / "pending").glob("*.json")):
+        running = queue / "running" / request.name
+        try:
+            os.rename(request, running)
+        except FileNotFoundError:
+            continue
+        return running
+    return None
+
+
+def serve(script: Path, queue: Path, base_args: list[str], poll_seconds: float = 0.2) -> int:
+    for sub in ("pending", "running", "done", "logs"):
+        (queue / sub).mkdir(parents=True, exist_ok=True)
+    module = load_runner(script)
+    memoize_model_runner(module)
+    print(f"af3 driver ready: pid={os.getpid()} runner={script}", flush=True)
+
+    while not (queue / STOP).exists():
+        running = claim(queue)
+        if running is None:
+            time.sleep(poll_seconds)
+            continue
+        request = json.loads(running.read_text())
+        start = time.time()
+        returncode, error = 0, None
+        with open(queue / "logs" / f"{running.stem}.log", "w") as log:
+            with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+                try:
+                    run_job(module, script, [*base_args, *request["args"]])
+                except SystemExit as e:
+                    returncode = e.code if isinstance(e.code, int) else 1
+                    error = None if returncode == 0 else f"SystemExit({e.code!r})"
+                except Exception:
+                    returncode, error = 1, traceback.format_exc()
+                    log.write(error)
+        result = {"returncode": returncode, "error": error, "seconds": time.time() - start}
+        _write_json(queue / "done" / running.name, result)
+        running.unlink()
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve AF3 jobs from a queue directory.")
+    parser.add_argument("--runner", type=Path, required=True, help="run_alphafold.py inside the container")
+    parser.add_argument("--queue", type=Path, required=True, help="Queue directory")
+    parser.add_argument("--poll", type=float, default=0.2, help="Seconds between queue scans when idle")
+    args, base_args = parser.parse_known_args(argv)
+    return serve(args.runner, args.queue, base_args, args.poll)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""Runs AF3 plans through one persistent Singularity instance instead of a fresh ``singularity exec`` per job. `AF3InstanceRunner` is a CommandRunner: it starts ``singularity instance start`` once, launches the long-lived in-container driver (varidock/runners/af3_driver.py) inside it, and hands each AF3 plan to that driver through a queue directory, so container start-up, the AF3/JAX import and model loading are paid once per worker rather than once per job. Because an instance's binds are fixed when it starts, the directories holding per-job inputs and outputs ("data roots") are bound at their host paths, and jobs are addressed by host path."""
+# varidock/runners/af3_instance.py
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Mapping, Optional, Sequence
+
+from varidock.execution.run import CommandRunner, CompletedRun, LocalCommandRunner
+from varidock.plans import RunPlan
+from varidock.runners.af3 import AF3Config
+
+DRIVER = Path(__file__).with_name("af3_driver.py")
+
+
+class AF3InstanceRunner(CommandRunner):
+    """Run AF3 plans in one long-lived container instance, one job at a time.
+
+    Use it as the ``runner`` of a LocalExecutor; materialization, output
+    validation, the ledger and retries work as for any other plan. Plans not
+    built by ``plan_af3`` (no ``af3_job`` metadata) run as ordinary commands.
+    Create one runner per GPU or worker; each owns one instance and one driver.
+
+    Example:
+        >>> runner = AF3InstanceRunner(af3_config, queue_dir=screen / ".af3_queue", data_roots=[screen])
+        >>> with runner:
+        ...     stage = AF3Inference(af3_config, jax_cache_dir, executor=LocalExecutor(runner=runner), write_only=False)
+        ...     outputs = [stage.run(m) for m in merged_inputs]
+
+    Attributes:
+        af3_config (AF3Config): Image, model, database and runner script. Its
+            ``singularity_args`` (e.g. ``--nv``) apply when the instance starts.
+        queue_dir (Path): Directory shared with the driver; bound at its host path.
+        data_roots (Sequence[Path]): Directories containing every plan's work_dir,
+            bound at their host paths.
+        name (str): Singularity instance name.
+        env (Mapping[str, str] | None): Extra environment for the instance, e.g.
+            ``{"CUDA_VISIBLE_DEVICES": "1"}`` to pin a worker to a GPU.
+        poll_seconds (float): How often to check for a finished job.
+        container_driver_dir (str): Container mount point for the driver's directory.
+
+    """
+
+    def __init__(
+        self,
+        af3_config: AF3Config,
+        queue_dir: Path,
+        data_roots: Sequence[Path],
+        name: Optional[str] = None,
+        env: Optional[Mapping[str, str]] = None,
+        poll_seconds: float = 0.5,
+        container_driver_dir: str = "/root/varidock_driver",
+    ):
+        self.af3_config = af3_config
+        self.queue_dir = Path(queue_dir).resolve()
+        self.data_roots = [Path(r).resolve() for r in data_roots]
+        self.name = name or f"varidock_af3_{uuid.uuid4().hex[:8]}"
+        self.env = dict(env or {})
+        self.poll_seconds = poll_seconds
+        self.container_driver_dir = container_driver_dir
+        self._fallback = LocalCommandRunner(capture_output=True)
+        self._driver: Optional[subprocess.Popen] = None
+        self._instance_started = False
+        self._lock = threading.Lock()
+
+    def binds(self) -> dict[Path, str]:
+        """Host path -> container path for the instance."""
+        cfg = self.af3_config
+        binds = {
+            Path(cfg.model_dir): cfg.container_model_dir,
+            Path(cfg.db_dir): cfg.container_db_dir,
+            cfg.runner_script.resolve().parent: cfg.container_runner_dir,
+            DRIVER.parent: self.container_driver_dir,
+        }
+        if cfg.msa_dir is not None:
+            binds[Path(cfg.msa_dir)] = cfg.container_msa_dir
+        for root in (*self.data_roots, self.queue_dir):
+            binds[root] = str(root)
+        return binds
+
+    def _env(self) -> dict[str, str]:
+        return {**os.environ, **self.env}
+
+    def start(self) -> None:
+        """Start the instance and the driver if they are not running."""
+        with self._lock:
+            if self._driver is not None and self._driver.poll() is None:
+                return
+            cfg = self.af3_config
+            if self._instance_started:
+                # The driver died; the instance may be wedged too, so start both afresh.
+                self._stop_instance()
+            for sub in ("pending", "running", "done", "logs"):
+                (self.queue_dir / sub).mkdir(parents=True, exist_ok=True)
+            (self.queue_dir / "stop").unlink(missing_ok=True)
+
+            argv = ["singularity", "instance", "start", *cfg.singularity_args]
+            for host, container in self.binds().items():
+                argv += ["--bind", f"{Path(host).resolve()}:{container}"]
+            argv += [str(cfg.sif_path), self.name]
+            proc = subprocess.run(argv, env=self._env(), capture_output=True, text=True)
+            if proc.returncode != 0:
+                raise RuntimeError(f"singularity instance start failed ({proc.returncode}): {proc.stderr.strip()}")
+            self._instance_started = True
+
+            driver_argv = [
+                "singularity",
+                "exec",
+                f"instance://{self.name}",
+                cfg.python_entrypoint,
+                f"{self.container_driver_dir}/{DRIVER.name}",
+                f"--runner={cfg.container_runner_dir}/{cfg.runner_script.name}",
+                f"--queue={self.queue_dir}",
+                f"--model_dir={cfg.container_model_dir}",
+                f"--db_dir={cfg.container_db_dir}",
+            ]
+            with open(self.queue_dir / "driver.log", "ab") as log:
+                self._driver = subprocess.Popen(
+                    driver_argv, env=self._env(), stdout=log, stderr=subprocess.STDOUT, start_new_session=True
+                )
+
+    def run(self, plan: RunPlan) -> CompletedRun:
+        job = (plan.metadata or {}).get("af3_job")
+        if job is None:
+            return self._fallback.run(plan)
+        for path in (job["json_path"], job["output_dir"]):
+            if not any(Path(path).is_relative_to(root) for root in self.data_roots):
+                raise ValueError(f"{path} is not under any data root of {self.name}: {self.data_roots}")
+
+        self.start()
+        request_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        args = [f"--json_path={job['json_path']}", f"--output_dir={job['output_dir']}", *job["script_args"]]
+        pending = self.queue_dir / "pending" / f"{request_id}.json"
+        tmp = self.queue_dir / f".{request_id}.tmp"
+        tmp.write_text(json.dumps({"args": args}))
+        os.replace(tmp, pending)
+
+        done = self.queue_dir / "done" / f"{request_id}.json"
+        log = self.queue_dir / "logs" / f"{request_id}.log"
+        while not done.exists():
+            driver = self._driver
+            if driver is None or driver.poll() is not None:
+                pending.unlink(missing_ok=True)
+                if done.exists():
+                    break
+                return CompletedRun(
+                    returncode=(driver.returncode if driver is not None else None) or 1,
+                    argv=plan.argv,
+                    stdout=_read(log),
+                    stderr=f"AF3 driver of instance {self.name} exited\n{_read(self.queue_dir / 'driver.log')}",
+                )
+            time.sleep(self.poll_seconds)
+
+        result = json.loads(done.read_text())
+        done.unlink()
+        return CompletedRun(
+            returncode=result["returncode"],
+            argv=plan.argv,
+            stdout=_read(log),
+            stderr=result.get("error") or "",
+        )
+
+    def _stop_instance(self) -> None:
+        subprocess.run(["singularity", "instance", "stop", self.name], env=self._env(), capture_output=True)
+        self._instance_started = False
+
+    def close(self, timeout: float = 60) -> None:
+        """Let the driver finish its current job, then stop it and the instance."""
+        with self._lock:
+            if self._driver is not None:
+                (self.queue_dir / "stop").touch()
+                try:
+                    self._driver.wait(timeout)
+                except subprocess.TimeoutExpired:
+                    self._driver.kill()
+                    self._driver.wait()
+                self._driver = None
+            if self._instance_started:
+                self._stop_instance()
+
+    def __enter__(self) -> "AF3InstanceRunner":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _read(path: Path, limit: int = 65536) -> str:
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - limit))
+            return f.read().decode(errors="replace")
+    except OSError:
+        return ""
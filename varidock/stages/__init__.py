@@ -1,12 +1,18 @@
 from .alphafold3.input_builder import AF3InputBuilder
 from .alphafold3.msa import AF3MSA
+from .alphafold3.msa_store import MSAStore
 from .alphafold3.merger import AF3MSAMerger, AF3MSAMergerConfig
 from .alphafold3.inference import AF3Inference
+from .alphafold3.batching import CompileLog, plan_inference_batches, run_inference_batches
 
 __all__ = [
     "AF3InputBuilder",
     "AF3MSA",
+    "MSAStore",
     "AF3MSAMerger",
     "AF3MSAMergerConfig",
     "AF3Inference",
+    "CompileLog",
+    "plan_inference_batches",
+    "run_inference_batches",
 ]
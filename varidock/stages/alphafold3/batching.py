@@ -0,0 +1,389 @@
+from __future__ import annotations
+
+import json
+import re
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Mapping, Optional, Sequence
+
+from varidock.io.json_spans import scan_spans
+from varidock.types import AF3InferenceOutput, AF3MergedInput
+
+# AF3's default --buckets: inputs are padded up to the next size, and each
+# size is a separate XLA compilation on every process that meets it.
+AF3_BUCKETS = (256, 512, 768, 1024, 1280, 1536, 2048, 2560, 3072, 3584, 4096, 4608, 5120)
+
+# Rough wall time of one compilation, used for estimates until a CompileLog
+# has measured the real figure on your GPUs.
+DEFAULT_COMPILE_SECONDS = 120.0
+
+# Heavy-atom counts (one token each) of common CCD ligands, ions and cofactors.
+CCD_HEAVY_ATOMS = {
+    "ATP": 31, "ADP": 27, "AMP": 23, "ANP": 31, "GTP": 32, "GDP": 28, "GNP": 32,
+    "NAD": 44, "NAP": 48, "NDP": 48, "FAD": 53, "FMN": 31, "SAM": 27, "SAH": 26,
+    "COA": 48, "ACO": 51, "HEM": 43, "HEC": 43, "PLP": 15, "TPP": 26, "GSH": 20,
+    "NAG": 14, "MAN": 12, "BMA": 12, "GLC": 12, "GAL": 12, "FUC": 11, "SIA": 21,
+    "SO4": 5, "PO4": 5, "GOL": 6, "EDO": 4, "ACT": 4, "PEG": 7, "HOH": 1,
+    "MG": 1, "ZN": 1, "CA": 1, "MN": 1, "FE": 1, "FE2": 1, "CU": 1, "NI": 1,
+    "CO": 1, "NA": 1, "K": 1, "CL": 1, "CD": 1,
+}
+
+_SMILES_ATOM = re.compile(r"\[([^\]]+)\]|Br|Cl|[BCNOPSFIbcnops]")
+_BRACKET_ELEMENT = re.compile(r"\d*([A-Z][a-z]?|[a-z][a-z]?)")
+_POLYMERS = ("protein", "rna", "dna")
+
+
+def smiles_heavy_atoms(smiles: str) -> int:
+    """Number of non-hydrogen atoms in a SMILES string."""
+    count = 0
+    for match in _SMILES_ATOM.finditer(smiles):
+        bracket = match.group(1)
+        if bracket is None:
+            count += 1
+            continue
+        element = _BRACKET_ELEMENT.match(bracket)
+        if element is not None and element.group(1) not in ("H", "D", "T"):
+            count += 1
+    return count
+
+
+def count_tokens(
+    json_path: Path,
+    ccd_heavy_atoms: Optional[Mapping[str, int]] = None,
+    unknown_ccd_atoms: int = 30,
+) -> int:
+    """Number of AF3 tokens in an input JSON: one per residue, one per ligand heavy atom.
+
+    Only the ``id``, ``sequence``, ``smiles`` and ``ccdCodes`` values are
+    read (via byte spans), so inputs with inlined MSAs cost no more to count
+    than ones that reference MSA files. Modified residues are counted as one
+    token, which AF3 expands per atom; that undercounts by a few tokens.
+
+    Args:
+        json_path (Path): AF3 input JSON.
+        ccd_heavy_atoms (Mapping[str, int] | None): Heavy-atom counts of CCD
+            codes, added to CCD_HEAVY_ATOMS.
+        unknown_ccd_atoms (int): Tokens assumed for a CCD code not in either table.
+
+    Returns:
+        int: Token count, with each entry multiplied by its number of copies (ids).
+
+    """
+    table = {**CCD_HEAVY_ATOMS, **(ccd_heavy_atoms or {})}
+    wanted = {"id", "sequence", "smiles", "ccdCodes"}
+    spans = scan_spans(
+        Path(json_path),
+        lambda p: len(p) == 4 and p[0] == "sequences" and p[3] in wanted,
+    )
+    entries: dict[tuple[int, str], dict[str, object]] = defaultdict(dict)
+    with open(json_path, "rb") as f:
+        for (_, index, kind, key), (start, end) in spans.items():
+            f.seek(start)
+            entries[(index, kind)][key] = json.loads(f.read(end - start))
+
+    tokens = 0
+    for (_, kind), entry in entries.items():
+        ids = entry.get("id", "A")
+        copies = len(ids) if isinstance(ids, list) else 1
+        if kind in _POLYMERS:
+            size = len(entry.get("sequence", ""))
+        elif kind == "ligand":
+            if "smiles" in entry:
+                size = smiles_heavy_atoms(entry["smiles"])
+            else:
+                size = sum(table.get(code.upper(), unknown_ccd_atoms) for code in entry.get("ccdCodes", []))
+        else:
+            continue
+        tokens += copies * size
+    return tokens
+
+
+def bucket_for(tokens: int, buckets: Sequence[int] = AF3_BUCKETS) -> int:
+    """The padded size AF3 compiles for ``tokens``: the smallest bucket that fits, else ``tokens`` itself."""
+    for bucket in sorted(buckets):
+        if tokens <= bucket:
+            return bucket
+    return tokens
+
+
+@dataclass(frozen=True)
+class InferenceJob:
+    """One merged input with its size.
+
+    Attributes:
+        input (AF3MergedInput): The merged input to run.
+        tokens (int): Its AF3 token count.
+        bucket (int): The padded size it compiles to.
+
+    """
+
+    input: AF3MergedInput
+    tokens: int
+    bucket: int
+
+
+@dataclass
+class InferenceBatchPlan:
+    """Jobs assigned to workers so each worker compiles as few buckets as possible.
+
+    Attributes:
+        workers (list[list[InferenceJob]]): Per worker, its jobs in run order
+            (ascending bucket, caller order within a bucket).
+        compiles_in_given_order (int): Compilations the caller's order would
+            have cost when dealt round-robin to the same workers, for comparison.
+
+    """
+
+    workers: list[list[InferenceJob]]
+    compiles_in_given_order: int = 0
+
+    def compiles(self) -> dict[int, int]:
+        """Bucket -> number of workers that compile it."""
+        counts: dict[int, int] = defaultdict(int)
+        for jobs in self.workers:
+            for bucket in {job.bucket for job in jobs}:
+                counts[bucket] += 1
+        return dict(sorted(counts.items()))
+
+    def estimated_compile_seconds(
+        self, compile_seconds: Callable[[int], float] = lambda bucket: DEFAULT_COMPILE_SECONDS
+    ) -> dict[int, float]:
+        """Bucket -> planned compile overhead, given the cost of one compilation of a bucket."""
+        return {bucket: n * compile_seconds(bucket) for bucket, n in self.compiles().items()}
+
+
+def plan_inference_batches(
+    inputs: Sequence[AF3MergedInput],
+    workers: int = 1,
+    buckets: Sequence[int] = AF3_BUCKETS,
+    tokens: Optional[Callable[[AF3MergedInput], int]] = None,
+) -> InferenceBatchPlan:
+    """Group merged inputs by AF3 padding bucket and deal whole buckets to workers.
+
+    Work is weighed as bucket**2 per job (the pair representation dominates).
+    Buckets are handed out largest first to the least-loaded worker; a bucket
+    is split across workers only when it alone is more than a worker's fair
+    share, so with ``workers`` GPUs each bucket is compiled on as few of them
+    as balance allows, instead of on every GPU that happens to meet it.
+
+    Args:
+        inputs (Sequence[AF3MergedInput]): Merged inputs, in the caller's order.
+        workers (int): Number of GPU workers (processes with their own compile cache).
+        buckets (Sequence[int]): AF3 --buckets in use.
+        tokens (Callable[[AF3MergedInput], int] | None): Token counter; defaults
+            to count_tokens on each input's JSON.
+
+    Returns:
+        InferenceBatchPlan: Per-worker job lists.
+
+    Raises:
+        ValueError: If workers < 1.
+
+    """
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    count = tokens or (lambda m: count_tokens(m.json_path))
+    jobs = []
+    for merged in inputs:
+        n = count(merged)
+        jobs.append(InferenceJob(input=merged, tokens=n, bucket=bucket_for(n, buckets)))
+
+    by_bucket: dict[int, list[InferenceJob]] = defaultdict(list)
+    for job in jobs:
+        by_bucket[job.bucket].append(job)
+
+    def cost(bucket: int, n: int = 1) -> float:
+        return float(bucket) ** 2 * n
+
+    share = sum(cost(job.bucket) for job in jobs) / workers
+    assigned: list[list[InferenceJob]] = [[] for _ in range(workers)]
+    load = [0.0] * workers
+    for bucket in sorted(by_bucket, key=lambda b: cost(b, len(by_bucket[b])), reverse=True):
+        remaining = by_bucket[bucket]
+        while remaining:
+            w = min(range(workers), key=lambda i: load[i])
+            if cost(bucket, len(remaining)) <= share:
+                take = len(remaining)  # fits in one share: keep it on one worker
+            else:
+                take = max(1, int((share - load[w]) // cost(bucket)))
+            assigned[w] += remaining[:take]
+            load[w] += cost(bucket, take)
+            remaining = remaining[take:]
+
+    order = {id(job): i for i, job in enumerate(jobs)}
+    for worker_jobs in assigned:
+        worker_jobs.sort(key=lambda job: (job.bucket, order[id(job)]))
+
+    given: list[set[int]] = [set() for _ in range(workers)]
+    for i, job in enumerate(jobs):
+        given[i % workers].add(job.bucket)
+    return InferenceBatchPlan(workers=assigned, compiles_in_given_order=sum(len(b) for b in given))
+
+
+@dataclass
+class CompileRecord:
+    """One timed inference job.
+
+    Attributes:
+        worker (int): Worker that ran it.
+        bucket (int): Padded size.
+        tokens (int): Token count.
+        name (str): Job name.
+        seconds (float): Wall time of the job.
+        first_in_bucket (bool): Whether it was the worker's first job in this
+            bucket, i.e. the one that paid for compilation.
+        ok (bool): False if the job raised.
+
+    """
+
+    worker: int
+    bucket: int
+    tokens: int
+    name: str
+    seconds: float
+    first_in_bucket: bool
+    ok: bool = True
+
+
+@dataclass
+class BucketCompileSummary:
+    """Estimated against observed compile overhead of one bucket.
+
+    Attributes:
+        bucket (int): Padded size.
+        jobs (int): Jobs run in this bucket.
+        compiles (int): Workers that compiled it (first-in-bucket jobs).
+        estimated_seconds (float | None): Planned overhead, if an estimate was given.
+        observed_seconds (float | None): Sum over compiling workers of the first
+            job's time minus the median of later jobs in the bucket; None until
+            some worker has run at least two jobs in it.
+        median_job_seconds (float | None): Median time of a job that did not compile.
+
+    """
+
+    bucket: int
+    jobs: int
+    compiles: int
+    estimated_seconds: Optional[float] = None
+    observed_seconds: Optional[float] = None
+    median_job_seconds: Optional[float] = None
+
+
+class CompileLog:
+    """Append-only JSONL log of inference job timings, for measuring compile overhead per bucket.
+
+    Attributes:
+        path (Path): The JSONL file.
+
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._seen: set[tuple[int, int]] = set()
+
+    def record(self, record: CompileRecord) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(asdict(record)) + "\n")
+
+    def timed(self, worker: int, job: InferenceJob, run: Callable[[], object]):
+        """Call ``run`` and record how long it took. Returns what ``run`` returns."""
+        with self._lock:
+            first = (worker, job.bucket) not in self._seen
+            self._seen.add((worker, job.bucket))
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = run()
+            ok = True
+            return result
+        finally:
+            self.record(
+                CompileRecord(
+                    worker=worker,
+                    bucket=job.bucket,
+                    tokens=job.tokens,
+                    name=job.input.name,
+                    seconds=time.perf_counter() - start,
+                    first_in_bucket=first,
+                    ok=ok,
+                )
+            )
+
+    def records(self) -> list[CompileRecord]:
+        if not self.path.exists():
+            return []
+        records = []
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    records.append(CompileRecord(**json.loads(line)))
+                except (ValueError, TypeError):
+                    continue
+        return records
+
+    def summary(self, estimated: Optional[Mapping[int, float]] = None) -> list[BucketCompileSummary]:
+        """Per bucket, the observed compile overhead next to ``estimated`` (e.g. plan.estimated_compile_seconds())."""
+        ok = [r for r in self.records() if r.ok]
+        summaries = []
+        for bucket in sorted({r.bucket for r in ok} | set(estimated or {})):
+            records = [r for r in ok if r.bucket == bucket]
+            steady = [r.seconds for r in records if not r.first_in_bucket]
+            median = statistics.median(steady) if steady else None
+            firsts = [r.seconds for r in records if r.first_in_bucket]
+            observed = sum(max(0.0, s - median) for s in firsts) if median is not None and firsts else None
+            summaries.append(
+                BucketCompileSummary(
+                    bucket=bucket,
+                    jobs=len(records),
+                    compiles=len(firsts),
+                    estimated_seconds=(estimated or {}).get(bucket),
+                    observed_seconds=observed,
+                    median_job_seconds=median,
+                )
+            )
+        return summaries
+
+
+def run_inference_batches(
+    plan: InferenceBatchPlan,
+    stages: Sequence,
+    log: Optional[CompileLog] = None,
+) -> list[list[AF3InferenceOutput]]:
+    """Run each worker's jobs in order on its own AF3Inference stage, workers in parallel.
+
+    Args:
+        plan (InferenceBatchPlan): From plan_inference_batches.
+        stages (Sequence[AF3Inference]): One stage per worker, e.g. each with a
+            LocalExecutor over its own AF3InstanceRunner pinned to one GPU.
+        log (CompileLog | None): Receives the time of every job.
+
+    Returns:
+        list[list[AF3InferenceOutput]]: Outputs per worker, in plan order.
+
+    Raises:
+        ValueError: If there are fewer stages than workers in the plan.
+
+    """
+    if len(stages) < len(plan.workers):
+        raise ValueError(f"{len(plan.workers)} workers planned but {len(stages)} stages given")
+
+    def work(worker: int) -> list[AF3InferenceOutput]:
+        stage = stages[worker]
+        outputs = []
+        for job in plan.workers[worker]:
+            if log is None:
+                outputs.append(stage.run(job.input))
+            else:
+                outputs.append(log.timed(worker, job, lambda: stage.run(job.input)))
+        return outputs
+
+    with ThreadPoolExecutor(max_workers=max(1, len(plan.workers))) as pool:
+        return list(pool.map(work, range(len(plan.workers))))
@@ -1,5 +1,6 @@
 from dataclasses import replace
 
+from varidock.execution.routing import RoutingExecutor
 from varidock.execution.slurm import SlurmExecutor
 from varidock.pipeline.stage import Stage
 from varidock.runners.af3 import AF3Config, plan_af3
@@ -24,7 +25,7 @@ class AF3Inference(Stage[AF3MergedInput, AF3InferenceOutput]):
         self,
         af3_config: AF3Config,
         jax_cache_dir: str,
-        executor: LocalExecutor | SlurmExecutor | None = None,
+        executor: LocalExecutor | SlurmExecutor | RoutingExecutor | None = None,
         write_only: bool = True,
         overwrite_input: bool = False,
     ):
@@ -1,8 +1,17 @@
+import hashlib
+import itertools
 import json
-from typing import Sequence
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Sequence
 from dataclasses import dataclass
 from pathlib import Path
 
+from varidock.io.json_spans import JSONPath, copy_span, scan_spans
+from varidock.structure import MSAData
+
 from varidock.types import (
     Ligand,
     AF3MSAOutput, 
@@ -17,11 +26,42 @@ class AF3MSAMergerConfig:
     Attributes:
         output_dir (Path): Directory to write merged JSON files.
         seed (int): Random seed for AF3 inference.
+        streaming (bool): Copy each monomer's sequence, modifications, MSAs and
+            templates into the merged file as raw byte spans instead of parsing
+            and re-serializing them, and write compact JSON. Memory stays
+            bounded by a small buffer however deep the MSAs are; the result
+            parses to the same object as the default path.
+        msa_dir (Path | None): If set, write each monomer's MSAs and template
+            mmCIFs once to ``msa_dir/<protein_id>-<stamp>/`` and reference them from the
+            merged JSON through ``unpairedMsaPath``, ``pairedMsaPath`` and
+            ``mmcifPath`` instead of inlining them, so a P x L screen stores
+            each MSA once rather than L times. Takes precedence over
+            ``streaming``. Inference must bind the same directory, via
+            AF3Config(msa_dir=..., container_msa_dir=...).
+        container_msa_dir (str): Where ``msa_dir`` is mounted inside the AF3
+            container; the paths in the merged JSON point there.
 
     """
 
     output_dir: Path
     seed: int = 42
+    streaming: bool = False
+    msa_dir: Path | None = None
+    container_msa_dir: str = "/root/af_msas"
+
+
+# Protein fields copied from each monomer, with the value used when a field is absent.
+_PROTEIN_FIELDS = {
+    "sequence": None,
+    "modifications": b"[]",
+    "unpairedMsa": b"null",
+    "pairedMsa": b"null",
+    "templates": b"null",
+}
+
+_COMPACT = (",", ":")
+
+_MANIFEST = "manifest.json"
 
 
 class AF3MSAMerger:
@@ -38,6 +78,8 @@ class AF3MSAMerger:
     """
 
     name = "af3_msa_merger"
+    input_types = {"msa_outputs": AF3MSAOutput, "ligands": Ligand}
+    output_type = AF3MergedInput
 
     def __init__(self, config: AF3MSAMergerConfig):
         self.config = config
@@ -71,62 +113,145 @@ class AF3MSAMerger:
 
         # Auto-generate name from protein IDs + ligand
         if name is None:
-            parts = [m.protein_id.lower() for m in msa_outputs]
-            if ligands is not None:
-                for ligand in ligands:
-                    if ligand.name:
-                        parts.append(ligand.name.lower())
-            name = "_".join(parts)
-
-        sequences = []
+            name = _default_name(msa_outputs, ligands)
+
         for msa in msa_outputs:
             if not msa.data_json_path.exists():
                 raise FileNotFoundError(f"MSA output not found: {msa.data_json_path}")
 
-            monomer_data = json.loads(msa.data_json_path.read_text())
-
-            # Find the protein entry in the monomer JSON
-            protein_entry = None
-            for seq in monomer_data["sequences"]:
-                if "protein" in seq:
-                    protein_entry = seq["protein"]
-                    break
-
-            if protein_entry is None:
-                raise ValueError(f"No protein entry found in {msa.data_json_path}")
-
-            sequences.append(
-                {
-                    "protein": {
-                        "id": [msa.chain_id],
-                        "sequence": protein_entry["sequence"],
-                        "modifications": protein_entry.get("modifications", []),
-                        "unpairedMsa": protein_entry.get("unpairedMsa"),
-                        "pairedMsa": protein_entry.get("pairedMsa"),
-                        "templates": protein_entry.get("templates"),
-                    }
-                }
-            )
-
-        if ligands is not None:
-            for ligand in ligands:
-                if ligand.smiles and ligand.ccd:
-                    raise ValueError(f"Ligand {ligand.name} cannot have both SMILES and CCD code.")
-                if ligand.af3_sequence_id is None:
-                    raise ValueError(f"Ligand {ligand.name} with SMILES or CCD must have an AF3 sequence ID.")
-
-        lig_entry: dict | None = None
-
-        if ligands is not None:
-            for ligand in ligands:
-                lig_entry = {"id": [ligand.af3_sequence_id]}
-                if ligand.smiles:
-                    lig_entry["smiles"] = ligand.smiles
-                elif ligand.ccd:
-                    lig_entry["ccdCodes"] = [ligand.ccd]
-                sequences.append({"ligand": lig_entry})
-
-        payload = {
+        streaming = self._streams() and not return_json_only
+        loaded = [self._load_monomer(msa, streaming) for msa in msa_outputs]
+        ligand_entries = _ligand_entries(ligands)
+
+        if return_json_only:
+            json_text = json.dumps(self._payload(name, msa_outputs, loaded, ligand_entries), indent=2) + "\n"
+            return AF3MergedInput(json_path=Path("."), name=json_text, output_dir=None)
+
+        out_path = self._prepare_output(name)
+        self._write_merged(out_path, name, msa_outputs, loaded, ligand_entries, streaming)
+
+        return AF3MergedInput(json_path=out_path, name=name, output_dir=None)
+
+    def merge_grid(
+        self,
+        msa_outputs: Sequence[AF3MSAOutput | Sequence[AF3MSAOutput]],
+        ligands: Sequence[Ligand | Sequence[Ligand]] | None = None,
+        pairing: str | Iterable[tuple[int, int]] = "product",
+        max_workers: int | None = None,
+        skip_unchanged: bool = True,
+    ) -> list[AF3MergedInput]:
+        """Merge many protein x ligand combinations, loading each monomer data JSON once.
+
+        ``run`` re-reads every monomer for every complex; for a screen of 40
+        proteins x 500 ligands that is 20,000 parses of the same 40 files.
+        Here each distinct monomer is loaded once (parsed, indexed or written
+        to ``msa_dir`` depending on the config) and the merged JSONs are
+        written from a thread pool.
+
+        Example:
+            >>> merger = AF3MSAMerger(AF3MSAMergerConfig(output_dir=out, msa_dir=out / "msas"))
+            >>> inputs = merger.merge_grid(monomers, ligands)  # len(monomers) * len(ligands) inputs
+
+        Args:
+            msa_outputs (Sequence[AF3MSAOutput | Sequence[AF3MSAOutput]]): Protein
+                side of each complex: a monomer, or a sequence of monomers for a multimer.
+            ligands (Sequence[Ligand | Sequence[Ligand]] | None): Ligand side of
+                each complex: a ligand or a sequence of ligands. None merges the
+                protein sides alone.
+            pairing (str | Iterable[tuple[int, int]]): 'product' for every protein
+                side with every ligand side, 'zip' for the i-th with the i-th, or
+                explicit (protein index, ligand index) pairs.
+            max_workers (int | None): Threads writing merged JSONs. Defaults to
+                the ThreadPoolExecutor default.
+            skip_unchanged (bool): Leave a merged JSON alone when its sources,
+                ligands and config are unchanged since it was written, so a
+                re-run with more ligands only writes the new combinations.
+
+        Returns:
+            list[AF3MergedInput]: One per combination, in pairing order, named
+                as ``run`` names them.
+
+        Raises:
+            ValueError: If pairing is unknown, 'zip' lengths differ, or a ligand is invalid.
+            IndexError: If an explicit pair is out of range.
+            FileNotFoundError: If any monomer data JSON is missing.
+
+        """
+        proteins = [(m,) if isinstance(m, AF3MSAOutput) else tuple(m) for m in msa_outputs]
+        if any(not p for p in proteins):
+            raise ValueError("At least one MSA output is required.")
+        if ligands is None:
+            combos = [(p, ()) for p in proteins]
+        else:
+            ligand_sets = [(lig,) if isinstance(lig, Ligand) else tuple(lig) for lig in ligands]
+            combos = [(proteins[i], ligand_sets[j]) for i, j in _pair_indices(len(proteins), len(ligand_sets), pairing)]
+
+        monomers = {_monomer_key(m): m for p in proteins for m in p}
+        for msa in monomers.values():
+            if not msa.data_json_path.exists():
+                raise FileNotFoundError(f"MSA output not found: {msa.data_json_path}")
+
+        streaming = self._streams()
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            loaded = dict(zip(monomers, pool.map(lambda m: self._load_monomer(m, streaming), monomers.values())))
+            stamps = {key: _source_stamp(m.data_json_path) for key, m in monomers.items()}
+
+            def write(combo: tuple[tuple[AF3MSAOutput, ...], tuple[Ligand, ...]]) -> AF3MergedInput:
+                msas, ligs = combo
+                name = _default_name(msas, ligs)
+                ligand_entries = _ligand_entries(ligs)
+                out_path = self._prepare_output(name)
+                fingerprint = self._fingerprint(name, msas, [stamps[_monomer_key(m)] for m in msas], ligand_entries)
+                marker = out_path.with_name(f".{out_path.name}.fingerprint")
+                if skip_unchanged and out_path.exists() and _read_text(marker) == fingerprint:
+                    return AF3MergedInput(json_path=out_path, name=name, output_dir=None)
+                parts = [loaded[_monomer_key(m)] for m in msas]
+                self._write_merged(out_path, name, msas, parts, ligand_entries, streaming)
+                _atomic_write(marker, fingerprint)
+                return AF3MergedInput(json_path=out_path, name=name, output_dir=None)
+
+            return list(pool.map(write, combos))
+
+    def _streams(self) -> bool:
+        return self.config.streaming and self.config.msa_dir is None
+
+    def _load_monomer(self, msa: AF3MSAOutput, streaming: bool) -> dict:
+        """What merging needs from one monomer: byte spans when streaming, else its protein fields."""
+        if streaming:
+            return _protein_spans(msa.data_json_path)
+        if self.config.msa_dir is not None:
+            return self._protein_with_msa_paths(msa)
+
+        monomer_data = json.loads(msa.data_json_path.read_text())
+
+        # Find the protein entry in the monomer JSON
+        protein_entry = None
+        for seq in monomer_data["sequences"]:
+            if "protein" in seq:
+                protein_entry = seq["protein"]
+                break
+
+        if protein_entry is None:
+            raise ValueError(f"No protein entry found in {msa.data_json_path}")
+
+        return {
+            "sequence": protein_entry["sequence"],
+            "modifications": protein_entry.get("modifications", []),
+            "unpairedMsa": protein_entry.get("unpairedMsa"),
+            "pairedMsa": protein_entry.get("pairedMsa"),
+            "templates": protein_entry.get("templates"),
+        }
+
+    def _payload(
+        self,
+        name: str,
+        msa_outputs: Sequence[AF3MSAOutput],
+        entries: Sequence[dict],
+        ligand_entries: list[dict],
+    ) -> dict:
+        sequences = [{"protein": {"id": [msa.chain_id], **entry}} for msa, entry in zip(msa_outputs, entries)]
+        sequences += ({"ligand": entry} for entry in ligand_entries)
+        return {
             "dialect": "alphafold3",
             "version": 4,
             "name": name,
@@ -136,15 +261,266 @@ class AF3MSAMerger:
             "userCCD": None,
         }
 
-        if return_json_only:
-            json_text = json.dumps(payload, indent=2) + "\n"
-            return AF3MergedInput(json_path=Path("."), name=json_text, output_dir=None)
-        
-    
+    def _write_merged(
+        self,
+        out_path: Path,
+        name: str,
+        msa_outputs: Sequence[AF3MSAOutput],
+        loaded: Sequence[dict],
+        ligand_entries: list[dict],
+        streaming: bool,
+    ) -> None:
+        if streaming:
+            self._write_streaming(out_path, name, msa_outputs, loaded, ligand_entries)
+        else:
+            payload = self._payload(name, msa_outputs, loaded, ligand_entries)
+            _atomic_write(out_path, json.dumps(payload, indent=2) + "\n")
+
+    def _fingerprint(
+        self,
+        name: str,
+        msa_outputs: Sequence[AF3MSAOutput],
+        stamps: Sequence[dict],
+        ligand_entries: list[dict],
+    ) -> str:
+        """Hash of everything a merged JSON is built from, for skip_unchanged."""
+        inputs = {
+            "name": name,
+            "seed": self.config.seed,
+            "layout": [self._streams(), str(self.config.msa_dir), self.config.container_msa_dir],
+            "proteins": [[m.protein_id, m.chain_id, stamp] for m, stamp in zip(msa_outputs, stamps)],
+            "ligands": ligand_entries,
+        }
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+    def _prepare_output(self, name: str) -> Path:
         out_path = self.config.output_dir / name / "af_input" / f"{name}.json"
         out_path.parent.mkdir(parents=True, exist_ok=True)
         af_out_path = self.config.output_dir / name / "af_output"
         af_out_path.mkdir(parents=True, exist_ok=True)
-        out_path.write_text(json.dumps(payload, indent=2) + "\n")
+        return out_path
 
-        return AF3MergedInput(json_path=out_path, name=name, output_dir=None)
+    def _protein_with_msa_paths(self, msa: AF3MSAOutput) -> dict:
+        """A protein entry whose MSAs and templates point at files under ``msa_dir``.
+
+        The files go to ``msa_dir/<protein_id>-<stamp>/``, where the stamp
+        hashes the source data JSON's path, size and mtime, so monomers that
+        share a protein_id never overwrite each other and a new MSA run gets
+        a fresh directory. Each directory is written once, on first use.
+        """
+        source = msa.data_json_path
+        fields = _protein_spans(source)
+        stamp = _source_stamp(source)
+        digest = hashlib.sha256(json.dumps(stamp, sort_keys=True).encode()).hexdigest()
+        dir_name = f"{msa.protein_id}-{digest[:12]}"
+        manifest = _ensure_msa_files(source, fields, self.config.msa_dir / dir_name, stamp)
+
+        container_dir = f"{self.config.container_msa_dir}/{dir_name}"
+        entry = {
+            "sequence": _load_span(source, fields["sequence"]),
+            "modifications": _load_span(source, fields["modifications"]) if "modifications" in fields else [],
+        }
+        for key in ("unpairedMsa", "pairedMsa"):
+            if manifest[key] is None:
+                entry[key] = None
+            else:
+                entry[f"{key}Path"] = f"{container_dir}/{manifest[key]}"
+        templates = manifest["templates"]
+        if templates is not None:
+            templates = [
+                {**t, "mmcifPath": f"{container_dir}/{t['mmcifPath']}"} if "mmcifPath" in t else t for t in templates
+            ]
+        entry["templates"] = templates
+        return entry
+
+    def _write_streaming(
+        self,
+        out_path: Path,
+        name: str,
+        msa_outputs: Sequence[AF3MSAOutput],
+        spans: list[dict[str, tuple[int, int]]],
+        ligand_entries: list[dict],
+    ) -> None:
+        tmp = out_path.with_name(f".{out_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as out:
+            header = {"dialect": "alphafold3", "version": 4, "name": name}
+            out.write(json.dumps(header, separators=_COMPACT)[:-1].encode())
+            out.write(b',"sequences":[')
+            for index, (msa, fields) in enumerate(zip(msa_outputs, spans)):
+                if index:
+                    out.write(b",")
+                out.write(b'{"protein":{"id":' + json.dumps([msa.chain_id]).encode())
+                with open(msa.data_json_path, "rb") as src:
+                    for field, default in _PROTEIN_FIELDS.items():
+                        out.write(b',"' + field.encode() + b'":')
+                        if field in fields:
+                            copy_span(src, *fields[field], out, compact=True)
+                        else:
+                            out.write(default)
+                out.write(b"}}")
+            for entry in ligand_entries:
+                out.write(b"," + json.dumps({"ligand": entry}, separators=_COMPACT).encode())
+            footer = {"modelSeeds": [self.config.seed], "bondedAtomPairs": None, "userCCD": None}
+            out.write(b"]," + json.dumps(footer, separators=_COMPACT)[1:].encode() + b"\n")
+        os.replace(tmp, out_path)
+
+
+def _default_name(msa_outputs: Sequence[AF3MSAOutput], ligands: Sequence[Ligand] | None) -> str:
+    """Like "protein1_protein2_ligand1_ligand2"."""
+    parts = [m.protein_id.lower() for m in msa_outputs]
+    if ligands is not None:
+        for ligand in ligands:
+            if ligand.name:
+                parts.append(ligand.name.lower())
+    return "_".join(parts)
+
+
+def _pair_indices(n_proteins: int, n_ligands: int, pairing: str | Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+    if pairing == "product":
+        return list(itertools.product(range(n_proteins), range(n_ligands)))
+    if pairing == "zip":
+        if n_proteins != n_ligands:
+            raise ValueError(f"pairing='zip' needs as many ligands as proteins, got {n_ligands} and {n_proteins}")
+        return [(i, i) for i in range(n_proteins)]
+    if isinstance(pairing, str):
+        raise ValueError(f"pairing must be 'product', 'zip' or (protein, ligand) index pairs, got {pairing!r}")
+    pairs = [(int(i), int(j)) for i, j in pairing]
+    for i, j in pairs:
+        if not (0 <= i < n_proteins and 0 <= j < n_ligands):
+            raise IndexError(f"Pair {(i, j)} out of range for {n_proteins} proteins and {n_ligands} ligands")
+    return pairs
+
+
+def _monomer_key(msa: AF3MSAOutput) -> tuple[Path, str]:
+    return (msa.data_json_path, msa.protein_id)
+
+
+def _source_stamp(path: Path) -> dict:
+    stat = path.stat()
+    return {"source": str(path.resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _read_text(path: Path) -> str | None:
+    try:
+        return path.read_text()
+    except OSError:
+        return None
+
+
+def _ligand_entries(ligands: Sequence[Ligand] | None) -> list[dict]:
+    """Validate ligands and build their AF3 ``ligand`` entries."""
+    if ligands is None:
+        return []
+    for ligand in ligands:
+        if ligand.smiles and ligand.ccd:
+            raise ValueError(f"Ligand {ligand.name} cannot have both SMILES and CCD code.")
+        if ligand.af3_sequence_id is None:
+            raise ValueError(f"Ligand {ligand.name} with SMILES or CCD must have an AF3 sequence ID.")
+
+    entries = []
+    for ligand in ligands:
+        lig_entry = {"id": [ligand.af3_sequence_id]}
+        if ligand.smiles:
+            lig_entry["smiles"] = ligand.smiles
+        elif ligand.ccd:
+            lig_entry["ccdCodes"] = [ligand.ccd]
+        entries.append(lig_entry)
+    return entries
+
+
+def _protein_spans(data_json: Path) -> dict[str, tuple[int, int]]:
+    """Byte spans of the first protein entry's copied fields in a monomer data JSON."""
+
+    def want(path: JSONPath) -> bool:
+        return (
+            3 <= len(path) <= 4
+            and path[0] == "sequences"
+            and path[2] == "protein"
+            and (len(path) == 3 or path[3] in _PROTEIN_FIELDS)
+        )
+
+    spans = scan_spans(data_json, want)
+    entries = sorted(p[1] for p in spans if len(p) == 3)
+    if not entries:
+        raise ValueError(f"No protein entry found in {data_json}")
+    first = entries[0]
+    fields = {p[3]: span for p, span in spans.items() if len(p) == 4 and p[1] == first}
+    if "sequence" not in fields:
+        raise KeyError("sequence")
+    return fields
+
+
+def _load_span(path: Path, span: tuple[int, int]):
+    """Decode one JSON value stored at ``span`` of ``path``."""
+    start, end = span
+    with open(path, "rb") as f:
+        f.seek(start)
+        return json.loads(f.read(end - start))
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+def _ensure_msa_files(source: Path, fields: dict[str, tuple[int, int]], host_dir: Path, stamp: dict) -> dict:
+    """Return the manifest of ``host_dir``, writing the directory first if it does not exist yet.
+
+    The files are written into a private temporary directory that is then
+    renamed into place, so concurrent merges (e.g. merge_grid threads) never
+    see a half-written directory; when two race, the loser drops its copy.
+    """
+    try:
+        return json.loads((host_dir / _MANIFEST).read_text())
+    except (OSError, ValueError):
+        pass
+
+    host_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = host_dir.with_name(f".{host_dir.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    try:
+        manifest = _write_msa_files(source, fields, tmp_dir)
+        manifest["stamp"] = stamp
+        (tmp_dir / _MANIFEST).write_text(json.dumps(manifest, indent=1) + "\n")
+        os.rename(tmp_dir, host_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not (host_dir / _MANIFEST).exists():
+            raise
+        # Another writer published the same files first.
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return manifest
+
+
+def _write_msa_files(source: Path, fields: dict[str, tuple[int, int]], host_dir: Path) -> dict:
+    """Write a monomer's MSAs as .a3m and its template mmCIFs as .cif files under ``host_dir``.
+
+    Returns the manifest: the file name written for each MSA (None when the
+    monomer has none), and the template entries with ``mmcif`` replaced by a
+    relative ``mmcifPath``.
+    """
+    host_dir.mkdir(parents=True)
+    msa = MSAData(
+        paired=_load_span(source, fields["pairedMsa"]) if "pairedMsa" in fields else None,
+        unpaired=_load_span(source, fields["unpairedMsa"]) if "unpairedMsa" in fields else None,
+    )
+    manifest = {"unpairedMsa": None, "pairedMsa": None}
+    if msa.has_unpaired():
+        msa.write_unpaired_a3m(host_dir / "unpaired.a3m")
+        manifest["unpairedMsa"] = "unpaired.a3m"
+    if msa.has_paired():
+        msa.write_paired_a3m(host_dir / "paired.a3m")
+        manifest["pairedMsa"] = "paired.a3m"
+
+    templates = _load_span(source, fields["templates"]) if "templates" in fields else None
+    if templates is not None:
+        for i, template in enumerate(templates):
+            if "mmcif" in template:
+                file_name = f"template_{i}.cif"
+                (host_dir / file_name).write_text(template.pop("mmcif"))
+                template["mmcifPath"] = file_name
+    manifest["templates"] = templates
+    return manifest
@@ -1,8 +1,11 @@
+import json
 from dataclasses import replace
 
+from varidock.execution.routing import RoutingExecutor
 from varidock.execution.slurm import SlurmExecutor
 from varidock.pipeline.stage import Stage
 from varidock.runners.af3 import AF3Config, plan_af3
+from varidock.stages.alphafold3.msa_store import MSAStore
 from varidock.execution import LocalExecutor
 from varidock.types import AF3MSAInput, AF3MSAOutput
 
@@ -16,6 +19,9 @@ class AF3MSA(Stage[AF3MSAInput, AF3MSAOutput]):
     Attributes:
         af3_config (AF3Config): Singularity/container configuration for AF3.
         write_only (bool): If True, write files but don't execute (dry run).
+        msa_store (MSAStore | None): If set, a stored result for the same
+            sequence, databases and search parameters is linked into place
+            instead of running the search, and new results are added to it.
 
     """
 
@@ -26,12 +32,14 @@ class AF3MSA(Stage[AF3MSAInput, AF3MSAOutput]):
     def __init__(
         self,
         af3_config: AF3Config,
-        executor: LocalExecutor | SlurmExecutor | None = None,
+        executor: LocalExecutor | SlurmExecutor | RoutingExecutor | None = None,
         write_only: bool = True,
         overwrite_input: bool = False,
+        msa_store: MSAStore | None = None,
     ):
         self.executor = executor or LocalExecutor()
-        
+        self.msa_store = msa_store
+
         if "--norun_inference" not in af3_config.script_args:
             af3_config = replace(
                 af3_config,
@@ -59,15 +67,6 @@ class AF3MSA(Stage[AF3MSAInput, AF3MSAOutput]):
         """
         input_json = input.json_path.read_text()
 
-        plan = plan_af3(
-            cfg=self.af3_config,
-            name=input.protein_id,
-            input_json=input_json,
-            output_dir=input.output_dir.resolve(),  # ensure absolute path
-        )
-
-        self.executor.execute(plan, write_only=self.write_only,overwrite_inputs=self.overwrite_input)
-
         data_json = (
             input.output_dir.resolve()
             / "af_output"
@@ -75,6 +74,32 @@ class AF3MSA(Stage[AF3MSAInput, AF3MSAOutput]):
             / f"{input.protein_id}_data.json"
         )
 
+        store_key = sequence = None
+        reused = False
+        if self.msa_store is not None:
+            sequence = _protein_sequence(input_json)
+            if sequence is not None:
+                store_key = self.msa_store.key(sequence, self.af3_config)
+                if not data_json.exists():
+                    reused = self.msa_store.fetch(
+                        store_key, data_json, name=input.protein_id, chain_id=input.chain_id
+                    )
+
+        if not reused:
+            plan = plan_af3(
+                cfg=self.af3_config,
+                name=input.protein_id,
+                input_json=input_json,
+                output_dir=input.output_dir.resolve(),  # ensure absolute path
+            )
+
+            self.executor.execute(plan, write_only=self.write_only,overwrite_inputs=self.overwrite_input)
+
+        # With a SLURM executor the output appears later; the next run() over
+        # the same input adds it to the store.
+        if store_key is not None and data_json.exists():
+            self.msa_store.put(store_key, data_json, sequence, {"protein_id": input.protein_id})
+
         if not self.write_only and not data_json.exists():
             raise FileNotFoundError(f"AF3 MSA output not found: {data_json}")
 
@@ -83,3 +108,11 @@ class AF3MSA(Stage[AF3MSAInput, AF3MSAOutput]):
             protein_id=input.protein_id,
             chain_id=input.chain_id,
         )
+
+
+def _protein_sequence(input_json: str) -> str | None:
+    """Sequence of the (single) protein chain in an AF3 input JSON."""
+    for entry in json.loads(input_json).get("sequences", []):
+        if "protein" in entry:
+            return entry["protein"]["sequence"]
+    return None
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Optional, Sequence
+
+from varidock.io.json_spans import scan_spans, splice_spans
+from varidock.runners.af3 import AF3Config
+
+# Flags that change where or how AF3 runs, not what the data pipeline finds.
+_NON_SEARCH_ARGS = ("--norun_inference", "--run_inference", "--jax_compilation_cache_dir", "--output_dir", "--json_path")
+
+_LINK_MODES = ("hardlink", "symlink", "copy")
+
+
+def normalize_sequence(sequence: str) -> str:
+    """Uppercase and strip whitespace, so the same chain always hashes the same."""
+    return "".join(sequence.split()).upper()
+
+
+def search_params(af3_config: AF3Config) -> list[str]:
+    """The script args of ``af3_config`` that can change the MSA/template search result."""
+    return sorted(a for a in af3_config.script_args if not a.startswith(_NON_SEARCH_ARGS))
+
+
+class MSAStore:
+    """Global store of AF3 data-pipeline outputs keyed by sequence, not by name.
+
+    The key hashes the normalized sequence, the database version and the
+    search parameters, so the same chain under another protein_id, species
+    or screen reuses the stored ``_data.json`` instead of repeating a 30–90
+    CPU-minute jackhmmer/nhmmer search. Entries live under
+    ``root/<key[:2]>/<key>/`` with the data JSON and a ``meta.json``; they are
+    published by renaming a finished temporary directory, so readers never
+    see a partial entry and concurrent writers of the same key are harmless.
+    A stored JSON still carries the ``name`` and chain ``id`` of the job that
+    produced it; ``fetch`` can rewrite both for the job reusing it.
+
+    Example:
+        >>> store = MSAStore.from_config(db_version="af3-2024-11")
+        >>> msa = AF3MSA(af3_config, executor, write_only=False, msa_store=store)
+
+    Attributes:
+        root (Path): Store directory, shared by every screen.
+        db_version (str | None): Label of the genetic databases. Defaults to
+            the resolved ``db_dir`` of the AF3Config being keyed.
+        link (str): How hits are placed at the destination: 'hardlink'
+            (falling back to a copy across filesystems), 'symlink' or 'copy'.
+
+    """
+
+    DATA_NAME = "data.json"
+    META_NAME = "meta.json"
+
+    def __init__(self, root: Path, db_version: Optional[str] = None, link: str = "hardlink"):
+        if link not in _LINK_MODES:
+            raise ValueError(f"link must be one of {_LINK_MODES}, got {link!r}")
+        self.root = Path(root)
+        self.db_version = db_version
+        self.link = link
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, **overrides) -> "MSAStore":
+        """Create an MSAStore at ``[af3] msa_store`` (default: ``<cache dir>/msa``) of the VariDock config."""
+        from varidock.config import VaridockConfig
+
+        cfg = VaridockConfig.load()
+        return cls(root=overrides.pop("root", cfg.af3.msa_store or cfg.cache.dir / "msa"), **overrides)
+
+    def key(self, sequence: str, af3_config: AF3Config) -> str:
+        payload = {
+            "sequence": normalize_sequence(sequence),
+            "db_version": self.db_version or str(Path(af3_config.db_dir).resolve()),
+            "params": search_params(af3_config),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """The stored data JSON for ``key``, or None."""
+        path = self._entry(key) / self.DATA_NAME
+        return path if path.is_file() else None
+
+    def fetch(
+        self,
+        key: str,
+        dest: Path,
+        name: Optional[str] = None,
+        chain_id: Optional[str] = None,
+    ) -> bool:
+        """Place the stored data JSON for ``key`` at ``dest``. Returns False on a miss.
+
+        Args:
+            key (str): Store key.
+            dest (Path): Where the data JSON goes.
+            name (str | None): Job name to write into the JSON's ``name``.
+            chain_id (str | None): Chain ID to write into the ``id`` of its
+                protein entry (kept as a list if it was one). Only single-protein
+                JSONs are relabelled.
+
+        A hit whose name and chain ID already match is linked per ``link``;
+        one that needs relabelling is written as a copy with only those
+        values replaced, streamed so the MSAs are never decoded.
+        """
+        src = self.lookup(key)
+        if src is None:
+            self.misses += 1
+            return False
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f".{dest.name}.{uuid.uuid4().hex}.tmp")
+        replacements = _relabel(src, name, chain_id) if name is not None or chain_id is not None else {}
+        try:
+            if replacements:
+                with open(tmp, "wb") as out:
+                    splice_spans(src, out, replacements)
+            elif self.link == "symlink":
+                tmp.symlink_to(src.resolve())
+            elif self.link == "hardlink":
+                try:
+                    os.link(src, tmp)
+                except OSError:
+                    shutil.copyfile(src, tmp)
+            else:
+                shutil.copyfile(src, tmp)
+            os.replace(tmp, dest)
+        finally:
+            tmp.unlink(missing_ok=True)
+        self.hits += 1
+        return True
+
+    def put(self, key: str, data_json: Path, sequence: str, extra: Optional[dict] = None) -> Path:
+        """Publish ``data_json`` under ``key`` atomically. A no-op if the key is already stored."""
+        entry = self._entry(key)
+        if (entry / self.DATA_NAME).is_file():
+            return entry / self.DATA_NAME
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = entry.parent / f".{key}.{uuid.uuid4().hex}.tmp"
+        tmp.mkdir()
+        try:
+            # Copy rather than link the run's own output, and make the stored
+            # file read-only: hits are hard links to it, and a tool rewriting
+            # one of them in place must not corrupt every other screen's copy.
+            shutil.copyfile(data_json, tmp / self.DATA_NAME)
+            (tmp / self.DATA_NAME).chmod(0o444)
+            meta = {"sequence": normalize_sequence(sequence), "created": time.time(), **(extra or {})}
+            (tmp / self.META_NAME).write_text(json.dumps(meta, indent=1) + "\n")
+            try:
+                os.rename(tmp, entry)
+            except OSError:
+                # Another process published the same key first; keep theirs.
+                if not (entry / self.DATA_NAME).is_file():
+                    raise
+        finally:
+            if tmp.exists():
+                shutil.rmtree(tmp, ignore_errors=True)
+        return entry / self.DATA_NAME
+
+    def keys(self) -> Sequence[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.glob("??/*") if not p.name.startswith("."))
+
+
+def _relabel(data_json: Path, name: Optional[str], chain_id: Optional[str]) -> dict[tuple[int, int], bytes]:
+    """Spans of ``data_json`` whose name or protein chain ID differ from the requested ones, with the new values."""
+    spans = scan_spans(
+        data_json,
+        lambda p: p == ("name",) or (len(p) == 4 and p[0] == "sequences" and p[2] == "protein" and p[3] == "id"),
+    )
+    ids = [span for path, span in spans.items() if path != ("name",)]
+    replacements = {}
+    with open(data_json, "rb") as f:
+
+        def value(span: tuple[int, int]):
+            f.seek(span[0])
+            return json.loads(f.read(span[1] - span[0]))
+
+        if name is not None and ("name",) in spans and value(spans[("name",)]) != name:
+            replacements[spans[("name",)]] = json.dumps(name).encode()
+        if chain_id is not None and len(ids) == 1:
+            current = value(ids[0])
+            wanted = [chain_id] if isinstance(current, list) else chain_id
+            if current != wanted:
+                replacements[ids[0]] = json.dumps(wanted).encode()
+    return replacements
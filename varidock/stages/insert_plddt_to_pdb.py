@@ -3,7 +3,7 @@ import json
 from dataclasses import dataclass
 from pathlib import Path
 
-from varidock.pipeline.types import PDB
+from varidock.types import PDB
 from varidock.pipeline.stage import Stage
 
 
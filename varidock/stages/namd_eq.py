@@ -2,10 +2,10 @@
 from dataclasses import dataclass
 import subprocess
 
-from varidock.pipeline.types import NAMDSimulationDir, NAMDCheckpoint
+from varidock.types import NAMDSimulationDir, NAMDCheckpoint
 from varidock.pipeline.stage import Stage
-from varidock.execution.utils import run_with_interrupt
-from varidock.execution.slurm import _sbatch
+from varidock.utils import run_with_interrupt
+from varidock.utils.slurm import _sbatch
 
 @dataclass
 class NAMDEqConfig:
@@ -2,10 +2,10 @@
 from dataclasses import dataclass
 import subprocess
 
-from varidock.pipeline.types import NAMDCheckpoint, Trajectory
+from varidock.types import PDB, PSF, NAMDCheckpoint, Trajectory
 from varidock.pipeline.stage import Stage
-from varidock.execution.utils import run_with_interrupt
-from varidock.execution.slurm import _sbatch
+from varidock.utils import run_with_interrupt
+from varidock.utils.slurm import _sbatch
 
 @dataclass
 class NAMDProductionConfig:
@@ -42,9 +42,11 @@ class NAMDProduction(Stage[NAMDCheckpoint, Trajectory]):
 
         coor_files = sorted(input.path.glob("run[0-9][0-9][0-9].coor"))
         return Trajectory(
-            pdb=input.path / "system.pdb",
-            psf=input.path / "system.psf", 
-            coor_files=coor_files)
+            pdb=PDB(path=input.path / "system.pdb"),
+            psf=PSF(path=input.path / "system.psf"),
+            coor_files=coor_files,
+            source_checkpoint=input,
+        )
 
     def submit(
         self, input: NAMDCheckpoint, depends_on: int | None = None
@@ -53,7 +55,13 @@ class NAMDProduction(Stage[NAMDCheckpoint, Trajectory]):
         dep = depends_on if depends_on is not None else input.job_id
         job_id = _sbatch(input.path / "run.sh", dep)
 
-        return Trajectory(psf=input.path / "system.psf", coor_files=[], job_id=job_id)
+        return Trajectory(
+            pdb=PDB(path=input.path / "system.pdb"),
+            psf=PSF(path=input.path / "system.psf"),
+            coor_files=[],
+            source_checkpoint=input,
+            job_id=job_id,
+        )
 
     def run(self, input: NAMDCheckpoint) -> Trajectory:
         return self.run_local(input)
@@ -1,29 +1,50 @@
+from collections import deque
 from dataclasses import dataclass
 from pathlib import Path
 import subprocess
+from typing import Iterator, Optional
 
 from varidock.types import Trajectory, ConformationSet, PDB
 from varidock.pipeline.stage import Stage
 from varidock.utils import run_with_interrupt
 
+# Printed by the Tcl script after each frame is written, so stream() knows it is complete.
+FRAME_MARKER = "VARIDOCK_FRAME_WRITTEN"
+
+
 @dataclass
 class VMDFrameExtractionConfig:
+    """Settings for VMDFrameExtraction.
+
+    Attributes:
+        output_dir (Path): Where protein.psf and the frame PDBs are written.
+        prefetch_frames (int): In stream(), how many frames VMD may write
+            ahead of the consumer.
+        keep_frames (int | None): In stream(), how many frames already handed
+            to the consumer stay on disk; older ones are deleted. None keeps
+            every frame.
+
+    """
+
     output_dir: Path
+    prefetch_frames: int = 1
+    keep_frames: Optional[int] = None
 
 class VMDFrameExtraction(Stage[Trajectory, ConformationSet]):
     name = "vmd_frame_extraction"
     input_type = Trajectory
     output_type = ConformationSet
+    item_type = PDB
 
     def __init__(self, config: VMDFrameExtractionConfig):
         self.config = config
 
-    def run(self, input: Trajectory) -> ConformationSet:
+    def _write_script(self, input: Trajectory, gated: bool = False) -> Path:
         # 1. Load PSF
         # 2. Load each .coor file as a frame
         # 3. Select protein atoms
-        # 4. Write each frame as PDB
-        # 5. Return ConformationSet with list of PDBs
+        # 4. Write each frame as PDB, announcing it on stdout
+        #    (gated: only after stream() grants it with a line on stdin; EOF stops)
         self.config.output_dir = self.config.output_dir.resolve()
         self.config.output_dir.mkdir(parents=True, exist_ok=True)
 
@@ -44,8 +65,11 @@ class VMDFrameExtraction(Stage[Trajectory, ConformationSet]):
 
         set numframes [molinfo top get numframes]
         for {{set i 0}} {{$i < $numframes}} {{incr i}} {{
+            {"if {[gets stdin grant] < 0} break" if gated else ""}
             $prot frame $i
             $prot writepdb {self.config.output_dir}/protein_conf$i.pdb
+            puts "{FRAME_MARKER} $i"
+            flush stdout
         }}
         $prot delete
         mol delete $molid
@@ -55,6 +79,10 @@ class VMDFrameExtraction(Stage[Trajectory, ConformationSet]):
         script_path = self.config.output_dir / "frame_extraction.tcl"
         script_path.parent.mkdir(parents=True, exist_ok=True)
         script_path.write_text(tcl)
+        return script_path
+
+    def run(self, input: Trajectory) -> ConformationSet:
+        script_path = self._write_script(input)
 
         with open(self.config.output_dir / "vmd_frame_extraction.log", "w") as f:
             run_with_interrupt(
@@ -69,8 +97,88 @@ class VMDFrameExtraction(Stage[Trajectory, ConformationSet]):
             psf=self.config.output_dir / "protein.psf",
             pdbs=[PDB(path=p) for p in pdb_files],
         )
-    
 
+    def stream(self, input: Trajectory) -> Iterator[PDB]:
+        """Yield each extracted frame as soon as VMD has written it.
+
+        VMD prints a marker line after every frame; the PDB is yielded when the
+        marker is seen, so downstream stages can start on frame 0 while later
+        frames are still being written. VMD writes a frame only when granted
+        one over its stdin, and grants are sent as the consumer takes frames,
+        so VMD never gets more than ``prefetch_frames`` frames ahead: a slow
+        consumer (e.g. a full StreamingPipeline queue) stops VMD itself, not
+        just its stdout pipe. With ``keep_frames`` set, frame PDBs the
+        consumer took more than ``keep_frames`` frames ago are deleted, so at
+        most ``keep_frames + prefetch_frames`` frame PDBs (plus protein.psf)
+        are on disk at once; keep_frames must cover every frame downstream may
+        still be reading, e.g. the next stage's queue size plus one in a
+        StreamingPipeline. Without it every frame is kept, as with run().
+        The VMD output is still logged to vmd_frame_extraction.log.
+
+        Args:
+            input (Trajectory): Trajectory with PSF, reference PDB and .coor files.
+
+        Yields:
+            PDB: One protein-only PDB per frame, in frame order.
+
+        Raises:
+            ValueError: If prefetch_frames is below 1 or keep_frames is negative.
+            subprocess.CalledProcessError: If VMD exits with a non-zero status.
+
+        """
+        prefetch, keep = self.config.prefetch_frames, self.config.keep_frames
+        if prefetch < 1 or (keep is not None and keep < 0):
+            raise ValueError(f"Need prefetch_frames >= 1 and keep_frames >= 0, got {prefetch} and {keep}")
+        script_path = self._write_script(input, gated=True)
+        argv = ["vmd", "-dispdev", "none", "-eofexit", "-e", str(script_path)]
+
+        with open(self.config.output_dir / "vmd_frame_extraction.log", "w") as log:
+            process = subprocess.Popen(
+                argv,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                cwd=self.config.output_dir,
+            )
+            assert process.stdin is not None and process.stdout is not None
 
+            def grant(frames: int) -> None:
+                try:
+                    process.stdin.write("\n" * frames)
+                    process.stdin.flush()
+                except OSError:  # VMD already exited; its returncode tells why
+                    pass
 
+            taken: deque[Path] = deque()
+            try:
+                grant(prefetch)
+                for line in process.stdout:
+                    log.write(line)
+                    if line.startswith(FRAME_MARKER):
+                        i = int(line.split()[1])
+                        path = self.config.output_dir / f"protein_conf{i}.pdb"
+                        yield PDB(path=path)
+                        taken.append(path)
+                        while keep is not None and len(taken) > keep:
+                            taken.popleft().unlink(missing_ok=True)
+                        grant(1)
+                process.wait()
+            finally:
+                try:
+                    process.stdin.close()  # EOF: VMD stops before its next frame
+                except OSError:
+                    pass
+                if process.poll() is None:  # consumer stopped early
+                    try:
+                        process.wait(timeout=5)
+                    except subprocess.TimeoutExpired:
+                        process.terminate()
+                        try:
+                            process.wait(timeout=5)
+                        except subprocess.TimeoutExpired:
+                            process.kill()
+                            process.wait()
 
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, argv)
@@ -1,5 +1,20 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
 from .base import BaseStructure
-from .msa import MSAData
+from .msa import LazyMSAData, MSAData
 from .template import TemplateData
 
-__all__ = ["BaseStructure", "MSAData", "TemplateData"]
+if TYPE_CHECKING:
+    from .msa_array import MSAArray
+
+__all__ = ["BaseStructure", "LazyMSAData", "MSAArray", "MSAData", "TemplateData"]
+
+
+def __getattr__(name):
+    # MSAArray needs numpy; import it only when asked for.
+    if name == "MSAArray":
+        from .msa_array import MSAArray
+
+        return MSAArray
+    raise AttributeError(f"module 'varidock.structure' has no attribute {name}")
@@ -1,4 +1,6 @@
 # docking/structure/msa.py
+import json
+import os
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
@@ -19,4 +21,80 @@ class MSAData:
     def write_unpaired_a3m(self, path: Path) -> None:
         if self.unpaired is None:
             raise ValueError("No unpaired MSA data to write")
-        Path(path).write_text(self.unpaired)
\ No newline at end of file
+        Path(path).write_text(self.unpaired)
+
+    def write_paired_a3m(self, path: Path) -> None:
+        if self.paired is None:
+            raise ValueError("No paired MSA data to write")
+        Path(path).write_text(self.paired)
+
+
+@dataclass(frozen=True)
+class LazyMSAData:
+    """MSA strings that stay in an AF3 data JSON until they are accessed.
+
+    Holds only the byte span of each MSA string, as indexed by
+    varidock.io.af3_load, and decodes it on every access of ``paired`` or
+    ``unpaired``; nothing is cached, so thousands of these cost almost no
+    memory. It offers the same read interface as MSAData, but it is not a
+    subclass: its fields are the spans, so equality, hashing, repr,
+    ``dataclasses.replace`` and ``asdict`` never touch the file. Call
+    ``load()`` for a plain MSAData with the strings read once.
+
+    Attributes:
+        path (Path): The data JSON.
+        paired_span (tuple[int, int] | None): Byte span of pairedMsa; None if null or absent.
+        unpaired_span (tuple[int, int] | None): Byte span of unpairedMsa; None if null or absent.
+        stamp (tuple[int, int] | None): (size, mtime_ns) of ``path`` when indexed;
+            reads fail if the file has changed since.
+
+    """
+
+    path: Path
+    paired_span: Optional[tuple[int, int]] = None
+    unpaired_span: Optional[tuple[int, int]] = None
+    stamp: Optional[tuple[int, int]] = None
+
+    def __post_init__(self):
+        object.__setattr__(self, "path", Path(self.path))
+        for name in ("paired_span", "unpaired_span", "stamp"):
+            value = getattr(self, name)
+            object.__setattr__(self, name, tuple(value) if value else None)
+
+    def _read(self, span: Optional[tuple[int, int]]) -> Optional[str]:
+        if span is None:
+            return None
+        with open(self.path, "rb") as f:
+            if self.stamp is not None:
+                st = os.fstat(f.fileno())
+                if (st.st_size, st.st_mtime_ns) != self.stamp:
+                    raise ValueError(f"{self.path} changed since its MSAs were indexed")
+            f.seek(span[0])
+            return json.loads(f.read(span[1] - span[0]))
+
+    @property
+    def paired(self) -> Optional[str]:
+        return self._read(self.paired_span)
+
+    @property
+    def unpaired(self) -> Optional[str]:
+        return self._read(self.unpaired_span)
+
+    def has_paired(self) -> bool:
+        return self.paired_span is not None
+
+    def has_unpaired(self) -> bool:
+        return self.unpaired_span is not None
+
+    def write_unpaired_a3m(self, path: Path) -> None:
+        if self.unpaired_span is None:
+            raise ValueError("No unpaired MSA data to write")
+        Path(path).write_text(self.unpaired)
+
+    def write_paired_a3m(self, path: Path) -> None:
+        if self.paired_span is None:
+            raise ValueError("No paired MSA data to write")
+        Path(path).write_text(self.paired)
+
+    def load(self) -> MSAData:
+        return MSAData(paired=self.paired, unpaired=self.unpaired)
@@ -0,0 +1,317 @@
+# varidock/structure/msa_array.py
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError as e:  # optional dependency
+    raise ImportError("MSAArray requires numpy; install it with: pip install 'varidock[msa]'") from e
+
+from .msa import MSAData
+
+GAP = ord("-")
+_LOWER_A, _LOWER_Z = ord("a"), ord("z")
+_DOT = ord(".")
+_NEWLINE = ord("\n")
+
+_CACHE_FILES = ("residues.npy", "insertions.npy", "letters.npy")
+
+
+class MSAArray:
+    """An A3M alignment as arrays instead of one large string.
+
+    ``residues`` is an (N, L) uint8 matrix of the aligned (upper-case or gap)
+    characters as ASCII bytes, row 0 being the query. ``insertions`` is an
+    (N, L + 1) matrix counting the lower-case insertion characters before
+    each column (the last column counts those after the final residue), i.e.
+    the deletion matrix AF3 featurises. ``letters`` keeps the inserted
+    characters themselves, row by row, so to_a3m() reproduces the input.
+    Parsing and filtering are vectorised over the whole alignment; arrays
+    saved with save() are memory-mapped by load().
+
+    Example:
+        >>> msa = MSAArray.from_msa_data(monomer_msa)
+        >>> trimmed = msa.dedup().filter_coverage(0.5).subsample_diverse(2048)
+        >>> trimmed.write_a3m(msa_dir / "unpaired.a3m")
+
+    Attributes:
+        headers (list[str]): Description line of each row, without '>'.
+        residues (np.ndarray): (N, L) uint8.
+        insertions (np.ndarray): (N, L + 1) uint16 or uint32.
+        letters (np.ndarray): 1-D uint8, the inserted characters in row order.
+
+    """
+
+    def __init__(self, headers: Sequence[str], residues: np.ndarray, insertions: np.ndarray, letters: np.ndarray):
+        if residues.ndim != 2 or insertions.shape != (residues.shape[0], residues.shape[1] + 1):
+            raise ValueError(f"insertions {insertions.shape} do not match residues {residues.shape}")
+        if len(headers) != residues.shape[0]:
+            raise ValueError(f"{len(headers)} headers for {residues.shape[0]} rows")
+        self.headers = list(headers)
+        self.residues = residues
+        self.insertions = insertions
+        self.letters = letters
+
+    # Construction
+
+    @classmethod
+    def from_a3m(cls, a3m: Union[str, bytes]) -> "MSAArray":
+        """Parse A3M text. Sequences may span several lines; '.' characters are dropped.
+
+        Raises:
+            ValueError: If the text has no sequences or rows differ in aligned length.
+
+        """
+        data = a3m.encode() if isinstance(a3m, str) else a3m
+        headers: list[str] = []
+        chunks: list[list[bytes]] = []
+        for line in data.split(b"\n"):
+            line = line.rstrip(b"\r")
+            if line.startswith(b">"):
+                headers.append(line[1:].decode())
+                chunks.append([])
+            elif line and chunks:
+                chunks[-1].append(line)
+        if not headers:
+            raise ValueError("No sequences in A3M")
+        rows = [b"".join(c) for c in chunks]
+
+        buf = np.frombuffer(b"".join(rows), dtype=np.uint8)
+        lengths = np.fromiter((len(r) for r in rows), dtype=np.int64, count=len(rows))
+        row_of = np.repeat(np.arange(len(rows)), lengths)
+        lower = (buf >= _LOWER_A) & (buf <= _LOWER_Z)
+        aligned = ~lower & (buf != _DOT)
+
+        counts = np.bincount(row_of[aligned], minlength=len(rows))
+        width = int(counts[0])
+        if (counts != width).any():
+            bad = int(np.nonzero(counts != width)[0][0])
+            raise ValueError(f"Row {bad} ({headers[bad]!r}) has {counts[bad]} aligned columns, query has {width}")
+        residues = buf[aligned].reshape(len(rows), width)
+
+        # Column of each insertion = aligned characters before it in its row.
+        before = np.cumsum(aligned) - aligned
+        col = before[lower] - row_of[lower] * width
+        flat = np.bincount(row_of[lower] * (width + 1) + col, minlength=len(rows) * (width + 1))
+        dtype = np.uint16 if flat.size == 0 or flat.max() <= np.iinfo(np.uint16).max else np.uint32
+        insertions = flat.astype(dtype).reshape(len(rows), width + 1)
+        return cls(headers, residues, insertions, buf[lower].copy())
+
+    @classmethod
+    def from_msa_data(cls, msa: MSAData, paired: bool = False) -> "MSAArray":
+        """Parse the unpaired (or paired) MSA of an MSAData.
+
+        Raises:
+            ValueError: If that MSA is missing.
+
+        """
+        text = msa.paired if paired else msa.unpaired
+        if text is None:
+            raise ValueError(f"No {'paired' if paired else 'unpaired'} MSA data")
+        return cls.from_a3m(text)
+
+    # Properties
+
+    @property
+    def depth(self) -> int:
+        return self.residues.shape[0]
+
+    @property
+    def length(self) -> int:
+        return self.residues.shape[1]
+
+    def __len__(self) -> int:
+        return self.depth
+
+    @property
+    def query(self) -> str:
+        return self.residues[0].tobytes().decode()
+
+    def coverage(self) -> np.ndarray:
+        """Fraction of the query's non-gap columns that each row aligns a residue to."""
+        query_cols = self.residues[0] != GAP
+        covered = (self.residues[:, query_cols] != GAP).sum(axis=1)
+        return covered / max(1, int(query_cols.sum()))
+
+    def identity(self) -> np.ndarray:
+        """Fraction of identical residues to the query over the columns where both have one."""
+        both = (self.residues != GAP) & (self.residues[0] != GAP)
+        same = (self.residues == self.residues[0]) & both
+        return same.sum(axis=1) / np.maximum(1, both.sum(axis=1))
+
+    # Selection
+
+    def select(self, rows: Union[Sequence[int], np.ndarray]) -> "MSAArray":
+        """A new MSAArray of ``rows`` (indices or a boolean mask), in that order."""
+        mask = np.asarray(rows)
+        rows = np.nonzero(mask)[0] if mask.dtype == bool else np.asarray(rows, dtype=np.intp)
+        per_row = self.insertions.sum(axis=1, dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(per_row)])
+        if len(rows) and per_row[rows].any():
+            letters = np.concatenate([self.letters[offsets[i] : offsets[i + 1]] for i in rows])
+        else:
+            letters = np.empty(0, dtype=np.uint8)
+        return MSAArray(
+            [self.headers[i] for i in rows],
+            np.ascontiguousarray(self.residues[rows]),
+            np.ascontiguousarray(self.insertions[rows]),
+            letters,
+        )
+
+    def _keep(self, mask: np.ndarray) -> "MSAArray":
+        mask = np.asarray(mask, dtype=bool).copy()
+        mask[0] = True  # never drop the query
+        return self.select(mask)
+
+    def dedup(self) -> "MSAArray":
+        """Drop rows whose aligned residues repeat an earlier row (insertions are ignored)."""
+        rows = np.ascontiguousarray(self.residues).view(np.dtype((np.void, self.length)))[:, 0]
+        _, first = np.unique(rows, return_index=True)
+        mask = np.zeros(self.depth, dtype=bool)
+        mask[first] = True
+        return self._keep(mask)
+
+    def filter_coverage(self, min_coverage: float) -> "MSAArray":
+        return self._keep(self.coverage() >= min_coverage)
+
+    def filter_identity(self, min_identity: float = 0.0, max_identity: float = 1.0) -> "MSAArray":
+        """Keep rows whose identity to the query is within [min_identity, max_identity]."""
+        identity = self.identity()
+        return self._keep((identity >= min_identity) & (identity <= max_identity))
+
+    def top(self, n: int) -> "MSAArray":
+        """The query and the first ``n - 1`` hits (search tools write hits best first)."""
+        return self.select(np.arange(min(max(n, 1), self.depth)))
+
+    def subsample_diverse(self, n: int) -> "MSAArray":
+        """Keep ``n`` rows by farthest-point sampling on Hamming distance, starting from the query.
+
+        Each pick is the row least similar to everything kept so far, so
+        near-duplicate clusters contribute one representative before any
+        gets a second. Costs one pass over the alignment per kept row.
+        """
+        if n >= self.depth:
+            return self
+        nearest = np.full(self.depth, np.iinfo(np.int64).max, dtype=np.int64)
+        picked = [0]
+        for _ in range(max(n, 1) - 1):
+            distance = (self.residues != self.residues[picked[-1]]).view(np.uint8).sum(axis=1, dtype=np.int64)
+            np.minimum(nearest, distance, out=nearest)
+            nearest[picked[-1]] = -1
+            picked.append(int(nearest.argmax()))
+        return self.select(sorted(picked))
+
+    # Output
+
+    def to_a3m(self) -> str:
+        per_row = self.insertions.sum(axis=1, dtype=np.int64)
+        row_len = self.length + per_row
+        row_start = np.concatenate([[0], np.cumsum(row_len + 1)])[:-1]  # +1: newline
+        newlines = row_start + row_len
+        out = np.empty(int(newlines[-1]) + 1, dtype=np.uint8)
+        # Aligned column j lands after itself, j earlier columns and the insertions up to it.
+        shift = np.cumsum(self.insertions[:, : self.length], axis=1, dtype=np.int64)
+        positions = row_start[:, None] + np.arange(self.length) + shift
+        is_aligned = np.zeros(out.size, dtype=bool)
+        is_aligned[positions.ravel()] = True
+        is_aligned[newlines] = True  # not an insertion slot
+        out[positions.ravel()] = self.residues.ravel()
+        out[newlines] = _NEWLINE
+        out[~is_aligned] = self.letters
+        body = out.tobytes()
+        lines = []
+        for header, start, end in zip(self.headers, row_start, newlines + 1):
+            lines.append(f">{header}\n")
+            lines.append(body[start:end].decode())
+        return "".join(lines)
+
+    def write_a3m(self, path: Path) -> None:
+        Path(path).write_text(self.to_a3m())
+
+    def to_msa_data(self, paired: bool = False) -> MSAData:
+        text = self.to_a3m()
+        return MSAData(paired=text) if paired else MSAData(unpaired=text)
+
+    # .npy cache
+
+    def save(self, cache_dir: Path, source: Optional[dict] = None) -> Path:
+        """Write the arrays as .npy files (plus headers) into ``cache_dir``, replacing it atomically."""
+        cache_dir = Path(cache_dir)
+        cache_dir.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_dir.with_name(f".{cache_dir.name}.{uuid.uuid4().hex}.tmp")
+        tmp.mkdir()
+        for name, array in zip(_CACHE_FILES, (self.residues, self.insertions, self.letters)):
+            np.save(tmp / name, array)
+        (tmp / "headers.json").write_text(json.dumps(self.headers))
+        (tmp / "meta.json").write_text(json.dumps({"source": source}))
+        if cache_dir.exists():
+            shutil.rmtree(cache_dir)
+        os.rename(tmp, cache_dir)
+        return cache_dir
+
+    @classmethod
+    def load(cls, cache_dir: Path, mmap: bool = True) -> "MSAArray":
+        """Load arrays written by save(); memory-mapped read-only unless ``mmap`` is False."""
+        cache_dir = Path(cache_dir)
+        mode = "r" if mmap else None
+        residues, insertions, letters = (np.load(cache_dir / name, mmap_mode=mode) for name in _CACHE_FILES)
+        headers = json.loads((cache_dir / "headers.json").read_text())
+        return cls(headers, residues, insertions, letters)
+
+    @classmethod
+    def from_a3m_file(cls, path: Path, cache_dir: Optional[Path] = None) -> "MSAArray":
+        """Parse an .a3m file, or memory-map its cache if ``cache_dir`` holds one for the same file version."""
+        path = Path(path)
+        st = path.stat()
+        source = {"path": str(path.resolve()), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        if cache_dir is not None:
+            try:
+                if json.loads((Path(cache_dir) / "meta.json").read_text()).get("source") == source:
+                    return cls.load(cache_dir)
+            except (OSError, ValueError):
+                pass
+        msa = cls.from_a3m(path.read_bytes())
+        if cache_dir is not None:
+            msa.save(cache_dir, source=source)
+        return msa
+
+
+def trim_a3m(
+    a3m: str,
+    max_depth: Optional[int] = None,
+    min_coverage: float = 0.0,
+    max_identity: float = 1.0,
+    dedup: bool = True,
+    diverse: bool = True,
+) -> str:
+    """Shrink an A3M before inference: dedup, filter, then cap the depth.
+
+    Args:
+        a3m (str): The alignment, query first.
+        max_depth (int | None): Rows to keep at most, query included.
+        min_coverage (float): Drop hits covering less of the query than this.
+        max_identity (float): Drop hits more identical to the query than this.
+        dedup (bool): Drop repeated rows first.
+        diverse (bool): Cap the depth by farthest-point sampling rather than
+            keeping the top hits.
+
+    Returns:
+        str: The trimmed A3M.
+
+    """
+    msa = MSAArray.from_a3m(a3m)
+    if dedup:
+        msa = msa.dedup()
+    if min_coverage > 0:
+        msa = msa.filter_coverage(min_coverage)
+    if max_identity < 1:
+        msa = msa.filter_identity(max_identity=max_identity)
+    if max_depth is not None and msa.depth > max_depth:
+        msa = msa.subsample_diverse(max_depth) if diverse else msa.top(max_depth)
+    return msa.to_a3m()
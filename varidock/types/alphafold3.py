@@ -37,7 +37,9 @@ class AF3MSAOutput:
 
     Attributes:
         data_json_path (Path): Path to the AF3 output JSON containing
-            unpairedMsa, pairedMsa, and templates fields.
+            unpairedMsa, pairedMsa, and templates fields. Its ``name`` and
+            protein ``id`` are this output's protein_id and chain_id, also
+            when the JSON was reused from an MSAStore.
         protein_id (str): Identifier for the protein (e.g. 'AT3G62980').
         chain_id (str): Chain identifier used in the AF3 JSON.
 
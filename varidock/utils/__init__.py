@@ -1,19 +1,27 @@
 from .slurm import  (
+    ClusterState,
+    JobInfo,
+    get_cluster_state,
     _sbatch, 
     get_slurm_queue_count, 
     get_job_name, 
     get_running_job_names, 
-    job_exists
+    job_exists,
+    parse_slurm_time,
 )
 from .namd import get_namd_ns, is_namd_done
 from .local_exec import run_with_interrupt
 
 __all__ = [
+    "ClusterState",
+    "JobInfo",
+    "get_cluster_state",
     "_sbatch",
     "get_slurm_queue_count",
     "get_job_name",
     "get_running_job_names",
     "job_exists",
+    "parse_slurm_time",
     "get_namd_ns",
     "is_namd_done",
     "run_with_interrupt",
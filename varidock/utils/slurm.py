@@ -1,11 +1,284 @@
+import json
+import math
 import re
 import subprocess
+import threading
+import time
+from dataclasses import dataclass, replace
 from pathlib import Path
+from typing import Callable, Iterable
+
+# One line per job (array tasks expanded by -r). The job name sits between
+# fields that never contain "|", so names with "|" still parse.
+_SQUEUE_FORMAT = "%i|%j|%T|%r|%Z"
+
+# Reason squeue gives for a pending job whose afterok dependency failed. SLURM
+# leaves such jobs in the queue (unless kill_invalid_depend is set), but they
+# will never start.
+DEPENDENCY_NEVER_SATISFIED = "DependencyNeverSatisfied"
+
+
+@dataclass(frozen=True)
+class JobInfo:
+    """One job (or array task) as seen by the scheduler.
+
+    Attributes:
+        job_id (str): SLURM job ID, e.g. '1234' or '1234_7' for an array task.
+        name (str): Job name.
+        state (str): SLURM state, e.g. 'PENDING', 'RUNNING', 'COMPLETED'.
+        work_dir (str | None): Resolved working directory the job was submitted from.
+        reason (str | None): Why the job is pending or ended, e.g. 'Resources'
+            or 'DependencyNeverSatisfied'; None when SLURM gives none.
+
+    """
+
+    job_id: str
+    name: str
+    state: str
+    work_dir: str | None = None
+    reason: str | None = None
+
+    @property
+    def active(self) -> bool:
+        """True for jobs still in the queue (pending, running, suspended...)."""
+        return self.state not in _FINISHED_STATES
+
+    @property
+    def never_starts(self) -> bool:
+        """True for pending jobs stuck behind a dependency that failed."""
+        return self.state == "PENDING" and self.reason == DEPENDENCY_NEVER_SATISFIED
+
+
+_FINISHED_STATES = {
+    "COMPLETED", "FAILED", "CANCELLED", "TIMEOUT", "OUT_OF_MEMORY",
+    "NODE_FAIL", "PREEMPTED", "BOOT_FAIL", "DEADLINE",
+}
+
+
+def _parse_line(line: str) -> JobInfo | None:
+    line = line.strip()
+    if not line:
+        return None
+    job_id, _, rest = line.partition("|")
+    if not rest:
+        return JobInfo(job_id=job_id, name="", state="PENDING")
+    name, state, reason, work_dir = (rest.rsplit("|", 3) + ["", "", ""])[:4]
+    state = state.split()[0] if state else "PENDING"  # sacct reports e.g. "CANCELLED by 123"
+    return JobInfo(
+        job_id=job_id,
+        name=name,
+        state=state,
+        work_dir=_norm(work_dir) if work_dir else None,
+        reason=reason if reason not in ("", "None", "(null)") else None,
+    )
+
+
+def _norm(path) -> str:
+    return str(Path(path).expanduser().resolve())
+
+
+def fetch_squeue() -> list[JobInfo]:
+    """All of the current user's queued jobs, array tasks expanded, in one squeue call."""
+    result = subprocess.run(
+        ["squeue", "--me", "-h", "-r", f"--format={_SQUEUE_FORMAT}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return [job for job in map(_parse_line, result.stdout.splitlines()) if job is not None]
+
+
+def fetch_sacct(start: str = "now-7days") -> list[JobInfo]:
+    """The current user's recent jobs, including finished ones, in one sacct call."""
+    result = subprocess.run(
+        ["sacct", "-X", "-n", "-P", f"--starttime={start}", "--format=JobID,JobName,State,Reason,WorkDir"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return [job for job in map(_parse_line, result.stdout.splitlines()) if job is not None]
+
+
+class ClusterState:
+    """Cached, indexed snapshot of the user's SLURM jobs.
+
+    One scheduler query fills indexes by job ID, job name and working
+    directory; lookups within ``ttl`` seconds reuse it, so checking thousands
+    of directories costs one squeue call instead of one per directory. Jobs
+    submitted through ``_sbatch`` or the SlurmExecutor are added with
+    ``note_submitted`` so they are visible before the next refresh.
+
+    Every task of a SlurmExecutor job array runs from the array directory,
+    so squeue reports that directory for all of them. When the array's
+    ``<name>.manifest.json`` is in that directory, each task is indexed
+    under its plan's work_dir from the manifest instead.
+
+    Attributes:
+        ttl (float): Seconds a snapshot stays valid.
+        include_sacct (bool): Also query sacct, so recently finished jobs and
+            their final states are indexed. squeue wins for jobs in both.
+
+    """
+
+    def __init__(
+        self,
+        ttl: float = 30.0,
+        include_sacct: bool = False,
+        fetch: Callable[[], Iterable[JobInfo]] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.include_sacct = include_sacct
+        self._fetch = fetch
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._fetched_at: float | None = None
+        self._by_id: dict[str, JobInfo] = {}
+        self._by_name: dict[str, list[JobInfo]] = {}
+        self._by_work_dir: dict[str, list[JobInfo]] = {}
+        self._manifests: dict[Path, tuple[tuple[int, int], dict[int, str]]] = {}
+
+    def refresh(self) -> "ClusterState":
+        """Query the scheduler now, replacing the snapshot."""
+        if self._fetch is not None:
+            jobs = list(self._fetch())
+        else:
+            jobs = fetch_sacct() if self.include_sacct else []
+            jobs += fetch_squeue()
+        jobs = [self._array_task(job) for job in jobs]
+        with self._lock:
+            self._by_id, self._by_name, self._by_work_dir = {}, {}, {}
+            for job in jobs:  # later entries (squeue) override earlier ones (sacct)
+                self._by_id[job.job_id] = job
+            for job in self._by_id.values():
+                self._index(job)
+            self._fetched_at = self._clock()
+        return self
+
+    def _array_task(self, job: JobInfo) -> JobInfo:
+        """Give an array task the work_dir its manifest assigns to its index."""
+        _, sep, index = job.job_id.partition("_")
+        if not sep or not index.isdigit() or not job.work_dir:
+            return job
+        manifest = Path(job.work_dir) / f"{job.name}.manifest.json"
+        try:
+            st = manifest.stat()
+        except OSError:
+            return job
+        stamp = (st.st_size, st.st_mtime_ns)
+        cached = self._manifests.get(manifest)
+        if cached is None or cached[0] != stamp:
+            try:
+                work_dirs = {int(t["index"]): _norm(t["work_dir"]) for t in json.loads(manifest.read_text())}
+            except (OSError, ValueError, TypeError, KeyError):
+                work_dirs = {}
+            cached = self._manifests[manifest] = (stamp, work_dirs)
+        work_dir = cached[1].get(int(index))
+        return replace(job, work_dir=work_dir) if work_dir else job
+
+    def _index(self, job: JobInfo) -> None:
+        self._by_name.setdefault(job.name, []).append(job)
+        if job.work_dir:
+            self._by_work_dir.setdefault(job.work_dir, []).append(job)
+
+    def _fresh(self) -> None:
+        if self._fetched_at is None or self._clock() - self._fetched_at > self.ttl:
+            self.refresh()
+
+    def invalidate(self) -> None:
+        """Force the next lookup to query the scheduler."""
+        self._fetched_at = None
+
+    def note_submitted(self, job_id: int | str, name: str, work_dir: Path | None = None) -> None:
+        """Record a job we just submitted, without querying the scheduler.
+
+        If there is no snapshot yet, the next lookup queries the scheduler,
+        which already includes the job.
+        """
+        job = JobInfo(job_id=str(job_id), name=name, state="PENDING", work_dir=_norm(work_dir) if work_dir else None)
+        with self._lock:
+            if job.job_id in self._by_id:
+                return
+            self._by_id[job.job_id] = job
+            self._index(job)
+
+    def jobs(self, active_only: bool = True) -> list[JobInfo]:
+        self._fresh()
+        return [j for j in self._by_id.values() if j.active or not active_only]
+
+    def count(self) -> int:
+        """Number of queued (pending + running) jobs, counting array tasks individually."""
+        return len(self.jobs())
+
+    def by_id(self, job_id: int | str) -> JobInfo | None:
+        self._fresh()
+        return self._by_id.get(str(job_id))
+
+    def by_name(self, name: str, active_only: bool = True) -> list[JobInfo]:
+        self._fresh()
+        return [j for j in self._by_name.get(name, []) if j.active or not active_only]
+
+    def by_work_dir(self, work_dir: Path, active_only: bool = True) -> list[JobInfo]:
+        self._fresh()
+        return [j for j in self._by_work_dir.get(_norm(work_dir), []) if j.active or not active_only]
+
+    def names(self) -> set[str]:
+        return {j.name for j in self.jobs()}
+
+
+_default_state = ClusterState()
+
+# Replace the sbatch and scancel binaries when set, e.g. by LocalCluster.activate():
+# submit(script, depends_on) returns the job ID, cancel(job_id) cancels it.
+_submit_backend: Callable[[Path, int | None], int] | None = None
+_cancel_backend: Callable[[int | str], None] | None = None
+
+
+def get_cluster_state() -> ClusterState:
+    """The process-wide ClusterState used by the helpers below."""
+    return _default_state
+
+
+def get_submit_backend() -> Callable[[Path, int | None], int] | None:
+    return _submit_backend
+
+
+def set_submit_backend(
+    submit: Callable[[Path, int | None], int] | None,
+    state: ClusterState | None = None,
+    cancel: Callable[[int | str], None] | None = None,
+) -> tuple[Callable[[Path, int | None], int] | None, ClusterState, Callable[[int | str], None] | None]:
+    """Send sbatch calls to ``submit`` and scancel calls to ``cancel`` (None
+    restores the real binaries) and, if given, make ``state`` the
+    process-wide ClusterState. Returns the previous triple.
+
+    Executors and campaigns pick up the ClusterState when they are created,
+    so switch backends before creating them.
+    """
+    global _submit_backend, _cancel_backend, _default_state
+    previous = (_submit_backend, _default_state, _cancel_backend)
+    _submit_backend = submit
+    _cancel_backend = cancel
+    if state is not None:
+        _default_state = state
+    return previous
+
+
+def scancel(job_id: int | str) -> None:
+    """Cancel a job, or every task of an array."""
+    if _cancel_backend is not None:
+        _cancel_backend(job_id)
+        return
+    subprocess.run(["scancel", str(job_id)], capture_output=True, text=True, check=True)
 
 
 # execution/slurm.py
-def _sbatch(script: Path, depends_on: int | None = None) -> int:
+def _sbatch(script: Path, depends_on: int | None = None, state: ClusterState | None = None) -> int:
     """Submit script to SLURM, return job ID."""
+    if _submit_backend is not None:
+        job_id = _submit_backend(script, depends_on)
+        (state or _default_state).note_submitted(job_id, get_job_name(script) or script.name, script.parent)
+        return job_id
     cmd = ["sbatch", "--parsable"]
     if depends_on is not None:
         cmd += [f"--dependency=afterok:{depends_on}"]
@@ -13,18 +286,40 @@ def _sbatch(script: Path, depends_on: int | None = None) -> int:
     result = subprocess.run(
         cmd, capture_output=True, text=True, check=True, cwd=script.parent
     )
-    return int(result.stdout.strip())
+    job_id = int(result.stdout.strip().split(";")[0])
+    (state or _default_state).note_submitted(job_id, get_job_name(script) or script.name, script.parent)
+    return job_id
 
 
-def get_slurm_queue_count() -> int:
+def parse_slurm_time(text: str) -> int | None:
+    """Seconds in a SLURM time string ("MM", "MM:SS", "HH:MM:SS", "D-HH[:MM[:SS]]"), None if unlimited."""
+    text = text.strip()
+    if not text or text.upper() in ("UNLIMITED", "INFINITE", "NOT_SET", "INVALID"):
+        return None
+    days, _, clock = text.rpartition("-")
+    parts = [int(p) for p in clock.split(":")]
+    if days:
+        parts += [0] * (3 - len(parts))  # D-HH, D-HH:MM
+    elif len(parts) == 1:
+        parts = [0, parts[0], 0]  # minutes
+    elif len(parts) == 2:
+        parts = [0, *parts]  # MM:SS
+    hours, minutes, seconds = parts
+    return (int(days or 0) * 24 + hours) * 3600 + minutes * 60 + seconds
+
+
+def parse_slurm_mem(mem: str) -> int:
+    """Megabytes in a SLURM memory string ("64G", "500M", "1T"; bare numbers are MB)."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*", str(mem), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Cannot parse SLURM memory {mem!r}")
+    value, unit = float(match.group(1)), match.group(2).upper() or "M"
+    return math.ceil(value * {"K": 1 / 1024, "M": 1, "G": 1024, "T": 1024**2}[unit])
+
+
+def get_slurm_queue_count(state: ClusterState | None = None) -> int:
     """Count current user's pending + running jobs."""
-    result = subprocess.run(
-        ["squeue", "--me", "-h", "-r", "--format=%i"],
-        capture_output=True,
-        text=True,
-        check=True,
-    )
-    return len(result.stdout.strip().splitlines())
+    return (state or _default_state).count()
 
 
 def get_job_name(script: Path) -> str | None:
@@ -37,19 +332,12 @@ def get_job_name(script: Path) -> str | None:
     return None
 
 
-def get_running_job_names() -> set[str]:
-    result = subprocess.run(
-        ["squeue", "--me", "-h", "--format=%j"],
-        capture_output=True,
-        text=True,
-        check=True,
-    )
-    return set(result.stdout.strip().splitlines())
+def get_running_job_names(state: ClusterState | None = None) -> set[str]:
+    return (state or _default_state).names()
 
 
-def job_exists(script: Path) -> bool:
+def job_exists(script: Path, state: ClusterState | None = None) -> bool:
     job_name = get_job_name(script)
     if not job_name:
         return False
-    running_jobs = get_running_job_names()
-    return job_name in running_jobs
+    return bool((state or _default_state).by_name(job_name))